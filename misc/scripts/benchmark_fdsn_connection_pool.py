@@ -0,0 +1,82 @@
+"""
+Benchmark for HTTP requests of the FDSN client with and without connection
+pooling.
+
+Run with ``python misc/scripts/benchmark_fdsn_connection_pool.py`` to print
+the number of requests per second against a local HTTP/1.1 server. Pass
+``--https`` to also include the TLS handshake in every new connection (needs
+the ``openssl`` command line tool to create a temporary certificate).
+"""
+import os
+import ssl
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from obspy.clients.fdsn import Client
+from obspy.clients.fdsn.connection_pool import HTTPConnectionPool
+
+
+BODY = b"Network|Station\n" + b"IU|ANMO\n" * 100
+NUMBER = 2000
+
+
+class RequestHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    # Headers and body are written separately.
+    disable_nagle_algorithm = True
+
+    def do_GET(self):
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain")
+        self.send_header("Content-Length", str(len(BODY)))
+        self.end_headers()
+        self.wfile.write(BODY)
+
+    def log_message(self, *args):
+        pass
+
+
+def _ssl_context(tmpdir):
+    certfile = os.path.join(tmpdir, "cert.pem")
+    keyfile = os.path.join(tmpdir, "key.pem")
+    subprocess.check_call(
+        ["openssl", "req", "-x509", "-newkey", "rsa:2048", "-nodes",
+         "-subj", "/CN=127.0.0.1", "-keyout", keyfile, "-out", certfile],
+        stderr=subprocess.DEVNULL)
+    context = ssl.SSLContext(ssl.PROTOCOL_TLS_SERVER)
+    context.load_cert_chain(certfile, keyfile)
+    return context
+
+
+def benchmark(number=NUMBER, https=False):
+    server = ThreadingHTTPServer(("127.0.0.1", 0), RequestHandler)
+    server.daemon_threads = True
+    scheme = "http"
+    if https:
+        with tempfile.TemporaryDirectory() as tmpdir:
+            context = _ssl_context(tmpdir)
+        server.socket = context.wrap_socket(server.socket, server_side=True)
+        # The certificate is self-signed.
+        ssl._create_default_https_context = ssl._create_unverified_context
+        scheme = "https"
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    url = "%s://127.0.0.1:%i" % (scheme, server.server_port)
+    for name, pool in [("new connection per request", None),
+                       ("HTTPConnectionPool", HTTPConnectionPool())]:
+        client = Client(url, _discover_services=False, connection_pool=pool)
+        start = time.perf_counter()
+        for _ in range(number):
+            client._download(url + "/fdsnws/station/1/query")
+        seconds = time.perf_counter() - start
+        print('%-28s %8.0f requests/s' % (name, number / seconds))
+    server.shutdown()
+    server.server_close()
+
+
+if __name__ == '__main__':
+    benchmark(https="--https" in sys.argv)
@@ -0,0 +1,30 @@
+"""
+Benchmark for the time needed to import ObsPy.
+
+Run with ``python misc/scripts/benchmark_import.py`` to print the minimum
+and median time of ``import obspy`` in fresh interpreters in seconds.
+"""
+import statistics
+import subprocess
+import sys
+
+
+CODE = """
+import time
+t = time.perf_counter()
+import obspy
+print(time.perf_counter() - t)
+"""
+NUMBER = 10
+
+
+def benchmark(number=NUMBER):
+    timings = [float(subprocess.check_output([sys.executable, "-c", CODE]))
+               for _ in range(number)]
+    print('%-22s %8.3f s' % ('import obspy (min)', min(timings)))
+    print('%-22s %8.3f s' % ('import obspy (median)',
+                             statistics.median(timings)))
+
+
+if __name__ == '__main__':
+    benchmark()
@@ -0,0 +1,49 @@
+"""
+Micro-benchmark for construction and copying of Trace headers.
+
+Run with ``python misc/scripts/benchmark_stats.py`` to print the time per
+operation in microseconds and the memory used per Stats object in bytes.
+"""
+import copy
+import pickle
+import timeit
+import tracemalloc
+
+import numpy as np
+
+from obspy import Trace, UTCDateTime
+from obspy.core.trace import Stats
+
+
+HEADER = {'network': 'BW', 'station': 'RJOB', 'channel': 'EHZ',
+          'starttime': UTCDateTime(2009, 8, 24, 0, 20, 3),
+          'sampling_rate': 100.0, 'npts': 3000}
+NUMBER = 20000
+
+
+def benchmark(number=NUMBER):
+    stats = Stats(HEADER)
+    stats.mseed = {'dataquality': 'D', 'record_length': 512}
+    pickled = pickle.dumps(stats)
+    data = np.zeros(100)
+    trace = Trace(data=data, header=HEADER)
+    timings = {
+        'Stats()': lambda: Stats(HEADER),
+        'deepcopy(Stats)': lambda: copy.deepcopy(stats),
+        'pickle.dumps(Stats)': lambda: pickle.dumps(stats),
+        'pickle.loads(Stats)': lambda: pickle.loads(pickled),
+        'Trace()': lambda: Trace(data=data, header=HEADER),
+        'Trace.copy()': trace.copy,
+    }
+    for name, func in timings.items():
+        seconds = timeit.timeit(func, number=number)
+        print('%-22s %8.2f us' % (name, seconds / number * 1e6))
+    tracemalloc.start()
+    objects = [Stats(HEADER) for _ in range(number)]  # NOQA
+    size = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    print('%-22s %8.0f bytes' % ('memory per Stats', size / number))
+
+
+if __name__ == '__main__':
+    benchmark()
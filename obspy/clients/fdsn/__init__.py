@@ -151,6 +151,45 @@ USP         http://sismo.iag.usp.br
         inventory.plot()
 
 
+Concurrent Requests
+-------------------
+
+Many requests to the same provider can be awaited concurrently with the
+:class:`~obspy.clients.fdsn.async_client.AsyncClient`. It offers coroutine
+versions of the request methods and sends at most ``max_concurrency``
+requests at the same time over persistent connections.
+
+>>> import asyncio
+>>> from obspy.clients.fdsn import AsyncClient
+>>> async def get_streams(stations, t):
+...     async with AsyncClient("EARTHSCOPE", max_concurrency=5) as client:
+...         return await asyncio.gather(*[
+...             client.get_waveforms("IU", sta, "00", "LHZ", t, t + 60)
+...             for sta in stations])
+>>> t = UTCDateTime("2010-02-27T06:45:00.000")
+>>> streams = asyncio.run(
+...     get_streams(["ANMO", "KONO", "COLA"], t))  # doctest: +SKIP
+
+
+Caching Station and Event Queries
+---------------------------------
+
+Responses of station and event queries can be kept in a
+:class:`~obspy.clients.fdsn.cache.ResponseCache` on disk. Repeating a query,
+e.g. after restarting a processing script, then loads the already parsed
+:class:`~obspy.core.inventory.inventory.Inventory` from the cache instead of
+downloading and parsing the StationXML again. Entries older than ``ttl``
+seconds are revalidated with the server.
+
+>>> from obspy.clients.fdsn.cache import ResponseCache
+>>> cache = ResponseCache("fdsn_cache", ttl=24 * 3600)  # doctest: +SKIP
+>>> client = Client("EARTHSCOPE", cache=cache)  # doctest: +SKIP
+>>> inv = client.get_stations(network="IU", station="ANMO",
+...                           level="response")  # doctest: +SKIP
+>>> cache.get_statistics()  # doctest: +SKIP
+{'hits': 0, 'revalidated': 0, 'misses': 1}
+
+
 Basic Routing Clients Usage
 ---------------------------
 
@@ -240,12 +279,27 @@ Inventory created at 2017-10-09T14:26:28.466161Z
             II.MBAR.10.LHZ, IU.KOWA.00.LHZ, TT.TATN.00.LHZ, YY.GIDA..LHZ,
             YY.GUBA..LHZ, YY.MEND..LHZ, YY.SHER..LHZ
 
+The data centers are queried in parallel, ``max_concurrency`` limits how
+many of them are queried at the same time. The
+``iter_(waveforms|stations)_bulk()`` methods yield the data of each data
+center as soon as it arrives, so a slow data center does not hold up the
+processing of the others:
+
+>>> client = RoutingClient("eida-routing", max_concurrency=4)
+>>> bulk = [("G?", "*", "*", "LHZ", UTCDateTime(2017, 1, 1),
+...          UTCDateTime(2017, 1, 1, 0, 5))]
+>>> for url, st in client.iter_waveforms_bulk(bulk):  # doctest: +SKIP
+...     print(url, len(st))
+http://ws.resif.fr 4
+http://geofon.gfz-potsdam.de 1
+
 Please see the documentation for each method for further information and
 examples.
 
 .. _FDSN web service definitions: https://www.fdsn.org/webservices/
 """
 from .client import Client  # NOQA
+from .async_client import AsyncClient  # NOQA
 from .routing.routing_client import RoutingClient  # NOQA
 from .header import URL_MAPPINGS  # NOQA
 
@@ -257,7 +311,7 @@ if Client.__init__.__doc__ is not None and r"%s" in Client.__init__.__doc__:
         Client.__init__.__doc__ % \
         str(sorted(URL_MAPPINGS.keys())).strip("[]")
 
-__all__ = ["Client", "RoutingClient"]
+__all__ = ["Client", "AsyncClient", "RoutingClient"]
 
 
 if __name__ == '__main__':
@@ -0,0 +1,143 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+asyncio interface to the FDSN web service client.
+
+:copyright:
+    The ObsPy Development Team (devs@obspy.org)
+:license:
+    GNU Lesser General Public License, Version 3
+    (https://www.gnu.org/copyleft/lesser.html)
+"""
+import asyncio
+import functools
+from concurrent.futures import ThreadPoolExecutor
+
+from .client import Client
+from .connection_pool import HTTPConnectionPool
+
+
+class AsyncClient(object):
+    """
+    FDSN web service client with coroutine versions of the request methods.
+
+    Requests are sent and their responses are parsed in a thread pool of
+    ``max_concurrency`` worker threads over persistent connections, the
+    event loop is never blocked. Any number of requests can be awaited
+    concurrently, at most ``max_concurrency`` of them are sent to the
+    provider at the same time, the others wait in line.
+
+    >>> import asyncio
+    >>> from obspy import UTCDateTime
+    >>> from obspy.clients.fdsn import AsyncClient
+    >>> async def main():
+    ...     t = UTCDateTime("2010-02-27T06:45:00.000")
+    ...     async with AsyncClient("EARTHSCOPE") as client:
+    ...         return await asyncio.gather(*[
+    ...             client.get_waveforms("IU", sta, "00", "LHZ", t, t + 60)
+    ...             for sta in ("ANMO", "KONO", "COLA")])
+    >>> streams = asyncio.run(main())  # doctest: +SKIP
+
+    :type base_url: str or :class:`~obspy.clients.fdsn.client.Client`
+    :param base_url: Base URL or key string of the FDSN web service, see
+        :class:`~obspy.clients.fdsn.client.Client`. An already initialized
+        client can be passed as well.
+    :type max_concurrency: int
+    :param max_concurrency: Maximum number of requests sent to the provider
+        at the same time.
+    :param kwargs: Passed on to :class:`~obspy.clients.fdsn.client.Client`.
+        Unless ``connection_pool`` is given, a
+        :class:`~obspy.clients.fdsn.connection_pool.HTTPConnectionPool`
+        keeping up to ``max_concurrency`` idle connections is used.
+
+    .. note::
+        Initializing the client discovers the available services with
+        blocking requests, unless ``_discover_services=False`` is passed.
+    """
+    def __init__(self, base_url="EARTHSCOPE", max_concurrency=10, **kwargs):
+        if max_concurrency < 1:
+            msg = "max_concurrency must be a positive integer."
+            raise ValueError(msg)
+        if isinstance(base_url, Client):
+            if kwargs:
+                msg = ("No further arguments can be given when passing an "
+                       "initialized Client.")
+                raise ValueError(msg)
+            self.client = base_url
+        else:
+            kwargs.setdefault("connection_pool",
+                              HTTPConnectionPool(maxsize=max_concurrency))
+            self.client = Client(base_url, **kwargs)
+        self.max_concurrency = max_concurrency
+        self._executor = ThreadPoolExecutor(
+            max_workers=max_concurrency,
+            thread_name_prefix="obspy-fdsn-async")
+
+    def __str__(self):
+        return "Asynchronous " + str(self.client)
+
+    def _repr_pretty_(self, p, cycle):
+        p.text(str(self))
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc_value, traceback):
+        await self.close()
+
+    async def close(self):
+        """
+        Wait for running requests, stop the worker threads and close idle
+        connections.
+        """
+        loop = asyncio.get_running_loop()
+        await loop.run_in_executor(None, self._executor.shutdown)
+        if self.client.connection_pool is not None:
+            self.client.connection_pool.clear()
+
+    async def _run(self, method, *args, **kwargs):
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(
+            self._executor, functools.partial(method, *args, **kwargs))
+
+    async def get_events(self, *args, **kwargs):
+        """
+        Coroutine version of
+        :meth:`~obspy.clients.fdsn.client.Client.get_events`.
+        """
+        return await self._run(self.client.get_events, *args, **kwargs)
+
+    async def get_stations(self, *args, **kwargs):
+        """
+        Coroutine version of
+        :meth:`~obspy.clients.fdsn.client.Client.get_stations`.
+        """
+        return await self._run(self.client.get_stations, *args, **kwargs)
+
+    async def get_stations_bulk(self, *args, **kwargs):
+        """
+        Coroutine version of
+        :meth:`~obspy.clients.fdsn.client.Client.get_stations_bulk`.
+        """
+        return await self._run(self.client.get_stations_bulk, *args,
+                               **kwargs)
+
+    async def get_waveforms(self, *args, **kwargs):
+        """
+        Coroutine version of
+        :meth:`~obspy.clients.fdsn.client.Client.get_waveforms`.
+        """
+        return await self._run(self.client.get_waveforms, *args, **kwargs)
+
+    async def get_waveforms_bulk(self, *args, **kwargs):
+        """
+        Coroutine version of
+        :meth:`~obspy.clients.fdsn.client.Client.get_waveforms_bulk`.
+        """
+        return await self._run(self.client.get_waveforms_bulk, *args,
+                               **kwargs)
+
+
+if __name__ == '__main__':
+    import doctest
+    doctest.testmod(exclude_empty=True)
@@ -0,0 +1,260 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+Persistent on-disk cache for responses of the FDSN station and event web
+services.
+
+Repeated station and event queries, e.g. of the same responses when a
+processing run is restarted, are answered from a directory on disk instead
+of downloading and parsing the StationXML or QuakeML again:
+
+>>> from obspy.clients.fdsn import Client
+>>> from obspy.clients.fdsn.cache import ResponseCache
+>>> cache = ResponseCache("fdsn_cache", ttl=24 * 3600)  # doctest: +SKIP
+>>> client = Client("EARTHSCOPE", cache=cache)  # doctest: +SKIP
+
+The same cache directory can be used by any number of clients and processes.
+
+:copyright:
+    The ObsPy Development Team (devs@obspy.org)
+:license:
+    GNU Lesser General Public License, Version 3
+    (https://www.gnu.org/copyleft/lesser.html)
+"""
+import collections
+import hashlib
+import json
+import os
+import pickle
+import tempfile
+import threading
+import time
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+import obspy
+
+
+class ResponseCache(object):
+    """
+    Thread and process safe on-disk cache of FDSN web service responses.
+
+    Entries are keyed by the normalized request URL (query parameters in
+    sorted order), the body of POST requests and the user name of
+    authenticated clients. Every entry stores the raw response and/or the
+    parsed :class:`~obspy.core.inventory.inventory.Inventory` or
+    :class:`~obspy.core.event.Catalog` as a pickle, which is much quicker to
+    load than parsing the XML again.
+
+    Entries younger than ``ttl`` seconds are used without contacting the
+    server. Older entries are revalidated with a conditional request if the
+    server sent an ``ETag`` or ``Last-Modified`` header, a
+    ``304 Not Modified`` answer renews the entry without downloading the
+    data again. Otherwise the response is downloaded and stored anew.
+
+    :type directory: str
+    :param directory: Directory the entries are stored in, created if it
+        does not exist.
+    :type ttl: float
+    :param ttl: Time in seconds an entry is used without revalidation.
+        ``None`` uses entries forever, ``0`` revalidates every entry.
+    :type store_raw: bool
+    :param store_raw: Whether to store the raw response. Needed to answer
+        requests writing the response to a file and to parse the response
+        again after ObsPy has been updated.
+    :type store_parsed: bool
+    :param store_parsed: Whether to store the parsed response as a pickle.
+
+    .. warning::
+        Pickles can execute arbitrary code when loaded. Only use cache
+        directories that nobody else can write to.
+    """
+    def __init__(self, directory, ttl=None, store_raw=True,
+                 store_parsed=True):
+        if not store_raw and not store_parsed:
+            msg = "At least one of store_raw and store_parsed must be True."
+            raise ValueError(msg)
+        if ttl is not None and ttl < 0:
+            msg = "ttl must not be negative."
+            raise ValueError(msg)
+        self.directory = directory
+        self.ttl = ttl
+        self.store_raw = store_raw
+        self.store_parsed = store_parsed
+        os.makedirs(directory, exist_ok=True)
+        self._lock = threading.Lock()
+        self._statistics = collections.Counter()
+
+    def __str__(self):
+        return "ResponseCache(directory=%r, ttl=%s)" % (
+            self.directory, self.ttl)
+
+    def _repr_pretty_(self, p, cycle):
+        p.text(str(self))
+
+    def get_statistics(self):
+        """
+        Return a dictionary with counters of this cache instance.
+
+        ``"hits"`` is the number of requests answered from the cache without
+        contacting the server, ``"revalidated"`` the number of entries
+        confirmed by the server with ``304 Not Modified`` and ``"misses"``
+        the number of responses that had to be downloaded.
+        """
+        with self._lock:
+            return {key: self._statistics[key] for key in (
+                "hits", "revalidated", "misses")}
+
+    def clear(self):
+        """
+        Remove all entries from the cache directory.
+        """
+        for name in os.listdir(self.directory):
+            if os.path.splitext(name)[1] in (".json", ".raw", ".pickle"):
+                _remove(os.path.join(self.directory, name))
+
+    def get_key(self, url, data=None, user=None):
+        """
+        Return the cache key of a request.
+
+        :type url: str
+        :param url: Request URL.
+        :type data: bytes or str
+        :param data: Body of POST requests. Leading and trailing whitespace
+            and empty lines are ignored.
+        :type user: str
+        :param user: User name of authenticated requests.
+        """
+        scheme, netloc, path, query, _ = urlsplit(url)
+        query = urlencode(sorted(parse_qsl(query, keep_blank_values=True)))
+        url = urlunsplit((scheme.lower(), netloc.lower(), path, query, ""))
+        key = hashlib.sha256(url.encode())
+        if data:
+            if isinstance(data, bytes):
+                data = data.decode()
+            lines = [line.strip() for line in data.splitlines()]
+            key.update(b"\n")
+            key.update("\n".join(line for line in lines if line).encode())
+        if user is not None:
+            key.update(b"\nuser=" + user.encode())
+        return key.hexdigest()
+
+    def _count(self, name):
+        with self._lock:
+            self._statistics[name] += 1
+
+    def _path(self, key, extension):
+        return os.path.join(self.directory, key + extension)
+
+    def _get_entry(self, key):
+        """
+        Return the metadata of an entry or ``None``.
+        """
+        try:
+            with open(self._path(key, ".json"), "rt") as fh:
+                return json.load(fh)
+        except (OSError, ValueError):
+            return None
+
+    def _is_fresh(self, entry):
+        return self.ttl is None or time.time() - entry["time"] < self.ttl
+
+    def _get_validators(self, entry):
+        """
+        Return the headers of a conditional request for an entry.
+        """
+        headers = {}
+        if entry.get("etag"):
+            headers["If-None-Match"] = entry["etag"]
+        if entry.get("last_modified"):
+            headers["If-Modified-Since"] = entry["last_modified"]
+        return headers
+
+    def _load(self, key, entry, parse=None):
+        """
+        Return the raw response of an entry or, if ``parse`` is given, the
+        parsed response. ``parse`` is called with the raw response for
+        entries without a pickle or with a pickle of another ObsPy version.
+        Returns ``None`` if the entry can not be used.
+        """
+        if parse is not None and entry.get("parsed") and \
+                entry.get("obspy_version") == obspy.__version__:
+            try:
+                with open(self._path(key, ".pickle"), "rb") as fh:
+                    return pickle.load(fh)
+            except Exception:
+                pass
+        if not entry.get("raw"):
+            return None
+        try:
+            with open(self._path(key, ".raw"), "rb") as fh:
+                raw = fh.read()
+        except OSError:
+            return None
+        if parse is None:
+            return raw
+        parsed = parse(raw)
+        if self.store_parsed:
+            self._write_pickle(key, parsed, entry)
+            self._write_entry(key, entry)
+        return parsed
+
+    def _store(self, key, url, raw=None, parsed=None, etag=None,
+               last_modified=None):
+        """
+        Store a downloaded response.
+        """
+        entry = {"url": url, "time": time.time(), "etag": etag,
+                 "last_modified": last_modified, "raw": False,
+                 "parsed": False}
+        if raw is not None and self.store_raw:
+            _write_atomically(self._path(key, ".raw"), raw)
+            entry["raw"] = True
+        if parsed is not None and self.store_parsed:
+            self._write_pickle(key, parsed, entry)
+        self._write_entry(key, entry)
+
+    def _touch(self, key, entry):
+        """
+        Renew an entry after the server confirmed it is still valid.
+        """
+        entry["time"] = time.time()
+        self._write_entry(key, entry)
+
+    def _write_pickle(self, key, parsed, entry):
+        _write_atomically(self._path(key, ".pickle"), pickle.dumps(
+            parsed, protocol=pickle.HIGHEST_PROTOCOL))
+        entry["parsed"] = True
+        entry["obspy_version"] = obspy.__version__
+
+    def _write_entry(self, key, entry):
+        # The metadata is written last, it only refers to complete files.
+        _write_atomically(self._path(key, ".json"),
+                          json.dumps(entry).encode())
+
+
+def _write_atomically(filename, data):
+    """
+    Write data to a temporary file first so that concurrent readers never
+    see partially written files.
+    """
+    fd, tmp = tempfile.mkstemp(dir=os.path.dirname(filename),
+                               suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as fh:
+            fh.write(data)
+        os.replace(tmp, filename)
+    except BaseException:
+        _remove(tmp)
+        raise
+
+
+def _remove(filename):
+    try:
+        os.remove(filename)
+    except OSError:
+        pass
+
+
+if __name__ == '__main__':
+    import doctest
+    doctest.testmod(exclude_empty=True)
@@ -11,6 +11,7 @@ FDSN Web service client for ObsPy.
 """
 import collections.abc
 import copy
+import functools
 import gzip
 import io
 import os
@@ -28,6 +29,7 @@ from lxml import etree
 import obspy
 from obspy import UTCDateTime, read_inventory
 from obspy.core.util.deprecation_helpers import ObsPyDeprecationWarning
+from obspy.io.mseed.core import _iread_mseed_stream, _read_mseed_stream
 from .header import (DEFAULT_PARAMETERS, DEFAULT_USER_AGENT, FDSNWS,
                      OPTIONAL_PARAMETERS, PARAMETER_ALIASES,
                      URL_DEFAULT_SUBPATH, URL_MAPPINGS, URL_MAPPING_SUBPATHS,
@@ -46,6 +48,8 @@ from .header import (DEFAULT_PARAMETERS, DEFAULT_USER_AGENT, FDSNWS,
                      FDSNForbiddenException,
                      FDSNDoubleAuthenticationException,
                      FDSNInvalidRequestException)
+from .cache import ResponseCache
+from .connection_pool import _get_connection_pool
 from .wadl_parser import WADLParser
 
 from urllib.parse import urlencode
@@ -150,7 +154,8 @@ class Client(object):
     def __init__(self, base_url="EARTHSCOPE", major_versions=None, user=None,
                  password=None, user_agent=DEFAULT_USER_AGENT, debug=False,
                  timeout=120, service_mappings=None, force_redirect=False,
-                 eida_token=None, _discover_services=True, use_gzip=True):
+                 eida_token=None, _discover_services=True, use_gzip=True,
+                 connection_pool=None, cache=None):
         """
         Initializes an FDSN Web Service client.
 
@@ -226,12 +231,32 @@ class Client(object):
             on results. Can be used if servers experience server side issues
             with gzip compression but results in downloads being larger in
             size.
+        :type connection_pool: bool or
+            :class:`~obspy.clients.fdsn.connection_pool.HTTPConnectionPool`
+        :param connection_pool: By default a new connection is opened for
+            every request. If set to ``True``, the client keeps idle
+            connections open in its own
+            :class:`~obspy.clients.fdsn.connection_pool.HTTPConnectionPool`
+            and reuses them for subsequent requests (HTTP keep-alive). A pool
+            instance can be passed to share the connections between several
+            clients.
+        :type cache: str or :class:`~obspy.clients.fdsn.cache.ResponseCache`
+        :param cache: Directory or
+            :class:`~obspy.clients.fdsn.cache.ResponseCache` to store the
+            responses of station and event queries in. Repeated queries are
+            then answered from the cache, see
+            :class:`~obspy.clients.fdsn.cache.ResponseCache` for details. A
+            directory name creates a cache that never expires.
         """
         self.debug = debug
         self.user = user
         self.timeout = timeout
         self._force_redirect = force_redirect
         self.use_gzip = use_gzip
+        self.connection_pool = _get_connection_pool(connection_pool)
+        if isinstance(cache, str):
+            cache = ResponseCache(cache)
+        self.cache = cache
 
         # Cache for the webservice versions. This makes interactive use of
         # the client more convenient.
@@ -369,6 +394,9 @@ class Client(object):
         else:
             handlers.append(NoRedirectionHandler())
 
+        if self.connection_pool is not None:
+            handlers.extend(self.connection_pool.get_handlers())
+
         # Don't install globally to not mess with other codes.
         self._url_opener = urllib_request.build_opener(*handlers)
         if self.debug:
@@ -562,15 +590,9 @@ class Client(object):
         url = self._create_url_from_parameters(
             "event", DEFAULT_PARAMETERS['event'], kwargs)
 
-        data_stream = self._download(url)
-        data_stream.seek(0, 0)
-        if filename:
-            self._write_to_file_object(filename, data_stream)
-            data_stream.close()
-        else:
-            cat = obspy.read_events(data_stream, format="quakeml")
-            data_stream.close()
-            return cat
+        return self._query(url, filename,
+                           functools.partial(obspy.read_events,
+                                             format="quakeml"))
 
     def get_stations(self, starttime=None, endtime=None, startbefore=None,
                      startafter=None, endbefore=None, endafter=None,
@@ -760,21 +782,9 @@ class Client(object):
         url = self._create_url_from_parameters(
             "station", DEFAULT_PARAMETERS['station'], kwargs)
 
-        data_stream = self._download(url)
-        data_stream.seek(0, 0)
-        if filename:
-            self._write_to_file_object(filename, data_stream)
-            data_stream.close()
-        else:
-            # This works with XML and StationXML data.
-            if format is None or format == 'xml':
-                inventory = read_inventory(data_stream, format='STATIONXML')
-            elif format == 'text':
-                inventory = read_inventory(data_stream, format='STATIONTXT')
-            else:
-                inventory = read_inventory(data_stream)
-            data_stream.close()
-            return inventory
+        return self._query(url, filename,
+                           functools.partial(_read_station_response,
+                                             format=format))
 
     def get_waveforms(self, network, station, location, channel, starttime,
                       endtime, quality=None, minimumlength=None,
@@ -884,19 +894,19 @@ class Client(object):
 
         # Gzip not worth it for MiniSEED and most likely disabled for this
         # route in any case.
-        data_stream = self._download(url, use_gzip=False)
-        data_stream.seek(0, 0)
-        if filename:
-            self._write_to_file_object(filename, data_stream)
-            data_stream.close()
-        else:
-            st = obspy.read(data_stream, format="MSEED")
+        data_stream = self._download(url, use_gzip=False, stream=True)
+        try:
+            if filename:
+                self._write_to_file_object(filename, data_stream)
+                return
+            st = self._read_mseed_response(data_stream)
+        finally:
             data_stream.close()
-            if attach_response:
-                self._attach_responses(st)
-            self._attach_dataselect_url_to_stream(st)
-            st.trim(starttime, endtime)
-            return st
+        if attach_response:
+            self._attach_responses(st)
+        self._attach_dataselect_url_to_stream(st)
+        st.trim(starttime, endtime)
+        return st
 
     def _attach_responses(self, st):
         """
@@ -1064,18 +1074,91 @@ class Client(object):
         url = self._build_url("dataselect", "query")
 
         data_stream = self._download(
-            url, data=bulk, content_type='text/plain')
-        data_stream.seek(0, 0)
-        if filename:
-            self._write_to_file_object(filename, data_stream)
+            url, data=bulk, content_type='text/plain', stream=True)
+        try:
+            if filename:
+                self._write_to_file_object(filename, data_stream)
+                return
+            st = self._read_mseed_response(data_stream)
+        finally:
             data_stream.close()
-        else:
-            st = obspy.read(data_stream, format="MSEED")
+        if attach_response:
+            self._attach_responses(st)
+        self._attach_dataselect_url_to_stream(st)
+        return st
+
+    def iter_waveforms_bulk(self, bulk, quality=None, minimumlength=None,
+                            longestonly=None, filename=None):
+        """
+        Query the dataselect service of the client with a bulk request and
+        yield the traces while the response is being downloaded.
+
+        The response is decoded record by record as it arrives, only a small
+        part of the raw data is kept in memory. A trace is yielded as soon as
+        the data of another channel (or the end of the response) follows it,
+        data of a channel that the server continues later in the response is
+        yielded as a separate trace. Use
+        :meth:`~obspy.clients.fdsn.client.Client.get_waveforms_bulk` to get
+        all data as a single :class:`~obspy.core.stream.Stream`.
+
+        >>> client = Client("EARTHSCOPE")
+        >>> t1 = UTCDateTime("2010-02-27T06:30:00.000")
+        >>> bulk = [("IU", "ANMO", "00", "BHZ", t1, t1 + 1),
+        ...         ("IU", "AFI", "1?", "BHE", t1, t1 + 3)]
+        >>> for tr in client.iter_waveforms_bulk(bulk):  # doctest: +SKIP
+        ...     print(tr.id)
+        IU.AFI.10.BHE
+        IU.ANMO.00.BHZ
+
+        :type bulk: str, file or list[list]
+        :param bulk: Information about the requested data. See
+            :meth:`~obspy.clients.fdsn.client.Client.get_waveforms_bulk` for
+            details.
+        :type quality: str, optional
+        :param quality: Select a specific SEED quality indicator, handling is
+            data center dependent. Ignored when `bulk` is provided as a
+            request string/file.
+        :type minimumlength: float, optional
+        :param minimumlength: Limit results to continuous data segments of a
+            minimum length specified in seconds. Ignored when `bulk` is
+            provided as a request string/file.
+        :type longestonly: bool, optional
+        :param longestonly: Limit results to the longest continuous segment per
+            channel. Ignored when `bulk` is provided as a request string/file.
+        :type filename: str or file
+        :param filename: If given, the raw data is written there as well
+            while it is being downloaded.
+        """
+        if "dataselect" not in self.services:
+            msg = "The current client does not have a dataselect service."
+            raise FDSNNoServiceException(msg)
+
+        arguments = OrderedDict(
+            quality=quality,
+            minimumlength=minimumlength,
+            longestonly=longestonly
+        )
+        bulk = get_bulk_string(bulk, arguments)
+
+        url = self._build_url("dataselect", "query")
+
+        data_stream = self._download(
+            url, data=bulk, content_type='text/plain', stream=True)
+        fh = None
+        try:
+            if filename:
+                if hasattr(filename, "write"):
+                    data_stream = _WriteThroughReader(data_stream, filename)
+                else:
+                    fh = open(filename, "wb")
+                    data_stream = _WriteThroughReader(data_stream, fh)
+            for tr in _iread_mseed_stream(data_stream):
+                tr.stats._fdsnws_dataselect_url = url
+                yield tr
+        finally:
             data_stream.close()
-            if attach_response:
-                self._attach_responses(st)
-            self._attach_dataselect_url_to_stream(st)
-            return st
+            if fh is not None:
+                fh.close()
 
     def get_stations_bulk(self, bulk, level=None, includerestricted=None,
                           includeavailability=None, filename=None,
@@ -1261,23 +1344,80 @@ class Client(object):
 
         url = self._build_url("station", "query")
 
-        data_stream = self._download(
-            url, data=bulk, content_type='text/plain')
+        return self._query(url, filename,
+                           functools.partial(_read_station_response,
+                                             format=format),
+                           data=bulk, content_type='text/plain')
+
+    def _query(self, url, filename, parse, data=None, content_type=None):
+        """
+        Downloads the response of a station or event query and parses it
+        with ``parse`` or writes it to ``filename``. Uses the response cache
+        if the client has one.
+        """
+        if self.cache is not None:
+            return self._query_cached(url, filename, parse, data=data,
+                                      content_type=content_type)
+        data_stream = self._download(url, data=data,
+                                     content_type=content_type)
         data_stream.seek(0, 0)
         if filename:
             self._write_to_file_object(filename, data_stream)
             data_stream.close()
             return
-        else:
-            # Works with text and StationXML data.
-            if format is None or format == 'xml':
-                inv = read_inventory(data_stream, format='STATIONXML')
-            elif format == 'text':
-                inv = read_inventory(data_stream, format='STATIONTXT')
-            else:
-                inv = read_inventory(data_stream)
-            data_stream.close()
-            return inv
+        result = parse(data_stream)
+        data_stream.close()
+        return result
+
+    def _query_cached(self, url, filename, parse, data=None,
+                      content_type=None):
+        cache = self.cache
+        key = cache.get_key(url, data=data, user=self.user)
+        entry = cache._get_entry(key)
+        cached = None
+        if entry is not None:
+            cached = cache._load(
+                key, entry,
+                parse=None if filename else
+                lambda raw: parse(io.BytesIO(raw)))
+        headers = self.request_headers.copy()
+        if content_type:
+            headers['Content-Type'] = content_type
+        if cached is not None:
+            if cache._is_fresh(entry):
+                cache._count("hits")
+                if self.debug is True:
+                    print("Using cached response for %s" % url)
+                return self._return_cached(cached, filename)
+            headers.update(cache._get_validators(entry))
+        code, response = download_url(
+            url, opener=self._url_opener, headers=headers,
+            debug=self.debug, data=data, timeout=self.timeout,
+            use_gzip=self.use_gzip, stream=True)
+        if code == 304 and cached is not None:
+            cache._count("revalidated")
+            cache._touch(key, entry)
+            return self._return_cached(cached, filename)
+        raise_on_error(code, response)
+        try:
+            raw = response.read()
+            response_headers = response.info()
+        finally:
+            response.close()
+        cache._count("misses")
+        parsed = None
+        if not filename or not cache.store_raw:
+            parsed = parse(io.BytesIO(raw))
+        cache._store(key, url, raw=raw, parsed=parsed,
+                     etag=response_headers.get("ETag"),
+                     last_modified=response_headers.get("Last-Modified"))
+        return self._return_cached(raw if filename else parsed, filename)
+
+    def _return_cached(self, cached, filename):
+        if filename:
+            self._write_to_file_object(filename, io.BytesIO(cached))
+            return
+        return cached
 
     def _write_to_file_object(self, filename_or_object, data_stream):
         if hasattr(filename_or_object, "write"):
@@ -1286,6 +1426,12 @@ class Client(object):
         with open(filename_or_object, "wb") as fh:
             fh.write(data_stream.read())
 
+    def _read_mseed_response(self, data_stream):
+        """
+        Decodes a MiniSEED response while it is being downloaded.
+        """
+        return _read_mseed_stream(data_stream)
+
     def _create_url_from_parameters(self, service, default_params, parameters):
         """
         """
@@ -1490,7 +1636,7 @@ class Client(object):
         print("\n".join(msg))
 
     def _download(self, url, return_string=False, data=None, use_gzip=None,
-                  content_type=None):
+                  content_type=None, stream=False):
         # make it possible to have a default for gzip set on client
         # initialization but also be able to override it here (for dataselect
         # requests)
@@ -1502,7 +1648,7 @@ class Client(object):
         code, data = download_url(
             url, opener=self._url_opener, headers=headers,
             debug=self.debug, return_string=return_string, data=data,
-            timeout=self.timeout, use_gzip=use_gzip)
+            timeout=self.timeout, use_gzip=use_gzip, stream=stream)
         raise_on_error(code, data)
         return data
 
@@ -1902,13 +2048,17 @@ def raise_on_error(code, data):
 
 
 def download_url(url, opener, timeout=10, headers={}, debug=False,
-                 return_string=True, data=None, use_gzip=True):
+                 return_string=True, data=None, use_gzip=True, stream=False):
     """
     Returns a pair of tuples.
 
     The first one is the returned HTTP code and the second the data as
     string.
 
+    If `stream=True` the second item of successful requests is the open
+    response as a file-like object (decompressing gzipped responses on the
+    fly) that has to be read and closed by the caller.
+
     Will return a tuple of Nones if the service could not be found.
     All encountered exceptions will get raised unless `debug=True` is
     specified.
@@ -1968,6 +2118,11 @@ def download_url(url, opener, timeout=10, headers={}, debug=False,
 
     code = url_obj.getcode()
 
+    if stream:
+        if url_obj.info().get("Content-Encoding") == "gzip":
+            return code, _GzipResponse(url_obj)
+        return code, url_obj
+
     # Unpack gzip if necessary.
     if url_obj.info().get("Content-Encoding") == "gzip":
         if debug is True:
@@ -1997,6 +2152,61 @@ def download_url(url, opener, timeout=10, headers={}, debug=False,
     return code, data
 
 
+class _GzipResponse(gzip.GzipFile):
+    """
+    Decompresses a gzipped response while it is read and closes the response
+    together with itself.
+    """
+    def __init__(self, response):
+        super().__init__(fileobj=response)
+        self._response = response
+
+    def info(self):
+        return self._response.info()
+
+    def close(self):
+        try:
+            super().close()
+        finally:
+            self._response.close()
+
+
+class _WriteThroughReader(io.RawIOBase):
+    """
+    Wraps a file-like object and writes everything read from it to a second
+    file-like object as well.
+    """
+    def __init__(self, file_object, target):
+        self._file_object = file_object
+        self._target = target
+
+    def readable(self):
+        return True
+
+    def read(self, size=-1):
+        data = self._file_object.read(size)
+        self._target.write(data)
+        return data
+
+    def close(self):
+        try:
+            self._file_object.close()
+        finally:
+            super().close()
+
+
+def _read_station_response(data_stream, format=None):
+    """
+    Parses the response of a station query.
+    """
+    # This works with XML and StationXML data.
+    if format is None or format == 'xml':
+        return read_inventory(data_stream, format='STATIONXML')
+    elif format == 'text':
+        return read_inventory(data_stream, format='STATIONTXT')
+    return read_inventory(data_stream)
+
+
 def setup_query_dict(service, locs, kwargs):
     """
     """
@@ -0,0 +1,262 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+Persistent HTTP/1.1 connections for the FDSN web service clients.
+
+By default every request of the :class:`~obspy.clients.fdsn.client.Client`
+opens a new TCP (and for HTTPS also a new TLS) connection, which is closed
+again after the response has been read. An :class:`HTTPConnectionPool` keeps
+idle connections per host open so that subsequent requests to the same data
+center can reuse them:
+
+>>> from obspy.clients.fdsn import Client
+>>> from obspy.clients.fdsn.connection_pool import HTTPConnectionPool
+>>> pool = HTTPConnectionPool(maxsize=4)
+>>> client = Client("EARTHSCOPE", connection_pool=pool)  # doctest: +SKIP
+
+The same pool can be shared by any number of clients, e.g. by all clients of
+a :class:`~obspy.clients.fdsn.mass_downloader.MassDownloader` or a routing
+client.
+
+:copyright:
+    The ObsPy Development Team (devs@obspy.org)
+:license:
+    GNU Lesser General Public License, Version 3
+    (https://www.gnu.org/copyleft/lesser.html)
+"""
+import collections
+import http.client
+import select
+import threading
+import urllib.request as urllib_request
+from urllib.error import URLError
+
+
+class HTTPConnectionPool(object):
+    """
+    Thread-safe pool of persistent HTTP/1.1 connections.
+
+    Connections are kept per scheme and host (including the port). A
+    connection is returned to the pool once the body of its response has
+    been read completely and the server did not ask to close the connection.
+    Requests are never blocked by the pool, if no idle connection is
+    available a new one is opened.
+
+    :type maxsize: int
+    :param maxsize: Maximum number of idle connections kept per host.
+        Connections released while the pool of a host is full are closed.
+    """
+    def __init__(self, maxsize=10):
+        if maxsize < 1:
+            msg = "maxsize must be a positive integer."
+            raise ValueError(msg)
+        self.maxsize = maxsize
+        self._lock = threading.Lock()
+        self._idle = collections.defaultdict(collections.deque)
+        self._statistics = collections.Counter()
+
+    def __str__(self):
+        return "HTTPConnectionPool(maxsize=%i, idle=%i)" % (
+            self.maxsize, self.get_statistics()["idle"])
+
+    def get_handlers(self):
+        """
+        Return new urllib handlers that send their requests via this pool.
+
+        The handlers replace the default HTTP and HTTPS handlers when passed
+        to :func:`urllib.request.build_opener`.
+        """
+        return [_PooledHTTPHandler(self), _PooledHTTPSHandler(self)]
+
+    def get_statistics(self):
+        """
+        Return a dictionary with counters of the pool.
+
+        ``"requests"`` is the number of requests sent via the pool,
+        ``"connections"`` the number of newly opened connections,
+        ``"reused"`` the number of requests that reused an idle connection,
+        ``"discarded"`` the number of connections that were closed when
+        taken from or released to the pool (e.g. because the server closed
+        them in the meantime) and ``"idle"`` the number of currently idle
+        connections.
+        """
+        with self._lock:
+            stats = {key: self._statistics[key] for key in (
+                "requests", "connections", "reused", "discarded")}
+            stats["idle"] = sum(len(_i) for _i in self._idle.values())
+        return stats
+
+    def clear(self):
+        """
+        Close all idle connections.
+        """
+        with self._lock:
+            connections = [conn for idle in self._idle.values()
+                           for conn in idle]
+            self._idle.clear()
+        for conn in connections:
+            conn.close()
+
+    def _count(self, key):
+        with self._lock:
+            self._statistics[key] += 1
+
+    def _get(self, key):
+        """
+        Pop an idle connection for the given key, ``None`` if there is none.
+        """
+        while True:
+            with self._lock:
+                idle = self._idle.get(key)
+                if not idle:
+                    return None
+                # The most recently used connection is the least likely to
+                # have been closed by the server.
+                conn = idle.pop()
+            if not _is_dropped(conn):
+                self._count("reused")
+                return conn
+            conn.close()
+            self._count("discarded")
+
+    def _put(self, key, conn):
+        with self._lock:
+            idle = self._idle[key]
+            if len(idle) < self.maxsize:
+                idle.append(conn)
+                return
+            self._statistics["discarded"] += 1
+        conn.close()
+
+
+def _get_connection_pool(connection_pool):
+    """
+    Return the connection pool for the ``connection_pool`` argument of the
+    clients: a new :class:`HTTPConnectionPool` for ``True``, ``None`` for
+    ``False`` and the given pool otherwise.
+    """
+    if connection_pool is True:
+        return HTTPConnectionPool()
+    if connection_pool is False:
+        return None
+    return connection_pool
+
+
+def _is_dropped(conn):
+    """
+    Check if an idle connection can no longer be used.
+
+    An idle socket must not be readable, if it is the server either closed
+    the connection or sent unexpected data.
+    """
+    if conn.sock is None:
+        return True
+    try:
+        return bool(select.select([conn.sock], [], [], 0.0)[0])
+    except (OSError, ValueError):
+        return True
+
+
+class _PooledResponse(http.client.HTTPResponse):
+    """
+    Response that releases its connection to the pool once the body has been
+    read completely.
+    """
+    _pool_connection = None
+
+    def close(self):
+        if self.fp is not None and self._pool_connection is not None:
+            # Closed before the body was read completely, the rest of the
+            # body is still pending on the socket.
+            conn = self._pool_connection[2]
+            self._pool_connection = None
+            conn.close()
+        super().close()
+
+    def _close_conn(self):
+        super()._close_conn()
+        if self._pool_connection is not None:
+            pool, key, conn = self._pool_connection
+            self._pool_connection = None
+            pool._put(key, conn)
+
+
+class _PooledHandlerMixin(object):
+    """
+    Replaces :meth:`urllib.request.AbstractHTTPHandler.do_open` with a
+    version that takes its connections from a :class:`HTTPConnectionPool`
+    and does not ask the server to close the connection.
+    """
+    def __init__(self, pool, **kwargs):
+        super().__init__(**kwargs)
+        self._pool = pool
+
+    def do_open(self, http_class, req, **http_conn_args):
+        # Connections tunneled through a proxy are not pooled.
+        if req._tunnel_host:
+            return super().do_open(http_class, req, **http_conn_args)
+        host = req.host
+        if not host:
+            raise URLError('no host given')
+        key = (req.type, host)
+
+        headers = dict(req.unredirected_hdrs)
+        headers.update({k: v for k, v in req.headers.items()
+                        if k not in headers})
+        headers = {name.title(): val for name, val in headers.items()}
+
+        self._pool._count("requests")
+        while True:
+            h = self._pool._get(key)
+            reused = h is not None
+            if reused:
+                h.timeout = req.timeout
+                h.sock.settimeout(req.timeout)
+            else:
+                h = http_class(host, timeout=req.timeout, **http_conn_args)
+                h.response_class = _PooledResponse
+                self._pool._count("connections")
+            h.set_debuglevel(self._debuglevel)
+            try:
+                try:
+                    h.request(req.get_method(), req.selector, req.data,
+                              headers, encode_chunked=req.has_header(
+                                  'Transfer-encoding'))
+                except OSError as err:  # timeout error
+                    if not (reused and isinstance(err, ConnectionError)):
+                        raise URLError(err)
+                    raise
+                r = h.getresponse()
+            except ConnectionError:
+                h.close()
+                # The server closed an idle connection before we noticed,
+                # retry the request with another connection.
+                if reused:
+                    self._pool._count("discarded")
+                    continue
+                raise
+            except BaseException:
+                h.close()
+                raise
+            break
+
+        # HTTPConnection already closed the connection if the server asked
+        # for it.
+        if h.sock is not None:
+            r._pool_connection = (self._pool, key, h)
+        r.url = req.get_full_url()
+        r.msg = r.reason
+        return r
+
+
+class _PooledHTTPHandler(_PooledHandlerMixin, urllib_request.HTTPHandler):
+    pass
+
+
+class _PooledHTTPSHandler(_PooledHandlerMixin, urllib_request.HTTPSHandler):
+    pass
+
+
+if __name__ == '__main__':
+    import doctest
+    doctest.testmod(exclude_empty=True)
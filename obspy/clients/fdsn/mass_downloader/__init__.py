@@ -412,6 +412,31 @@ value in agreement with some data centers.
 ...              threads_per_client=3, mseed_storage=mseed_storage,
 ...              stationxml_storage=stationxml_storage)  # doctest: +SKIP
 
+Instead of using fixed values, a
+:class:`~obspy.clients.fdsn.mass_downloader.scheduler.DownloadScheduler` can
+adapt the number of threads and the chunk size of each data center to its
+throughput, latency and ``429``/``503`` throttling responses, starting from
+the given values. It also requests the availability of all data centers right
+away and can cap the total bandwidth of the download:
+
+>>> from obspy.clients.fdsn.mass_downloader.scheduler import \
+...     DownloadScheduler
+>>> scheduler = DownloadScheduler(max_bandwidth_in_mb=10)
+>>> mdl.download(domain, restrictions, mseed_storage=mseed_storage,
+...              stationxml_storage=stationxml_storage,
+...              scheduler=scheduler)  # doctest: +SKIP
+
+Large downloads can be interrupted and restarted. With a ``state`` database
+the availability of every data center and the status of every file are
+recorded in a SQLite file, see
+:class:`~obspy.clients.fdsn.mass_downloader.state.DownloadState`. A restart
+with the same database reuses the availability and neither reads nor
+downloads again the files of completed time intervals:
+
+>>> mdl.download(domain, restrictions, mseed_storage=mseed_storage,
+...              stationxml_storage=stationxml_storage,
+...              state="download_state.sqlite")  # doctest: +SKIP
+
 
 How it Works
 ------------
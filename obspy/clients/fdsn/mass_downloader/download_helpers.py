@@ -18,16 +18,15 @@ import itertools
 import os
 import time
 import timeit
-from itertools import filterfalse
 from multiprocessing.pool import ThreadPool
 
-import numpy as np
 from lxml.etree import XMLSyntaxError
 
 import obspy
 from obspy.core.util import Enum
 
 from . import utils
+from .scheduler import THROTTLING_ERRORS
 
 #: The current status of an entity.
 STATUS = Enum(["none", "needs_downloading", "downloaded", "ignore", "exists",
@@ -199,12 +198,19 @@ class Station(_SlotsEqualityComparisionObject):
                            self.miss_station_information.keys()]),
             channels=channels)
 
-    def prepare_stationxml_download(self, stationxml_storage, logger):
+    def prepare_stationxml_download(self, stationxml_storage, logger,
+                                    get_stationxml_contents=None):
         """
         Figure out what to download.
 
         :param stationxml_storage:
+        :param get_stationxml_contents: Function used to get the channels of
+            existing StationXML files. Defaults to
+            :func:`~.utils.get_stationxml_contents`.
         """
+        if get_stationxml_contents is None:
+            get_stationxml_contents = utils.get_stationxml_contents
+
         # Determine what channels actually want to have station information.
         # This will be a tuple of location code, channel code, starttime,
         # and endtime.
@@ -245,7 +251,7 @@ class Station(_SlotsEqualityComparisionObject):
             # necessary information, nothing will happen. Otherwise it will
             # be overwritten.
             else:
-                info = utils.get_stationxml_contents(filename)
+                info = get_stationxml_contents(filename)
                 for c_id, times in self.want_station_information.items():
                     # Get the temporal range of information in the file.
                     c_info = [_i for _i in info if
@@ -322,7 +328,7 @@ class Station(_SlotsEqualityComparisionObject):
             else:
                 self.stationxml_status = STATUS.IGNORE
 
-    def prepare_mseed_download(self, mseed_storage):
+    def prepare_mseed_download(self, mseed_storage, recorded_status=None):
         """
         Loop through all channels of the station and distribute filenames
         and the current status of the channel.
@@ -333,7 +339,12 @@ class Station(_SlotsEqualityComparisionObject):
         NEEDS_DOWNLOADING.
 
         :param mseed_storage:
+        :param recorded_status: Status of the files of a previous download
+            by filename. Files recorded as downloaded or existing are
+            assumed to exist without checking.
+        :type recorded_status: dict
         """
+        recorded_status = recorded_status or {}
         for channel in self.channels:
             for interval in channel.intervals:
                 interval.filename = utils.get_mseed_filename(
@@ -342,6 +353,9 @@ class Station(_SlotsEqualityComparisionObject):
                     interval.end)
                 if interval.filename is True:
                     interval.status = STATUS.IGNORE
+                elif recorded_status.get(interval.filename) in (
+                        STATUS.DOWNLOADED, STATUS.EXISTS):
+                    interval.status = STATUS.EXISTS
                 elif os.path.exists(interval.filename):
                     interval.status = STATUS.EXISTS
                 else:
@@ -476,9 +490,13 @@ class ClientDownloadHelper(object):
     :param mseed_storage: The MiniSEED storage settings.
     :param stationxml_storage: The StationXML storage settings.
     :param logger: An active logger instance.
+    :type state: :class:`~.state.DownloadState`
+    :param state: Reuse the availability and the status of the files of
+        previous downloads stored in this database and record them for
+        later downloads.
     """
     def __init__(self, client, client_name, restrictions, domain,
-                 mseed_storage, stationxml_storage, logger):
+                 mseed_storage, stationxml_storage, logger, state=None):
         self.client = client
         self.client_name = client_name
         self.restrictions = restrictions
@@ -486,6 +504,7 @@ class ClientDownloadHelper(object):
         self.mseed_storage = mseed_storage
         self.stationxml_storage = stationxml_storage
         self.logger = logger
+        self.state = state
         self.stations = {}
         self.is_availability_reliable = None
 
@@ -520,7 +539,27 @@ class ClientDownloadHelper(object):
         downloading.
         """
         for station in self.stations.values():
-            station.prepare_mseed_download(mseed_storage=self.mseed_storage)
+            recorded_status = None
+            if self.state is not None:
+                recorded_status = self.state.get_interval_status(
+                    station.network, station.station)
+            station.prepare_mseed_download(mseed_storage=self.mseed_storage,
+                                           recorded_status=recorded_status)
+
+    def save_state(self):
+        """
+        Record the status of all time intervals in the download state, if
+        any.
+        """
+        if self.state is None:
+            return
+        self.state.set_interval_status(self.client_name,
+                                       self.stations.values())
+
+    def _get_stationxml_contents(self, filename):
+        if self.state is None:
+            return utils.get_stationxml_contents(filename)
+        return self.state.get_stationxml_contents(filename)
 
     def filter_stations_based_on_minimum_distance(
             self, existing_client_dl_helpers):
@@ -541,94 +580,31 @@ class ClientDownloadHelper(object):
 
         # Create a sorted copy that will be used in the following. Make it
         # more deterministic by sorting the stations based on the id.
-        stations = copy.copy(list(self.stations.values()))
-        stations = sorted(stations, key=lambda x: (x.network, x.station))
+        stations = sorted(self.stations.values(),
+                          key=lambda x: (x.network, x.station))
 
         existing_stations = []
         for dlh in existing_client_dl_helpers:
-            existing_stations.extend(list(dlh.stations.values()))
-
-        remaining_stations = []
-        rejected_stations = []
+            existing_stations.extend(dlh.stations.values())
 
         # There are essentially two possibilities. If no station exists yet,
         # it will choose the largest subset of stations satisfying the
-        # minimum inter-station distance constraint.
-        if not existing_stations:
-            # Build k-d-tree and query for the neighbours of each point within
-            # the minimum distance.
-            kd_tree = utils.SphericalNearestNeighbour(stations)
-            nns = kd_tree.query_pairs(
-                self.restrictions.minimum_interstation_distance_in_m)
-
-            indexes_to_remove = []
-            # Keep removing the station with the most pairs until no pairs are
-            # left.
-            while nns:
-                most_common = collections.Counter(
-                    itertools.chain.from_iterable(nns)).most_common()[0][0]
-                indexes_to_remove.append(most_common)
-                nns = list(filterfalse(lambda x: most_common in x, nns))
-
-            # Remove these indices this results in a set of stations we wish to
-            # keep.
-            new_remaining_stations = [_i[1] for _i in enumerate(stations)
-                                      if _i[0] not in indexes_to_remove]
-            new_rejected_stations = [_i[1] for _i in enumerate(stations)
-                                     if _i[0] in indexes_to_remove]
-
-            # Station objects are not hashable thus we have to go the long
-            # route.
-            for st in new_remaining_stations:
-                if st not in remaining_stations:
-                    remaining_stations.append(st)
-
-            for st in new_rejected_stations:
-                if st not in rejected_stations:
-                    rejected_stations.append(st)
-
-            # Otherwise it will add new stations approximating a Poisson disk
-        # distribution.
-        else:
-            while stations:
-                # kd-tree with all existing_stations
-                existing_kd_tree = utils.SphericalNearestNeighbour(
-                    existing_stations)
-                # Now we have to get the distance to the closest existing
-                # station for all new stations.
-                distances = np.ma.array(existing_kd_tree.query(stations)[0])
-                if np.isinf(distances[0]):
-                    break
-                distances.mask = False
-
-                # Step one is to get rid of all stations that are closer
-                # than the minimum distance to any existing station.
-                remove = np.where(
-                    distances <
-                    self.restrictions.minimum_interstation_distance_in_m)[0]
-                rejected_stations.extend([stations[_i] for _i in remove])
-
-                keep = np.where(
-                    distances >=
-                    self.restrictions.minimum_interstation_distance_in_m)[0]
-                distances.mask[remove] = True
-
-                if len(keep):
-                    # Station with the largest distance to next closer station.
-                    largest = np.argmax(distances)
-                    remaining_stations.append(stations[largest])
-                    existing_stations.append(stations[largest])
-
-                    # Add all rejected stations here.
-                    stations = [stations[_i] for _i in keep if _i != largest]
-                else:
-                    stations = []
+        # minimum inter-station distance constraint. Otherwise it will add
+        # new stations approximating a Poisson disk distribution. Both are
+        # done on arrays with one k-d-tree per set of stations.
+        keep = utils.StationTable(stations).thin(
+            self.restrictions.minimum_interstation_distance_in_m,
+            existing=utils.StationTable(existing_stations))
+        remaining_stations = [_i for _i, _k in zip(stations, keep) if _k]
+        rejected_stations = [_i for _i, _k in zip(stations, keep) if not _k]
 
         # Now actually delete the files and everything of the rejected
         # stations.
         for station in rejected_stations:
             station.remove_files(logger=self.logger,
                                  reason="Minimum distance filtering.")
+            if self.state is not None:
+                self.state.remove_intervals(station.network, station.station)
         self.stations = {}
         for station in remaining_stations:
             self.stations[(station.network, station.station)] = station
@@ -646,14 +622,20 @@ class ClientDownloadHelper(object):
         for station in self.stations.values():
             station.prepare_stationxml_download(
                 stationxml_storage=self.stationxml_storage,
-                logger=self.logger)
+                logger=self.logger,
+                get_stationxml_contents=self._get_stationxml_contents)
 
-    def download_stationxml(self, threads=3):
+    def download_stationxml(self, threads=3, scheduler=None):
         """
         Actually download the StationXML files.
 
         :param threads: Limits the maximum number of threads for the client.
+        :param scheduler: Run the requests with this scheduler, ``threads``
+            is then only the initial number of concurrent requests.
+        :type scheduler: :class:`~.scheduler.DownloadScheduler`
         """
+        # Throttled requests are retried by the scheduler.
+        reraise = THROTTLING_ERRORS if scheduler is not None else ()
 
         def star_download_station(args):
             """
@@ -662,7 +644,10 @@ class ClientDownloadHelper(object):
             :param args: The to-be mapped arguments.
             """
             try:
-                ret_val = utils.download_stationxml(*args, logger=self.logger)
+                ret_val = utils.download_stationxml(*args, logger=self.logger,
+                                                    reraise=reraise)
+            except reraise:
+                raise
             except utils.ERRORS as e:
                 self.logger.error(str(e))
                 return None
@@ -690,9 +675,17 @@ class ClientDownloadHelper(object):
 
         # Download it.
         s_time = timeit.default_timer()
-        pool = ThreadPool(min(threads, len(arguments)))
-        results = pool.map(star_download_station, arguments)
-        pool.close()
+        if scheduler is None:
+            pool = ThreadPool(min(threads, len(arguments)))
+            results = pool.map(star_download_station, arguments)
+            pool.close()
+        else:
+            results = scheduler.map(
+                self.client_name,
+                lambda batch: star_download_station(batch[0]), arguments,
+                get_size=lambda result: os.path.getsize(result[1])
+                if result is not None else 0,
+                threads=threads, logger=self.logger)
         e_time = timeit.default_timer()
 
         results = [_i for _i in results if _i is not None]
@@ -710,7 +703,7 @@ class ClientDownloadHelper(object):
 
             # Extract information about that file.
             try:
-                info = utils.get_stationxml_contents(filename)
+                info = self._get_stationxml_contents(filename)
             # Sometimes some services choose to not return XML files - guard
             # against it and just delete the file. At subsequent runs the
             # mass downloader will attempt to download it again.
@@ -770,7 +763,8 @@ class ClientDownloadHelper(object):
                              e_time - s_time,
                              (download_size / 1024.0) / (e_time - s_time)))
 
-    def download_mseed(self, chunk_size_in_mb=25, threads_per_client=3):
+    def download_mseed(self, chunk_size_in_mb=25, threads_per_client=3,
+                       scheduler=None):
         """
         Actually download MiniSEED data.
 
@@ -778,6 +772,10 @@ class ClientDownloadHelper(object):
             size.
         :param threads_per_client: Threads to launch per client. 3 seems to
             be a value in agreement with some data centers.
+        :param scheduler: Run the requests with this scheduler, which adapts
+            the chunk size and the number of threads starting from the given
+            values.
+        :type scheduler: :class:`~.scheduler.DownloadScheduler`
         """
         # Estimate the download size to have equally sized chunks.
         channel_sampling_rate = {
@@ -786,10 +784,9 @@ class ClientDownloadHelper(object):
             "R": 0.001, "P": 0.0001, "T": 0.00001, "Q": 0.000001, "A": 5000,
             "O": 5000}
 
-        # Split into chunks of about equal size in terms of filesize.
-        chunks = []
-        chunks_curr = []
-        curr_chunks_mb = 0
+        # Everything to download with its estimated size in MB.
+        items = []
+        sizes = []
 
         # Don't request more than 50 chunks at once to not choke the servers.
         max_chunk_length = 50
@@ -814,20 +811,27 @@ class ClientDownloadHelper(object):
                     # some downloading.
                     if interval.status != STATUS.NEEDS_DOWNLOADING:
                         continue
-                    chunks_curr.append((
+                    items.append((
                         sta.network, sta.station, cha.location, cha.channel,
                         interval.start, interval.end, interval.filename))
                     # Assume that each sample needs 4 byte, STEIM
                     # compression reduces size to about a third.
                     # chunk size is in MB
                     duration = interval.end - interval.start
-                    curr_chunks_mb += \
-                        sr * duration * 4.0 / 3.0 / 1024.0 / 1024.0
-                    if curr_chunks_mb >= chunk_size_in_mb or \
-                            len(chunks_curr) >= max_chunk_length:
-                        chunks.append(chunks_curr)
-                        chunks_curr = []
-                        curr_chunks_mb = 0
+                    sizes.append(sr * duration * 4.0 / 3.0 / 1024.0 / 1024.0)
+
+        # Split into chunks of about equal size in terms of filesize.
+        chunks = []
+        chunks_curr = []
+        curr_chunks_mb = 0
+        for item, size in zip(items, sizes):
+            chunks_curr.append(item)
+            curr_chunks_mb += size
+            if curr_chunks_mb >= chunk_size_in_mb or \
+                    len(chunks_curr) >= max_chunk_length:
+                chunks.append(chunks_curr)
+                chunks_curr = []
+                curr_chunks_mb = 0
         if chunks_curr:
             chunks.append(chunks_curr)
 
@@ -852,6 +856,10 @@ class ClientDownloadHelper(object):
                 ret_val = utils.download_and_split_mseed_bulk(
                     *args, logger=self.logger)
             except utils.ERRORS as e:
+                # Throttled requests are retried by the scheduler.
+                if scheduler is not None and \
+                        isinstance(e, THROTTLING_ERRORS):
+                    raise
                 msg = ("Client '%s' - " % args[1]) + str(e)
                 if "no data available" in msg.lower():
                     self.logger.info(msg.split("Detailed response")[0].strip())
@@ -860,13 +868,25 @@ class ClientDownloadHelper(object):
                 return []
             return ret_val
 
-        pool = ThreadPool(min(threads_per_client, len(chunks)))
-
         d_start = timeit.default_timer()
-        pool.map(
-            star_download_mseed,
-            [(self.client, self.client_name, chunk) for chunk in chunks])
-        pool.close()
+        if scheduler is None:
+            pool = ThreadPool(min(threads_per_client, len(chunks)))
+            pool.map(
+                star_download_mseed,
+                [(self.client, self.client_name, chunk) for chunk in chunks])
+            pool.close()
+        else:
+            # The scheduler cuts the chunks itself.
+            scheduler.map(
+                self.client_name,
+                lambda chunk: star_download_mseed(
+                    (self.client, self.client_name, chunk)),
+                items, sizes=sizes, max_items=max_chunk_length,
+                get_size=lambda filenames: sum(
+                    os.path.getsize(_i) for _i in filenames
+                    if os.path.exists(_i)),
+                failed=[], threads=threads_per_client,
+                chunk_size_in_mb=chunk_size_in_mb, logger=self.logger)
         d_end = timeit.default_timer()
 
         self.logger.info("Client '%s' - Launching basic QC checks..." %
@@ -1052,21 +1072,31 @@ class ClientDownloadHelper(object):
         :type existing_client_dl_helpers: list of
             :class:`~.ClientDownloadHelper`
         """
-        station_ids = []
+        station_ids = set()
         for helper in existing_client_dl_helpers:
-            station_ids.extend(helper.stations.keys())
+            station_ids.update(helper.stations.keys())
 
-        for station_id in station_ids:
-            try:
-                del self.stations[station_id]
-            except KeyError:
-                pass
+        for station_id in station_ids.intersection(self.stations):
+            del self.stations[station_id]
 
     def get_availability(self):
         """
         Queries the current client for information on what stations are
         available given the spatial and temporal restrictions.
         """
+        if self.state is not None:
+            stored = self.state.get_availability(
+                self.client_name, self.restrictions, self.domain)
+            if stored is not None:
+                self.is_availability_reliable, self.stations = stored
+                self.logger.info(
+                    "Client '%s' - Using stored availability of %i stations "
+                    "(%i channels)." % (
+                        self.client_name, len(self.stations),
+                        sum([len(_i.channels)
+                             for _i in self.stations.values()])))
+                return
+
         # Check if stations needs to be filtered after downloading or if the
         # restrictions one can impose with the FDSN webservices queries are
         # enough. This depends on the domain definition.
@@ -1234,3 +1264,8 @@ class ClientDownloadHelper(object):
         self.logger.info("Client '%s' - Found %i stations (%i channels)." % (
             self.client_name, len(self.stations),
             sum([len(_i.channels) for _i in self.stations.values()])))
+
+        if self.state is not None:
+            self.state.set_availability(
+                self.client_name, self.restrictions, self.domain,
+                self.is_availability_reliable, self.stations)
@@ -10,6 +10,7 @@ services in an automated fashion.
     (https://www.gnu.org/copyleft/lesser.html)
 """
 import collections
+import concurrent.futures
 import logging
 from multiprocessing.pool import ThreadPool
 import os
@@ -17,9 +18,12 @@ import warnings
 
 from obspy.clients.fdsn.header import URL_MAPPINGS, FDSNException
 from obspy.clients.fdsn.client import Client
+from obspy.clients.fdsn.connection_pool import _get_connection_pool
 
 from . import utils
 from .download_helpers import ClientDownloadHelper, STATUS
+from .scheduler import DownloadScheduler
+from .state import DownloadState
 
 
 logger = logging.getLogger("obspy.clients.fdsn.mass_downloader")
@@ -49,8 +53,16 @@ class MassDownloader(object):
     :param debug: Debug flag passed to the underlying FDSN web service clients.
     :type providers: list[str] or :class:`~obspy.clients.fdsn.client.Client`
         instances
+    :param connection_pool: Keep connections to the data centers open and
+        reuse them for all requests. If ``True``, a pool shared by all clients
+        initialized by the mass downloader is created, a pool instance can
+        also be passed. Clients passed as ``providers`` keep their own
+        setting. See :class:`~obspy.clients.fdsn.client.Client`.
+    :type connection_pool: bool or
+        :class:`~obspy.clients.fdsn.connection_pool.HTTPConnectionPool`
     """
-    def __init__(self, providers=None, debug=False, configure_logging=True):
+    def __init__(self, providers=None, debug=False, configure_logging=True,
+                 connection_pool=None):
         if configure_logging:
             logger.setLevel(logging.DEBUG)
             # Prevent propagating to higher loggers.
@@ -64,6 +76,7 @@ class MassDownloader(object):
             ch.setFormatter(formatter)
             logger.addHandler(ch)
         self.debug = debug
+        self.connection_pool = _get_connection_pool(connection_pool)
         # If not given, use all providers ObsPy knows. They will be sorted
         # alphabetically except that ORFEUS is second to last and IRIS last.
         # The reason for this order is that smaller data centers can be
@@ -117,7 +130,8 @@ class MassDownloader(object):
 
     def download(self, domain, restrictions, mseed_storage,
                  stationxml_storage, download_chunk_size_in_mb=20,
-                 threads_per_client=3, print_report=True):
+                 threads_per_client=3, print_report=True,
+                 scheduler=None, state=None):
         """
         Launch the actual data download.
 
@@ -141,15 +155,62 @@ class MassDownloader(object):
         :param threads_per_client: The number of download threads launched
             per client.
         :type threads_per_client: int
+        :param scheduler: Run all requests with a central scheduler that
+            adapts the number of threads and the chunk size of every client
+            to its throughput, latency and throttling responses, starting
+            from ``threads_per_client`` and ``download_chunk_size_in_mb``.
+            If ``True``, a scheduler with default settings is used, an
+            instance can be passed to e.g. cap the total bandwidth. The
+            availability of all clients is then requested in parallel as
+            well.
+        :type scheduler: bool or :class:`~.scheduler.DownloadScheduler`
+        :param state: Filename of a SQLite database or a
+            :class:`~.state.DownloadState` recording the availability of all
+            clients and the status of all files. Restarting a download with
+            the same database reuses the availability and skips checking the
+            files already downloaded.
+        :type state: str or :class:`~.state.DownloadState`
         """
+        own_scheduler = scheduler is True
+        if own_scheduler:
+            scheduler = DownloadScheduler()
+        elif scheduler is False:
+            scheduler = None
+        own_state = isinstance(state, str)
+        if own_state:
+            state = DownloadState(state)
+
         # The downloads from each client will be handled separately.
         # Nonetheless collect all in this dictionary.
         client_download_helpers = {}
 
+        # The client download helper objects are responsible for the
+        # downloads of a single FDSN endpoint.
+        helpers = collections.OrderedDict(
+            (client_name, ClientDownloadHelper(
+                client=client, client_name=client_name,
+                restrictions=restrictions, domain=domain,
+                mseed_storage=mseed_storage,
+                stationxml_storage=stationxml_storage, logger=logger,
+                state=state))
+            for client_name, client in self._initialized_clients.items())
+
+        # The availability queries do not depend on each other, with a
+        # scheduler they are sent right away and run while the data of the
+        # preceding clients is downloaded.
+        availability = {}
+        if scheduler is not None and helpers:
+            executor = concurrent.futures.ThreadPoolExecutor(
+                max_workers=min(len(helpers), scheduler.max_threads))
+            availability = {
+                client_name: executor.submit(helper.get_availability)
+                for client_name, helper in helpers.items()}
+            executor.shutdown(wait=False)
+
         # Do it sequentially for each client. Doing it in parallel is not
         # really feasible as long as the availability queries are not
         # reliable for all endpoints.
-        for client_name, client in self._initialized_clients.items():
+        for client_name, helper in helpers.items():
             # Log some information about preexisting data.
             station_count = 0
             for _c in client_download_helpers.values():
@@ -160,19 +221,15 @@ class MassDownloader(object):
             logger.info("Total acquired or preexisting stations: %i" %
                         station_count)
 
-            # The client download helper object is responsible for the
-            # downloads of a single FDSN endpoint.
-            helper = ClientDownloadHelper(
-                client=client, client_name=client_name,
-                restrictions=restrictions, domain=domain,
-                mseed_storage=mseed_storage,
-                stationxml_storage=stationxml_storage, logger=logger)
             existing_client_dl_helpers = list(
                 client_download_helpers.values())
             client_download_helpers[client_name] = helper
 
             # Request the availability.
-            helper.get_availability()
+            if availability:
+                availability[client_name].result()
+            else:
+                helper.get_availability()
 
             # Continue if there is no data.
             if not helper:
@@ -209,16 +266,19 @@ class MassDownloader(object):
             # Download MiniSEED data.
             helper.prepare_mseed_download()
             helper.download_mseed(chunk_size_in_mb=download_chunk_size_in_mb,
-                                  threads_per_client=threads_per_client)
+                                  threads_per_client=threads_per_client,
+                                  scheduler=scheduler)
+            helper.save_state()
 
             # Download StationXML data.
             helper.prepare_stationxml_download()
-            helper.download_stationxml()
+            helper.download_stationxml(scheduler=scheduler)
 
             # Sanitize the downloaded things if desired. Assures that all
             # waveform data also has the corresponding station information.
             if restrictions.sanitize:
                 helper.sanitize_downloads()
+            helper.save_state()
 
             if not helper:
                 logger.info("Client '%s' - No data could be downloaded." %
@@ -285,6 +345,24 @@ class MassDownloader(object):
             logger.info("Downloaded %.1f MB in total." % (
                 total_downloaded_filesize / 1024.0 ** 2))
 
+            if scheduler is not None:
+                stats = scheduler.get_statistics()
+                for client_name in client_download_helpers:
+                    if client_name not in stats:
+                        continue
+                    logger.info(
+                        "Client '%s' - %i requests, %i throttled, finished "
+                        "with %i threads and %.1f MB chunks." % (
+                            client_name, stats[client_name]["requests"],
+                            stats[client_name]["throttled"],
+                            stats[client_name]["threads"],
+                            stats[client_name]["chunk_size_in_mb"]))
+
+        if own_scheduler:
+            scheduler.shutdown()
+        if own_state:
+            state.close()
+
         return client_download_helpers
 
     def _initialize_clients(self):
@@ -302,7 +380,9 @@ class MassDownloader(object):
                 name, client = client_name.base_url, client_name
             else:
                 try:
-                    this_client = Client(client_name, debug=self.debug)
+                    this_client = Client(
+                        client_name, debug=self.debug,
+                        connection_pool=self.connection_pool)
                     name, client = client_name, this_client
                 except utils.ERRORS as e:
                     if "timeout" in str(e).lower():
@@ -0,0 +1,387 @@
+# -*- coding: utf-8 -*-
+"""
+Adaptive scheduling of the requests of the mass downloader.
+
+The :class:`DownloadScheduler` runs the MiniSEED and StationXML requests of
+all providers in one thread pool. For every provider it adapts the number of
+concurrent requests and the size of the MiniSEED bulk requests to the
+observed throughput, latency and throttling of the data center, and it keeps
+the total download rate below an optional bandwidth cap.
+
+:copyright:
+    The ObsPy Development Team (devs@obspy.org)
+:license:
+    GNU Lesser General Public License, Version 3
+    (https://www.gnu.org/copyleft/lesser.html)
+"""
+import collections
+import concurrent.futures
+import threading
+import time
+
+from obspy.clients.fdsn.header import (FDSNServiceUnavailableException,
+                                       FDSNTooManyRequestsException)
+
+
+# Responses of data centers asking clients to send fewer requests.
+THROTTLING_ERRORS = (FDSNTooManyRequestsException,
+                     FDSNServiceUnavailableException)
+
+
+class DownloadScheduler(object):
+    """
+    Central scheduler for the requests of the mass downloader.
+
+    Per provider the scheduler starts with ``threads_per_client`` concurrent
+    requests and MiniSEED bulk requests of ``chunk_size_in_mb`` as passed to
+    :meth:`~.mass_downloader.MassDownloader.download` and then adapts both:
+
+    * The number of concurrent requests is tuned by hill climbing on the
+      throughput of the provider. It is increased as long as this increases
+      the throughput and decreased again once it does not. Requests taking
+      much longer per megabyte than usual also decrease it.
+    * A ``429 Too Many Requests`` or ``503 Service Unavailable`` response
+      halves the number of concurrent requests and pauses new requests to
+      the provider (doubling the pause on each further throttled request).
+      The throttled request is retried up to ``max_retries`` times.
+    * The chunk size is scaled so that MiniSEED requests take about
+      ``target_request_duration`` seconds.
+
+    The scheduler can be shared between several downloads, everything it
+    learned about a provider is kept.
+
+    :type max_threads: int
+    :param max_threads: Maximum number of requests running at the same time
+        across all providers.
+    :type max_threads_per_client: int
+    :param max_threads_per_client: Maximum number of concurrent requests to
+        a single provider.
+    :type min_chunk_size_in_mb: float
+    :param min_chunk_size_in_mb: Lower limit of the estimated size of
+        MiniSEED bulk requests.
+    :type max_chunk_size_in_mb: float
+    :param max_chunk_size_in_mb: Upper limit of the estimated size of
+        MiniSEED bulk requests.
+    :type target_request_duration: float
+    :param target_request_duration: Desired duration of a single MiniSEED
+        request in seconds.
+    :type max_bandwidth_in_mb: float
+    :param max_bandwidth_in_mb: Limit of the average total download rate in
+        MB/s. New requests are delayed while the data downloaded so far
+        exceeds this rate.
+    :type max_retries: int
+    :param max_retries: How often throttled requests are retried.
+    :type backoff: float
+    :param backoff: Initial pause in seconds after a throttled request.
+    """
+    def __init__(self, max_threads=12, max_threads_per_client=6,
+                 min_chunk_size_in_mb=1, max_chunk_size_in_mb=200,
+                 target_request_duration=30.0, max_bandwidth_in_mb=None,
+                 max_retries=3, backoff=1.0):
+        if max_threads < 1 or max_threads_per_client < 1:
+            msg = "The number of threads must be a positive integer."
+            raise ValueError(msg)
+        if not 0 < min_chunk_size_in_mb <= max_chunk_size_in_mb:
+            msg = ("min_chunk_size_in_mb must be positive and not larger "
+                   "than max_chunk_size_in_mb.")
+            raise ValueError(msg)
+        self.max_threads = max_threads
+        self.max_threads_per_client = max_threads_per_client
+        self.min_chunk_size_in_mb = min_chunk_size_in_mb
+        self.max_chunk_size_in_mb = max_chunk_size_in_mb
+        self.target_request_duration = target_request_duration
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self._bandwidth = _BandwidthLimiter(max_bandwidth_in_mb)
+        self._executor = concurrent.futures.ThreadPoolExecutor(
+            max_workers=max_threads,
+            thread_name_prefix="obspy-mass-downloader")
+        self._lock = threading.Lock()
+        self._providers = {}
+
+    def __str__(self):
+        return "DownloadScheduler(max_threads=%i, providers=%i)" % (
+            self.max_threads, len(self._providers))
+
+    def _repr_pretty_(self, p, cycle):
+        p.text(str(self))
+
+    def get_statistics(self):
+        """
+        Return a dictionary with the current state and counters of every
+        provider.
+
+        ``"threads"`` and ``"chunk_size_in_mb"`` are the current number of
+        concurrent requests and chunk size, ``"requests"``, ``"bytes"`` and
+        ``"seconds"`` count the finished requests, the downloaded bytes and
+        the time spent in them, ``"throttled"`` the 429/503 responses and
+        ``"failed"`` the requests that were given up after ``max_retries``
+        retries.
+        """
+        with self._lock:
+            return {name: state.get_statistics()
+                    for name, state in self._providers.items()}
+
+    def shutdown(self):
+        """
+        Stop the worker threads once all running requests are done.
+        """
+        self._executor.shutdown()
+
+    def _get_state(self, client_name, threads, chunk_size_in_mb):
+        with self._lock:
+            if client_name not in self._providers:
+                self._providers[client_name] = _ProviderState(
+                    self, min(max(threads, 1), self.max_threads_per_client),
+                    self._clip_chunk_size(chunk_size_in_mb))
+            return self._providers[client_name]
+
+    def _clip_chunk_size(self, chunk_size_in_mb):
+        return min(max(chunk_size_in_mb, self.min_chunk_size_in_mb),
+                   self.max_chunk_size_in_mb)
+
+    def map(self, client_name, function, items, sizes=None,
+            max_items=50, get_size=None, failed=None, threads=3,
+            chunk_size_in_mb=25, logger=None):
+        """
+        Call ``function`` for batches of items and return the results in
+        the order they finished.
+
+        :type client_name: str
+        :param client_name: Name of the provider the requests go to.
+        :param function: Called with a list of items in one of the worker
+            threads. Throttling errors it raises are handled by the
+            scheduler, it has to catch all other errors itself.
+        :type items: list
+        :param items: The items to process.
+        :type sizes: list[float]
+        :param sizes: Estimated size of each item in MB. If given, items are
+            grouped to batches of the current chunk size of the provider,
+            otherwise every batch holds a single item.
+        :type max_items: int
+        :param max_items: Maximum number of items in a batch.
+        :param get_size: Called with the result of a batch, returns the
+            number of downloaded bytes.
+        :param failed: Result of batches that were still throttled after
+            ``max_retries`` retries.
+        :type threads: int
+        :param threads: Initial number of concurrent requests to a provider
+            the scheduler did not see before.
+        :type chunk_size_in_mb: float
+        :param chunk_size_in_mb: Initial chunk size of a provider the
+            scheduler did not see before.
+        :param logger: Logger for changes of the provider settings.
+        """
+        state = self._get_state(client_name, threads, chunk_size_in_mb)
+        if sizes is None:
+            sizes_ = [0.0] * len(items)
+        else:
+            sizes_ = sizes
+        # Items with their size and the number of previous attempts.
+        pending = collections.deque(
+            (item, size, 0) for item, size in zip(items, sizes_))
+        running = {}
+        results = []
+        while pending or running:
+            while pending and len(running) < state.threads and \
+                    self._get_delay(state) <= 0:
+                batch = self._get_batch(pending, state, sizes is not None,
+                                        max_items)
+                future = self._executor.submit(_timed, function,
+                                               [_i[0] for _i in batch])
+                running[future] = (batch, state.chunk_size_in_mb)
+            timeout = None
+            if pending and len(running) < state.threads:
+                timeout = self._get_delay(state)
+            if not running:
+                time.sleep(timeout)
+                continue
+            done, _ = concurrent.futures.wait(
+                running, timeout=timeout,
+                return_when=concurrent.futures.FIRST_COMPLETED)
+            for future in done:
+                batch, chunk_size = running.pop(future)
+                try:
+                    result, seconds = future.result()
+                except THROTTLING_ERRORS as e:
+                    attempt = batch[0][2]
+                    state.on_throttled(logger, client_name, e)
+                    if attempt < self.max_retries:
+                        pending.extendleft(
+                            (item, size, attempt + 1)
+                            for item, size, _ in reversed(batch))
+                    else:
+                        state.count("failed")
+                        results.append(failed)
+                    continue
+                nbytes = get_size(result) if get_size else 0
+                self._bandwidth.add(nbytes)
+                estimated_mb = sum(_i[1] for _i in batch) \
+                    if sizes is not None else None
+                state.on_success(logger, client_name, nbytes, seconds,
+                                 estimated_mb, chunk_size)
+                results.append(result)
+        return results
+
+    def _get_delay(self, state):
+        return max(state.resume_time - time.monotonic(),
+                   self._bandwidth.delay())
+
+    def _get_batch(self, pending, state, use_sizes, max_items):
+        if not use_sizes:
+            return [pending.popleft()]
+        batch = []
+        size = 0.0
+        # Retried items are resent in their original batch.
+        attempt = pending[0][2]
+        while pending and len(batch) < max_items:
+            if pending[0][2] != attempt:
+                break
+            batch.append(pending.popleft())
+            size += batch[-1][1]
+            if size >= state.chunk_size_in_mb:
+                break
+        return batch
+
+
+class _ProviderState(object):
+    """
+    Adaptive settings and counters of a single provider.
+    """
+    def __init__(self, scheduler, threads, chunk_size_in_mb):
+        self.scheduler = scheduler
+        self.threads = threads
+        self.chunk_size_in_mb = chunk_size_in_mb
+        self.resume_time = 0.0
+        self._lock = threading.Lock()
+        self._statistics = collections.Counter()
+        self._pause = 0.0
+        # Moving average of the seconds per estimated MB.
+        self._seconds_per_mb = None
+        # Hill climbing state: direction of the last change, throughput of
+        # the last epoch and the current epoch.
+        self._direction = 1
+        self._last_rate = None
+        self._epoch_start = time.monotonic()
+        self._epoch_bytes = 0
+        self._epoch_requests = 0
+
+    def count(self, name, value=1):
+        with self._lock:
+            self._statistics[name] += value
+
+    def get_statistics(self):
+        with self._lock:
+            stats = {key: self._statistics[key] for key in (
+                "requests", "bytes", "seconds", "throttled", "failed")}
+            stats["threads"] = self.threads
+            stats["chunk_size_in_mb"] = self.chunk_size_in_mb
+        return stats
+
+    def _set_threads(self, threads, logger, client_name, reason):
+        threads = min(max(threads, 1), self.scheduler.max_threads_per_client)
+        if threads != self.threads and logger is not None:
+            logger.debug("Client '%s' - %s, using %i instead of %i "
+                         "concurrent requests." % (
+                             client_name, reason, threads, self.threads))
+        self.threads = threads
+
+    def _reset_epoch(self):
+        self._epoch_start = time.monotonic()
+        self._epoch_bytes = 0
+        self._epoch_requests = 0
+
+    def on_throttled(self, logger, client_name, exception):
+        with self._lock:
+            self._statistics["throttled"] += 1
+            self._pause = min(max(2 * self._pause, self.scheduler.backoff),
+                              60.0)
+            self.resume_time = time.monotonic() + self._pause
+            self._set_threads(self.threads // 2, logger, client_name,
+                              "Throttled by the server (%s)" %
+                              type(exception).__name__)
+            # Climb again from the reduced number of requests.
+            self._direction = 1
+            self._last_rate = None
+            self._reset_epoch()
+
+    def on_success(self, logger, client_name, nbytes, seconds,
+                   estimated_mb, chunk_size):
+        with self._lock:
+            self._statistics["requests"] += 1
+            self._statistics["bytes"] += nbytes
+            self._statistics["seconds"] += seconds
+            self._pause = 0.0
+            if estimated_mb:
+                self._update_chunk_size(seconds, estimated_mb, chunk_size,
+                                        logger, client_name)
+            self._epoch_bytes += nbytes
+            self._epoch_requests += 1
+            # Judge the throughput once every running request finished.
+            if self._epoch_requests < max(self.threads, 2):
+                return
+            elapsed = time.monotonic() - self._epoch_start
+            if elapsed <= 0:
+                return
+            rate = self._epoch_bytes / elapsed
+            if self._last_rate is not None:
+                if rate < 0.95 * self._last_rate:
+                    self._direction = -self._direction
+                elif rate < 1.05 * self._last_rate:
+                    # No significant change, prefer fewer requests.
+                    self._direction = -1
+            self._last_rate = rate
+            self._set_threads(self.threads + self._direction, logger,
+                              client_name, "Throughput %.1f KB/s" % (
+                                  rate / 1024.0))
+            self._reset_epoch()
+
+    def _update_chunk_size(self, seconds, estimated_mb, chunk_size, logger,
+                           client_name):
+        seconds_per_mb = seconds / estimated_mb
+        if self._seconds_per_mb is not None and \
+                seconds_per_mb > 3.0 * self._seconds_per_mb:
+            self._set_threads(self.threads - 1, logger, client_name,
+                              "Increased latency")
+        if self._seconds_per_mb is None:
+            self._seconds_per_mb = seconds_per_mb
+        else:
+            self._seconds_per_mb = \
+                0.7 * self._seconds_per_mb + 0.3 * seconds_per_mb
+        # Scale the chunk the request was made with, at most by a factor of
+        # two per request.
+        factor = self.scheduler.target_request_duration / max(seconds, 1e-3)
+        factor = min(max(factor, 0.5), 2.0)
+        self.chunk_size_in_mb = self.scheduler._clip_chunk_size(
+            chunk_size * factor)
+
+
+class _BandwidthLimiter(object):
+    """
+    Keeps the average download rate below a limit by delaying new requests
+    after large amounts of data have been downloaded.
+    """
+    def __init__(self, max_bandwidth_in_mb=None):
+        self.max_bandwidth = max_bandwidth_in_mb and \
+            max_bandwidth_in_mb * 1024.0 ** 2
+        self._lock = threading.Lock()
+        self._next_time = time.monotonic()
+
+    def add(self, nbytes):
+        if not self.max_bandwidth:
+            return
+        with self._lock:
+            self._next_time = max(self._next_time, time.monotonic()) + \
+                nbytes / self.max_bandwidth
+
+    def delay(self):
+        if not self.max_bandwidth:
+            return 0.0
+        with self._lock:
+            return self._next_time - time.monotonic()
+
+
+def _timed(function, batch):
+    start = time.monotonic()
+    result = function(batch)
+    return result, time.monotonic() - start
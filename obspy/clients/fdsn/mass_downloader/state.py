@@ -0,0 +1,293 @@
+# -*- coding: utf-8 -*-
+"""
+Persistent state of mass downloads.
+
+A :class:`DownloadState` records the availability of every client and the
+status of every station, channel and time interval of a download in a SQLite
+database. Restarting an interrupted or repeated download with the same
+database skips the availability requests and the inspection of the already
+downloaded MiniSEED and StationXML files:
+
+>>> from obspy.clients.fdsn.mass_downloader import MassDownloader
+>>> mdl = MassDownloader()  # doctest: +SKIP
+>>> mdl.download(domain, restrictions, mseed_storage="waveforms",
+...              stationxml_storage="stations",
+...              state="download_state.sqlite")  # doctest: +SKIP
+
+:copyright:
+    The ObsPy Development Team (devs@obspy.org)
+:license:
+    GNU Lesser General Public License, Version 3
+    (https://www.gnu.org/copyleft/lesser.html)
+"""
+import hashlib
+import json
+import os
+import pickle
+import sqlite3
+import threading
+import time
+
+import obspy
+
+from . import utils
+
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS availability (
+    client TEXT NOT NULL,
+    key TEXT NOT NULL,
+    reliable INTEGER,
+    stations BLOB NOT NULL,
+    obspy_version TEXT NOT NULL,
+    time REAL NOT NULL,
+    PRIMARY KEY (client, key)
+);
+CREATE TABLE IF NOT EXISTS intervals (
+    filename TEXT PRIMARY KEY,
+    client TEXT NOT NULL,
+    network TEXT NOT NULL,
+    station TEXT NOT NULL,
+    location TEXT NOT NULL,
+    channel TEXT NOT NULL,
+    starttime REAL NOT NULL,
+    endtime REAL NOT NULL,
+    status TEXT NOT NULL,
+    time REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS intervals_station ON intervals (network, station);
+CREATE TABLE IF NOT EXISTS stationxml (
+    filename TEXT PRIMARY KEY,
+    mtime INTEGER NOT NULL,
+    size INTEGER NOT NULL,
+    contents TEXT NOT NULL
+);
+"""
+
+
+class DownloadState(object):
+    """
+    SQLite database with the state of a mass download.
+
+    The database stores
+
+    * the stations and channels returned by the availability request of
+      every client for the given restrictions and domain,
+    * the status and filename of every MiniSEED time interval after it has
+      been processed by a client and
+    * the channels with response information of every StationXML file,
+      renewed whenever the size or modification time of the file changes.
+
+    MiniSEED files recorded as downloaded or existing are assumed to still
+    exist and are neither checked nor downloaded again. Call :meth:`clear`
+    or use a new database after deleting or changing files by hand. Failed
+    and rejected time intervals are attempted again.
+
+    The database can be shared by threads and, as SQLite locks it, by
+    processes.
+
+    :type filename: str
+    :param filename: The database file, created if it does not exist.
+    :type availability_ttl: float
+    :param availability_ttl: Time in seconds the stored availability of a
+        client is used. ``None`` uses it forever, ``0`` requests the
+        availability on every download.
+
+    .. warning::
+        The availability is stored as a pickle which can execute arbitrary
+        code when loaded. Only use databases nobody else can write to.
+    """
+    def __init__(self, filename, availability_ttl=None):
+        if availability_ttl is not None and availability_ttl < 0:
+            msg = "availability_ttl must not be negative."
+            raise ValueError(msg)
+        self.filename = filename
+        self.availability_ttl = availability_ttl
+        dirname = os.path.dirname(os.path.abspath(filename))
+        if not os.path.exists(dirname):
+            os.makedirs(dirname)
+        self._lock = threading.Lock()
+        self._connection = sqlite3.connect(filename, timeout=60,
+                                           check_same_thread=False)
+        with self._lock, self._connection:
+            self._connection.executescript(_SCHEMA)
+
+    def __str__(self):
+        return "DownloadState(filename=%r, availability_ttl=%s)" % (
+            self.filename, self.availability_ttl)
+
+    def _repr_pretty_(self, p, cycle):
+        p.text(str(self))
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    def close(self):
+        """
+        Close the connection to the database.
+        """
+        with self._lock:
+            self._connection.close()
+
+    def _execute(self, sql, parameters=()):
+        with self._lock, self._connection:
+            return self._connection.execute(sql, parameters).fetchall()
+
+    def get_statistics(self):
+        """
+        Return a dictionary with the number of recorded MiniSEED time
+        intervals per status.
+        """
+        return dict(self._execute(
+            "SELECT status, COUNT(*) FROM intervals GROUP BY status"))
+
+    def clear(self):
+        """
+        Remove everything from the database.
+        """
+        with self._lock, self._connection:
+            for table in ("availability", "intervals", "stationxml"):
+                self._connection.execute("DELETE FROM %s" % table)
+
+    def get_availability(self, client_name, restrictions, domain):
+        """
+        Return a tuple of the reliability of the availability and the
+        dictionary of stations stored for a client or ``None``.
+
+        :type client_name: str
+        :param client_name: The name of the client.
+        :type restrictions: :class:`~.restrictions.Restrictions`
+        :param restrictions: The restrictions of the download.
+        :type domain: :class:`~.domain.Domain`
+        :param domain: The domain of the download.
+        """
+        rows = self._execute(
+            "SELECT reliable, stations, obspy_version, time FROM "
+            "availability WHERE client = ? AND key = ?",
+            (client_name, _get_key(restrictions, domain)))
+        if not rows:
+            return None
+        reliable, stations, version, stored = rows[0]
+        if version != obspy.__version__:
+            return None
+        if self.availability_ttl is not None and \
+                time.time() - stored >= self.availability_ttl:
+            return None
+        try:
+            stations = pickle.loads(stations)
+        except Exception:
+            return None
+        return (None if reliable is None else bool(reliable)), stations
+
+    def set_availability(self, client_name, restrictions, domain, reliable,
+                         stations):
+        """
+        Store the availability of a client.
+
+        :type client_name: str
+        :param client_name: The name of the client.
+        :type restrictions: :class:`~.restrictions.Restrictions`
+        :param restrictions: The restrictions of the download.
+        :type domain: :class:`~.domain.Domain`
+        :param domain: The domain of the download.
+        :type reliable: bool
+        :param reliable: Whether the availability information is reliable.
+        :type stations: dict
+        :param stations: The stations of the client download helper.
+        """
+        self._execute(
+            "INSERT OR REPLACE INTO availability VALUES (?, ?, ?, ?, ?, ?)",
+            (client_name, _get_key(restrictions, domain), reliable,
+             pickle.dumps(stations, protocol=pickle.HIGHEST_PROTOCOL),
+             obspy.__version__, time.time()))
+
+    def get_interval_status(self, network, station):
+        """
+        Return a dictionary mapping the filenames of all recorded time
+        intervals of a station to their status.
+        """
+        return dict(self._execute(
+            "SELECT filename, status FROM intervals WHERE network = ? AND "
+            "station = ?", (network, station)))
+
+    def set_interval_status(self, client_name, stations):
+        """
+        Record the status of all time intervals of some stations.
+
+        :type client_name: str
+        :param client_name: The name of the client.
+        :type stations: list of :class:`~.download_helpers.Station`
+        :param stations: The stations with their channels and intervals.
+        """
+        now = time.time()
+        rows = [(interval.filename, client_name, station.network,
+                 station.station, channel.location, channel.channel,
+                 interval.start.timestamp, interval.end.timestamp,
+                 interval.status, now)
+                for station in stations
+                for channel in station.channels
+                for interval in channel.intervals
+                if isinstance(interval.filename, str)]
+        with self._lock, self._connection:
+            self._connection.executemany(
+                "INSERT OR REPLACE INTO intervals VALUES "
+                "(?, ?, ?, ?, ?, ?, ?, ?, ?, ?)", rows)
+
+    def remove_intervals(self, network, station):
+        """
+        Remove all recorded time intervals of a station.
+        """
+        self._execute("DELETE FROM intervals WHERE network = ? AND "
+                      "station = ?", (network, station))
+
+    def get_stationxml_contents(self, filename):
+        """
+        Return the channels with response information in a StationXML file
+        like :func:`~.utils.get_stationxml_contents`, but only parse the
+        file if it has not been parsed before or changed since.
+
+        :param filename: The path to the file.
+        :returns: list of ChannelAvailability objects.
+        """
+        stat = os.stat(filename)
+        rows = self._execute(
+            "SELECT contents FROM stationxml WHERE filename = ? AND "
+            "mtime = ? AND size = ?",
+            (filename, stat.st_mtime_ns, stat.st_size))
+        if rows:
+            return [utils.ChannelAvailability(
+                net, sta, loc, cha, obspy.UTCDateTime(start),
+                obspy.UTCDateTime(end), filename)
+                for net, sta, loc, cha, start, end in json.loads(rows[0][0])]
+        contents = utils.get_stationxml_contents(filename)
+        self._execute(
+            "INSERT OR REPLACE INTO stationxml VALUES (?, ?, ?, ?)",
+            (filename, stat.st_mtime_ns, stat.st_size, json.dumps([
+                (_i.network, _i.station, _i.location, _i.channel,
+                 str(_i.starttime), str(_i.endtime)) for _i in contents])))
+        return contents
+
+
+def _get_key(*objects):
+    """
+    Return a key identifying the types and attributes of some objects.
+    """
+    items = []
+    for obj in objects:
+        attributes = []
+        for name, value in sorted(getattr(obj, "__dict__", {}).items()):
+            # The iteration order of sets changes between runs.
+            if isinstance(value, (set, frozenset)):
+                value = sorted(value)
+            attributes.append((name, value))
+        items.append((type(obj).__module__, type(obj).__qualname__,
+                      attributes))
+    return hashlib.sha256(repr(items).encode()).hexdigest()
+
+
+if __name__ == '__main__':
+    import doctest
+    doctest.testmod(exclude_empty=True)
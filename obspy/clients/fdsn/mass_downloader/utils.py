@@ -10,6 +10,7 @@ Utility functions required for the download helpers.
 """
 import collections
 import fnmatch
+import heapq
 import itertools
 import os
 from http.client import HTTPException
@@ -42,7 +43,8 @@ ChannelAvailability = collections.namedtuple(
      "filename"])
 
 
-def download_stationxml(client, client_name, bulk, filename, logger):
+def download_stationxml(client, client_name, bulk, filename, logger,
+                        reraise=()):
     """
     Download all channels for a station in the already prepared bulk list.
 
@@ -54,6 +56,9 @@ def download_stationxml(client, client_name, bulk, filename, logger):
         to come from the same station.
     :param filename: The filename to download to.
     :param logger: The logger instance to use for logging.
+    :param reraise: Exception types that are raised instead of being logged,
+        e.g. to retry throttled requests.
+    :type reraise: tuple
 
     :returns: A tuple with the network and station id and the filename upon
         success
@@ -63,6 +68,8 @@ def download_stationxml(client, client_name, bulk, filename, logger):
     try:
         client.get_stations_bulk(bulk=bulk, level="response",
                                  filename=filename)
+    except reraise:
+        raise
     except Exception:
         logger.info("Failed to download StationXML from '%s' for station "
                     "'%s.%s'." % (client_name, network, station))
@@ -287,22 +294,165 @@ class SphericalNearestNeighbour(object):
         Converts a list of :class:`~obspy.clients.fdsn.download_status.Station`
         objects to an array of shape(len(list), 3) containing x/y/z in meters.
         """
-        # Create three arrays containing lat/lng/radius.
-        shape = len(data)
         lat = np.array([_i.latitude for _i in data], dtype=np.float64)
         lon = np.array([_i.longitude for _i in data], dtype=np.float64)
-        r = np.array([EARTH_RADIUS for _ in data], dtype=np.float64)
-        # Convert data from lat/lng to x/y/z.
-        colat = 90.0 - lat
-        cart_data = np.empty((shape, 3), dtype=np.float64)
-
-        cart_data[:, 0] = r * np.sin(np.deg2rad(colat)) * \
-            np.cos(np.deg2rad(lon))
-        cart_data[:, 1] = r * np.sin(np.deg2rad(colat)) * \
-            np.sin(np.deg2rad(lon))
-        cart_data[:, 2] = r * np.cos(np.deg2rad(colat))
-
-        return cart_data
+        return _spherical_to_cartesian(lat, lon)
+
+
+def _spherical_to_cartesian(latitudes, longitudes):
+    """
+    Converts arrays of latitudes and longitudes to an array of shape
+    (len(latitudes), 3) containing x/y/z in meters.
+    """
+    colat = np.deg2rad(90.0 - latitudes)
+    lon = np.deg2rad(longitudes)
+    cart_data = np.empty((len(latitudes), 3), dtype=np.float64)
+    cart_data[:, 0] = EARTH_RADIUS * np.sin(colat) * np.cos(lon)
+    cart_data[:, 1] = EARTH_RADIUS * np.sin(colat) * np.sin(lon)
+    cart_data[:, 2] = EARTH_RADIUS * np.cos(colat)
+    return cart_data
+
+
+class StationTable(object):
+    """
+    Array-backed table of stations for vectorized proximity queries.
+
+    The coordinates and priorities of all stations are stored in NumPy arrays
+    and a single kd-tree of their Cartesian coordinates is built when first
+    needed. Distances are straight line distances in meters.
+
+    :param stations: Objects with ``latitude`` and ``longitude`` attributes,
+        e.g. :class:`~.download_helpers.Station` objects.
+    :type stations: list
+    :param priorities: Stations with higher values are preferably kept when
+        thinning the table. Defaults to the order of the stations.
+    :type priorities: list of int
+    """
+    def __init__(self, stations, priorities=None):
+        self.stations = list(stations)
+        count = len(self.stations)
+        self.latitudes = np.fromiter(
+            (_i.latitude for _i in self.stations), dtype=np.float64,
+            count=count)
+        self.longitudes = np.fromiter(
+            (_i.longitude for _i in self.stations), dtype=np.float64,
+            count=count)
+        if priorities is None:
+            self.priorities = np.arange(count)
+        else:
+            self.priorities = np.asarray(priorities)
+            if self.priorities.shape != (count, ):
+                msg = "One priority per station is required."
+                raise ValueError(msg)
+        self.coordinates = _spherical_to_cartesian(self.latitudes,
+                                                   self.longitudes)
+        self._kd_tree = None
+
+    def __len__(self):
+        return len(self.stations)
+
+    @property
+    def kd_tree(self):
+        if self._kd_tree is None:
+            self._kd_tree = cKDTree(data=self.coordinates, leafsize=10)
+        return self._kd_tree
+
+    def get_distances(self, other):
+        """
+        Returns the distance of every station of another table to the
+        closest station of this table. Infinite if this table is empty.
+
+        :type other: :class:`StationTable`
+        """
+        if not len(self) or not len(other):
+            return np.full(len(other), np.inf)
+        return self.kd_tree.query(other.coordinates)[0]
+
+    def thin(self, minimum_distance, existing=None):
+        """
+        Returns a boolean array marking the stations to keep so that all
+        kept stations have at least the minimum distance to each other.
+
+        Without existing stations, the station with the most neighbours
+        closer than the minimum distance is removed until no such pairs are
+        left. On ties the station with the lowest priority is removed.
+        Otherwise the station farthest from the existing and the already
+        kept stations is kept until no station has the minimum distance to
+        all of them, approximating a Poisson disk distribution.
+
+        :param minimum_distance: The minimum distance in meters.
+        :type minimum_distance: float
+        :param existing: Stations that are already kept.
+        :type existing: :class:`StationTable`
+        """
+        if existing is None or not len(existing):
+            return self._remove_closest(minimum_distance)
+        return self._add_farthest(minimum_distance, existing)
+
+    def _remove_closest(self, minimum_distance):
+        count = len(self)
+        keep = np.ones(count, dtype=bool)
+        if count < 2:
+            return keep
+        pairs = self.kd_tree.query_pairs(minimum_distance,
+                                         output_type="ndarray")
+        if not len(pairs):
+            return keep
+        neighbour_count = np.bincount(pairs.ravel(), minlength=count)
+        # Neighbours of every station in compressed sparse row layout.
+        pairs = np.concatenate([pairs, pairs[:, ::-1]])
+        pairs = pairs[np.argsort(pairs[:, 0], kind="stable")]
+        offsets = np.zeros(count + 1, dtype=np.int64)
+        np.cumsum(np.bincount(pairs[:, 0], minlength=count), out=offsets[1:])
+        neighbours = pairs[:, 1]
+
+        priorities = self.priorities.tolist()
+        # Heap with possibly outdated entries, they are skipped.
+        heap = [(-neighbour_count[_i], priorities[_i], _i)
+                for _i in np.nonzero(neighbour_count)[0].tolist()]
+        heapq.heapify(heap)
+        while heap:
+            neighbours_left, _, index = heapq.heappop(heap)
+            if -neighbours_left != neighbour_count[index] or \
+                    not keep[index]:
+                continue
+            keep[index] = False
+            neighbour_count[index] = 0
+            remaining = neighbours[offsets[index]:offsets[index + 1]]
+            remaining = remaining[keep[remaining]]
+            neighbour_count[remaining] -= 1
+            for _i in remaining[neighbour_count[remaining] > 0].tolist():
+                heapq.heappush(heap, (-neighbour_count[_i], priorities[_i],
+                                      _i))
+        return keep
+
+    def _add_farthest(self, minimum_distance, existing):
+        keep = np.zeros(len(self), dtype=bool)
+        distances = existing.get_distances(self)
+        candidates = distances >= minimum_distance
+        heap = [(-distances[_i], _i)
+                for _i in np.nonzero(candidates)[0].tolist()]
+        heapq.heapify(heap)
+        while heap:
+            distance, index = heapq.heappop(heap)
+            if -distance != distances[index] or not candidates[index]:
+                continue
+            keep[index] = True
+            candidates[index] = False
+            # Only stations closer to the new station than its distance to
+            # the previous ones can get closer to the kept stations.
+            closer = np.array(self.kd_tree.query_ball_point(
+                self.coordinates[index], -distance), dtype=np.int64)
+            closer = closer[candidates[closer]]
+            new_distances = np.linalg.norm(
+                self.coordinates[closer] - self.coordinates[index], axis=1)
+            mask = new_distances < distances[closer]
+            closer = closer[mask]
+            distances[closer] = new_distances[mask]
+            candidates[closer[distances[closer] < minimum_distance]] = False
+            for _i in closer[candidates[closer]].tolist():
+                heapq.heappush(heap, (-distances[_i], _i))
+        return keep
 
 
 def filter_channel_priority(channels, key, priorities=None):
@@ -69,6 +69,10 @@ class EIDAWSRoutingClient(BaseRoutingClient):
         <http://www.orfeus-eu.org/data/eida/webservices/routing/>`_
         for details.
         """
+        return self._download_waveforms(
+            self._route_waveforms(bulk, **kwargs), **kwargs)
+
+    def _route_waveforms(self, bulk, **kwargs):
         # Multi-step procedure - first get the stations to be able to use
         # more query parameters - and then construct the waveform string
         # from it.
@@ -118,9 +122,8 @@ class EIDAWSRoutingClient(BaseRoutingClient):
         bulk_str = get_bulk_string(new_bulk, arguments)
         r = self._download(self._url + "/query", data=bulk_str,
                            content_type='text/plain')
-        split = self._split_routing_response(
+        return self._split_routing_response(
             r.content.decode() if hasattr(r.content, "decode") else r.content)
-        return self._download_waveforms(split, **kwargs)
 
     @_assert_filename_not_in_kwargs
     def get_stations(self, **kwargs):
@@ -168,6 +171,11 @@ class EIDAWSRoutingClient(BaseRoutingClient):
         <http://www.orfeus-eu.org/data/eida/webservices/routing/>`_
         for details.
         """
+        return self._download_stations(
+            self._route_stations(bulk, **kwargs), **kwargs)
+
+    @_assert_format_not_in_kwargs
+    def _route_stations(self, bulk, **kwargs):
         arguments = collections.OrderedDict()
         arguments["service"] = "station"
         arguments["format"] = "post"
@@ -175,9 +183,8 @@ class EIDAWSRoutingClient(BaseRoutingClient):
         bulk_str = get_bulk_string(bulk, arguments)
         r = self._download(self._url + "/query", data=bulk_str,
                            content_type='text/plain')
-        split = self._split_routing_response(
+        return self._split_routing_response(
             r.content.decode() if hasattr(r.content, "decode") else r.content)
-        return self._download_stations(split, **kwargs)
 
     @staticmethod
     def _split_routing_response(data):
@@ -66,6 +66,10 @@ class FederatorRoutingClient(BaseRoutingClient):
         web site of the `EarthScope (former IRIS) Federator
         <https://service.iris.edu/irisws/fedcatalog/1/>`_ for details.
         """
+        return self._download_waveforms(
+            self._route_waveforms(bulk, **kwargs), **kwargs)
+
+    def _route_waveforms(self, bulk, **kwargs):
         bulk_params = ["network", "station", "location", "channel",
                        "starttime", "endtime"]
         for _i in bulk_params:
@@ -83,7 +87,7 @@ class FederatorRoutingClient(BaseRoutingClient):
         split = self._split_routing_response(
             r.content.decode() if hasattr(r.content, "decode") else r.content,
             service="dataselect")
-        return self._download_waveforms(split, **kwargs)
+        return split
 
     @_assert_filename_not_in_kwargs
     def get_stations(self, **kwargs):
@@ -119,6 +123,10 @@ class FederatorRoutingClient(BaseRoutingClient):
         web site of the `EarthScope (former IRIS) Federator
         <https://service.iris.edu/irisws/fedcatalog/1/>`_ for details.
         """
+        return self._download_stations(
+            self._route_stations(bulk, **kwargs), **kwargs)
+
+    def _route_stations(self, bulk, **kwargs):
         bulk_params = ["network", "station", "location", "channel",
                        "starttime", "endtime"]
         for _i in bulk_params:
@@ -138,7 +146,7 @@ class FederatorRoutingClient(BaseRoutingClient):
         split = self._split_routing_response(
             r.content.decode() if hasattr(r.content, "decode") else r.content,
             service="station")
-        return self._download_stations(split, **kwargs)
+        return split
 
     @staticmethod
     def _split_routing_response(data, service):
@@ -11,7 +11,7 @@ Base class for all FDSN routers.
     GNU Lesser General Public License, Version 3
     (https://www.gnu.org/copyleft/lesser.html)
 """
-from multiprocessing.dummy import Pool as ThreadPool
+import concurrent.futures
 
 import decorator
 import io
@@ -26,6 +26,7 @@ from obspy.core.util.deprecation_helpers import ObsPyDeprecationWarning
 from ...base import HTTPClient
 from .. import client
 from ..client import raise_on_error
+from ..connection_pool import _get_connection_pool
 from ..header import FDSNException, URL_MAPPINGS, FDSNNoDataException
 
 
@@ -118,19 +119,26 @@ def _download_bulk(r):
     # (2) A global EIDA_TOKEN key. It will be used for all services that
     #     don't have explicit credentials and also support the `/auth` route.
     credentials = r["credentials"].get(urlparse(r["endpoint"]).netloc, {})
-    try:
-        c = client.Client(r["endpoint"], debug=r["debug"],
-                          timeout=r["timeout"], **credentials)
-    # This should rarely happen but better safe than sorry.
-    except FDSNException as e:  # pragma: no cover
-        msg = e.args[0]
-        msg += "It will not be used for routing. Try again later?"
-        warnings.warn(msg)
-        return None
-
-    if not credentials and "EIDA_TOKEN" in r["credentials"] and \
-            c._has_eida_auth:
-        c.set_eida_token(r["credentials"]["EIDA_TOKEN"])
+    # Clients are reused for all requests to the same data center, this
+    # avoids discovering its services again.
+    c = r["clients"].get(r["endpoint"])
+    if c is None:
+        try:
+            c = client.Client(r["endpoint"], debug=r["debug"],
+                              timeout=r["timeout"],
+                              connection_pool=r["connection_pool"],
+                              **credentials)
+        # This should rarely happen but better safe than sorry.
+        except FDSNException as e:  # pragma: no cover
+            msg = e.args[0]
+            msg += "It will not be used for routing. Try again later?"
+            warnings.warn(msg)
+            return None
+
+        if not credentials and "EIDA_TOKEN" in r["credentials"] and \
+                c._has_eida_auth:
+            c.set_eida_token(r["credentials"]["EIDA_TOKEN"])
+        r["clients"][r["endpoint"]] = c
 
     if r["data_type"] == "waveform":
         fct = c.get_waveforms_bulk
@@ -160,7 +168,8 @@ def _strip_protocol(url):
 # get_events() but also others).
 class BaseRoutingClient(HTTPClient):
     def __init__(self, debug=False, timeout=120, include_providers=None,
-                 exclude_providers=None, credentials=None):
+                 exclude_providers=None, credentials=None,
+                 connection_pool=None, max_concurrency=None):
         """
         :type routing_type: str
         :param routing_type: The type of
@@ -185,8 +194,26 @@ class BaseRoutingClient(HTTPClient):
             center specific credentials.
             You can also use a URL mapping as for the normal FDSN client
             instead of the URL.
+        :type connection_pool: bool or
+            :class:`~obspy.clients.fdsn.connection_pool.HTTPConnectionPool`
+        :param connection_pool: Keep connections to the data centers open
+            and reuse them for subsequent requests. If ``True``, a pool
+            shared by all requests of this routing client is created, a pool
+            instance can also be passed. See
+            :class:`~obspy.clients.fdsn.client.Client`.
+        :type max_concurrency: int
+        :param max_concurrency: The maximum number of data centers queried
+            at the same time. ``None`` queries all data centers of a request
+            at once.
         """
         HTTPClient.__init__(self, debug=debug, timeout=timeout)
+        if max_concurrency is not None and max_concurrency < 1:
+            msg = "max_concurrency must be at least 1."
+            raise ValueError(msg)
+        self.max_concurrency = max_concurrency
+        self.connection_pool = _get_connection_pool(connection_pool)
+        # The FDSN clients of the data centers by URL.
+        self._clients = {}
         self.include_providers = include_providers
         self.exclude_providers = exclude_providers
 
@@ -253,6 +280,32 @@ class BaseRoutingClient(HTTPClient):
         return self._download_parallel(split, data_type="station", **kwargs)
 
     def _download_parallel(self, split, data_type, **kwargs):
+        results = dict(self._iter_download(split, data_type, **kwargs))
+
+        # Merge all results into a single object.
+        if data_type == "waveform":
+            collection = obspy.Stream()
+        elif data_type == "station":
+            collection = obspy.Inventory(
+                networks=[],
+                source="ObsPy FDSN Routing %s" % obspy.__version__)
+        else:  # pragma: no cover
+            raise ValueError
+
+        # In the order of the routing response.
+        for endpoint in split:
+            if not results.get(endpoint):
+                continue
+            collection += results[endpoint]
+
+        return collection
+
+    def _iter_download(self, split, data_type, **kwargs):
+        """
+        Download from all data centers in parallel and yield tuples of the
+        data center URL and its result in the order they finish. Data
+        centers without results are skipped.
+        """
         # Apply the provider filter.
         split = self._filter_requests(split)
 
@@ -264,7 +317,7 @@ class BaseRoutingClient(HTTPClient):
         if data_type not in ["waveform", "station"]:  # pragma: no cover
             raise ValueError("Invalid data type.")
 
-        # One thread per data center.
+        # One thread per data center, unless limited.
         dl_requests = []
         for k, v in split.items():
             dl_requests.append({
@@ -274,30 +327,29 @@ class BaseRoutingClient(HTTPClient):
                 "bulk_str": v,
                 "data_type": data_type,
                 "kwargs": kwargs,
-                "credentials": self.credentials})
-        pool = ThreadPool(processes=len(dl_requests))
-        results = pool.map(_try_download_bulk, dl_requests)
-
-        # Merge all results into a single object.
-        if data_type == "waveform":
-            collection = obspy.Stream()
-        elif data_type == "station":
-            collection = obspy.Inventory(
-                networks=[],
-                source="ObsPy FDSN Routing %s" % obspy.__version__)
-        else:  # pragma: no cover
-            raise ValueError
-
-        for _i in results:
-            if not _i:
-                continue
-            collection += _i
-
-        # Explitly close the thread pool as somehow this does not work
-        # automatically under linux. See #2342.
-        pool.close()
-
-        return collection
+                "credentials": self.credentials,
+                "connection_pool": self.connection_pool,
+                "clients": self._clients})
+        return self._iter_results(dl_requests)
+
+    def _iter_results(self, dl_requests):
+        executor = concurrent.futures.ThreadPoolExecutor(
+            max_workers=min(self.max_concurrency or len(dl_requests),
+                            len(dl_requests)))
+        futures = {executor.submit(_try_download_bulk, r): r["endpoint"]
+                   for r in dl_requests}
+        try:
+            for future in concurrent.futures.as_completed(futures):
+                result = future.result()
+                if not result:
+                    continue
+                yield futures[future], result
+        finally:
+            # Do not start the remaining requests if the caller stops
+            # early.
+            for future in futures:
+                future.cancel()
+            executor.shutdown(wait=False)
 
     def _handle_requests_http_error(self, r):
         """
@@ -343,6 +395,56 @@ class BaseRoutingClient(HTTPClient):
         bulk.extend([starttime, endtime])
         return self.get_waveforms_bulk([bulk], **kwargs)
 
+    @_assert_filename_not_in_kwargs
+    @_assert_attach_response_not_in_kwargs
+    def iter_waveforms_bulk(self, bulk, **kwargs):
+        """
+        Get waveforms from multiple data centers and yield them per data
+        center as soon as its download finished.
+
+        Arguments are the same as for ``get_waveforms_bulk()``. Yields tuples
+        of the URL of a data center and a :class:`~obspy.core.stream.Stream`
+        with its data, data centers without data are skipped. A slow data
+        center thus does not delay processing the data of the others:
+
+        >>> from obspy.clients.fdsn import RoutingClient
+        >>> client = RoutingClient("eida-routing", max_concurrency=4)
+        >>> t = UTCDateTime(2017, 1, 1)  # doctest: +SKIP
+        >>> for url, st in client.iter_waveforms_bulk(
+        ...         [("G?", "*", "*", "LHZ", t, t + 60)]):  # doctest: +SKIP
+        ...     print(url, len(st))
+        http://ws.resif.fr 4
+        http://geofon.gfz-potsdam.de 1
+        """
+        split = self._route_waveforms(bulk, **kwargs)
+        return self._iter_download(split, data_type="waveform", **kwargs)
+
+    @_assert_filename_not_in_kwargs
+    def iter_stations_bulk(self, bulk, **kwargs):
+        """
+        Get stations from multiple data centers and yield them per data
+        center as soon as its download finished.
+
+        Arguments are the same as for ``get_stations_bulk()``. Yields tuples
+        of the URL of a data center and an
+        :class:`~obspy.core.inventory.inventory.Inventory` with its stations,
+        data centers without stations are skipped.
+        """
+        split = self._route_stations(bulk, **kwargs)
+        return self._iter_download(split, data_type="station", **kwargs)
+
+    def _route_waveforms(self, bulk, **kwargs):
+        """
+        Return the waveform requests per data center for a bulk request.
+        """
+        raise NotImplementedError
+
+    def _route_stations(self, bulk, **kwargs):
+        """
+        Return the station requests per data center for a bulk request.
+        """
+        raise NotImplementedError
+
     def get_service_version(self):
         """
         Return a semantic version number of the remote service as a string.
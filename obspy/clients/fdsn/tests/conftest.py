@@ -0,0 +1,90 @@
+# -*- coding: utf-8 -*-
+"""
+Fixtures shared by the obspy.clients.fdsn test suite.
+
+:copyright:
+    The ObsPy Development Team (devs@obspy.org)
+:license:
+    GNU Lesser General Public License, Version 3
+    (https://www.gnu.org/copyleft/lesser.html)
+"""
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+
+class _RequestHandler(BaseHTTPRequestHandler):
+    """
+    Records the connection and request and passes it on to the ``handler``
+    of the server. The body of POST requests is read into ``body``.
+    """
+    protocol_version = "HTTP/1.1"
+    # Headers and body are written separately.
+    disable_nagle_algorithm = True
+
+    def do_GET(self):
+        self.body = None
+        self._handle()
+
+    def do_POST(self):
+        self.body = self.rfile.read(int(self.headers["Content-Length"]))
+        self._handle()
+
+    def _handle(self):
+        self.server.connections.add(self.client_address)
+        self.server.requests.append((self.path, dict(self.headers)))
+        self.server.handler(self)
+
+    def respond(self, body, status=200, headers=None):
+        """
+        Send a complete response with the given body and headers.
+        """
+        self.send_response(status)
+        for key, value in (headers or {}).items():
+            self.send_header(key, value)
+        if body is not None:
+            self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        if body is not None:
+            self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture(scope="module")
+def http_handler():
+    """
+    Called with the request handler for every request to ``http_server``.
+    Override it in a test module to serve other responses.
+    """
+    def handler(request):
+        request.respond(request.body or b"",
+                        headers={"Content-Type": "text/plain"})
+    return handler
+
+
+@pytest.fixture(scope="module")
+def http_server(http_handler):
+    """
+    Local HTTP/1.1 server supporting keep-alive. The ``connections`` and
+    ``requests`` it received are reset by the ``url`` fixture.
+    """
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _RequestHandler)
+    server.daemon_threads = True
+    server.handler = http_handler
+    server.connections = set()
+    server.requests = []
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture
+def url(http_server):
+    http_server.connections.clear()
+    http_server.requests = []
+    return "http://127.0.0.1:%i" % http_server.server_port
@@ -0,0 +1,153 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+The obspy.clients.fdsn.async_client test suite.
+
+:copyright:
+    The ObsPy Development Team (devs@obspy.org)
+:license:
+    GNU Lesser General Public License, Version 3
+    (https://www.gnu.org/copyleft/lesser.html)
+"""
+import asyncio
+import io
+import threading
+import time
+import warnings
+from unittest import mock
+
+import pytest
+
+from obspy import Inventory, Stream, UTCDateTime, read
+from obspy.clients.fdsn import AsyncClient, Client
+from obspy.clients.fdsn.connection_pool import HTTPConnectionPool
+from obspy.clients.fdsn.header import FDSNNoDataException
+
+
+class TestAsyncClient():
+    """
+    Test cases for obspy.clients.fdsn.async_client.AsyncClient.
+    """
+    def test_init(self):
+        client = AsyncClient(_discover_services=False, max_concurrency=3)
+        assert isinstance(client.client, Client)
+        assert isinstance(client.client.connection_pool, HTTPConnectionPool)
+        assert client.client.connection_pool.maxsize == 3
+
+        sync_client = Client(_discover_services=False)
+        client = AsyncClient(sync_client)
+        assert client.client is sync_client
+        with pytest.raises(ValueError):
+            AsyncClient(sync_client, timeout=10)
+        with pytest.raises(ValueError):
+            AsyncClient(sync_client, max_concurrency=0)
+
+    def test_bounded_concurrency(self):
+        """
+        All requests are awaited concurrently, but at most max_concurrency
+        of them are running at the same time.
+        """
+        client = AsyncClient(_discover_services=False, max_concurrency=4)
+        lock = threading.Lock()
+        running = []
+        max_running = []
+
+        def get_waveforms(network, station, *args, **kwargs):
+            with lock:
+                running.append(station)
+                max_running.append(len(running))
+            time.sleep(0.05)
+            with lock:
+                running.remove(station)
+            return station
+
+        client.client.get_waveforms = get_waveforms
+        t = UTCDateTime(2020, 1, 1)
+
+        async def main():
+            async with client:
+                return await asyncio.gather(*[
+                    client.get_waveforms("XX", str(i), "", "HHZ", t, t + 1)
+                    for i in range(20)])
+
+        start = time.perf_counter()
+        results = asyncio.run(main())
+        assert results == [str(i) for i in range(20)]
+        assert max(max_running) == 4
+        # 20 requests of 50 ms with 4 at a time.
+        assert time.perf_counter() - start < 20 * 0.05
+
+    @mock.patch('obspy.clients.fdsn.client.download_url')
+    def test_requests(self, download_mock):
+        """
+        Requests are sent and parsed by the underlying client.
+        """
+        client = AsyncClient(_discover_services=False)
+        t = UTCDateTime(2009, 8, 24, 0, 20, 3)
+
+        def download_url(url, **kwargs):
+            bio = io.BytesIO()
+            if "dataselect" in url:
+                read().write(bio, "MSEED")
+            elif "station" in url:
+                Inventory().write(bio, "STATIONXML")
+            else:
+                return 204, None
+            bio.seek(0)
+            return 200, bio
+
+        download_mock.side_effect = download_url
+
+        async def main():
+            async with client:
+                return await asyncio.gather(
+                    client.get_waveforms("BW", "RJOB", "", "EHZ", t, t + 1),
+                    client.get_waveforms_bulk(
+                        [("BW", "RJOB", "", "EHZ", t, t + 1)]),
+                    client.get_stations(network="BW"),
+                    client.get_events(minmagnitude=10),
+                    return_exceptions=True)
+
+        st, st_bulk, inv, exc = asyncio.run(main())
+        assert isinstance(st, Stream)
+        assert len(st) == 3
+        assert isinstance(st_bulk, Stream)
+        assert isinstance(inv, Inventory)
+        assert isinstance(exc, FDSNNoDataException)
+
+    @mock.patch('obspy.clients.fdsn.client.download_url')
+    def test_concurrent_decoding(self, download_mock):
+        """
+        MiniSEED responses producing libmseed warnings can be decoded in
+        several threads at once.
+        """
+        bio = io.BytesIO()
+        read().write(bio, "MSEED", reclen=512)
+        data = bio.getvalue()
+        # Non-SEED data between the records.
+        data = b"".join(data[i:i + 512] + b"x" * 512
+                        for i in range(0, len(data), 512))
+
+        def download_url(url, **kwargs):
+            return 200, io.BytesIO(data)
+
+        download_mock.side_effect = download_url
+        client = AsyncClient(_discover_services=False, max_concurrency=8)
+        t = UTCDateTime(2009, 8, 24, 0, 20, 3)
+
+        async def main():
+            async with client:
+                return await asyncio.gather(*[
+                    client.get_waveforms("BW", "RJOB", "", "EHZ", t, t + 1)
+                    for _ in range(40)])
+
+        with warnings.catch_warnings(record=True) as w:
+            warnings.simplefilter("always")
+            expected = client.client.get_waveforms(
+                "BW", "RJOB", "", "EHZ", t, t + 1)
+            count = len(w)
+            results = asyncio.run(main())
+        assert count > 0
+        assert len(w) == 41 * count
+        assert len(expected) == 3
+        assert all(st == expected for st in results)
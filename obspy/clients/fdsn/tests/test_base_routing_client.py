@@ -8,6 +8,8 @@
     (https://www.gnu.org/copyleft/lesser.html)
 """
 import collections
+import threading
+import time
 import warnings
 from unittest import mock
 
@@ -214,3 +216,79 @@ class TestBaseRoutingClient():
             "Failed to download data of type 'station' from "
             "'https://example.com' due to:")
         assert "ValueError: random" in msg
+
+    def test_bounded_concurrency_and_client_reuse(self):
+        """
+        At most max_concurrency data centers are queried at the same time
+        and the client of each data center is only created once.
+        """
+        split = {"http://example%i.com" % _i: "1234" for _i in range(8)}
+        lock = threading.Lock()
+        running = []
+        max_running = []
+
+        def get_waveforms_bulk(*args, **kwargs):
+            with lock:
+                running.append(1)
+                max_running.append(len(running))
+            time.sleep(0.02)
+            with lock:
+                running.pop()
+            return obspy.read()
+
+        with mock.patch("obspy.clients.fdsn.client.Client") as p:
+            mock_instance = p.return_value
+            mock_instance.get_waveforms_bulk.side_effect = get_waveforms_bulk
+            mock_instance.services = {"dataselect": {}}
+            c = self._cls_object(max_concurrency=3)
+            for _ in range(2):
+                st = c._download_waveforms(split=split)
+                assert len(st) == 24
+        assert max(max_running) == 3
+        assert p.call_count == 8
+        assert mock_instance.get_waveforms_bulk.call_count == 16
+
+        with pytest.raises(ValueError):
+            self._cls_object(max_concurrency=0)
+
+    def test_iter_download(self):
+        """
+        Results are yielded per data center as soon as they arrive.
+        """
+        split = {"http://slow.com": "1234", "http://fast.com": "1234",
+                 "http://empty.com": "1234"}
+        clients = {}
+
+        def get_client(url, **kwargs):
+            clients[url] = mock.MagicMock()
+            clients[url].services = {"station": {}}
+            if "empty" in url:
+                result = obspy.Inventory([], "")
+            else:
+                result = obspy.read_inventory()
+
+            def get_stations_bulk(*args, **kwargs):
+                if "slow" in url:
+                    time.sleep(0.2)
+                return result
+            clients[url].get_stations_bulk.side_effect = get_stations_bulk
+            return clients[url]
+
+        with mock.patch("obspy.clients.fdsn.client.Client") as p:
+            p.side_effect = get_client
+            c = self._cls_object()
+            results = list(c._iter_download(split, data_type="station"))
+            assert [_i[0] for _i in results] == ["http://fast.com",
+                                                 "http://slow.com"]
+            assert results[0][1] == obspy.read_inventory()
+
+            # Routing requests of subclasses.
+            with mock.patch.object(c, "_route_stations",
+                                   return_value=split) as route:
+                it = c.iter_stations_bulk([("BW", "*", "*", "*", "*", "*")],
+                                          level="station")
+                assert route.call_args[1] == {"level": "station"}
+                assert next(it)[0] == "http://fast.com"
+                it.close()
+        with pytest.raises(ValueError):
+            c.iter_stations_bulk([], filename="out.xml")
@@ -0,0 +1,194 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+The obspy.clients.fdsn.cache test suite.
+
+:copyright:
+    The ObsPy Development Team (devs@obspy.org)
+:license:
+    GNU Lesser General Public License, Version 3
+    (https://www.gnu.org/copyleft/lesser.html)
+"""
+import io
+from unittest import mock
+
+import pytest
+
+from obspy import Catalog, Inventory, read_events, read_inventory
+from obspy.clients.fdsn import Client
+from obspy.clients.fdsn.cache import ResponseCache
+
+
+def _to_bytes(obj, format):
+    bio = io.BytesIO()
+    obj.write(bio, format=format)
+    return bio.getvalue()
+
+
+STATIONXML = _to_bytes(read_inventory(), "STATIONXML")
+QUAKEML = _to_bytes(read_events(), "QUAKEML")
+
+
+@pytest.fixture(scope="module")
+def http_handler():
+    """
+    Serves StationXML for station and QuakeML for event queries with the
+    ETag of the server and answers matching conditional requests with 304.
+    """
+    def handler(request):
+        etag = request.server.etag
+        if etag and request.headers.get("If-None-Match") == etag:
+            request.respond(None, status=304, headers={"ETag": etag})
+            return
+        headers = {"Content-Type": "application/xml"}
+        if etag:
+            headers["ETag"] = etag
+        request.respond(
+            STATIONXML if "/station/" in request.path else QUAKEML,
+            headers=headers)
+    return handler
+
+
+@pytest.fixture
+def url(url, http_server):
+    http_server.etag = '"v1"'
+    return url
+
+
+class TestResponseCache():
+    """
+    Test cases for the ResponseCache using a local HTTP server.
+    """
+    def test_get_key(self, tmp_path):
+        cache = ResponseCache(str(tmp_path))
+        key = cache.get_key("http://a.org/query?network=IU&level=response")
+        assert key == cache.get_key(
+            "HTTP://A.org/query?level=response&network=IU")
+        assert key != cache.get_key("http://a.org/query?network=II")
+        assert key != cache.get_key(
+            "http://a.org/query?network=IU&level=response", user="user")
+        key = cache.get_key("http://a.org/query", data=b"level=channel\n"
+                            b"IU ANMO * BHZ 2020-01-01 2020-01-02")
+        assert key == cache.get_key(
+            "http://a.org/query", data="\n level=channel \n\n"
+            "IU ANMO * BHZ 2020-01-01 2020-01-02\n")
+        assert key != cache.get_key("http://a.org/query",
+                                    data=b"level=station")
+        with pytest.raises(ValueError):
+            ResponseCache(str(tmp_path), store_raw=False, store_parsed=False)
+
+    def test_hit_and_miss(self, http_server, url, tmp_path):
+        """
+        Repeated queries are answered from the cache, also by new clients
+        using the same directory.
+        """
+        client = Client(url, _discover_services=False, cache=str(tmp_path))
+        assert isinstance(client.cache, ResponseCache)
+        for _ in range(3):
+            inv = client.get_stations(network="BW", level="response")
+            assert isinstance(inv, Inventory)
+            cat = client.get_events(minmagnitude=5)
+            assert isinstance(cat, Catalog)
+            inv = client.get_stations_bulk("level=channel\nBW * * * * *")
+            assert isinstance(inv, Inventory)
+        assert len(http_server.requests) == 3
+        assert client.cache.get_statistics() == {
+            "hits": 6, "revalidated": 0, "misses": 3}
+        # A different query.
+        client.get_stations(network="GR", level="response")
+        assert len(http_server.requests) == 4
+
+        cache = ResponseCache(str(tmp_path))
+        client = Client(url, _discover_services=False, cache=cache)
+        assert client.get_stations(level="response", network="BW") == \
+            read_inventory()
+        assert len(http_server.requests) == 4
+        assert cache.get_statistics()["hits"] == 1
+
+        cache.clear()
+        client.get_stations(level="response", network="BW")
+        assert len(http_server.requests) == 5
+
+    def test_revalidation(self, http_server, url, tmp_path):
+        """
+        Expired entries are revalidated with their ETag.
+        """
+        cache = ResponseCache(str(tmp_path), ttl=0)
+        client = Client(url, _discover_services=False, cache=cache)
+        client.get_stations(network="BW")
+        assert "If-None-Match" not in http_server.requests[-1][1]
+        inv = client.get_stations(network="BW")
+        assert http_server.requests[-1][1]["If-None-Match"] == '"v1"'
+        assert inv == read_inventory()
+        assert cache.get_statistics() == {
+            "hits": 0, "revalidated": 1, "misses": 1}
+
+        # Changed on the server.
+        http_server.etag = '"v2"'
+        client.get_stations(network="BW")
+        client.get_stations(network="BW")
+        assert cache.get_statistics() == {
+            "hits": 0, "revalidated": 2, "misses": 2}
+        assert http_server.requests[-1][1]["If-None-Match"] == '"v2"'
+
+        # Without validators the response is downloaded again.
+        http_server.etag = None
+        client.get_stations(network="GR")
+        client.get_stations(network="GR")
+        assert "If-None-Match" not in http_server.requests[-1][1]
+        assert cache.get_statistics()["misses"] == 4
+
+    def test_filename(self, http_server, url, tmp_path):
+        """
+        Raw responses are written to files from the cache as well.
+        """
+        client = Client(url, _discover_services=False,
+                        cache=str(tmp_path / "cache"))
+        for _ in range(2):
+            bio = io.BytesIO()
+            assert client.get_stations(network="BW", filename=bio) is None
+            assert bio.getvalue() == STATIONXML
+            filename = str(tmp_path / "stations.xml")
+            client.get_stations(network="BW", filename=filename)
+            with open(filename, "rb") as fh:
+                assert fh.read() == STATIONXML
+        assert len(http_server.requests) == 1
+        # Parsed when first needed.
+        with mock.patch("obspy.clients.fdsn.client.read_inventory",
+                        side_effect=read_inventory) as p:
+            client.get_stations(network="BW")
+            client.get_stations(network="BW")
+        assert p.call_count == 1
+        assert len(http_server.requests) == 1
+
+    def test_store_options(self, http_server, url, tmp_path):
+        cache = ResponseCache(str(tmp_path / "parsed"), store_raw=False)
+        client = Client(url, _discover_services=False, cache=cache)
+        client.get_events()
+        assert client.get_events() == read_events()
+        # Raw data is not available.
+        client.get_events(filename=io.BytesIO())
+        assert len(http_server.requests) == 2
+
+        cache = ResponseCache(str(tmp_path / "raw"), store_parsed=False)
+        client = Client(url, _discover_services=False, cache=cache)
+        with mock.patch("obspy.clients.fdsn.client.read_inventory",
+                        side_effect=read_inventory) as p:
+            for _ in range(3):
+                client.get_stations()
+        assert p.call_count == 3
+        assert len(http_server.requests) == 3
+
+    def test_other_obspy_version(self, http_server, url, tmp_path):
+        """
+        Pickles of other ObsPy versions are not used.
+        """
+        client = Client(url, _discover_services=False, cache=str(tmp_path))
+        client.get_stations()
+        with mock.patch("obspy.__version__", "0.0.0"):
+            with mock.patch("obspy.clients.fdsn.client.read_inventory",
+                            side_effect=read_inventory) as p:
+                assert client.get_stations() == read_inventory()
+                client.get_stations()
+        assert p.call_count == 1
+        assert len(http_server.requests) == 1
@@ -9,6 +9,7 @@ The obspy.clients.fdsn.client test suite.
     GNU Lesser General Public License, Version 3
     (https://www.gnu.org/copyleft/lesser.html)
 """
+import gzip
 import io
 import re
 import sys
@@ -28,7 +29,8 @@ from obspy import (
 from obspy.core.util.base import NamedTemporaryFile, CatchAndAssertWarnings
 from obspy.core.util.deprecation_helpers import ObsPyDeprecationWarning
 from obspy.clients.fdsn import Client, RoutingClient
-from obspy.clients.fdsn.client import (build_url, parse_simple_xml,
+from obspy.clients.fdsn.client import (build_url, download_url,
+                                       parse_simple_xml,
                                        get_bulk_string, _cleanup_earthscope)
 from obspy.clients.fdsn.header import (DEFAULT_USER_AGENT, URL_MAPPINGS,
                                        FDSNException, FDSNRedirectException,
@@ -1623,6 +1625,63 @@ class TestClientNoNetwork():
         with pytest.raises(FDSNNoDataException):
             self.client.get_stations()
 
+    @mock.patch("obspy.clients.fdsn.client.download_url")
+    def test_streamed_waveforms(self, download_url_mock):
+        """
+        Dataselect responses are decoded while they are downloaded.
+        """
+        st = read()
+        st[1].stats.channel = "EHE"
+        bio = io.BytesIO()
+        st.write(bio, format="MSEED", reclen=512)
+        raw = bio.getvalue()
+        bulk = [("BW", "RJOB", "", "EH?", st[0].stats.starttime,
+                 st[0].stats.endtime)]
+        download_url_mock.side_effect = \
+            lambda *args, **kwargs: (200, io.BytesIO(raw))
+
+        got = self.client.get_waveforms_bulk(bulk)
+        assert download_url_mock.call_args[1]["stream"] is True
+        expected = read(io.BytesIO(raw), format="MSEED")
+        assert [tr.id for tr in got] == [tr.id for tr in expected]
+        for tr_got, tr_expected in zip(got, expected):
+            np.testing.assert_array_equal(tr_got.data, tr_expected.data)
+            assert tr_got.stats.starttime == tr_expected.stats.starttime
+
+        # Traces are yielded one by one, the raw data can be kept as well.
+        target = io.BytesIO()
+        traces = list(self.client.iter_waveforms_bulk(bulk, filename=target))
+        assert [tr.id for tr in traces] == [tr.id for tr in expected]
+        assert target.getvalue() == raw
+        with NamedTemporaryFile() as tf:
+            traces = list(self.client.iter_waveforms_bulk(
+                bulk, filename=tf.name))
+            with open(tf.name, "rb") as fh:
+                assert fh.read() == raw
+        assert all(tr.stats._fdsnws_dataselect_url.endswith(
+                   "/fdsnws/dataselect/1/query") for tr in traces)
+
+    def test_download_url_stream(self):
+        """
+        Streamed responses are decompressed on the fly.
+        """
+        class _Response(io.BytesIO):
+            def getcode(self):
+                return 200
+
+            def info(self):
+                return {"Content-Encoding": "gzip"}
+
+        response = _Response(gzip.compress(b"abc" * 1000))
+        opener = mock.Mock()
+        opener.open.return_value = response
+        code, data = download_url("http://example.com", opener, stream=True)
+        assert code == 200
+        assert data.read(6) == b"abcabc"
+        assert data.read() == b"abc" * 998
+        data.close()
+        assert response.closed
+
     @mock.patch("obspy.clients.fdsn.client.download_url")
     def test_request_too_large_exception(self, download_url_mock):
         """
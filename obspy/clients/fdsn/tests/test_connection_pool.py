@@ -0,0 +1,174 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+The obspy.clients.fdsn.connection_pool test suite.
+
+:copyright:
+    The ObsPy Development Team (devs@obspy.org)
+:license:
+    GNU Lesser General Public License, Version 3
+    (https://www.gnu.org/copyleft/lesser.html)
+"""
+import urllib.request as urllib_request
+from multiprocessing.pool import ThreadPool
+from unittest import mock
+
+import pytest
+
+from obspy.clients.fdsn import Client
+from obspy.clients.fdsn.client import download_url
+from obspy.clients.fdsn.connection_pool import HTTPConnectionPool
+
+
+BODY = b"Network|Station\n" + b"IU|ANMO\n" * 1000
+
+
+@pytest.fixture(scope="module")
+def http_handler():
+    """
+    Serves ``BODY`` for every path, ``/close`` asks the client to close the
+    connection and ``/chunked`` uses chunked transfer encoding. POST requests
+    are answered with the request body.
+    """
+    def handler(request):
+        if request.body is not None:
+            request.respond(request.body)
+        elif request.path.startswith("/chunked"):
+            request.send_response(200)
+            request.send_header("Transfer-Encoding", "chunked")
+            request.end_headers()
+            for i in range(0, len(BODY), 4096):
+                chunk = BODY[i:i + 4096]
+                request.wfile.write(b"%x\r\n%s\r\n" % (len(chunk), chunk))
+            request.wfile.write(b"0\r\n\r\n")
+        elif request.path.startswith("/close"):
+            request.respond(BODY, headers={"Connection": "close"})
+        else:
+            request.respond(BODY)
+    return handler
+
+
+class TestHTTPConnectionPool():
+    """
+    Test cases for the HTTPConnectionPool using a local HTTP server.
+    """
+    def test_connection_reuse(self, http_server, url):
+        pool = HTTPConnectionPool()
+        opener = urllib_request.build_opener(*pool.get_handlers())
+        for _ in range(10):
+            code, data = download_url(url + "/query", opener,
+                                      use_gzip=False)
+            assert code == 200
+            assert data == BODY
+        assert len(http_server.connections) == 1
+        stats = pool.get_statistics()
+        assert stats == {"requests": 10, "connections": 1, "reused": 9,
+                         "discarded": 0, "idle": 1}
+        pool.clear()
+        assert pool.get_statistics()["idle"] == 0
+
+    def test_no_reuse_without_pool(self, http_server, url):
+        opener = urllib_request.build_opener()
+        for _ in range(3):
+            code, data = download_url(url + "/query", opener)
+            assert data == BODY
+        assert len(http_server.connections) == 3
+
+    def test_chunked_and_post(self, http_server, url):
+        pool = HTTPConnectionPool()
+        opener = urllib_request.build_opener(*pool.get_handlers())
+        for _ in range(3):
+            code, data = download_url(url + "/chunked", opener)
+            assert data == BODY
+            code, data = download_url(url + "/query", opener,
+                                      data=b"IU ANMO * * 2020-01-01 *")
+            assert data == b"IU ANMO * * 2020-01-01 *"
+        assert len(http_server.connections) == 1
+
+    def test_connection_close_is_not_pooled(self, http_server, url):
+        pool = HTTPConnectionPool()
+        opener = urllib_request.build_opener(*pool.get_handlers())
+        for _ in range(3):
+            code, data = download_url(url + "/close", opener)
+            assert data == BODY
+        assert len(http_server.connections) == 3
+        stats = pool.get_statistics()
+        assert stats["connections"] == 3
+        assert stats["idle"] == 0
+
+    def test_partially_read_response_is_discarded(self, http_server, url):
+        pool = HTTPConnectionPool()
+        opener = urllib_request.build_opener(*pool.get_handlers())
+        response = opener.open(url + "/query")
+        assert response.read(10) == BODY[:10]
+        response.close()
+        assert pool.get_statistics()["idle"] == 0
+        code, data = download_url(url + "/query", opener)
+        assert data == BODY
+        assert len(http_server.connections) == 2
+
+    def test_stale_connection(self, http_server, url):
+        """
+        Connections closed by the server while idle are replaced by new
+        ones, also if this is only noticed when sending the request.
+        """
+        pool = HTTPConnectionPool()
+        opener = urllib_request.build_opener(*pool.get_handlers())
+        download_url(url + "/query", opener)
+        # Let the server close the connection while it is idle.
+        conn = pool._idle[("http", url[7:])][0]
+        conn.sock.shutdown(0)
+        code, data = download_url(url + "/query", opener)
+        assert data == BODY
+        assert pool.get_statistics()["discarded"] == 1
+        # Not detected before sending the request.
+        conn = pool._idle[("http", url[7:])][0]
+        conn.sock.shutdown(2)
+        with mock.patch("obspy.clients.fdsn.connection_pool._is_dropped",
+                        return_value=False):
+            code, data = download_url(url + "/query", opener)
+        assert data == BODY
+        stats = pool.get_statistics()
+        assert stats["discarded"] == 2
+        assert stats["connections"] == 3
+
+    def test_maxsize(self, http_server, url):
+        pool = HTTPConnectionPool(maxsize=2)
+        opener = urllib_request.build_opener(*pool.get_handlers())
+        threadpool = ThreadPool(8)
+        results = threadpool.map(
+            lambda _i: download_url(url + "/query", opener), range(40))
+        threadpool.close()
+        assert all(data == BODY for _, data in results)
+        stats = pool.get_statistics()
+        assert stats["requests"] == 40
+        assert stats["idle"] <= 2
+        assert stats["connections"] == \
+            stats["discarded"] + stats["idle"]
+        with pytest.raises(ValueError):
+            HTTPConnectionPool(maxsize=0)
+
+    def test_client(self, http_server, url):
+        """
+        Clients can own a pool or share one.
+        """
+        client = Client(url, _discover_services=False)
+        assert client.connection_pool is None
+        client = Client(url, _discover_services=False, connection_pool=True)
+        for _ in range(3):
+            assert client._download(url + "/query",
+                                    return_string=True) == BODY
+        assert client.connection_pool.get_statistics()["connections"] == 1
+        # The pool is kept when the credentials change.
+        client.set_credentials("user", "password")
+        assert client._download(url + "/query", return_string=True) == BODY
+        assert client.connection_pool.get_statistics()["reused"] == 3
+
+        pool = HTTPConnectionPool()
+        clients = [Client(url, _discover_services=False, connection_pool=pool)
+                   for _ in range(2)]
+        for client in clients:
+            assert client._download(url + "/query",
+                                    return_string=True) == BODY
+        assert pool.get_statistics()["connections"] == 1
+        assert len(http_server.connections) == 2
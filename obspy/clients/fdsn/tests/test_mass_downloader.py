@@ -15,6 +15,7 @@ import os
 import shutil
 import sys
 import tempfile
+import time
 from socket import timeout as socket_timeout
 from unittest import mock
 
@@ -30,15 +31,20 @@ import numpy as np
 import obspy
 from obspy.core.util.base import NamedTemporaryFile
 from obspy.clients.fdsn import Client
+from obspy.clients.fdsn.header import (FDSNServiceUnavailableException,
+                                       FDSNTooManyRequestsException)
 from obspy.clients.fdsn.mass_downloader import (domain, Restrictions,
                                                 MassDownloader)
 from obspy.clients.fdsn.mass_downloader.utils import (
     filter_channel_priority, get_stationxml_filename, get_mseed_filename,
-    get_stationxml_contents, SphericalNearestNeighbour, safe_delete,
+    get_stationxml_contents, SphericalNearestNeighbour, StationTable,
+    safe_delete,
     download_stationxml, download_and_split_mseed_bulk,
     _get_stationxml_contents_slow)
 from obspy.clients.fdsn.mass_downloader.download_helpers import (
     Channel, TimeInterval, Station, STATUS, ClientDownloadHelper)
+from obspy.clients.fdsn.mass_downloader.scheduler import DownloadScheduler
+from obspy.clients.fdsn.mass_downloader.state import DownloadState
 
 
 class TestDomain():
@@ -433,6 +439,51 @@ class TestDownloadHelpersUtil():
         # 100 km apart. Only contains points a and c.
         assert tree.query_pairs(100000) == {(0, 2)}
 
+    def test_station_table(self):
+        """
+        Tests the array-backed station table.
+        """
+        def _m_to_deg(meters):
+            return meters / 111000.0
+
+        stations = [Station("", "", 0.0, _m_to_deg(_i), [])
+                    for _i in (0, 200, 250, 400, 2000)]
+        table = StationTable(stations)
+        assert len(table) == 5
+        np.testing.assert_allclose(table.longitudes[1], _m_to_deg(200))
+        np.testing.assert_equal(table.priorities, np.arange(5))
+        # The same coordinates as the spherical kd-tree.
+        np.testing.assert_allclose(
+            table.coordinates,
+            SphericalNearestNeighbour.spherical2cartesian(stations))
+
+        distances = table.get_distances(StationTable(
+            [Station("", "", 0.0, _m_to_deg(1000), [])]))
+        np.testing.assert_allclose(distances, [600], rtol=1E-2)
+        assert np.isinf(StationTable([]).get_distances(table)).all()
+
+        # Removes the stations with the most neighbours.
+        np.testing.assert_equal(
+            table.thin(250), [True, False, False, True, True])
+        np.testing.assert_equal(
+            StationTable(stations[:2]).thin(250), [False, True])
+        np.testing.assert_equal(
+            StationTable(stations[:2], priorities=[1, 0]).thin(250),
+            [True, False])
+        np.testing.assert_equal(table.thin(10), [True] * 5)
+
+        # Adds the stations farthest from the existing ones.
+        existing = StationTable([stations[0], stations[-1]])
+        table = StationTable(stations[1:-1] + [
+            Station("", "", 0.0, _m_to_deg(1900), [])])
+        np.testing.assert_equal(
+            table.thin(210, existing=existing), [False, False, True, False])
+        np.testing.assert_equal(
+            table.thin(100, existing=existing), [True, False, True, True])
+
+        with pytest.raises(ValueError):
+            StationTable(stations, priorities=[1, 2])
+
     def test_safe_delete(self):
         """
         Test the safe-delete function.
@@ -2117,6 +2168,59 @@ class TestClientDownloadHelper():
         # The error logger should have been called once
         assert c.logger.error.call_count == 1
 
+    @mock.patch("obspy.clients.fdsn.mass_downloader."
+                "utils.download_and_split_mseed_bulk")
+    @mock.patch("obspy.clients.fdsn.mass_downloader."
+                "download_helpers.ClientDownloadHelper._check_downloaded_data")
+    def test_download_mseed_with_scheduler(self, patch_check_data,
+                                           patch_download_mseed):
+        """
+        The scheduler cuts the chunks and retries throttled requests.
+        """
+        patch_check_data.return_value = (20, 5)
+        patch_download_mseed.return_value = []
+
+        st = obspy.UTCDateTime(2015, 1, 1)
+        time_intervals = [
+            TimeInterval(st + _i * 1800, st + (_i + 1) * 1800)
+            for _i in range(10)]
+        for _i in time_intervals:
+            _i.status = STATUS.NEEDS_DOWNLOADING
+        channels = [Channel(location="", channel="BHZ",
+                            intervals=copy.copy(time_intervals))]
+
+        c = self._init_client()
+        c.stations = {
+            (_i, _i): Station(_i, _i, 0, 10, copy.deepcopy(channels))
+            for _i in "ABCDEF"}
+
+        scheduler = DownloadScheduler(backoff=0.01)
+        c.download_mseed(scheduler=scheduler)
+        chunks = [_i[0][2] for _i in patch_download_mseed.call_args_list]
+        assert sum(len(_i) for _i in chunks) == 60
+        assert max(len(_i) for _i in chunks) <= 50
+        stats = scheduler.get_statistics()[c.client_name]
+        assert stats["requests"] == len(chunks)
+
+        # One throttled request, then everything works.
+        patch_download_mseed.reset_mock()
+        c.stations = {
+            (_i, _i): Station(_i, _i, 0, 10, copy.deepcopy(channels))
+            for _i in "ABCDEF"}
+        patch_download_mseed.side_effect = [
+            FDSNTooManyRequestsException("Too many requests")] + \
+            [[]] * 100
+        scheduler = DownloadScheduler(backoff=0.01)
+        c.download_mseed(scheduler=scheduler)
+        chunks = [_i[0][2] for _i in patch_download_mseed.call_args_list]
+        assert sum(len(_i) for _i in chunks[1:]) == 60
+        assert chunks[0] in chunks[1:]
+        stats = scheduler.get_statistics()[c.client_name]
+        assert stats["throttled"] == 1
+        assert stats["failed"] == 0
+        assert c.logger.error.call_count == 0
+        scheduler.shutdown()
+
     @mock.patch("obspy.clients.fdsn.mass_downloader."
                 "utils.download_stationxml")
     @mock.patch("obspy.clients.fdsn.mass_downloader."
@@ -2620,7 +2724,7 @@ class TestDownloadHelper():
     @mock.patch("logging.Logger.warning")
     def test_download_method(self, _log_w, _log_p, _patch_makedirs,
                              patch_dl_mseed, patch_dl_stationxml,
-                             patch_get_avail, patch_discover):
+                             patch_get_avail, patch_discover, tmp_path):
         """
         Mock test of the central download method.
 
@@ -2677,6 +2781,23 @@ class TestDownloadHelper():
         d.download(domain=dom, restrictions=restrictions,
                    mseed_storage="mseed", stationxml_storage="stationxml")
 
+        # The same with a central scheduler.
+        d.download(domain=dom, restrictions=restrictions,
+                   mseed_storage="mseed", stationxml_storage="stationxml",
+                   scheduler=True)
+        assert isinstance(patch_dl_mseed.call_args[1]["scheduler"],
+                          DownloadScheduler)
+        assert isinstance(patch_dl_stationxml.call_args[1]["scheduler"],
+                          DownloadScheduler)
+
+        # Record the status of all files in a database.
+        filename = str(tmp_path / "state.sqlite")
+        d.download(domain=dom, restrictions=restrictions,
+                   mseed_storage="mseed", stationxml_storage="stationxml",
+                   state=filename)
+        with DownloadState(filename) as state:
+            assert state.get_interval_status("A", "A")
+
         # Discard all stations.
         with mock.patch("obspy.clients.fdsn.mass_downloader.download_helpers."
                         "ClientDownloadHelper.discard_stations",
@@ -2703,3 +2824,196 @@ class TestDownloadHelper():
             d = MassDownloader()
             d.download(domain=dom, restrictions=restrictions,
                        mseed_storage="mseed", stationxml_storage="stationxml")
+
+
+class TestDownloadScheduler():
+    """
+    Test cases for the adaptive download scheduler.
+    """
+    def test_batches(self):
+        scheduler = DownloadScheduler()
+        results = scheduler.map("A", lambda batch: list(batch), range(100),
+                                sizes=[1.0] * 100, chunk_size_in_mb=8,
+                                max_items=5)
+        assert sorted(sum(results, [])) == list(range(100))
+        assert max(len(_i) for _i in results) == 5
+        # Without sizes every item is a batch.
+        results = scheduler.map("B", lambda batch: batch[0], range(10))
+        assert sorted(results) == list(range(10))
+        assert scheduler.get_statistics()["B"]["requests"] == 10
+        scheduler.shutdown()
+        with pytest.raises(ValueError):
+            DownloadScheduler(max_threads=0)
+
+    def test_throttling(self):
+        """
+        Throttled requests are retried and reduce the number of threads.
+        """
+        scheduler = DownloadScheduler(backoff=0.01, max_retries=2)
+        attempts = collections.Counter()
+
+        def function(batch):
+            attempts[batch[0]] += 1
+            if batch[0] == 3 and attempts[3] <= 2:
+                raise FDSNServiceUnavailableException("Busy")
+            if batch[0] == 5:
+                raise FDSNTooManyRequestsException("Too many")
+            return batch[0]
+
+        results = scheduler.map("A", function, range(8), threads=4,
+                                failed="failed")
+        assert sorted(results, key=str) == \
+            [0, 1, 2, 3, 4, 6, 7, "failed"]
+        assert attempts[3] == 3
+        assert attempts[5] == 3
+        stats = scheduler.get_statistics()["A"]
+        assert stats["throttled"] == 5
+        assert stats["failed"] == 1
+        assert stats["threads"] < 4
+        scheduler.shutdown()
+
+    def test_adaptive_threads_and_chunk_size(self):
+        """
+        More threads as long as this increases the throughput, smaller
+        chunks if requests take too long.
+        """
+        scheduler = DownloadScheduler(max_threads_per_client=4,
+                                      target_request_duration=0.005,
+                                      min_chunk_size_in_mb=2)
+        threads = []
+
+        def function(batch):
+            threads.append(scheduler.get_statistics()["A"]["threads"])
+            time.sleep(0.02)
+            return batch
+
+        scheduler.map("A", function, range(80), sizes=[1.0] * 80,
+                      get_size=lambda batch: 1024 * len(batch), threads=1,
+                      chunk_size_in_mb=16)
+        assert max(threads) > 1
+        stats = scheduler.get_statistics()["A"]
+        assert stats["chunk_size_in_mb"] == 2
+        assert stats["bytes"] == 80 * 1024
+        scheduler.shutdown()
+
+    def test_bandwidth_limit(self):
+        scheduler = DownloadScheduler(max_bandwidth_in_mb=20)
+        start = time.monotonic()
+        scheduler.map("A", lambda batch: batch, range(6), threads=1,
+                      get_size=lambda batch: 1024 ** 2)
+        # 6 MB at 20 MB/s, the first request is sent right away.
+        assert time.monotonic() - start >= 0.2
+        scheduler.shutdown()
+
+
+class TestDownloadState():
+    """
+    Test cases for the persistent state of mass downloads.
+    """
+    def _init_helper(self, state, restrictions=None, mseed_storage="mseed"):
+        client = mock.MagicMock()
+        client.base_url = "http://example.com"
+        restrictions = restrictions or Restrictions(
+            starttime=obspy.UTCDateTime(2001, 1, 1),
+            endtime=obspy.UTCDateTime(2015, 1, 1))
+        return ClientDownloadHelper(
+            client=client, client_name="Test", restrictions=restrictions,
+            domain=domain.GlobalDomain(), mseed_storage=mseed_storage,
+            stationxml_storage="stationxml", logger=mock.MagicMock(),
+            state=state)
+
+    def test_availability(self, testdata, tmp_path):
+        """
+        The availability is only requested once for the same restrictions
+        and domain.
+        """
+        state = DownloadState(str(tmp_path / "state.sqlite"))
+        inv = obspy.read_inventory(testdata["channel_level_fdsn.txt"])
+        c = self._init_helper(state)
+        c.client.get_stations.return_value = inv
+        c.get_availability()
+        assert c.client.get_stations.call_count == 1
+        assert c.stations
+
+        # Also from another process.
+        state.close()
+        state = DownloadState(str(tmp_path / "state.sqlite"))
+        c2 = self._init_helper(state)
+        c2.get_availability()
+        assert c2.client.get_stations.call_count == 0
+        assert c2.stations == c.stations
+        assert c2.is_availability_reliable is False
+
+        # Different restrictions.
+        c3 = self._init_helper(state, Restrictions(
+            starttime=obspy.UTCDateTime(2001, 1, 1),
+            endtime=obspy.UTCDateTime(2015, 1, 1), network="AK"))
+        c3.client.get_stations.return_value = inv
+        c3.get_availability()
+        assert c3.client.get_stations.call_count == 1
+
+        state.availability_ttl = 0
+        c4 = self._init_helper(state)
+        c4.client.get_stations.return_value = inv
+        c4.get_availability()
+        assert c4.client.get_stations.call_count == 1
+        state.close()
+
+    def test_interval_status(self, tmp_path):
+        """
+        Completed files are neither checked nor downloaded again.
+        """
+        t = obspy.UTCDateTime(2015, 1, 1)
+        intervals = [TimeInterval(t + _i * 10, t + (_i + 1) * 10)
+                     for _i in range(3)]
+        with DownloadState(str(tmp_path / "state.sqlite")) as state:
+            c = self._init_helper(state, mseed_storage=str(tmp_path))
+            c.stations[("BW", "ALTM")] = Station(
+                "BW", "ALTM", 0, 0, [Channel("", "EHZ", intervals)])
+            c.prepare_mseed_download()
+            assert [_i.status for _i in intervals] == \
+                [STATUS.NEEDS_DOWNLOADING] * 3
+            intervals[0].status = STATUS.DOWNLOADED
+            intervals[1].status = STATUS.DOWNLOAD_FAILED
+            c.save_state()
+            assert state.get_statistics() == {
+                "downloaded": 1, "download_failed": 1,
+                "needs_downloading": 1}
+
+            with mock.patch("os.path.exists", return_value=False), \
+                    mock.patch("os.makedirs"):
+                c.prepare_mseed_download()
+            assert [_i.status for _i in intervals] == [
+                STATUS.EXISTS, STATUS.NEEDS_DOWNLOADING,
+                STATUS.NEEDS_DOWNLOADING]
+
+            # Files deleted by the minimum distance filter are forgotten.
+            state.remove_intervals("BW", "ALTM")
+            assert state.get_statistics() == {}
+
+    def test_stationxml_contents(self, testdata, tmp_path):
+        """
+        StationXML files are only parsed again after they changed.
+        """
+        filename = str(tmp_path / "AU.MEEK.xml")
+        shutil.copy(testdata["AU.MEEK.xml"], filename)
+        expected = get_stationxml_contents(filename)
+        state = DownloadState(str(tmp_path / "state.sqlite"))
+        with mock.patch("obspy.clients.fdsn.mass_downloader.utils."
+                        "get_stationxml_contents",
+                        side_effect=get_stationxml_contents) as p:
+            for _ in range(3):
+                assert state.get_stationxml_contents(filename) == expected
+            assert p.call_count == 1
+            with open(filename, "ab") as fh:
+                fh.write(b"\n")
+            assert state.get_stationxml_contents(filename) == expected
+            assert p.call_count == 2
+
+            state.clear()
+            state.get_stationxml_contents(filename)
+            assert p.call_count == 3
+        state.close()
+
+        with pytest.raises(ValueError):
+            DownloadState(str(tmp_path / "state.sqlite"), availability_ttl=-1)
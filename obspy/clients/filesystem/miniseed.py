@@ -126,20 +126,24 @@ class _FileDataSegment(_ExtractedDataSegment):
     """
     Segment of data that comes directly from a data file
     """
-    def __init__(self, filename, start_byte, num_bytes, src_name):
+    def __init__(self, filename, start_byte, num_bytes, src_name, data=None):
         """
         :param filename: Name of data file
         :param start_byte: Return data starting from this offset
         :param num_bytes: Length of data to return
         :param src_name: Name of the data source for logging
+        :param data: Optional bytes of the segment if they were already read
+                     from the data file
         """
         self.filename = filename
         self.start_byte = start_byte
         self.num_bytes = num_bytes
         self.src_name = src_name
+        self.data = data
 
     def read_stream(self):
-        st = Stream()
+        if self.data is not None:
+            return read(BytesIO(self.data), format="MSEED")
         with open(self.filename, "rb") as f:
             f.seek(self.start_byte)
             raw_data = BytesIO(f.read(self.num_bytes))
@@ -153,19 +157,108 @@ class _FileDataSegment(_ExtractedDataSegment):
         return self.src_name
 
 
+class _BufferDataSegment(_ExtractedDataSegment):
+    """
+    Segment of data that was read from a data file into memory beforehand
+    """
+    def __init__(self, data, sample_rate, start_time, end_time, trim,
+                 src_name):
+        """
+        :param data: Bytes-like object holding the records of the segment
+        :param sample_rate: Sample rate of the data
+        :param start_time: A `UTCDateTime` giving the start of the
+                           requested data
+        :param end_time: A `UTCDateTime` giving the end of the requested data
+        :param trim: Whether the data needs to be trimmed to the requested
+                     time window
+        :param src_name: Name of the data source for logging
+        """
+        self.data = data
+        self.sample_rate = sample_rate
+        self.start_time = start_time
+        self.end_time = end_time
+        self.trim = trim
+        self.src_name = src_name
+
+    def read_stream(self):
+        st = read(BytesIO(self.data), format="MSEED")
+        if self.trim and self.sample_rate > 0:
+            logger.debug("Trimming %s to %s - %s" %
+                         (self.src_name, self.start_time, self.end_time))
+            st.trim(self.start_time, self.end_time)
+        return st
+
+    def get_num_bytes(self):
+        return len(self.data)
+
+    def get_src_name(self):
+        return self.src_name
+
+
+def _read_byte_ranges(fh, starts, ends):
+    """
+    Read byte ranges of a file into a single buffer.
+
+    Overlapping and adjacent ranges are merged and every merged range is read
+    with a single ``preadv`` system call directly into the buffer, where
+    available.
+
+    :param fh: Open file handle
+    :param starts: Start offsets of the byte ranges
+    :param ends: End offsets (exclusive) of the byte ranges
+    :returns: Tuple of the buffer as `memoryview` and a list of the
+              positions of the byte ranges in the buffer
+    """
+    order = sorted(range(len(starts)), key=lambda i: starts[i])
+    merged = []
+    for i in order:
+        if merged and starts[i] <= merged[-1][1]:
+            merged[-1][1] = max(merged[-1][1], ends[i])
+        else:
+            merged.append([starts[i], ends[i]])
+    buffer = memoryview(bytearray(sum(end - start for start, end in merged)))
+    merged_positions = []
+    position = 0
+    for start, end in merged:
+        merged_positions.append(position)
+        chunk = buffer[position:position + end - start]
+        if hasattr(os, "preadv"):
+            num_bytes = os.preadv(fh.fileno(), [chunk], start)
+        else:
+            fh.seek(start)
+            num_bytes = fh.readinto(chunk)
+        if num_bytes != end - start:
+            raise Exception("Could not read bytes %d to %d of %s" %
+                            (start, end, fh.name))
+        position += end - start
+    merged_starts = [start for start, _ in merged]
+    positions = []
+    for start in starts:
+        j = bisect.bisect_right(merged_starts, start) - 1
+        positions.append(merged_positions[j] + start - merged_starts[j])
+    return buffer, positions
+
+
 class _MiniseedDataExtractor(object):
     """
     Component for extracting, trimming, and validating data.
     """
     @deprecated_keywords({"loglevel": None})
-    def __init__(self, dp_replace=None, request_limit=0, loglevel=None):
+    def __init__(self, dp_replace=None, request_limit=0, loglevel=None,
+                 read_byte_ranges=False):
         """
         :param dp_replace: optional tuple of (regex, replacement) indicating
           the location of data files. If regex is omitted, then the replacement
           string is appended to the beginning of the file name.
         :param request_limit: optional limit (in bytes) on how much data can
           be extracted at once
+        :param read_byte_ranges: if True, the byte ranges of all requested
+          index rows of a file are read into a single buffer with one system
+          call per contiguous range and are decoded from memory, instead of
+          iterating over the records of partially requested sections with
+          libmseed
         """
+        self.read_byte_ranges = read_byte_ranges
         if dp_replace:
             self.dp_replace_re = re.compile(dp_replace[0])
             self.dp_replace_sub = dp_replace[1]
@@ -268,41 +361,90 @@ class _MiniseedDataExtractor(object):
         if total_bytes == 0:
             raise NoDataError()
 
-        # Get & return the actual data
+        # Group the extraction by file and sort by byte offset, so that every
+        # file is opened once and read sequentially
+        file_rows = {}
         for nrow in request_rows:
-            logger.debug("Extracting %s (%s - %s) from %s" % (nrow.srcname,
-                                                              nrow.starttime,
-                                                              nrow.endtime,
-                                                              nrow.filename))
-
-            # Iterate through records in section
-            # if only part of the section is needed
-            if nrow.triminfo[0][2] or nrow.triminfo[1][2]:
-
-                for msri in _MSRIterator(filename=nrow.filename,
-                                         startoffset=nrow.triminfo[0][1],
-                                         dataflag=False):
-                    offset = msri.get_offset()
-
-                    # Done if we are beyond end offset
-                    if offset >= nrow.triminfo[1][1]:
-                        break
-
-                    yield _MSRIDataSegment(msri,
-                                           nrow.samplerate,
-                                           nrow.starttime,
-                                           nrow.endtime,
-                                           nrow.srcname)
-
-                    # Check for passing end offset
-                    if (offset + msri.msr.contents.reclen) >= \
-                            nrow.triminfo[1][1]:
-                        break
-
-            # Otherwise, return the entire section
-            else:
-                yield _FileDataSegment(nrow.filename, nrow.triminfo[0][1],
-                                       nrow.bytes, nrow.srcname)
+            file_rows.setdefault(nrow.filename, []).append(nrow)
+
+        # Get & return the actual data
+        for filename, rows in file_rows.items():
+            rows.sort(key=lambda nrow: nrow.triminfo[0][1])
+            with open(filename, "rb") as fh:
+                if self.read_byte_ranges:
+                    for segment in self._extract_byte_ranges(rows, fh):
+                        yield segment
+                    continue
+                for nrow in rows:
+                    for segment in self._extract_row(nrow, fh):
+                        yield segment
+
+    def _extract_byte_ranges(self, rows, fh):
+        """
+        Extract the data of all processed index rows of a single file by
+        reading their byte ranges into one buffer.
+
+        :param rows: processed index rows of the file, see `extract_data`
+        :param fh: open file handle of the data file
+        :yields: sequence of `_BufferDataSegment`s
+        """
+        starts = [nrow.triminfo[0][1] for nrow in rows]
+        ends = [nrow.triminfo[1][1] for nrow in rows]
+        buffer, positions = _read_byte_ranges(fh, starts, ends)
+        for nrow, start, end, position in zip(rows, starts, ends, positions):
+            if end <= start:
+                continue
+            logger.debug("Extracting %s (%s - %s) from %s" % (
+                nrow.srcname, nrow.starttime, nrow.endtime, nrow.filename))
+            trim = nrow.triminfo[0][2] or nrow.triminfo[1][2]
+            yield _BufferDataSegment(buffer[position:position + end - start],
+                                     nrow.samplerate, nrow.starttime,
+                                     nrow.endtime, trim, nrow.srcname)
+
+    def _extract_row(self, nrow, fh):
+        """
+        Extract the data of a single processed index row.
+
+        :param nrow: processed index row, see `extract_data`
+        :param fh: open file handle of the data file, used for reading whole
+                   sections
+        :yields: sequence of `_ExtractedDataSegment`s
+        """
+        logger.debug("Extracting %s (%s - %s) from %s" % (nrow.srcname,
+                                                          nrow.starttime,
+                                                          nrow.endtime,
+                                                          nrow.filename))
+
+        # Iterate through records in section
+        # if only part of the section is needed
+        if nrow.triminfo[0][2] or nrow.triminfo[1][2]:
+
+            for msri in _MSRIterator(filename=nrow.filename,
+                                     startoffset=nrow.triminfo[0][1],
+                                     dataflag=False):
+                offset = msri.get_offset()
+
+                # Done if we are beyond end offset
+                if offset >= nrow.triminfo[1][1]:
+                    break
+
+                yield _MSRIDataSegment(msri,
+                                       nrow.samplerate,
+                                       nrow.starttime,
+                                       nrow.endtime,
+                                       nrow.srcname)
+
+                # Check for passing end offset
+                if (offset + msri.msr.contents.reclen) >= \
+                        nrow.triminfo[1][1]:
+                    break
+
+        # Otherwise, return the entire section
+        else:
+            fh.seek(nrow.triminfo[0][1])
+            yield _FileDataSegment(nrow.filename, nrow.triminfo[0][1],
+                                   nrow.bytes, nrow.srcname,
+                                   data=fh.read(nrow.bytes))
 
 
 if __name__ == '__main__':
@@ -35,11 +35,16 @@ See https://www.seiscomp3.org/wiki/doc/applications/slarchive/SDS.
     GNU Lesser General Public License, Version 3
     (https://www.gnu.org/copyleft/lesser.html)
 """
+import fnmatch
 import glob
 import os
 import re
+import time
 import warnings
+from collections import defaultdict
 from datetime import timedelta
+from multiprocessing import Pool
+from multiprocessing.pool import ThreadPool
 
 import numpy as np
 
@@ -47,12 +52,17 @@ from obspy import Stream, read, UTCDateTime
 from obspy.core.stream import _headonly_warning_msg
 from obspy.core.util.misc import BAND_CODE
 from obspy.io.mseed import ObsPyMSEEDFilesizeTooSmallError
+from obspy.io.mseed.index import build_record_index, get_record_index
 
 
 SDS_FMTSTR = os.path.join(
     "{year}", "{network}", "{station}", "{channel}.{sds_type}",
     "{network}.{station}.{location}.{channel}.{sds_type}.{year}.{doy:03d}")
 FORMAT_STR_PLACEHOLDER_REGEX = r"{(\w+?)?([!:].*?)?}"
+# directories modified less than this many nanoseconds before being listed
+# are listed again on the next check, as further changes might not be
+# reflected in their modification time
+RACY_MTIME_NS = 2 * 10 ** 9
 
 
 class Client(object):
@@ -65,7 +75,9 @@ class Client(object):
     FMTSTR = SDS_FMTSTR
 
     def __init__(self, sds_root, sds_type="D", format="MSEED",
-                 fileborder_seconds=30, fileborder_samples=5000):
+                 fileborder_seconds=30, fileborder_samples=5000,
+                 use_record_index=None, record_index_dir=None,
+                 cache_ttl=None):
         """
         Initialize a SDS local filesystem client.
 
@@ -102,6 +114,28 @@ class Client(object):
             code of the requested channel to sampling frequency. The maximum of
             both ``fileborder_seconds`` and ``fileborder_samples`` is used when
             determining if previous/next day should be checked for data.
+        :type use_record_index: bool
+        :param use_record_index: Controls the usage of persistent record
+            indices of MiniSEED files (see :mod:`obspy.io.mseed.index`) which
+            allow reading only the records covering the requested time window
+            instead of whole daily files. ``None`` uses existing up to date
+            indices, ``True`` additionally creates or updates them on the fly
+            and ``False`` never uses them.
+        :type record_index_dir: str
+        :param record_index_dir: Directory to store the record indices in. By
+            default they are stored as hidden files next to the daily files
+            which requires write access to the archive if
+            ``use_record_index=True``.
+        :type cache_ttl: float
+        :param cache_ttl: If set, directory listings of the archive are
+            cached in memory and file lookups (e.g. in
+            :meth:`get_waveforms`, :meth:`has_data` or :meth:`get_all_nslc`)
+            are answered from the cache instead of globbing the filesystem
+            again. Cached listings are used for ``cache_ttl`` seconds, after
+            that only the modification time of the directory is checked and
+            the directory is listed again only if it changed. Especially
+            useful for big archives on network file systems. By default no
+            cache is used. See :meth:`clear_cache`.
         """
         if not os.path.isdir(sds_root):
             msg = ("SDS root is not a local directory: " + sds_root)
@@ -111,6 +145,30 @@ class Client(object):
         self.format = format and format.upper()
         self.fileborder_seconds = fileborder_seconds
         self.fileborder_samples = fileborder_samples
+        self.use_record_index = use_record_index
+        self.record_index_dir = record_index_dir
+        if cache_ttl is None:
+            self._directory_cache = None
+        else:
+            self._directory_cache = _DirectoryCache(sds_root, cache_ttl)
+
+    def clear_cache(self):
+        """
+        Clears the cached directory listings (if ``cache_ttl`` is used).
+        """
+        if self._directory_cache is not None:
+            self._directory_cache.clear()
+
+    def _glob(self, pattern):
+        """
+        Returns the paths matching a wildcarded path in the archive like
+        :func:`glob.glob` does, using the directory cache if enabled.
+
+        :rtype: list[str]
+        """
+        if self._directory_cache is None:
+            return glob.glob(pattern)
+        return self._directory_cache.glob(pattern)
 
     def get_waveforms(self, network, station, location, channel, starttime,
                       endtime, merge=-1, sds_type=None, **kwargs):
@@ -160,6 +218,9 @@ class Client(object):
         sds_type = sds_type or self.sds_type
 
         seed_pattern = ".".join((network, station, location, channel))
+        if self.format == "MSEED":
+            kwargs.setdefault("use_index", self.use_record_index)
+            kwargs.setdefault("index_dir", self.record_index_dir)
 
         st = Stream()
         full_paths = self._get_filenames(
@@ -194,7 +255,7 @@ class Client(object):
             st.merge(merge)
         return st
 
-    def get_waveforms_bulk(self, bulk):
+    def get_waveforms_bulk(self, bulk, parallel=None, use_processes=False):
         """
         Reads bulk data from a local SeisComP Data Structure (SDS) directory
         tree.
@@ -202,14 +263,106 @@ class Client(object):
         Returns a stream object with with the data requested from the local
         directory.
 
+        Requests are grouped by daily file, so every file is looked up and
+        read only once for all requests it is needed for (covering the
+        combined time span of those requests). The data of every request is
+        then cut from the traces read and trimmed/merged like
+        :meth:`~obspy.clients.filesystem.sds.Client.get_waveforms` does.
+
         :type bulk: list[tuple]
-        :param bulk: Information about the requested data.
+        :param bulk: Information about the requested data. Every item holds
+            the positional arguments of
+            :meth:`~obspy.clients.filesystem.sds.Client.get_waveforms`, i.e.
+            network, station, location, channel, starttime, endtime and
+            optionally merge and sds_type.
+        :type parallel: int
+        :param parallel: Number of daily files to read in parallel. By
+            default files are read one after another.
+        :type use_processes: bool
+        :param use_processes: Read the files in parallel in a pool of
+            processes instead of threads. Only used together with
+            ``parallel``.
         """
+        requests = [self._get_bulk_request(*bulk_string)
+                    for bulk_string in bulk]
+        # look up the files of all requests, globbing every pattern once
+        globbed = {}
+        files = defaultdict(list)
+        for i, request in enumerate(requests):
+            full_paths = set()
+            for pattern in self._get_filename_patterns(
+                    request["network"], request["station"],
+                    request["location"], request["channel"],
+                    request["starttime"], request["endtime"],
+                    request["sds_type"]):
+                if pattern not in globbed:
+                    globbed[pattern] = self._glob(pattern)
+                full_paths.update(globbed[pattern])
+            for full_path in full_paths:
+                files[full_path].append(i)
+        # read every file once for all requests it is needed for
+        tasks = []
+        for full_path, indices in files.items():
+            patterns = {requests[i]["seed_pattern"] for i in indices}
+            kwargs = {}
+            if self.format == "MSEED":
+                kwargs["use_index"] = self.use_record_index
+                kwargs["index_dir"] = self.record_index_dir
+            tasks.append((
+                full_path, self.format,
+                min(requests[i]["starttime"] for i in indices),
+                max(requests[i]["endtime"] for i in indices),
+                patterns.pop() if len(patterns) == 1 else None, kwargs))
+        if parallel is not None and parallel > 1 and len(tasks) > 1:
+            pool_class = Pool if use_processes else ThreadPool
+            pool = pool_class(min(parallel, len(tasks)))
+            try:
+                streams = pool.starmap(_read_file, tasks)
+            finally:
+                pool.close()
+                pool.join()
+        else:
+            streams = [_read_file(*task) for task in tasks]
+        # reassemble the data per request
+        results = [Stream() for _ in requests]
+        for (full_path, indices), file_st in zip(files.items(), streams):
+            for i in indices:
+                request = requests[i]
+                traces = file_st.select(
+                    network=request["network"], station=request["station"],
+                    location=request["location"], channel=request["channel"])
+                traces = traces.slice(request["starttime"], request["endtime"])
+                # do not share data between requests
+                if len(indices) > 1:
+                    for tr in traces:
+                        tr.data = tr.data.copy()
+                results[i] += traces
         st = Stream()
-        for bulk_string in bulk:
-            st += self.get_waveforms(*bulk_string)
+        for request, result in zip(requests, results):
+            merge = request["merge"]
+            if merge is None or merge is False:
+                pass
+            else:
+                result.merge(merge)
+            st += result
         return st
 
+    def _get_bulk_request(self, network, station, location, channel,
+                          starttime, endtime, merge=-1, sds_type=None):
+        """
+        Checks the arguments of a single bulk request.
+
+        :rtype: dict
+        """
+        if starttime >= endtime:
+            msg = ("'endtime' must be after 'starttime'.")
+            raise ValueError(msg)
+        return dict(
+            network=network, station=station, location=location,
+            channel=channel, starttime=starttime, endtime=endtime,
+            merge=merge, sds_type=sds_type or self.sds_type,
+            seed_pattern=".".join((network, station, location, channel)))
+
     def _get_filenames(self, network, station, location, channel, starttime,
                        endtime, sds_type=None):
         """
@@ -230,6 +383,24 @@ class Client(object):
         :type sds_type: str
         :param sds_type: Override SDS data type identifier that was specified
             during client initialization.
+        :rtype: list[str]
+        """
+        full_paths = set()
+        for pattern in self._get_filename_patterns(
+                network, station, location, channel, starttime, endtime,
+                sds_type):
+            full_paths = full_paths.union(self._glob(pattern))
+        return full_paths
+
+    def _get_filename_patterns(self, network, station, location, channel,
+                               starttime, endtime, sds_type=None):
+        """
+        Get list of (possibly wildcarded) filenames for certain waveform and
+        time span.
+
+        See :meth:`~obspy.clients.filesystem.sds.Client._get_filenames` for
+        the parameters.
+
         :rtype: list[str]
         """
         sds_type = sds_type or self.sds_type
@@ -252,15 +423,13 @@ class Client(object):
             t += timedelta(days=1)
         year_doy.add((t_max.year, t_max.julday))
 
-        full_paths = set()
-        for year, doy in year_doy:
+        patterns = []
+        for year, doy in sorted(year_doy):
             filename = self.FMTSTR.format(
                 network=network, station=station, location=location,
                 channel=channel, year=year, doy=doy, sds_type=sds_type)
-            full_path = os.path.join(self.sds_root, filename)
-            full_paths = full_paths.union(glob.glob(full_path))
-
-        return full_paths
+            patterns.append(os.path.join(self.sds_root, filename))
+        return patterns
 
     def _get_filename(self, network, station, location, channel, time,
                       sds_type=None):
@@ -365,6 +534,94 @@ class Client(object):
 
         return (1 - (gap_sum / total_duration), gap_count)
 
+    def scan_availability(self, starttime, endtime, network="*", station="*",
+                          location="*", channel="*", sds_type=None,
+                          parallel=None, use_processes=False):
+        """
+        Get data availability and time of the last sample of all matching
+        streams in the archive in a single pass.
+
+        For MiniSEED archives only the fixed section headers of all records
+        are read (see :mod:`obspy.io.mseed.index`), no samples are decoded.
+        Existing record indices are used if ``use_record_index`` is not set
+        to ``False`` during client initialization. Other formats are read
+        with ``headonly=True``.
+
+        >>> from obspy import UTCDateTime
+        >>> t = UTCDateTime()
+        >>> result = client.scan_availability(t - 24 * 3600, t, "IU")
+        ... # doctest: +SKIP
+        >>> percentage, gap_count, last_sample = result[
+        ...     ("IU", "ANMO", "00", "BHZ")]  # doctest: +SKIP
+        >>> latency = t - last_sample  # doctest: +SKIP
+
+        :type starttime: :class:`~obspy.core.utcdatetime.UTCDateTime`
+        :param starttime: Start of time window to check availability for.
+        :type endtime: :class:`~obspy.core.utcdatetime.UTCDateTime`
+        :param endtime: End of time window to check availability for.
+        :type network: str
+        :param network: Network code of requested data (e.g. "IU").
+            Wildcards '*' and '?' are supported.
+        :type station: str
+        :param station: Station code of requested data (e.g. "ANMO").
+            Wildcards '*' and '?' are supported.
+        :type location: str
+        :param location: Location code of requested data (e.g. "").
+            Wildcards '*' and '?' are supported.
+        :type channel: str
+        :param channel: Channel code of requested data (e.g. "HHZ").
+            Wildcards '*' and '?' are supported.
+        :type sds_type: str
+        :param sds_type: Override SDS data type identifier that was specified
+            during client initialization.
+        :type parallel: int
+        :param parallel: Number of files to scan in parallel. By default files
+            are scanned one after another.
+        :type use_processes: bool
+        :param use_processes: Scan the files in a pool of processes instead of
+            threads. Only used together with ``parallel``.
+        :rtype: dict
+        :returns: Dictionary mapping (network, station, location, channel)
+            4-tuples of all streams with data in the daily files covering the
+            time window to 3-tuples of percentage of available data (``0.0``
+            to ``1.0``), number of gaps and time of the last sample
+            encountered, see
+            :meth:`~obspy.clients.filesystem.sds.Client.get_availability_percentage`.
+            Unlike there, overlaps are not counted as gaps.
+        """
+        if starttime >= endtime:
+            msg = ("'endtime' must be after 'starttime'.")
+            raise ValueError(msg)
+        full_paths = sorted(self._get_filenames(
+            network=network, station=station, location=location,
+            channel=channel, starttime=starttime, endtime=endtime,
+            sds_type=sds_type))
+        tasks = [(full_path, self.format, self.use_record_index,
+                  self.record_index_dir) for full_path in full_paths]
+        if parallel is not None and parallel > 1 and len(tasks) > 1:
+            pool_class = Pool if use_processes else ThreadPool
+            pool = pool_class(min(parallel, len(tasks)))
+            try:
+                scans = pool.starmap(_scan_file, tasks)
+            finally:
+                pool.close()
+                pool.join()
+        else:
+            scans = [_scan_file(*task) for task in tasks]
+        # collect the records of all files per stream
+        records = defaultdict(list)
+        for scan in scans:
+            for nslc, times in scan.items():
+                if all(fnmatch.fnmatchcase(code, pattern) for code, pattern in
+                       zip(nslc, (network, station, location, channel))):
+                    records[nslc].append(times)
+        result = {}
+        for nslc, times in sorted(records.items()):
+            times = np.concatenate(times, axis=1)
+            result[nslc] = _get_availability(times, starttime._ns,
+                                             endtime._ns)
+        return result
+
     def _get_current_endtime(self, network, station, location, channel,
                              sds_type=None, stop_time=None,
                              check_has_no_data=True):
@@ -509,7 +766,7 @@ class Client(object):
             network=network, station=station, location=location,
             channel=channel, sds_type=sds_type)
         pattern = os.path.join(self.sds_root, pattern)
-        if glob.glob(pattern):
+        if self._glob(pattern):
             return True
         else:
             return False
@@ -545,7 +802,7 @@ class Client(object):
             pattern = os.path.join(self.sds_root, pattern)
         else:
             pattern = self._get_filename("*", "*", "*", "*", datetime)
-        all_files = glob.glob(pattern)
+        all_files = self._glob(pattern)
         # set up inverse regex to extract kwargs/values from full paths
         pattern_ = os.path.join(self.sds_root, self.FMTSTR)
         group_map = {i: groups[0] for i, groups in
@@ -590,7 +847,7 @@ class Client(object):
             _wildcarded_except(["sds_type"]),
             fmtstr).format(sds_type=sds_type)
         pattern = os.path.join(self.sds_root, pattern)
-        all_files = glob.glob(pattern)
+        all_files = self._glob(pattern)
         # set up inverse regex to extract kwargs/values from full paths
         pattern_ = os.path.join(self.sds_root, fmtstr)
         group_map = {i: groups[0] for i, groups in
@@ -613,6 +870,203 @@ class Client(object):
         return sorted(result)
 
 
+class _DirectoryCache(object):
+    """
+    In-memory cache of the directory listings of an SDS archive.
+
+    Listings are reused for ``ttl`` seconds. After that, the modification time
+    of the directory is checked and the directory is only listed again if it
+    changed (e.g. when a new daily file or station directory was created).
+    """
+    def __init__(self, root, ttl):
+        self.root = root
+        self.ttl = ttl
+        # path -> (dict mapping names to is-directory flags, mtime in ns,
+        #          time of last check)
+        self._listings = {}
+
+    def clear(self):
+        self._listings.clear()
+
+    def glob(self, pattern):
+        """
+        Returns the paths matching a wildcarded path below the archive root.
+
+        Matches the behavior of :func:`glob.glob`, i.e. hidden files are only
+        matched by wildcards starting with a dot.
+        """
+        prefix = os.path.join(self.root, "")
+        if not pattern.startswith(prefix):
+            return glob.glob(pattern)
+        parts = pattern[len(prefix):].split(os.sep)
+        paths = [self.root]
+        for i, part in enumerate(parts):
+            last = i == len(parts) - 1
+            magic = glob.has_magic(part)
+            matches = []
+            for path in paths:
+                entries = self._listdir(path)
+                if not magic:
+                    names = [part] if part in entries else []
+                else:
+                    names = [
+                        name for name in fnmatch.filter(entries, part)
+                        if part.startswith(".") or not name.startswith(".")]
+                for name in names:
+                    # only descend into directories
+                    if last or entries[name]:
+                        matches.append(os.path.join(path, name))
+            paths = matches
+            if not paths:
+                break
+        return paths
+
+    def _listdir(self, path):
+        """
+        Returns the (possibly cached) contents of a directory as a dictionary
+        mapping names to a flag whether the entry is a directory.
+        """
+        now = time.monotonic()
+        listing = self._listings.get(path)
+        if listing is not None:
+            entries, mtime, checked = listing
+            if now - checked < self.ttl:
+                return entries
+            try:
+                stat = os.stat(path)
+            except OSError:
+                del self._listings[path]
+                return {}
+            if mtime is not None and stat.st_mtime_ns == mtime:
+                self._listings[path] = (entries, mtime, now)
+                return entries
+        try:
+            mtime = os.stat(path).st_mtime_ns
+            with os.scandir(path) as it:
+                entries = {entry.name: entry.is_dir() for entry in it}
+        except OSError:
+            self._listings.pop(path, None)
+            return {}
+        entries = dict(sorted(entries.items()))
+        if time.time_ns() - mtime < RACY_MTIME_NS:
+            mtime = None
+        self._listings[path] = (entries, mtime, now)
+        return entries
+
+
+def _read_file(full_path, format, starttime, endtime, sourcename, kwargs):
+    """
+    Reads a single file for
+    :meth:`~obspy.clients.filesystem.sds.Client.get_waveforms_bulk`.
+
+    Module level function so it can be used in a process pool.
+    """
+    try:
+        return read(full_path, format=format, starttime=starttime,
+                    endtime=endtime, sourcename=sourcename, **kwargs)
+    except ObsPyMSEEDFilesizeTooSmallError:
+        # just ignore small MSEED files, see Client.get_waveforms()
+        return Stream()
+
+
+def _scan_file(full_path, format, use_record_index, record_index_dir):
+    """
+    Reads the start and end times of all records (or traces for formats other
+    than MiniSEED) of a single file for
+    :meth:`~obspy.clients.filesystem.sds.Client.scan_availability`.
+
+    :rtype: dict
+    :returns: Dictionary mapping (network, station, location, channel)
+        4-tuples to ``int64`` arrays of shape ``(3, N)`` holding start time,
+        time of the last sample and sampling interval in nanoseconds.
+    """
+    table = None
+    if format == "MSEED":
+        # just ignore small MSEED files, see Client.get_waveforms()
+        if os.path.getsize(full_path) < 128:
+            return {}
+        if use_record_index is not False:
+            table = get_record_index(full_path, index_dir=record_index_dir,
+                                     create=bool(use_record_index))
+        if table is None:
+            table = build_record_index(full_path)
+    if table is not None:
+        table = table[(table["npts"] > 0) & (table["samp_rate"] > 0)]
+        ids = table["network"]
+        for key in ("station", "location", "channel"):
+            ids = np.char.add(np.char.add(ids, b"."), table[key])
+        ids, inverse = np.unique(ids, return_inverse=True)
+        inverse = inverse.ravel()
+        times = np.stack([
+            table["starttime"], table["endtime"],
+            np.round(1e9 / table["samp_rate"]).astype(np.int64)])
+        return {
+            tuple(id.decode("ascii", "ignore").split(".")):
+                times[:, inverse == i]
+            for i, id in enumerate(ids)}
+    # formats other than MiniSEED or unusual MiniSEED files
+    with warnings.catch_warnings():
+        warnings.filterwarnings(
+            "ignore", _headonly_warning_msg, UserWarning, "obspy.core.stream")
+        st = _read_file(full_path, format, None, None, None,
+                        dict(headonly=True))
+    result = defaultdict(list)
+    for tr in st:
+        if not tr.stats.npts or not tr.stats.sampling_rate:
+            continue
+        result[tuple(tr.id.split("."))].append((
+            tr.stats.starttime._ns, tr.stats.endtime._ns,
+            int(round(1e9 * tr.stats.delta))))
+    return {nslc: np.array(times, dtype=np.int64).T
+            for nslc, times in result.items()}
+
+
+def _get_availability(times, starttime, endtime):
+    """
+    Computes the data availability of a single stream from the start times,
+    end times and sampling intervals of its records.
+
+    Records overlapping or following each other within half a sample are
+    joined to contiguous segments.
+
+    :type times: :class:`numpy.ndarray`
+    :param times: Array of shape ``(3, N)`` as returned by
+        :func:`_scan_file`.
+    :type starttime: int
+    :param starttime: Start of time window in nanoseconds.
+    :type endtime: int
+    :param endtime: End of time window in nanoseconds.
+    :rtype: tuple(float, int, :class:`~obspy.core.utcdatetime.UTCDateTime`)
+    """
+    times = times[:, np.argsort(times[0], kind="stable")]
+    starts, ends, deltas = times
+    last_sample = UTCDateTime(ns=int(ends.max()))
+    # time of the last sample of the data seen so far and the time the next
+    # sample would be expected at
+    last = np.maximum.accumulate(ends)
+    reach = np.maximum.accumulate(ends + deltas)
+    breaks = np.nonzero(starts[1:] - reach[:-1] > deltas[:-1] // 2)[0] + 1
+    seg_starts = starts[np.concatenate([[0], breaks])]
+    seg_ends = np.concatenate([breaks - 1, [len(starts) - 1]])
+    seg_last, seg_reach = last[seg_ends], reach[seg_ends]
+    # only take into account segments overlapping the time window
+    selected = (seg_last >= starttime) & (seg_starts <= endtime)
+    if not selected.any():
+        return (0, 1, last_sample)
+    seg_starts = seg_starts[selected]
+    seg_last, seg_reach = seg_last[selected], seg_reach[selected]
+    gaps = seg_starts[1:] - seg_reach[:-1]
+    gap_sum = int(gaps.sum())
+    gap_count = len(gaps)
+    if seg_starts[0] > starttime:
+        gap_sum += int(seg_starts[0]) - starttime
+        gap_count += 1
+    if seg_last[-1] < endtime:
+        gap_sum += endtime - int(seg_last[-1])
+        gap_count += 1
+    return (1 - (gap_sum / (endtime - starttime)), gap_count, last_sample)
+
+
 def _wildcarded_except(exclude=[]):
     """
     Function factory for :mod:`re` ``repl`` functions used in :func:`re.sub`,
@@ -3,11 +3,13 @@ import os
 import re
 import shutil
 import tempfile
+import warnings
 
 import numpy as np
 
 from obspy import UTCDateTime, Trace, Stream
 from obspy.core.util.misc import TemporaryWorkingDirectory
+from obspy.clients.filesystem import sds
 from obspy.clients.filesystem.sds import SDS_FMTSTR, Client
 from obspy.scripts.sds_html_report import main as sds_report
 
@@ -250,6 +252,83 @@ class TestSDS():
             assert st[4].stats.channel == "BHN"
             assert st[5].stats.channel == "BHE"
 
+    def test_get_waveforms_bulk_grouped_by_file(self):
+        """
+        Overlapping and repeated bulk requests give the same data as single
+        requests and every daily file is read only once.
+        """
+        year = 2015
+        doy = 247
+        t = UTCDateTime("%d-%03dT00:00:00" % (year, doy))
+        with TemporarySDSDirectory(year=year, doy=doy) as temp_sds:
+            bulk = [
+                ("AB", "XYZ", "", "HHZ", t - 200, t + 20),
+                ("AB", "XYZ", "", "HHZ", t, t + 20),
+                ("AB", "XYZ", "", "HHZ", t, t + 20),
+                ("AB", "XYZ", "", "HH?", t + 10, t + 200, None),
+                ("AB", "XYZ", "", "HHN", t + 1000, t + 2000),
+                ("CD", "*", "00", "BHZ", t - 100, t + 100, 0, "D"),
+            ]
+            client = Client(temp_sds.tempdir)
+            expected = Stream()
+            for bulk_string in bulk:
+                expected += client.get_waveforms(*bulk_string)
+            read_files = []
+            original_read_file = sds._read_file
+
+            def _read_file(full_path, *args):
+                read_files.append(full_path)
+                return original_read_file(full_path, *args)
+
+            def _compare(st, expected):
+                # processing information reflects the time span read and the
+                # order of files read is arbitrary
+                for tr in st + expected:
+                    tr.stats.pop("processing", None)
+                assert len(st) == len(expected) == 11
+                assert sorted(st, key=str) == sorted(expected, key=str)
+
+            sds._read_file = _read_file
+            try:
+                st = client.get_waveforms_bulk(bulk)
+            finally:
+                sds._read_file = original_read_file
+            _compare(st, expected)
+            assert len(read_files) == len(set(read_files)) == 10
+            # data is not shared between requests
+            st[1].data[:] = -1
+            assert st[2].data[0] != -1
+            for use_processes in (False, True):
+                st = client.get_waveforms_bulk(bulk, parallel=3,
+                                               use_processes=use_processes)
+                _compare(st, expected)
+
+    def test_get_waveforms_bulk_parallel_with_libmseed_messages(self):
+        """
+        Files producing libmseed warnings can be read in parallel threads.
+        """
+        t = UTCDateTime("2015-123T00:00:00")
+        with TemporarySDSDirectory(year=None, doy=None, time=t) as temp_sds:
+            # append non-SEED data to all files
+            for root, _, filenames in os.walk(temp_sds.tempdir):
+                for filename in filenames:
+                    with open(os.path.join(root, filename), "ab") as fh:
+                        fh.write(b"x" * 512)
+            client = Client(temp_sds.tempdir)
+            bulk = [("*", "*", "*", "*", t - 1000, t + 1000)]
+            with warnings.catch_warnings(record=True) as w:
+                warnings.simplefilter("always")
+                expected = client.get_waveforms_bulk(bulk)
+            messages = sorted(str(w_.message) for w_ in w)
+            assert len(messages) == 96 * 4
+            assert "Not a SEED record" in messages[0]
+            for _ in range(5):
+                with warnings.catch_warnings(record=True) as w:
+                    warnings.simplefilter("always")
+                    st = client.get_waveforms_bulk(bulk, parallel=8)
+                assert sorted(str(w_.message) for w_ in w) == messages
+                assert sorted(st, key=str) == sorted(expected, key=str)
+
     def test_get_all_stations_and_nslc(self):
         """
         Test `get_all_stations` and `get_all_nslc` methods
@@ -279,3 +358,129 @@ class TestSDS():
             assert [] == got_nslc
             got_nslc = client.get_all_nslc(datetime=t - 2 * 24 * 3600)
             assert [] == got_nslc
+
+    def test_read_with_record_index(self):
+        """
+        Test reading data using persistent MiniSEED record indices.
+        """
+        year, doy = 2015, 123
+        t = UTCDateTime("%d-%03dT00:00:00" % (year, doy))
+        with TemporarySDSDirectory(year=year, doy=doy) as temp_sds:
+            index_dir = os.path.join(temp_sds.tempdir, "index")
+            os.makedirs(index_dir)
+            client = Client(temp_sds.tempdir)
+            client_index = Client(temp_sds.tempdir, use_record_index=True,
+                                  record_index_dir=index_dir)
+            for starttime, endtime in ((t - 20, t + 20), (t - 200, t + 200),
+                                       (t + 20, t + 40)):
+                expected = client.get_waveforms("AB", "XYZ", "", "HH?",
+                                                starttime, endtime)
+                got = client_index.get_waveforms("AB", "XYZ", "", "HH?",
+                                                 starttime, endtime)
+                assert expected == got
+            # one index per daily file read
+            assert len(os.listdir(index_dir)) == 6
+            # nothing was written to the archive itself
+            assert client.get_all_nslc() == client_index.get_all_nslc()
+
+    def test_directory_cache(self, monkeypatch):
+        """
+        Test looking up files using the in-memory directory cache.
+        """
+        year, doy = 2015, 123
+        t = UTCDateTime("%d-%03dT00:00:00" % (year, doy))
+        with TemporarySDSDirectory(year=year, doy=doy) as temp_sds:
+            # pretend the archive was written a while ago, so modification
+            # times of directories can be trusted
+            for dirpath, _, _ in os.walk(temp_sds.tempdir):
+                os.utime(dirpath, (1e9, 1e9))
+            client = Client(temp_sds.tempdir)
+            client_cache = Client(temp_sds.tempdir, cache_ttl=0)
+            # hidden files are ignored just like with glob
+            open(os.path.join(temp_sds.tempdir, ".hidden"), "wb").close()
+            os.utime(temp_sds.tempdir, (1e9, 1e9))
+            for _ in range(2):
+                assert (client.get_all_stations() ==
+                        client_cache.get_all_stations())
+                assert client.get_all_nslc() == client_cache.get_all_nslc()
+                for seed_id in ("AB.XYZ..HHZ", "*.*.*.BH?", "AB.XX.*.*"):
+                    assert (client.has_data(*seed_id.split(".")) ==
+                            client_cache.has_data(*seed_id.split(".")))
+                    assert (client.get_waveforms(*seed_id.split("."),
+                                                 t - 200, t + 200) ==
+                            client_cache.get_waveforms(*seed_id.split("."),
+                                                       t - 200, t + 200))
+            # unchanged directories are not listed again
+            listed = []
+            scandir = os.scandir
+
+            def _scandir(path):
+                listed.append(path)
+                return scandir(path)
+
+            monkeypatch.setattr(os, "scandir", _scandir)
+            client_cache.get_all_nslc()
+            assert listed == []
+            # new stations show up once their directory is listed again
+            tr = Trace(np.arange(10, dtype=np.int32))
+            tr.stats.update(dict(network="EF", station="NEW", channel="HHZ",
+                                 starttime=t))
+            path = client._get_filename("EF", "NEW", "", "HHZ", t)
+            os.makedirs(os.path.dirname(path))
+            tr.write(path, format="MSEED")
+            assert ("EF", "NEW") in client_cache.get_all_stations()
+            assert client_cache.has_data("EF", "NEW", "", "HHZ")
+            assert set(listed) == {
+                os.path.join(temp_sds.tempdir, "2015", *parts)
+                for parts in ((), ("EF", ), ("EF", "NEW"),
+                              ("EF", "NEW", "HHZ.D"))}
+            # ... but only after the time to live of a listing expired
+            client_cache = Client(temp_sds.tempdir, cache_ttl=3600)
+            assert ("EF", "NEW2") not in client_cache.get_all_stations()
+            os.makedirs(os.path.join(temp_sds.tempdir, "2015", "EF", "NEW2",
+                                     "HHZ.D"))
+            assert ("EF", "NEW2") not in client_cache.get_all_stations()
+            client_cache.clear_cache()
+            assert ("EF", "NEW2") in client_cache.get_all_stations()
+
+    def test_scan_availability(self):
+        """
+        Test scanning availability of the whole archive from record headers.
+        """
+        year, doy = 2015, 123
+        t = UTCDateTime("%d-%03dT00:00:00" % (year, doy))
+        with TemporarySDSDirectory(year=year, doy=doy) as temp_sds:
+            # add a stream with a gap
+            tr = Trace(np.arange(1000, dtype=np.int32))
+            tr.stats.update(dict(network="EF", station="GAP", channel="HHZ",
+                                 starttime=t - 600))
+            st = Stream([tr.slice(endtime=t - 400), tr.slice(t - 300)])
+            path = Client(temp_sds.tempdir)._get_filename(
+                "EF", "GAP", "", "HHZ", t - 600)
+            os.makedirs(os.path.dirname(path))
+            st.write(path, format="MSEED", reclen=256)
+            nslc = [tuple(seed_id.split("."))
+                    for seed_id in ("AB.XYZ..HHZ", "CD.ZZZ3.00.BHE",
+                                    "EF.GAP..HHZ")]
+            for kwargs in (dict(), dict(format=None),
+                           dict(use_record_index=False)):
+                client = Client(temp_sds.tempdir, **kwargs)
+                for starttime, endtime in (
+                        (t - 200, t + 200), (t - 800, t + 800),
+                        (t - 500, t - 100), (t + 1000, t + 2000)):
+                    for parallel in (None, 4):
+                        got = client.scan_availability(
+                            starttime, endtime, parallel=parallel)
+                        # 48 streams in files of day 123, 49 with day 122
+                        assert len(got) == (48 if starttime > t else 49)
+                        for nslc_ in nslc:
+                            expected = client.get_availability_percentage(
+                                *nslc_, starttime, endtime)
+                            assert got.get(nslc_, (0, 1))[:2] == expected
+                got = client.scan_availability(t - 200, t + 200, "EF")
+                assert list(got) == [nslc[2]]
+                assert got[nslc[2]][2] == t - 600 + 999
+                got = client.scan_availability(t - 200, t + 200,
+                                               channel="HHZ")
+                assert got[nslc[0]][2] == t - 300 + 990
+                assert all(cha == "HHZ" for _, _, _, cha in got)
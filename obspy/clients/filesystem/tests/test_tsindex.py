@@ -1,6 +1,7 @@
 # -*- coding: utf-8 -*-
 import os
 import re
+import shutil
 import tempfile
 import uuid
 from collections import namedtuple
@@ -13,7 +14,7 @@ from sqlalchemy.orm import sessionmaker
 
 from obspy import read, UTCDateTime
 from obspy.clients.filesystem.tsindex import Client, Indexer, \
-    TSIndexDatabaseHandler
+    TSIndexDatabaseHandler, _format_file_modtime, _index_file
 
 
 # this one is used on the API frontpage, so guess leave it in for now parallel
@@ -162,6 +163,60 @@ class TestClient():
                                   endtime=UTCDateTime(2018, 1, 1, 0, 0, 3, 1))
         assert returned_stream.traces == []
 
+    def test_get_waveforms_bulk_many_rows(self, filepath, client):
+        """
+        Checks bulk requests with many (wildcarded) rows, which are joined
+        against the index in a single query.
+        """
+        t = UTCDateTime(2018, 1, 1)
+        bulk_request = [("IU,CU", "*", "*", "BHZ", t + i * 0.05,
+                         t + i * 0.05 + 0.5) for i in range(1000)]
+        index_rows = client.request_handler._fetch_index_rows(bulk_request)
+        # every request matches one section of each of the three files
+        assert len(index_rows) == 3000
+        bulk_request = [("CU", "TGUH", "00", "BHZ", t + 1, t + 2),
+                        ("I?", "ANMO", "*", "BHZ", t + 10, t + 12)]
+        st = client.get_waveforms_bulk(bulk_request, merge=None)
+        st.sort()
+        assert len(st) == 2
+        assert st[0].id == "CU.TGUH.00.BHZ"
+        assert st[0].stats.starttime == t + 1
+        assert st[0].stats.endtime == t + 2
+        assert st[1].id == "IU.ANMO.10.BHZ"
+        assert abs(st[1].stats.starttime - (t + 10)) < 0.025
+        assert abs(st[1].stats.endtime - (t + 12)) < 0.025
+
+    def test_read_byte_ranges(self, filepath, client):
+        """
+        Checks that reading the byte ranges of the index rows into a buffer
+        returns the same data as iterating over the records with libmseed.
+        """
+        range_client = Client(str(filepath / 'timeseries.sqlite'),
+                              datapath_replace=("^", str(filepath) + '/'),
+                              read_byte_ranges=True)
+        t = UTCDateTime(2018, 1, 1)
+        bulk_requests = [
+            # whole sections
+            [("*", "*", "*", "BHZ", t - 10, t + 100)],
+            # partial sections, overlapping requests for the same file
+            [("CU", "TGUH", "00", "BHZ", t + 1, t + 7),
+             ("IU", "ANMO", "10", "BHZ", t, t + 5),
+             ("IU", "ANMO", "10", "BHZ", t + 3, t + 30),
+             ("IU", "COLA", "*", "BHZ", t + 50, t + 70)]]
+        for bulk_request in bulk_requests:
+            expected = client.get_waveforms_bulk(bulk_request)
+            got = range_client.get_waveforms_bulk(bulk_request)
+            expected.sort()
+            got.sort()
+            assert len(got) == len(expected)
+            for tr_got, tr_expected in zip(got, expected):
+                assert tr_got.id == tr_expected.id
+                # records are joined before trimming, their start times
+                # may differ by a fraction of a sample
+                assert abs(tr_got.stats.starttime -
+                           tr_expected.stats.starttime) < 0.5 * 0.025
+                assert list(tr_got.data) == list(tr_expected.data)
+
     def test_get_nslc(self, client):
         # test using actual sqlite3 test database
         expected_nslc = [(u'CU', u'TGUH', u'00', u'BHZ')]
@@ -743,6 +798,100 @@ class TestIndexer():
         finally:
             purge(filepath, '^{}.*$'.format(fname))
 
+    def test_run_builtin(self, filepath, tmp_path):
+        """
+        Checks that the built-in indexer creates the same rows as mseedindex
+        and only reindexes modified files.
+        """
+        root = tmp_path / "data"
+        shutil.copytree(filepath, root)
+        os.remove(root / "timeseries.sqlite")
+        database = str(tmp_path / "timeseries.sqlite")
+        indexer = Indexer(str(root), database=database,
+                          filename_pattern="*.mseed", index_cmd=None,
+                          parallel=2, batch_size=2)
+        indexer.run(relative_paths=True)
+
+        keys = ['network', 'station', 'location', 'channel', 'quality',
+                'starttime', 'endtime', 'samplerate', 'filename',
+                'byteoffset', 'bytes', 'hash', 'timeindex', 'timespans',
+                'timerates', 'format']
+        query = [("*", "*", "*", "*", "2018-01-01", "2018-02-01")]
+        expected = TSIndexDatabaseHandler(
+            database=os.path.join(filepath, "timeseries.sqlite")
+        )._fetch_index_rows(query)
+        db_handler = TSIndexDatabaseHandler(database=database)
+        rows = db_handler._fetch_index_rows(query)
+        assert len(rows) == len(expected) == 3
+        for row, expected_row in zip(rows, expected):
+            for key in keys:
+                assert getattr(row, key) == getattr(expected_row, key)
+        assert db_handler.has_tsindex_summary()
+        client = Client(database, datapath_replace=("^", str(root) + "/"))
+        t = UTCDateTime("2018-01-01T00:00:00.019500")
+        st = client.get_waveforms("IU", "ANMO", "*", "BHZ", t, t + 1)
+        assert len(st) == 1 and st[0].stats.npts == 41
+
+        # nothing to do on an unmodified archive
+        assert indexer._get_modified_files() == []
+        # appending records to a file only reindexes this file
+        fname = os.path.normpath(
+            'IU/2018/001/IU.ANMO.10.BHZ.2018.001_first_minute.mseed')
+        tr = read(str(root / fname))[0]
+        tr.stats.starttime += 60
+        with open(root / fname, "ab") as fh:
+            tr.write(fh, format="MSEED", reclen=512)
+        assert indexer._get_modified_files() == [fname]
+        with mock.patch('obspy.clients.filesystem.tsindex._index_file',
+                        wraps=_index_file) as index_file:
+            indexer.run()
+        assert index_file.call_count == 1
+        rows = db_handler._fetch_index_rows(query)
+        assert len(rows) == 3
+        row = [r for r in rows if r.station == "ANMO"][0]
+        assert row.filename == fname
+        assert row.endtime == "2018-01-01T00:01:59.994500"
+        assert row.bytes == os.path.getsize(root / fname)
+        assert row.timespans == "[1514764800.019500:1514764919.994500]"
+        assert indexer._get_modified_files() == []
+
+        # trailing bytes after the last record and files without records
+        # are only read once
+        with open(root / fname, "ab") as fh:
+            fh.write(b"\x00" * 100)
+        with open(root / "empty.mseed", "wb") as fh:
+            fh.write(b"no miniseed")
+        assert sorted(indexer._get_modified_files()) == sorted(
+            [fname, str(root / "empty.mseed")])
+        with mock.patch.object(db_handler.__class__,
+                               'build_tsindex_summary') as build_summary:
+            indexer.run()
+            assert build_summary.call_count == 0
+            assert indexer._get_modified_files() == []
+            indexer.run()
+            assert build_summary.call_count == 0
+            # only touching a file does not change the summary
+            os.utime(root / fname, ns=(0, 0))
+            indexer.run()
+            assert build_summary.call_count == 0
+            assert indexer._get_modified_files() == []
+        assert len(db_handler._fetch_index_rows(query)) == 3
+
+        # files indexed without stored sizes are adopted if their
+        # modification time is unchanged
+        with db_handler.engine.begin() as connection:
+            connection.execute(sa.text("DROP TABLE tsindex_files"))
+            connection.execute(sa.text(
+                "UPDATE tsindex SET filemodtime = '{}'".format(
+                    _format_file_modtime(0))))
+        for path in root.rglob("*.mseed"):
+            os.utime(path, ns=(0, 0))
+        indexer.request_handler._create_tsindex_table()
+        assert indexer._get_modified_files() == [str(root / "empty.mseed")]
+        with db_handler.engine.connect() as connection:
+            assert connection.execute(sa.text(
+                "SELECT COUNT(*) FROM tsindex_files")).scalar() == 3
+
 
 class TestTSIndexDatabaseHandler():
 
@@ -147,10 +147,25 @@ directory. The name of the index database can be changed by supplying the
 
   indexer.run()
 
+Without the external ``mseedindex`` program files can be indexed by the
+built-in indexer based on ObsPy's libmseed bindings by passing
+``index_cmd=None``. It produces the same rows as ``mseedindex``, only
+(re)indexes files whose modification time or size changed since the last
+run and writes the rows of many files in a single transaction, making it
+cheap to keep the index of a growing archive up to date by calling
+:meth:`~Indexer.run` periodically.
+
+.. code-block:: python
+
+  indexer = Indexer(filepath, filename_pattern='*.mseed', index_cmd=None)
+  indexer.run()
+
 """
 
 import copyreg
+import ctypes as C
 import datetime
+import hashlib
 import logging
 import os
 import sqlalchemy as sa
@@ -160,18 +175,20 @@ import types
 from collections import namedtuple
 from glob import glob
 from multiprocessing import Pool
+from multiprocessing.pool import ThreadPool
 from os.path import relpath
-from sqlalchemy.exc import ResourceClosedError
 from sqlalchemy.orm import sessionmaker
 from sqlalchemy.pool import QueuePool
 
 from obspy import UTCDateTime
 from obspy.clients.filesystem.miniseed import _MiniseedDataExtractor, \
     NoDataError
+from obspy.clients.filesystem.msriterator import _MSRIterator
 from obspy.clients.filesystem.db import _get_tsindex_table, \
     _get_tsindex_summary_table
 from obspy.core.stream import Stream
 from obspy.core.util.decorator import deprecated_keywords
+from obspy.io.mseed.headers import HPTMODULUS, clibmseed
 
 logger = logging.getLogger('obspy.clients.filesystem.tsindex')
 
@@ -194,7 +211,8 @@ class Client(object):
     Time series extraction client for EarthScope tsindex database schema.
     """
     @deprecated_keywords({"loglevel": None})
-    def __init__(self, database, datapath_replace=None, loglevel=None):
+    def __init__(self, database, datapath_replace=None, loglevel=None,
+                 read_byte_ranges=False):
         """
         Initializes the client.
 
@@ -207,6 +225,14 @@ class Client(object):
             occurrence of the first value will be replaced with the second
             value in filename paths from the index.
         :param loglevel: DEPRECATED and without effect
+        :type read_byte_ranges: bool
+        :param read_byte_ranges: If ``True``, the byte ranges of all index
+            rows matching a request are read from each file into a single
+            buffer (with one ``preadv`` system call per contiguous range
+            where available) and decoded from memory. Partially requested
+            sections are then trimmed after decoding instead of being read
+            record by record through libmseed, which is considerably faster
+            when serving many short time windows.
         """
         # setup handler for database
         if isinstance(database, str):
@@ -220,7 +246,7 @@ class Client(object):
 
         # Create and configure the data extraction
         self.data_extractor = _MiniseedDataExtractor(
-            dp_replace=datapath_replace)
+            dp_replace=datapath_replace, read_byte_ranges=read_byte_ranges)
 
     def get_waveforms(self, network, station, location,
                       channel, starttime, endtime, merge=-1):
@@ -894,13 +920,20 @@ class Indexer(object):
     from ``root_path`` and run ``index_cmd`` for each target file found that
     is not already in the index. After all new files are indexed a summary
     table is generated with the extents of each timeseries.
+
+    If ``index_cmd`` is ``None``, the built-in indexer is used instead of
+    mseedindex. It reads the record headers with ObsPy's libmseed bindings
+    and (re)indexes all files that are not in the index yet or whose
+    modification time or size changed. The modification time and size of
+    every file read, including files without any readable records, are
+    stored in a separate table next to the tsindex table.
     """
     @deprecated_keywords({"leap_seconds_file": None})
     @deprecated_keywords({"loglevel": None})
     def __init__(self, root_path, database="timeseries.sqlite",
                  index_cmd='mseedindex',
                  bulk_params=None, filename_pattern='*', parallel=5,
-                 leap_seconds_file=None, loglevel=None):
+                 leap_seconds_file=None, loglevel=None, batch_size=100):
         """
         Initializes the Indexer.
 
@@ -913,16 +946,22 @@ class Indexer(object):
             if one does not already exists at the specified path.
         :type index_cmd: str
         :param index_cmd: Command to be run for each target file found that
-            is not already in the index
+            is not already in the index. If ``None``, the built-in indexer
+            is used.
         :type bulk_params: dict
         :param bulk_params: Dictionary of options to pass to ``index_cmd``.
+            Not used by the built-in indexer.
         :type filename_pattern: str
         :param filename_pattern: Glob pattern to determine what files to index.
         :type parallel: int
         :param parallel: Max number of ``index_cmd`` instances to run in
-            parallel. By default a max of 5 parallel process are run.
+            parallel. By default a max of 5 parallel process are run. The
+            built-in indexer reads this many files in parallel threads.
         :param loglevel: DEPRECATED and without effect
         :param leap_seconds_file: DEPRECATED and without effect
+        :type batch_size: int
+        :param batch_size: Number of files whose index rows are written to
+            the database in a single transaction by the built-in indexer.
         """
         self.index_cmd = index_cmd
         if bulk_params is None:
@@ -930,6 +969,7 @@ class Indexer(object):
         self.bulk_params = bulk_params
         self.filename_pattern = filename_pattern
         self.parallel = parallel
+        self.batch_size = batch_size
 
         # setup handler for database
         if isinstance(database, str):
@@ -962,6 +1002,8 @@ class Indexer(object):
             the index and have not been modified.  The ``reindex`` option can
             be set to ``True`` to force a re-indexing of all files regardless.
         """
+        if self.index_cmd is None:
+            return self._run_builtin(build_summary, relative_paths, reindex)
         if self._is_index_cmd_installed() is False:
             raise OSError(
                     "Required program '{}' is not installed. Hint: Install "
@@ -1070,6 +1112,91 @@ class Indexer(object):
                                   self.root_path))
         return result
 
+    def _run_builtin(self, build_summary=True, relative_paths=False,
+                     reindex=False):
+        """
+        Index all new and modified files with the built-in indexer.
+
+        The files are read in parallel threads and the rows of every
+        ``batch_size`` files replace the existing rows of these files in a
+        single transaction. The summary table is only rebuilt if the time
+        extents of any rows changed or if it does not exist yet.
+
+        See :meth:`~Indexer.run` for the parameters.
+        """
+        if self.request_handler.sqlite:
+            self.request_handler._set_sqlite_pragma()
+        self.request_handler._create_tsindex_table()
+        file_names = self._get_modified_files(relative_paths, reindex)
+        logger.debug("Indexing {} new or modified files."
+                     .format(len(file_names)))
+        changed = False
+        pool = ThreadPool(processes=max(1, self.parallel))
+        try:
+            for i in range(0, len(file_names), self.batch_size):
+                batch = file_names[i:i + self.batch_size]
+                tasks = [(os.path.join(self.root_path, file_name), file_name)
+                         for file_name in batch]
+                results = pool.starmap(_index_file, tasks)
+                files = [(file_name, stat, rows) for file_name, (stat, rows)
+                         in zip(batch, results) if stat is not None]
+                changed |= self.request_handler._replace_index_rows(files)
+        except KeyboardInterrupt:
+            logger.warning('Parent received keyboard interrupt.')
+            if build_summary is True:
+                logger.warning("Skipped building timeseries summary "
+                               "table since indexing was ended "
+                               "prematurely.")
+            return
+        finally:
+            pool.terminate()
+            pool.join()
+        if build_summary is True and (
+                changed or not self.request_handler.has_tsindex_summary()):
+            self.request_handler.build_tsindex_summary()
+
+    def _get_modified_files(self, relative_paths=False, reindex=False):
+        """
+        Return a list of all files under ``root_path`` matching the
+        ``filename_pattern`` that are not in the index yet or whose
+        modification time or size differs from the indexed one.
+
+        Files already in the index are returned with the file name stored in
+        the index, all others as absolute paths or relative to ``root_path``
+        depending on ``relative_paths``.
+
+        Files in the tsindex table without a stored size, e.g. indexed by
+        mseedindex, are only returned if their modification time differs
+        from the indexed one (in seconds). Otherwise their current
+        modification time and size are stored.
+
+        :rtype: list(str)
+        """
+        file_list = self._get_rootpath_files(relative_paths=False)
+        indexed = {}
+        if reindex is False and self.request_handler.has_tsindex():
+            indexed = self.request_handler._get_indexed_files()
+        result = []
+        adopted = []
+        for abs_fn in file_list:
+            rel_fn = os.path.normpath(relpath(abs_fn, self.root_path))
+            entry = indexed.get(abs_fn) or indexed.get(rel_fn)
+            if entry is None:
+                result.append(rel_fn if relative_paths else abs_fn)
+                continue
+            stored_fn, mtime, size = entry
+            stat = os.stat(abs_fn)
+            if size is None:
+                if mtime == _format_file_modtime(stat.st_mtime):
+                    adopted.append((stored_fn, stat))
+                else:
+                    result.append(stored_fn)
+            elif mtime != stat.st_mtime_ns or size != stat.st_size:
+                result.append(stored_fn)
+        if adopted:
+            self.request_handler._set_file_stats(adopted)
+        return result
+
     def _get_rootpath_files(self, relative_paths=False):
         """
         Return a list of absolute paths to files under the rootpath that
@@ -1135,6 +1262,130 @@ class Indexer(object):
             raise OSError(msg)
 
 
+# Minimum time between two entries of the time index of a section in seconds,
+# as used by mseedindex.
+_TIME_INDEX_INTERVAL = 3600
+
+
+def _format_hptime(hptime):
+    """
+    Format a libmseed high precision time as POSIX timestamp with six
+    decimals, as used in the timeindex and timespans fields.
+    """
+    seconds, microseconds = divmod(abs(int(hptime)), int(HPTMODULUS))
+    return "{}{}.{:06d}".format("-" if hptime < 0 else "", seconds,
+                                microseconds)
+
+
+def _format_hptime_iso(hptime):
+    """
+    Format a libmseed high precision time as ISO date time string, as used in
+    the starttime and endtime fields.
+    """
+    return UTCDateTime(ns=int(hptime) * 1000).strftime(
+        "%Y-%m-%dT%H:%M:%S.%f")
+
+
+def _format_file_modtime(mtime):
+    """
+    Format the modification time of a file for the filemodtime field.
+    """
+    return UTCDateTime(int(mtime)).strftime("%Y-%m-%dT%H:%M:%S")
+
+
+def _index_file(path, file_name):
+    """
+    Build the tsindex rows of a single miniSEED file for the built-in indexer
+    of :class:`Indexer`.
+
+    Like mseedindex, directly following records of the same time series
+    (including quality code) with the same sample rate are joined to a
+    section with one row in the index. Records of a section starting within
+    half a sample of the expected time are joined to one time span.
+
+    :type path: str
+    :param path: Path of the file to read.
+    :type file_name: str
+    :param file_name: File name to store in the index.
+    :rtype: tuple
+    :returns: The :func:`os.stat` result of the file before reading it and
+        the list of rows or ``None`` if the file could not be read. The
+        stat result is ``None`` if the file does not exist anymore.
+    """
+    try:
+        stat = os.stat(path)
+    except OSError as e:
+        logger.warning("Failed to index file '{}': {}".format(path, e))
+        return None, None
+    filemodtime = _format_file_modtime(stat.st_mtime)
+    sections = []
+    section = None
+    try:
+        for msri in _MSRIterator(filename=path, dataflag=False):
+            msr = msri.msr.contents
+            offset = msri.get_offset()
+            key = tuple(code.decode('ascii', 'replace') for code in (
+                msr.network, msr.station, msr.location, msr.channel,
+                msr.dataquality))
+            start = msr.starttime
+            end = clibmseed.msr_endtime(msri.msr)
+            if section is None or key != section["key"] or \
+                    msr.samprate != section["samplerate"] or \
+                    offset != section["byteoffset"] + section["bytes"]:
+                section = {"key": key, "samplerate": msr.samprate,
+                           "byteoffset": offset, "bytes": 0,
+                           "hash": hashlib.md5(),
+                           "starttime": start, "endtime": end,
+                           "timeindex": [(start, offset)],
+                           "timespans": [[start, end]]}
+                sections.append(section)
+            else:
+                section["starttime"] = min(section["starttime"], start)
+                section["endtime"] = max(section["endtime"], end)
+                if start - section["timeindex"][-1][0] >= \
+                        _TIME_INDEX_INTERVAL * HPTMODULUS:
+                    section["timeindex"].append((start, offset))
+                span = section["timespans"][-1]
+                if msr.samprate > 0:
+                    period = HPTMODULUS / msr.samprate
+                    adjacent = abs(start - span[1] - period) <= period / 2
+                else:
+                    adjacent = False
+                if adjacent:
+                    span[1] = max(span[1], end)
+                else:
+                    section["timespans"].append([start, end])
+            section["bytes"] += msr.reclen
+            section["hash"].update(C.string_at(msr.record, msr.reclen))
+    except Exception as e:
+        logger.warning("Failed to index file '{}': {}".format(path, e))
+        return stat, None
+
+    now = UTCDateTime().strftime("%Y-%m-%dT%H:%M:%S")
+    rows = []
+    for section in sections:
+        network, station, location, channel, quality = section["key"]
+        timeindex = ["{}=>{}".format(_format_hptime(t), o)
+                     for t, o in section["timeindex"]]
+        # the value of the 'latest' entry is not evaluated by the Client
+        timeindex.append("latest=>{}".format(len(section["timeindex"])))
+        rows.append({
+            "network": network, "station": station, "location": location,
+            "channel": channel, "quality": quality, "version": None,
+            "starttime": _format_hptime_iso(section["starttime"]),
+            "endtime": _format_hptime_iso(section["endtime"]),
+            "samplerate": section["samplerate"], "filename": file_name,
+            "byteoffset": section["byteoffset"], "bytes": section["bytes"],
+            "hash": section["hash"].hexdigest(),
+            "timeindex": ",".join(timeindex),
+            "timespans": ",".join(
+                "[{}:{}]".format(_format_hptime(s), _format_hptime(e))
+                for s, e in section["timespans"]),
+            "timerates": None, "format": None, "filemodtime": filemodtime,
+            "updated": now, "scanned": now})
+    return stat, rows
+
+
 class TSIndexDatabaseHandler(object):
     """Supports direct tsindex database data access and manipulation.
 
@@ -1142,6 +1393,8 @@ class TSIndexDatabaseHandler(object):
     be used to support TSIndex operation on other databases.
 
     """
+    # name of the temporary table holding the rows of a request
+    _request_table = "tsindex_request"
 
     @deprecated_keywords({"loglevel": None})
     def __init__(self, database=None, tsindex_table="tsindex",
@@ -1162,6 +1415,9 @@ class TSIndexDatabaseHandler(object):
         self.database = None
         self.tsindex_table = tsindex_table
         self.tsindex_summary_table = tsindex_summary_table
+        # modification time and size of the files read by the built-in
+        # indexer of Indexer
+        self.tsindex_files_table = tsindex_table + "_files"
         self.TSIndexTable = _get_tsindex_table(self.tsindex_table)
         self.TSIndexSummaryTable = \
             _get_tsindex_summary_table(self.tsindex_summary_table)
@@ -1319,6 +1575,125 @@ class TSIndexDatabaseHandler(object):
         else:
             return False
 
+    def _create_tsindex_table(self):
+        """
+        Create the tsindex table and its indexes with the layout used by
+        mseedindex, unless they already exist.
+        """
+        statements = [
+            "CREATE TABLE IF NOT EXISTS {0} (network TEXT, station TEXT, "
+            "location TEXT, channel TEXT, quality TEXT, version INTEGER, "
+            "starttime TEXT, endtime TEXT, samplerate REAL, filename TEXT, "
+            "byteoffset INTEGER, bytes INTEGER, hash TEXT, timeindex TEXT, "
+            "timespans TEXT, timerates TEXT, format TEXT, filemodtime TEXT, "
+            "updated TEXT, scanned TEXT)",
+            "CREATE INDEX IF NOT EXISTS {0}_nslcse_idx ON {0} "
+            "(network,station,location,channel,starttime,endtime)",
+            "CREATE INDEX IF NOT EXISTS {0}_filename_idx ON {0} (filename)",
+            "CREATE INDEX IF NOT EXISTS {0}_updated_idx ON {0} (updated)",
+            "CREATE TABLE IF NOT EXISTS {1} (filename TEXT PRIMARY KEY, "
+            "mtime INTEGER, size INTEGER, indexed INTEGER, scanned TEXT)"]
+        with self.engine.begin() as connection:
+            for statement in statements:
+                connection.execute(sa.text(statement.format(
+                    self.tsindex_table, self.tsindex_files_table)))
+
+    def _get_indexed_files(self):
+        """
+        Return the modification time and size of all indexed files.
+
+        :rtype: dict
+        :returns: Dictionary mapping normalized file names to tuples of the
+            file name as stored in the index, the modification time in
+            nanoseconds and the size of the file when it was last read by
+            the built-in indexer. For files only found in the tsindex table
+            the modification time is the ``filemodtime`` string of the index
+            and the size is ``None``.
+        """
+        result = {}
+        with self.engine.connect() as connection:
+            for filename, filemodtime in connection.execute(sa.text(
+                    "SELECT filename, MAX(filemodtime) FROM {} "
+                    "GROUP BY filename".format(self.tsindex_table))):
+                result[os.path.normpath(filename)] = \
+                    (filename, filemodtime, None)
+            if self.tsindex_files_table not in \
+                    sa.inspect(connection).get_table_names():
+                return result
+            for filename, mtime, size in connection.execute(sa.text(
+                    "SELECT filename, mtime, size FROM {}"
+                    .format(self.tsindex_files_table))):
+                result[os.path.normpath(filename)] = (filename, mtime, size)
+        return result
+
+    def _set_file_stats(self, files, connection=None):
+        """
+        Store the modification time and size of files.
+
+        :type files: list(tuple)
+        :param files: Tuples of the file name as stored in the index, the
+            :func:`os.stat` result of the file and optionally whether it
+            could be indexed.
+        """
+        if connection is None:
+            with self.engine.begin() as connection:
+                return self._set_file_stats(files, connection)
+        names = [f[0] for f in files]
+        now = UTCDateTime().strftime("%Y-%m-%dT%H:%M:%S")
+        # stay below the maximum number of host parameters of SQLite
+        for i in range(0, len(names), 500):
+            connection.execute(
+                sa.text("DELETE FROM {} WHERE filename IN :names"
+                        .format(self.tsindex_files_table))
+                .bindparams(sa.bindparam("names", expanding=True)),
+                {"names": names[i:i + 500]})
+        if files:
+            connection.execute(
+                sa.text("INSERT INTO {} VALUES (:filename, :mtime, :size, "
+                        ":indexed, :scanned)"
+                        .format(self.tsindex_files_table)),
+                [{"filename": f[0], "mtime": f[1].st_mtime_ns,
+                  "size": f[1].st_size,
+                  "indexed": int(f[2] if len(f) > 2 else True),
+                  "scanned": now} for f in files])
+
+    def _replace_index_rows(self, files):
+        """
+        Replace all rows of the given files in the tsindex table by new rows
+        and store the modification time and size of the files in a single
+        transaction. The rows of files that could not be read are kept.
+
+        :type files: list(tuple)
+        :param files: Tuples of the file name as stored in the index, the
+            :func:`os.stat` result of the file before reading it and the new
+            rows, mapping column names to values, or ``None`` if the file
+            could not be read.
+        :rtype: bool
+        :returns: ``True`` if the time extents of the rows changed.
+        """
+        table = self.TSIndexTable.__table__
+        filenames = [filename for filename, _, rows in files
+                     if rows is not None]
+        rows = [row for _, _, rows in files if rows is not None
+                for row in rows]
+        columns = ("network", "station", "location", "channel", "starttime",
+                   "endtime")
+        with self.engine.begin() as connection:
+            extents = []
+            # stay below the maximum number of host parameters of SQLite
+            for i in range(0, len(filenames), 500):
+                where = table.c.filename.in_(filenames[i:i + 500])
+                extents.extend(tuple(r) for r in connection.execute(
+                    sa.select(*[table.c[c] for c in columns]).where(where)))
+                connection.execute(table.delete().where(where))
+            if rows:
+                connection.execute(table.insert(), rows)
+            self._set_file_stats(
+                [(filename, stat, rows is not None)
+                 for filename, stat, rows in files], connection)
+        return sorted(extents) != sorted(
+            tuple(row[c] for c in columns) for row in rows)
+
     def _fetch_index_rows(self, query_rows=None, bulk_params=None):
         '''
         Fetch index rows matching specified request. This method is marked as
@@ -1341,165 +1716,111 @@ class TSIndexDatabaseHandler(object):
             requeststart, requestend).
         '''
 
-        session = self.session()
-
         if query_rows is None:
             query_rows = []
         if bulk_params is None:
             bulk_params = {}
 
         query_rows = self._clean_query_rows(query_rows)
-        request_cte_name = "raw_request_cte"
+        wildcards = False
+        for req in query_rows:
+            for field in req:
+                if '*' in str(field) or '?' in str(field):
+                    wildcards = True
+                    break
 
-        result = []
-        # Create a CTE that contains the request
+        session = self.session()
         try:
-            stmts = [
-                sa.select(
-                    sa.literal(a).label("network"),
-                    sa.literal(b).label("station"),
-                    sa.literal(c).label("location"),
-                    sa.literal(d).label("channel"),
-                    sa.case((sa.literal(e) == '*',
-                             sa.literal('0000-00-00T00:00:00')),
-                            else_=sa.literal(e)
-                            ).label("starttime"),
-                    sa.case((sa.literal(f) == '*',
-                             sa.literal('5000-00-00T00:00:00')),
-                            else_=sa.literal(f)
-                            ).label("endtime")
-                )
-                for idx, (a, b, c, d, e, f) in enumerate(query_rows)
-            ]
-            requests = sa.union_all(*stmts)
-            requests_cte = requests.cte(name=request_cte_name)
-            wildcards = False
-            for req in query_rows:
-                for field in req:
-                    if '*' in str(field) or '?' in str(field):
-                        wildcards = True
-                        break
-            summary_present = self.has_tsindex_summary()
-            if wildcards and summary_present:
+            requests = self._load_request_table(session, query_rows)
+            if wildcards and self.has_tsindex_summary():
                 # Resolve wildcards using summary if present to:
                 # a) resolve wildcards, allows use of '=' operator
                 #    and table index
                 # b) reduce index table search to channels that are
                 #    known included
-                flattened_request_cte_name = 'flattened_request_cte'
-                # expand
-                flattened_request_cte = (
+                requests = (
                     session
                     .query(self.TSIndexSummaryTable.network,
                            self.TSIndexSummaryTable.station,
                            self.TSIndexSummaryTable.location,
                            self.TSIndexSummaryTable.channel,
-                           sa.case((requests_cte.c.starttime == '*',
-                                    self.TSIndexSummaryTable.earliest),
-                                   else_=requests_cte.c.starttime
-                                   ).label('starttime'),
-                           sa.case((requests_cte.c.endtime == '*',
-                                    self.TSIndexSummaryTable.latest),
-                                   else_=requests_cte.c.endtime
-                                   ).label('endtime'))
+                           requests.c.starttime,
+                           requests.c.endtime)
                     .filter(self.TSIndexSummaryTable.network.op('GLOB')
-                            (requests_cte.c.network))
+                            (requests.c.network))
                     .filter(self.TSIndexSummaryTable.station.op('GLOB')
-                            (requests_cte.c.station))
+                            (requests.c.station))
                     .filter(self.TSIndexSummaryTable.location.op('GLOB')
-                            (requests_cte.c.location))
+                            (requests.c.location))
                     .filter(self.TSIndexSummaryTable.channel.op('GLOB')
-                            (requests_cte.c.channel))
+                            (requests.c.channel))
                     .filter(self.TSIndexSummaryTable.earliest <=
-                            requests_cte.c.endtime)
+                            requests.c.endtime)
                     .filter(self.TSIndexSummaryTable.latest >=
-                            requests_cte.c.starttime)
-                    .order_by(self.TSIndexSummaryTable.network,
-                              self.TSIndexSummaryTable.station,
-                              self.TSIndexSummaryTable.location,
-                              self.TSIndexSummaryTable.channel,
-                              self.TSIndexSummaryTable.earliest,
-                              self.TSIndexSummaryTable.latest)
-                    .cte(name=flattened_request_cte_name))
-                result = (
-                    session
-                    .query(self.TSIndexTable,
-                           requests_cte.c.starttime,
-                           requests_cte.c.endtime)
-                    .filter(self.TSIndexTable.network ==
-                            flattened_request_cte.c.network)
-                    .filter(self.TSIndexTable.station ==
-                            flattened_request_cte.c.station)
-                    .filter(self.TSIndexTable.location ==
-                            flattened_request_cte.c.location)
-                    .filter(self.TSIndexTable.channel ==
-                            flattened_request_cte.c.channel)
-                    .filter(self.TSIndexTable.starttime <=
-                            flattened_request_cte.c.endtime)
-                    .filter(self.TSIndexTable.endtime >=
-                            flattened_request_cte.c.starttime)
-                    .order_by(self.TSIndexTable.network,
-                              self.TSIndexTable.station,
-                              self.TSIndexTable.location,
-                              self.TSIndexTable.channel,
-                              self.TSIndexTable.starttime,
-                              self.TSIndexTable.endtime))
+                            requests.c.starttime)
+                    .distinct()
+                    .cte(name='flattened_request_cte'))
                 wildcards = False
+            if wildcards:
+                def match(column, pattern):
+                    return column.op('GLOB')(pattern)
             else:
-                result = (
-                    session
-                    .query(self.TSIndexTable,
-                           requests_cte.c.starttime,
-                           requests_cte.c.endtime
-                           )
-                    .filter(self.TSIndexTable.network.op('GLOB')
-                            (requests_cte.c.network))
-                    .filter(self.TSIndexTable.station.op('GLOB')
-                            (requests_cte.c.station))
-                    .filter(self.TSIndexTable.location.op('GLOB')
-                            (requests_cte.c.location))
-                    .filter(self.TSIndexTable.channel.op('GLOB')
-                            (requests_cte.c.channel))
-                    .filter(self.TSIndexTable.starttime <=
-                            requests_cte.c.endtime)
-                    .filter(self.TSIndexTable.endtime >=
-                            requests_cte.c.starttime)
-                    .order_by(self.TSIndexTable.network,
-                              self.TSIndexTable.station,
-                              self.TSIndexTable.location,
-                              self.TSIndexTable.channel,
-                              self.TSIndexTable.starttime,
-                              self.TSIndexTable.endtime))
+                def match(column, pattern):
+                    return column == pattern
+            # a single join of all requests against the tsindex table
+            result = (
+                session
+                .query(self.TSIndexTable,
+                       requests.c.starttime,
+                       requests.c.endtime)
+                .filter(match(self.TSIndexTable.network,
+                              requests.c.network))
+                .filter(match(self.TSIndexTable.station,
+                              requests.c.station))
+                .filter(match(self.TSIndexTable.location,
+                              requests.c.location))
+                .filter(match(self.TSIndexTable.channel,
+                              requests.c.channel))
+                .filter(self.TSIndexTable.starttime <= requests.c.endtime)
+                .filter(self.TSIndexTable.endtime >= requests.c.starttime)
+                .order_by(self.TSIndexTable.network,
+                          self.TSIndexTable.station,
+                          self.TSIndexTable.location,
+                          self.TSIndexTable.channel,
+                          self.TSIndexTable.starttime,
+                          self.TSIndexTable.endtime)
+                .all())
         except Exception as err:
             raise ValueError(str(err))
+        finally:
+            # returns the connection to the pool, the temporary request
+            # table stays on pooled connections and is dropped by
+            # _load_request_table() before the next request
+            session.close()
 
+        # convert to named tuples
+        NamedRow = namedtuple('NamedRow',
+                              ['network', 'station', 'location',
+                               'channel', 'quality', 'version',
+                               'starttime', 'endtime', 'samplerate',
+                               'filename', 'byteoffset', 'bytes',
+                               'hash', 'timeindex', 'timespans',
+                               'timerates', 'format', 'filemodtime',
+                               'updated', 'scanned', 'requeststart',
+                               'requestend'])
         index_rows = []
-        try:
-            for rt in result:
-                # convert to a named tuple
-                NamedRow = namedtuple('NamedRow',
-                                      ['network', 'station', 'location',
-                                       'channel', 'quality', 'version',
-                                       'starttime', 'endtime', 'samplerate',
-                                       'filename', 'byteoffset', 'bytes',
-                                       'hash', 'timeindex', 'timespans',
-                                       'timerates', 'format', 'filemodtime',
-                                       'updated', 'scanned', 'requeststart',
-                                       'requestend'])
-                row, requeststart, requestend = rt
-                nrow = NamedRow(
-                        row.network, row.station, row.location,
-                        row.channel, row.quality, row.version,
-                        row.starttime, row.endtime, row.samplerate,
-                        row.filename, row.byteoffset, row.bytes,
-                        row.hash, row.timeindex, row.timespans,
-                        row.timerates, row.format, row.filemodtime,
-                        row.updated, row.scanned,
-                        requeststart, requestend
-                       )
-                index_rows.append(nrow)
-        except ResourceClosedError:
-            pass  # query returned no results
+        for row, requeststart, requestend in result:
+            nrow = NamedRow(
+                    row.network, row.station, row.location,
+                    row.channel, row.quality, row.version,
+                    row.starttime, row.endtime, row.samplerate,
+                    row.filename, row.byteoffset, row.bytes,
+                    row.hash, row.timeindex, row.timespans,
+                    row.timerates, row.format, row.filemodtime,
+                    row.updated, row.scanned,
+                    requeststart, requestend
+                   )
+            index_rows.append(nrow)
         logger.debug("Fetched %d index rows" % len(index_rows))
         return index_rows
 
@@ -1523,36 +1844,12 @@ class TSIndexDatabaseHandler(object):
         :returns: Return rows as list of named tuples containing:
             (network, station, location, channel, earliest, latest, updated).
         '''
-        session = self.session()
         query_rows = self._clean_query_rows(query_rows)
         tsindex_summary_cte = self.get_tsindex_summary_cte()
-        # Create a CTE that contains the request
-        try:
-            request_cte_name = "request_cte"
-            stmts = [
-                sa.select(
-                    sa.literal(a).label("network"),
-                    sa.literal(b).label("station"),
-                    sa.literal(c).label("location"),
-                    sa.literal(d).label("channel"),
-                    sa.case((sa.literal(e) == '*',
-                             sa.literal('0000-00-00T00:00:00')),
-                            else_=sa.literal(e)
-                            ).label("starttime"),
-                    sa.case((sa.literal(f) == '*',
-                             sa.literal('5000-00-00T00:00:00')),
-                            else_=sa.literal(f)
-                            ).label("endtime")
-                    )
-                for idx, (a, b, c, d, e, f) in enumerate(query_rows)
-            ]
-            requests = sa.union_all(*stmts)
-            requests_cte = requests.cte(name=request_cte_name)
-        except Exception as err:
-            raise ValueError(str(err))
-
+        session = self.session()
         # Select summary rows by joining with summary table
         try:
+            requests = self._load_request_table(session, query_rows)
             # expand
             result = (
                 session
@@ -1564,39 +1861,75 @@ class TSIndexDatabaseHandler(object):
                        tsindex_summary_cte.c.latest,
                        tsindex_summary_cte.c.updt)
                 .filter(tsindex_summary_cte.c.network.op('GLOB')
-                        (requests_cte.c.network))
+                        (requests.c.network))
                 .filter(tsindex_summary_cte.c.station.op('GLOB')
-                        (requests_cte.c.station))
+                        (requests.c.station))
                 .filter(tsindex_summary_cte.c.location.op('GLOB')
-                        (requests_cte.c.location))
+                        (requests.c.location))
                 .filter(tsindex_summary_cte.c.channel.op('GLOB')
-                        (requests_cte.c.channel))
+                        (requests.c.channel))
                 .filter(tsindex_summary_cte.c.earliest <=
-                        requests_cte.c.endtime)
+                        requests.c.endtime)
                 .filter(tsindex_summary_cte.c.latest >=
-                        requests_cte.c.starttime)
+                        requests.c.starttime)
                 .order_by(tsindex_summary_cte.c.network,
                           tsindex_summary_cte.c.station,
                           tsindex_summary_cte.c.location,
                           tsindex_summary_cte.c.channel,
                           tsindex_summary_cte.c.earliest,
-                          tsindex_summary_cte.c.latest))
+                          tsindex_summary_cte.c.latest)
+                .all())
         except Exception as err:
             raise ValueError(str(err))
+        finally:
+            session.close()
 
         # Map raw tuples to named tuples for clear referencing
         NamedRow = namedtuple('NamedRow',
                               ['network', 'station', 'location', 'channel',
                                'earliest', 'latest', 'updated'])
-        summary_rows = []
-        try:
-            for row in result:
-                summary_rows.append(NamedRow(*row))
-        except ResourceClosedError:
-            pass  # query returned no results
+        summary_rows = [NamedRow(*row) for row in result]
         logger.debug("Fetched %d summary rows" % len(summary_rows))
         return summary_rows
 
+    def _load_request_table(self, session, query_rows):
+        """
+        Load cleaned query rows into a temporary request table with a single
+        bulk insert.
+
+        The table is created on the connection of ``session``. Pooled
+        connections keep it after the session is closed, so a table left
+        from a previous request is dropped first. Start and end times of
+        ``'*'`` are replaced by dates before and after all data.
+
+        :type session: :class:`sqlalchemy.orm.session.Session`
+        :param session: Session to create the table in.
+        :type query_rows: list(tuple(str, str, str, str, str, str))
+        :param query_rows: Query rows as returned by
+            :meth:`~TSIndexDatabaseHandler._clean_query_rows`.
+        :rtype: :class:`sqlalchemy.sql.expression.TableClause`
+        """
+        columns = ["network", "station", "location", "channel",
+                   "starttime", "endtime"]
+        session.execute(sa.text(
+            "DROP TABLE IF EXISTS temp.{}".format(self._request_table)))
+        session.execute(sa.text(
+            "CREATE TEMPORARY TABLE {} ({} TEXT)".format(
+                self._request_table, " TEXT, ".join(columns))))
+        table = sa.table(self._request_table,
+                         *[sa.column(c) for c in columns])
+        values = []
+        for network, station, location, channel, start, end in query_rows:
+            if start == '*':
+                start = '0000-00-00T00:00:00'
+            if end == '*':
+                end = '5000-00-00T00:00:00'
+            values.append(dict(zip(columns, (network, station, location,
+                                             channel, str(start),
+                                             str(end)))))
+        session.execute(table.insert(), values)
+        return table
+
     def _create_query_row(self, network, station, location,
                           channel, starttime, endtime):
         """
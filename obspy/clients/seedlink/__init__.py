@@ -11,7 +11,9 @@ For simple requests of finite time windows see
 data streams see
 :class:`~obspy.clients.seedlink.easyseedlink.EasySeedLinkClient`, or for
 lower-level packet handling see
-:class:`~obspy.clients.seedlink.slclient.SLClient`.
+:class:`~obspy.clients.seedlink.slclient.SLClient`. To receive the data of
+many stations from several servers at once in an asyncio event loop see
+:class:`~obspy.clients.seedlink.async_client.AsyncSeedLinkClient`.
 
 :copyright:
     The ObsPy Development Team (devs@obspy.org) & Anthony Lomax
@@ -29,6 +31,7 @@ mining".
 from .basic_client import Client  # NOQA
 from .slclient import SLClient  # NOQA
 from .easyseedlink import EasySeedLinkClient  # NOQA
+from .async_client import AsyncSeedLinkClient  # NOQA
 
 if __name__ == '__main__':
     import doctest
@@ -0,0 +1,474 @@
+# -*- coding: utf-8 -*-
+"""
+asyncio SeedLink client streaming data of many stations from many servers.
+
+:copyright:
+    The ObsPy Development Team (devs@obspy.org)
+:license:
+    GNU Lesser General Public License, Version 3
+    (https://www.gnu.org/copyleft/lesser.html)
+"""
+import asyncio
+import collections
+import io
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlparse
+
+from obspy import read
+from obspy.core.utcdatetime import UTCDateTime
+from .client.slnetstation import SLNetStation
+from .seedlinkexception import SeedLinkException
+from .slpacket import SLPacket
+
+
+logger = logging.getLogger('obspy.clients.seedlink')
+
+PACKET_SIZE = SLPacket.SLHEADSIZE + SLPacket.SLRECSIZE
+
+
+class _Server(object):
+    """
+    A SeedLink server with the streams selected from it.
+    """
+    def __init__(self, hostname, port):
+        self.hostname = hostname
+        self.port = port
+        # (network, station) -> SLNetStation
+        self.streams = collections.OrderedDict()
+        self.server_id = None
+        self.server_version = None
+
+    def __str__(self):
+        return "%s:%d" % (self.hostname, self.port)
+
+
+class AsyncSeedLinkClient(object):
+    """
+    SeedLink client receiving data of any number of stations from any number
+    of servers concurrently in a single asyncio event loop.
+
+    Every server is read over its own connection in multi-station mode. All
+    packets that arrived on a connection are decoded together in a thread
+    pool, contiguous records of a channel are combined into one
+    :class:`~obspy.core.trace.Trace`. The traces of all servers are
+    returned by iterating over the client with ``async for``:
+
+    >>> import asyncio
+    >>> from obspy.clients.seedlink import AsyncSeedLinkClient
+    >>> async def main():
+    ...     client = AsyncSeedLinkClient()
+    ...     client.select_stream("geofon.gfz-potsdam.de", "GE", "APE", "BH?")
+    ...     client.select_stream("rtserve.iris.washington.edu", "IU", "ANMO",
+    ...                          "BH?")
+    ...     async with client:
+    ...         async for trace in client:
+    ...             print(trace)
+    >>> asyncio.run(main())  # doctest: +SKIP
+
+    Lost connections are reestablished after ``reconnect_delay`` seconds,
+    resuming every station after the sequence number of its last received
+    packet.
+
+    :type timeout: float
+    :param timeout: Time in seconds to wait for the connection, the answer
+        to a command or the next data of a server before the connection is
+        considered lost.
+    :type reconnect_delay: float
+    :param reconnect_delay: Time in seconds to wait before reconnecting to a
+        server. ``None`` does not reconnect, the data of a server ends when
+        its connection is closed and connection errors are raised.
+    :type starttime: :class:`~obspy.core.utcdatetime.UTCDateTime`
+    :param starttime: Request data starting at this time from the buffers
+        of the servers instead of the next available data.
+    :type endtime: :class:`~obspy.core.utcdatetime.UTCDateTime`
+    :param endtime: End of the requested time window, only used together
+        with ``starttime``. The data of a server ends once it has sent all
+        data of the time window.
+    :type batch_size: int
+    :param batch_size: Maximum number of packets read and decoded at once
+        per server.
+    :type queue_size: int
+    :param queue_size: Maximum number of decoded batches waiting to be
+        iterated over. Servers are not read while the queue is full.
+    :type decode_threads: int
+    :param decode_threads: Number of threads decoding MiniSEED records.
+    """
+    def __init__(self, timeout=120, reconnect_delay=30, starttime=None,
+                 endtime=None, batch_size=128, queue_size=100,
+                 decode_threads=2):
+        if batch_size < 1 or queue_size < 1 or decode_threads < 1:
+            msg = ("batch_size, queue_size and decode_threads must be "
+                   "positive integers.")
+            raise ValueError(msg)
+        if endtime is not None and starttime is None:
+            msg = "endtime can only be used together with starttime."
+            raise ValueError(msg)
+        self.timeout = timeout
+        self.reconnect_delay = reconnect_delay
+        self.starttime = starttime if starttime is None \
+            else UTCDateTime(starttime)
+        self.endtime = endtime if endtime is None else UTCDateTime(endtime)
+        self.batch_size = batch_size
+        self.queue_size = queue_size
+        self._servers = collections.OrderedDict()
+        self._executor = ThreadPoolExecutor(
+            max_workers=decode_threads,
+            thread_name_prefix="obspy-seedlink-decode")
+        self._tasks = []
+        self._queue = None
+        self._statistics = collections.Counter()
+
+    def __str__(self):
+        streams = sum(len(server.streams)
+                      for server in self._servers.values())
+        return "AsyncSeedLinkClient(%d station(s) on %d server(s))" % (
+            streams, len(self._servers))
+
+    def _repr_pretty_(self, p, cycle):
+        p.text(str(self))
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc_value, traceback):
+        await self.close()
+
+    def __aiter__(self):
+        return self._iter_traces()
+
+    def get_statistics(self):
+        """
+        Return a dictionary with counters of this client.
+
+        ``"packets"`` and ``"bytes"`` are the number and size of received
+        data packets, ``"traces"`` the number of decoded traces and
+        ``"reconnects"`` the number of reestablished connections.
+        """
+        return {key: self._statistics[key] for key in (
+            "packets", "bytes", "traces", "reconnects")}
+
+    def select_stream(self, server_url, net, station, selector=None):
+        """
+        Select a stream of a server for data transfer.
+
+        This method can be called any number of times for any number of
+        servers before the client is iterated over.
+
+        :type server_url: str
+        :param server_url: The SeedLink server, e.g.
+            ``"seedlink://geofon.gfz-potsdam.de:18000"``. The scheme and the
+            default port 18000 can be omitted.
+        :type net: str
+        :param net: The network id
+        :type station: str
+        :param station: The station id
+        :type selector: str
+        :param selector: SeedLink selectors separated by spaces, e.g.
+            ``"BHZ"`` or ``"BH? HH?"``. All streams of the station are sent
+            if omitted.
+        """
+        if self._tasks:
+            msg = ("Adding streams is not supported after the client has "
+                   "started streaming.")
+            raise SeedLinkException(msg)
+        hostname, port = _parse_server_url(server_url)
+        server = self._servers.get((hostname, port))
+        if server is None:
+            server = self._servers[(hostname, port)] = _Server(hostname, port)
+        selectors = selector.split() if selector else []
+        stream = server.streams.get((net, station))
+        if stream is None:
+            server.streams[(net, station)] = SLNetStation(
+                net, station, selectors, -1, None)
+        else:
+            stream.selectors.extend(selectors)
+
+    async def close(self):
+        """
+        Close all connections and stop the decoding threads.
+        """
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        loop = asyncio.get_running_loop()
+        await loop.run_in_executor(None, self._executor.shutdown)
+
+    def _start(self):
+        if not self._servers:
+            msg = ("No streams specified. Use select_stream() to select a "
+                   "stream.")
+            raise SeedLinkException(msg)
+        if self._tasks:
+            msg = "The client can only be iterated over once."
+            raise SeedLinkException(msg)
+        self._queue = asyncio.Queue(maxsize=self.queue_size)
+        self._tasks = [asyncio.ensure_future(self._run(server))
+                       for server in self._servers.values()]
+
+    async def _iter_traces(self):
+        self._start()
+        running = len(self._tasks)
+        while running:
+            item = await self._queue.get()
+            if item is None:
+                running -= 1
+            elif isinstance(item, Exception):
+                raise item
+            else:
+                for trace in item:
+                    yield trace
+
+    async def _run(self, server):
+        """
+        Stream the data of a server into the queue, reconnecting after
+        connection errors.
+        """
+        try:
+            while True:
+                try:
+                    if await self._stream(server):
+                        break
+                    logger.warning("[%s] connection closed by server",
+                                   server)
+                except (OSError, asyncio.TimeoutError,
+                        asyncio.IncompleteReadError) as e:
+                    if self.reconnect_delay is None:
+                        raise
+                    logger.warning("[%s] connection lost: %s", server,
+                                   e or type(e).__name__)
+                if self.reconnect_delay is None:
+                    break
+                await asyncio.sleep(self.reconnect_delay)
+                self._statistics["reconnects"] += 1
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            await self._queue.put(e)
+            return
+        await self._queue.put(None)
+
+    async def _stream(self, server):
+        """
+        Connect to a server, negotiate the streams and put the decoded data
+        into the queue. Returns ``True`` if the server ended the data
+        transfer and ``False`` if it closed the connection.
+        """
+        reader, writer = await asyncio.wait_for(
+            asyncio.open_connection(server.hostname, server.port),
+            self.timeout)
+        try:
+            await self._negotiate(server, reader, writer)
+            loop = asyncio.get_running_loop()
+            buffer = bytearray()
+            while True:
+                data = await asyncio.wait_for(
+                    reader.read(self.batch_size * PACKET_SIZE), self.timeout)
+                if not data:
+                    return False
+                buffer += data
+                records, finished = self._split_packets(server, buffer)
+                if records:
+                    traces = await loop.run_in_executor(
+                        self._executor, _decode_records, records)
+                    self._statistics["traces"] += len(traces)
+                    await self._queue.put(traces)
+                if finished:
+                    return True
+        finally:
+            writer.close()
+
+    def _split_packets(self, server, buffer):
+        """
+        Remove all complete packets from the start of the buffer and update
+        the sequence numbers of the streams.
+
+        Returns the MiniSEED records of all data packets and whether the
+        server ended the data transfer.
+        """
+        records = []
+        finished = False
+        offset = 0
+        while offset < len(buffer):
+            head = bytes(buffer[offset:offset + SLPacket.SLHEADSIZE])
+            if head.startswith(SLPacket.SIGNATURE):
+                if len(buffer) - offset < PACKET_SIZE:
+                    break
+                record = bytes(buffer[offset + SLPacket.SLHEADSIZE:
+                                      offset + PACKET_SIZE])
+                offset += PACKET_SIZE
+                # In-stream INFO packets are not supported.
+                if head.startswith(SLPacket.INFOSIGNATURE):
+                    continue
+                self._update_stream(server, head, record)
+                records.append(record)
+            elif head.startswith(SLPacket.ENDSIGNATURE):
+                finished = True
+                offset = len(buffer)
+            elif head.startswith(SLPacket.ERRORSIGNATURE[:5]):
+                msg = "[%s] server reported an error" % server
+                raise SeedLinkException(msg)
+            elif len(head) < 5 and any(
+                    signature.startswith(head) for signature in (
+                        SLPacket.SIGNATURE, SLPacket.ENDSIGNATURE,
+                        SLPacket.ERRORSIGNATURE)):
+                break
+            else:
+                msg = "[%s] bad packet signature: %r" % (server, head)
+                raise ConnectionError(msg)
+        del buffer[:offset]
+        self._statistics["packets"] += len(records)
+        self._statistics["bytes"] += len(records) * PACKET_SIZE
+        return records, finished
+
+    def _update_stream(self, server, head, record):
+        try:
+            seqnum = int(head[2:], 16)
+        except ValueError:
+            msg = "[%s] bad packet sequence number: %r" % (server, head)
+            raise ConnectionError(msg)
+        # Station and network code in the fixed header of the record.
+        station = record[8:13].decode("ascii", "replace").strip()
+        net = record[18:20].decode("ascii", "replace").strip()
+        stream = server.streams.get((net, station))
+        if stream is not None:
+            stream.seqnum = seqnum
+
+    async def _send(self, reader, writer, command, response=True):
+        """
+        Send a command and return the line answering it.
+        """
+        logger.debug("sending: %s", command.decode())
+        writer.write(command + b"\r")
+        await writer.drain()
+        if not response:
+            return None
+        return await asyncio.wait_for(reader.readline(), self.timeout)
+
+    async def _negotiate(self, server, reader, writer):
+        """
+        Negotiate all streams of a server in multi-station mode and issue
+        the END action command, see
+        :meth:`~.client.seedlinkconnection.SeedLinkConnection.negotiate_multi_station`.
+        """
+        servstr = await self._send(reader, writer, b"HELLO")
+        # The second line holds the organization of the server.
+        await asyncio.wait_for(reader.readline(), self.timeout)
+        servstr = servstr.decode("ascii", "replace")
+        vndx = servstr.find(" v")
+        try:
+            server.server_id = servstr[:vndx] if vndx >= 0 else servstr
+            server.server_version = float(
+                servstr[vndx + 2:].split()[0]) if vndx >= 0 else 0.0
+        except (IndexError, ValueError):
+            msg = "bad server ID/version string: '%s'" % servstr
+            raise SeedLinkException(msg)
+        if server.server_id.lower() != "seedlink":
+            msg = "incorrect response to HELLO: '%s'" % servstr
+            raise SeedLinkException(msg)
+        logger.info("[%s] connected to: '%s'", server, servstr.strip())
+        if server.server_version < 2.5:
+            msg = ("detected SeedLink version %s does not support "
+                   "multi-station protocol" % server.server_version)
+            raise SeedLinkException(msg)
+        if self.starttime is not None and server.server_version < 2.92:
+            msg = ("detected SeedLink version %s does not support TIME "
+                   "windows" % server.server_version)
+            raise SeedLinkException(msg)
+
+        accepted = 0
+        for stream in server.streams.values():
+            command = "STATION %s %s" % (stream.station, stream.net)
+            response = await self._send(reader, writer, command.encode())
+            if not self._check_response(server, command, response):
+                continue
+            selectors = 0
+            for selector in stream.get_selectors():
+                command = "SELECT " + selector
+                response = await self._send(reader, writer, command.encode())
+                selectors += self._check_response(server, command, response)
+            if stream.get_selectors() and not selectors:
+                logger.error("[%s] no data stream selector(s) accepted for "
+                             "%s.%s", server, stream.net, stream.station)
+                continue
+            response = await self._send(
+                reader, writer, self._get_action(stream).encode())
+            if self._check_response(server, "DATA/TIME", response):
+                accepted += 1
+        if not accepted:
+            msg = "[%s] no stations accepted" % server
+            raise SeedLinkException(msg)
+        logger.info("[%s] %d station(s) accepted", server, accepted)
+        await self._send(reader, writer, SLPacket.ENDSIGNATURE,
+                         response=False)
+
+    def _get_action(self, stream):
+        """
+        Return the action command of a stream, resuming after the last
+        received packet.
+        """
+        if stream.seqnum != -1:
+            return "DATA %06X" % ((stream.seqnum + 1) % 0x1000000)
+        if self.starttime is not None:
+            command = "TIME " + self.starttime.format_seedlink()
+            if self.endtime is not None:
+                command += " " + self.endtime.format_seedlink()
+            return command
+        return "DATA"
+
+    def _check_response(self, server, command, response):
+        if response == b"OK\r\n":
+            return True
+        if response == SLPacket.ERRORSIGNATURE:
+            logger.error("[%s] response: %s not accepted", server, command)
+            return False
+        msg = "[%s] invalid response to %s command: %r" % (
+            server, command.split()[0], response)
+        raise SeedLinkException(msg)
+
+
+def _parse_server_url(server_url):
+    """
+    Return host name and port of a SeedLink server URL.
+
+    >>> _parse_server_url("geofon.gfz-potsdam.de")
+    ('geofon.gfz-potsdam.de', 18000)
+    >>> _parse_server_url("seedlink://localhost:18001")
+    ('localhost', 18001)
+    """
+    if not isinstance(server_url, str):
+        raise ValueError('Expected string for SeedLink server URL')
+    if '://' not in server_url and not server_url.startswith('//'):
+        server_url = '//' + server_url
+    parsed_url = urlparse(server_url, scheme='seedlink')
+    if not parsed_url.scheme == 'seedlink':
+        msg = 'Unsupported scheme %s (expected "seedlink")' % \
+            parsed_url.scheme
+        raise ValueError(msg)
+    if not parsed_url.hostname:
+        raise ValueError('No host name provided')
+    return parsed_url.hostname, parsed_url.port or 18000
+
+
+def _decode_records(records):
+    """
+    Decode MiniSEED records at once, contiguous records of a channel are
+    merged into one trace. Falls back to decoding the records one by one if
+    any of them is broken.
+    """
+    try:
+        return list(read(io.BytesIO(b"".join(records)), format="MSEED"))
+    except Exception:
+        pass
+    traces = []
+    for record in records:
+        try:
+            traces.extend(read(io.BytesIO(record), format="MSEED"))
+        except Exception as e:
+            logger.error("failed to decode MiniSEED record: %s", e)
+    return traces
+
+
+if __name__ == '__main__':
+    import doctest
+    doctest.testmod(exclude_empty=True)
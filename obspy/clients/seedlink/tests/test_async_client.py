@@ -0,0 +1,265 @@
+# -*- coding: utf-8 -*-
+"""
+The obspy.clients.seedlink.async_client test suite.
+
+:copyright:
+    The ObsPy Development Team (devs@obspy.org)
+:license:
+    GNU Lesser General Public License, Version 3
+    (https://www.gnu.org/copyleft/lesser.html)
+"""
+import asyncio
+import io
+import warnings
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pytest
+
+from obspy import Stream, Trace, UTCDateTime
+from obspy.clients.seedlink import AsyncSeedLinkClient
+from obspy.clients.seedlink.async_client import (_decode_records,
+                                                 _parse_server_url)
+from obspy.clients.seedlink.seedlinkexception import SeedLinkException
+
+
+STARTTIME = UTCDateTime(2020, 1, 1)
+
+
+def _get_records(net, sta, cha, npts=2000):
+    """
+    Return the 512 byte MiniSEED records of a trace.
+    """
+    trace = Trace(np.arange(npts, dtype=np.int32), header={
+        "network": net, "station": sta, "location": "", "channel": cha,
+        "sampling_rate": 100.0, "starttime": STARTTIME})
+    bio = io.BytesIO()
+    trace.write(bio, format="MSEED", reclen=512, encoding="STEIM2")
+    data = bio.getvalue()
+    return [data[i:i + 512] for i in range(0, len(data), 512)]
+
+
+class _FakeServer(object):
+    """
+    Minimal SeedLink server sending the records of every accepted station
+    after the END command.
+    """
+    def __init__(self, records, send_end=True, close_after=None):
+        # (net, sta) -> list of records
+        self.records = records
+        self.send_end = send_end
+        self.close_after = close_after
+        self.commands = []
+        self.connections = 0
+        self.server = None
+
+    async def start(self):
+        self.server = await asyncio.start_server(
+            self._handle, "127.0.0.1", 0)
+        return "127.0.0.1:%d" % self.server.sockets[0].getsockname()[1]
+
+    async def stop(self):
+        self.server.close()
+        await self.server.wait_closed()
+
+    async def _handle(self, reader, writer):
+        self.connections += 1
+        stations = []
+        actions = {}
+        station = None
+        while True:
+            line = await reader.readuntil(b"\r")
+            command = line.strip().decode()
+            self.commands.append(command)
+            if command == "HELLO":
+                writer.write(b"SeedLink v3.1 (test) :: SLPROTO:3.1\r\n"
+                             b"Test server\r\n")
+            elif command.startswith("STATION"):
+                _, sta, net = command.split()
+                if (net, sta) in self.records:
+                    station = (net, sta)
+                    stations.append(station)
+                    writer.write(b"OK\r\n")
+                else:
+                    writer.write(b"ERROR\r\n")
+            elif command.startswith("SELECT"):
+                writer.write(b"OK\r\n")
+            elif command.startswith(("DATA", "TIME")):
+                actions[station] = command
+                writer.write(b"OK\r\n")
+            elif command == "END":
+                break
+        sent = 0
+        for station in stations:
+            start = 0
+            parts = actions[station].split()
+            if parts[0] == "DATA" and len(parts) > 1:
+                start = int(parts[1], 16)
+            for seqnum, record in enumerate(self.records[station]):
+                if seqnum < start:
+                    continue
+                if sent == self.close_after:
+                    writer.close()
+                    self.close_after = None
+                    return
+                writer.write(b"SL%06X" % seqnum + record)
+                sent += 1
+                # Split packets over several reads.
+                await writer.drain()
+        # Partial signatures at the end of a read are completed later.
+        if self.send_end:
+            writer.write(b"E")
+            await writer.drain()
+            await asyncio.sleep(0.01)
+            writer.write(b"ND")
+            await writer.drain()
+        writer.close()
+
+
+def _run(coroutine):
+    return asyncio.run(asyncio.wait_for(coroutine, 30))
+
+
+class TestAsyncSeedLinkClient():
+    """
+    Test cases for obspy.clients.seedlink.async_client.AsyncSeedLinkClient
+    using local fake SeedLink servers.
+    """
+    def test_parse_server_url(self):
+        assert _parse_server_url("localhost") == ("localhost", 18000)
+        assert _parse_server_url("seedlink://localhost:18001") == \
+            ("localhost", 18001)
+        with pytest.raises(ValueError):
+            _parse_server_url("http://localhost")
+        with pytest.raises(ValueError):
+            _parse_server_url(None)
+
+    def test_init(self):
+        client = AsyncSeedLinkClient()
+        client.select_stream("localhost", "GE", "APE", "BHZ")
+        client.select_stream("localhost", "GE", "APE", "BHN BHE")
+        client.select_stream("other:18001", "GE", "APE")
+        assert client._servers[("localhost", 18000)].streams[
+            ("GE", "APE")].get_selectors() == ["BHZ", "BHN", "BHE"]
+        assert str(client) == \
+            "AsyncSeedLinkClient(2 station(s) on 2 server(s))"
+        with pytest.raises(ValueError):
+            AsyncSeedLinkClient(batch_size=0)
+        with pytest.raises(ValueError):
+            AsyncSeedLinkClient(endtime=UTCDateTime())
+
+        async def iterate():
+            async with AsyncSeedLinkClient() as client:
+                async for _ in client:
+                    pass
+        with pytest.raises(SeedLinkException):
+            _run(iterate())
+
+    def test_multiple_servers(self):
+        """
+        Streams of several stations on several servers are received
+        concurrently, records of a batch are merged.
+        """
+        servers = [
+            _FakeServer({("GE", "APE"): _get_records("GE", "APE", "BHZ"),
+                         ("GE", "KBS"): _get_records("GE", "KBS", "BHZ")}),
+            _FakeServer({("IU", "ANMO"): _get_records("IU", "ANMO", "BHZ")})]
+
+        async def main():
+            urls = [await server.start() for server in servers]
+            client = AsyncSeedLinkClient(reconnect_delay=None,
+                                         starttime=STARTTIME,
+                                         endtime=STARTTIME + 100)
+            client.select_stream(urls[0], "GE", "APE", "BH?")
+            client.select_stream(urls[0], "GE", "KBS")
+            client.select_stream(urls[0], "GE", "XXX")
+            client.select_stream(urls[1], "IU", "ANMO", "BHZ")
+            traces = []
+            async with client:
+                async for trace in client:
+                    traces.append(trace)
+            for server in servers:
+                await server.stop()
+            return client, traces
+
+        client, traces = _run(main())
+        st = Stream(traces)
+        assert len(st) <= client.get_statistics()["packets"]
+        st.merge()
+        assert sorted(tr.id for tr in st) == [
+            "GE.APE..BHZ", "GE.KBS..BHZ", "IU.ANMO..BHZ"]
+        for tr in st:
+            np.testing.assert_array_equal(tr.data, np.arange(2000))
+        stats = client.get_statistics()
+        assert stats["packets"] == sum(
+            len(records) for server in servers
+            for records in server.records.values())
+        assert stats["bytes"] == stats["packets"] * 520
+        assert stats["traces"] == len(traces)
+        assert stats["reconnects"] == 0
+        assert "TIME 2020,1,1,0,0,0 2020,1,1,0,1,40" in servers[0].commands
+        assert "SELECT BH?" in servers[0].commands
+        assert "STATION XXX GE" in servers[0].commands
+
+    def test_reconnect(self):
+        """
+        Lost connections are reestablished, resuming after the last
+        received packet.
+        """
+        records = _get_records("GE", "APE", "BHZ", npts=5000)
+        server = _FakeServer({("GE", "APE"): records}, close_after=3)
+
+        async def main():
+            url = await server.start()
+            client = AsyncSeedLinkClient(reconnect_delay=0)
+            client.select_stream(url, "GE", "APE")
+            traces = []
+            async with client:
+                async for trace in client:
+                    traces.append(trace)
+            await server.stop()
+            return client, traces
+
+        client, traces = _run(main())
+        st = Stream(traces).merge()
+        assert len(st) == 1
+        np.testing.assert_array_equal(st[0].data, np.arange(5000))
+        assert server.connections == 2
+        assert client.get_statistics()["reconnects"] == 1
+        assert client.get_statistics()["packets"] == len(records)
+        assert "DATA" in server.commands
+        assert "DATA 000003" in server.commands
+
+    def test_no_stations_accepted(self):
+        server = _FakeServer({})
+
+        async def main():
+            url = await server.start()
+            client = AsyncSeedLinkClient(reconnect_delay=None)
+            client.select_stream(url, "GE", "APE")
+            try:
+                async with client:
+                    async for _ in client:
+                        pass
+            finally:
+                await server.stop()
+
+        with pytest.raises(SeedLinkException):
+            _run(main())
+
+    def test_decode_records_concurrently(self):
+        """
+        Batches with broken records producing libmseed errors and warnings
+        can be decoded in several threads at once.
+        """
+        records = _get_records("GE", "APE", "BHZ", npts=20000)
+        broken = records[3][:64] + b"\xff" * 448
+        batches = [records[:3] + [broken, b"x" * 512] + records[4:8],
+                   records[8:20] + [b"x" * 512]]
+        with warnings.catch_warnings():
+            warnings.simplefilter("ignore")
+            expected = [_decode_records(batch) for batch in batches]
+            with ThreadPoolExecutor(max_workers=2) as executor:
+                results = list(executor.map(_decode_records, batches * 100))
+        assert [len(traces) for traces in expected] == [7, 1]
+        assert results == expected * 100
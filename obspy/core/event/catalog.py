@@ -33,8 +33,14 @@ from obspy.core.event import ResourceIdentifier
 
 from .event import Event
 
-EVENT_ENTRY_POINTS = ENTRY_POINTS['event']
-EVENT_ENTRY_POINTS_WRITE = ENTRY_POINTS['event_write']
+
+def __getattr__(name):
+    # The entry points are only looked up on first use.
+    if name == 'EVENT_ENTRY_POINTS':
+        return ENTRY_POINTS['event']
+    if name == 'EVENT_ENTRY_POINTS_WRITE':
+        return ENTRY_POINTS['event_write']
+    raise AttributeError("module %r has no attribute %r" % (__name__, name))
 
 
 class Catalog(object):
@@ -494,7 +500,7 @@ class Catalog(object):
         format = format.upper()
         try:
             # get format specific entry point
-            format_ep = EVENT_ENTRY_POINTS_WRITE[format]
+            format_ep = ENTRY_POINTS['event_write'][format]
             # search writeFormat method for given entry point
             write_format = buffered_load_entry_point(
                 format_ep.dist.key, 'obspy.plugin.event.%s' % (format_ep.name),
@@ -502,7 +508,7 @@ class Catalog(object):
         except (IndexError, ImportError, KeyError):
             msg = "Writing format \"%s\" is not supported. Supported types: %s"
             raise ValueError(msg % (format,
-                                    ', '.join(EVENT_ENTRY_POINTS_WRITE)))
+                                    ', '.join(ENTRY_POINTS['event_write'])))
         return write_format(self, filename, **kwargs)
 
     def plot(self, projection='global', resolution='l',
@@ -15,7 +15,6 @@ from obspy.core.event.header import (
     EventType, EventTypeCertainty, EventDescriptionType)
 from obspy.core.event.resourceid import ResourceIdentifier
 from obspy.core.util.misc import _yield_resource_id_parent_attr
-from obspy.imaging.source import plot_radiation_pattern, _setup_figure_and_axes
 
 
 from .base import _event_type_class_factory, CreationInfo
@@ -254,6 +253,8 @@ class Event(__Event):
             cat_ = Catalog([self])
             kwargs["events"] = cat_
 
+        from obspy.imaging.source import (plot_radiation_pattern,
+                                          _setup_figure_and_axes)
         fig, axes, kind_ = _setup_figure_and_axes(kind,
                                                   subplot_size=subplot_size,
                                                   **kwargs)
@@ -14,7 +14,9 @@ import fnmatch
 import math
 import pickle
 import re
+import tarfile
 import warnings
+import zipfile
 from pathlib import Path
 from glob import glob, has_magic
 
@@ -25,7 +27,9 @@ from obspy.core.trace import Trace
 from obspy.core.utcdatetime import UTCDateTime
 from obspy.core.util.attribdict import AttribDict
 from obspy.core.util.base import (ENTRY_POINTS, _get_function_from_entry_point,
-                                  _read_from_plugin, _generic_reader)
+                                  _generic_ireader, _generic_reader,
+                                  _iread_from_plugin, _read_from_plugin,
+                                  create_empty_data_chunk)
 from obspy.core.util.decorator import (map_example_filename,
                                        raise_if_masked, uncompress_file)
 from obspy.core.util.misc import (
@@ -246,6 +250,101 @@ def read(pathname_or_url=None, format=None, headonly=False, starttime=None,
     return st
 
 
+@map_example_filename("pathname_or_url")
+def iread(pathname_or_url=None, format=None, headonly=False, starttime=None,
+          endtime=None, nearest_sample=True, dtype=None, apply_calib=False,
+          check_compression=True, chunksize=None, window=None, **kwargs):
+    """
+    Iteratively read waveform files yielding ObsPy
+    :class:`~obspy.core.stream.Stream` objects.
+
+    Generator counterpart of :func:`~obspy.core.stream.read` that never
+    holds the data of all matching files in memory at once. By default a
+    :class:`~obspy.core.stream.Stream` is yielded per file. Formats with
+    native support for chunked reading (currently ``MSEED`` and ``SEGY``)
+    can yield smaller pieces of a file using ``chunksize``, all other formats
+    yield each file as a whole.
+
+    :type pathname_or_url: str, io.BytesIO, or pathlib.Path
+    :param pathname_or_url: String containing a file name or a URL, a Path
+        object, or a open file-like object. Wildcards are allowed for a file
+        name, matching files are read in alphabetical order.
+    :type chunksize: int, optional
+    :param chunksize: Yield a Stream per ``chunksize`` records (MiniSEED) or
+        traces (SEG Y) instead of one per file.
+    :type window: float, optional
+    :param window: Yield a Stream per time window of ``window`` seconds
+        instead of one per file or chunk. The windows are aligned to
+        ``starttime`` or, if not given, the start of the first data read.
+        Windows without any data are skipped. Data is expected to be read in
+        chronological order per SEED identifier (e.g. day files sorted by
+        date), a window is yielded as soon as data starting after it has been
+        read. Data read later on for an already yielded window is yielded in
+        an additional Stream for the same window.
+
+    See :func:`~obspy.core.stream.read` for all other parameters.
+
+    .. rubric:: Example
+
+    >>> from obspy.core.stream import iread
+    >>> for st in iread("/path/to/BW.BGLD.__.EHE.D.2008.001.first_10_records",
+    ...                 chunksize=5):
+    ...     print(st)  # doctest: +ELLIPSIS
+    1 Trace(s) in Stream:
+    BW.BGLD..EHE | 2007-12-31T23:59:59.915000Z - ... | 200.0 Hz, 2060 samples
+    1 Trace(s) in Stream:
+    BW.BGLD..EHE | 2008-01-01T00:00:10.215000Z - ... | 200.0 Hz, 2060 samples
+
+    >>> for st in iread("/data/BW/RJOB/EHZ.D/*", window=3600):  \
+# doctest: +SKIP
+    ...     process(st)
+    """
+    # add default parameters to kwargs so sub-modules may handle them
+    kwargs['starttime'] = starttime
+    kwargs['endtime'] = endtime
+    kwargs['nearest_sample'] = nearest_sample
+    kwargs['check_compression'] = check_compression
+    kwargs['headonly'] = headonly
+    kwargs['format'] = format
+    kwargs['chunksize'] = chunksize
+
+    # Keyword headonly is only combined with the trimming, dtype conversion
+    # and calibration below when possible, as in read().
+    postprocess = not (headonly and (starttime or endtime or dtype))
+    if not postprocess:
+        warnings.warn(_headonly_warning_msg, UserWarning)
+
+    def _trim(st):
+        if postprocess and starttime:
+            st._ltrim(starttime, nearest_sample=nearest_sample)
+        if postprocess and endtime:
+            st._rtrim(endtime, nearest_sample=nearest_sample)
+        return st
+
+    if pathname_or_url is None:
+        # if no pathname or URL specified, yield example stream
+        streams = iter([_create_example_stream(headonly=headonly)])
+    else:
+        streams = _generic_ireader(pathname_or_url, _iread, **kwargs)
+    streams = (_trim(st) for st in streams)
+    if window is not None:
+        streams = _iter_windows(streams, window, origin=starttime)
+
+    for st in streams:
+        if not len(st):
+            continue
+        if postprocess:
+            # convert to dtype if given
+            if dtype:
+                for tr in st:
+                    tr.data = np.require(tr.data, dtype)
+            # applies calibration factor
+            if apply_calib:
+                for tr in st:
+                    tr.data = tr.data * tr.stats.calib
+        yield st
+
+
 @uncompress_file
 def _read(filename, format=None, headonly=False, **kwargs):
     """
@@ -259,6 +358,93 @@ def _read(filename, format=None, headonly=False, **kwargs):
     return stream
 
 
+def _iread(filename, format=None, headonly=False, check_compression=True,
+           **kwargs):
+    """
+    Iteratively read a single file yielding ObsPy Stream objects.
+    """
+    if check_compression and isinstance(filename, str) and (
+            filename.endswith(('.gz', '.bz2')) or
+            tarfile.is_tarfile(filename) or zipfile.is_zipfile(filename)):
+        # Compressed files are read at once.
+        kwargs.pop('chunksize', None)
+        yield _read(filename, format=format, headonly=headonly, **kwargs)
+        return
+    streams, format = _iread_from_plugin('waveform', filename, format=format,
+                                         headonly=headonly, **kwargs)
+    for stream in streams:
+        # set _format identifier for each element
+        for trace in stream:
+            trace.stats._format = format
+        yield stream
+
+
+def _iter_windows(streams, window, origin=None):
+    """
+    Regroups the data of an iterable of streams into streams per time window.
+
+    A window is complete once a stream only containing data starting after
+    the end of the window has been read.
+    """
+    buffer = Stream()
+    # Start of the latest data read so far.
+    latest = None
+    for st in streams:
+        if not len(st):
+            continue
+        buffer += st
+        buffer._cleanup()
+        if origin is None:
+            origin = min(tr.stats.starttime for tr in buffer)
+        start = min(tr.stats.starttime for tr in st)
+        if latest is None or start > latest:
+            latest = start
+        while len(buffer):
+            window_start = _get_window_start(buffer, origin, window)
+            if window_start + window > latest:
+                break
+            chunk, buffer = _split_stream(buffer, window_start + window)
+            yield chunk
+    while len(buffer):
+        window_start = _get_window_start(buffer, origin, window)
+        chunk, buffer = _split_stream(buffer, window_start + window)
+        yield chunk
+
+
+def _get_window_start(stream, origin, window):
+    """
+    Returns the start of the earliest window containing data of the stream.
+    """
+    start = min(tr.stats.starttime for tr in stream)
+    return origin + math.floor((start - origin) / window) * window
+
+
+def _split_stream(stream, time):
+    """
+    Splits a stream into the samples before and at or after the given time
+    without copying the data.
+    """
+    before = Stream()
+    after = Stream()
+    for tr in stream:
+        npts = int(math.ceil(round(
+            (time - tr.stats.starttime) * tr.stats.sampling_rate, 7)))
+        npts = min(max(npts, 0), tr.stats.npts)
+        if npts == tr.stats.npts:
+            before.append(tr)
+        elif npts == 0:
+            after.append(tr)
+        else:
+            for part, data in ((before, tr.data[:npts]),
+                               (after, tr.data[npts:])):
+                new = copy.copy(tr)
+                new.stats = tr.stats.copy()
+                new.data = data
+                part.append(new)
+            new.stats.starttime += npts * tr.stats.delta
+    return before, after
+
+
 def _create_example_stream(headonly=False):
     """
     Create an example stream.
@@ -2068,14 +2254,9 @@ class Stream(object):
         self.traces = []
         # loop through ids
         for _id in traces_dict.keys():
-            cur_trace = traces_dict[_id].pop(0)
-            # loop through traces of same id
-            for _i in range(len(traces_dict[_id])):
-                trace = traces_dict[_id].pop(0)
-                # disable sanity checks because there are already done
-                cur_trace = cur_trace.__add__(
-                    trace, method, fill_value=fill_value, sanity_checks=False,
-                    interpolation_samples=interpolation_samples)
+            cur_trace = _merge_traces(
+                traces_dict[_id], method, fill_value=fill_value,
+                interpolation_samples=interpolation_samples)
             self.traces.append(cur_trace)
 
         # trying to restore order, newly created traces are placed at
@@ -3079,14 +3260,21 @@ seismometer_correction_simulation.html#using-a-resp-file>`_.
             cur_trace = trace_list.pop(0)
             delta = cur_trace.stats.delta
             allowed_micro_shift = misalignment_threshold * delta
+            # directly adjacent traces are collected and copied into the
+            # current trace in one go, `npts` and `endtime` refer to the
+            # current trace with all collected traces added
+            adjacent = []
+            npts = cur_trace.stats.npts
             # work through all traces of same id
             while trace_list:
                 trace = trace_list.pop(0)
+                endtime = cur_trace.stats.starttime + \
+                    float(npts - 1) * cur_trace.stats.delta
                 # `gap` is the deviation (in seconds) of the actual start
                 # time of the second trace from the expected start time
                 # (for the ideal case of directly adjacent and perfectly
                 # aligned traces).
-                gap = trace.stats.starttime - (cur_trace.stats.endtime + delta)
+                gap = trace.stats.starttime - (endtime + delta)
                 # if `gap` is larger than the designated allowed shift,
                 # we treat it as a real gap and leave as is.
                 if misalignment_threshold > 0 and gap <= allowed_micro_shift:
@@ -3135,8 +3323,10 @@ seismometer_correction_simulation.html#using-a-resp-file>`_.
                     cur_trace.stats.starttime.timestamp) % delta / delta
                 subsample_shift_percentage = min(
                     subsample_shift_percentage, 1 - subsample_shift_percentage)
-                if (trace.stats.starttime <= cur_trace.stats.endtime and
+                if (trace.stats.starttime <= endtime and
                         subsample_shift_percentage < misalignment_threshold):
+                    cur_trace = _append_traces(cur_trace, adjacent)
+                    adjacent = []
                     # check if common time slice [t1 --> t2] is equal:
                     t1 = trace.stats.starttime
                     t2 = min(cur_trace.stats.endtime, trace.stats.endtime)
@@ -3149,15 +3339,24 @@ seismometer_correction_simulation.html#using-a-resp-file>`_.
                         self.traces.append(cur_trace)
                         cur_trace = trace
                 # traces are perfectly adjacent: add them together
-                elif trace.stats.starttime == cur_trace.stats.endtime + \
-                        cur_trace.stats.delta:
-                    cur_trace += trace
+                elif trace.stats.starttime == endtime + cur_trace.stats.delta:
+                    if _can_append_trace(cur_trace, trace):
+                        adjacent.append(trace)
+                        npts += trace.stats.npts
+                        continue
+                    else:
+                        # let Trace.__add__ raise the appropriate error
+                        cur_trace = _append_traces(cur_trace, adjacent)
+                        adjacent = []
+                        cur_trace += trace
                 # no common parts (gap):
                 # leave traces alone and add current to list
                 else:
-                    self.traces.append(cur_trace)
+                    self.traces.append(_append_traces(cur_trace, adjacent))
+                    adjacent = []
                     cur_trace = trace
-            self.traces.append(cur_trace)
+                npts = cur_trace.stats.npts
+            self.traces.append(_append_traces(cur_trace, adjacent))
         self.traces = [tr for tr in self.traces if tr.stats.npts]
         return self
 
@@ -3657,6 +3856,139 @@ seismometer_correction_simulation.html#using-a-resp-file>`_.
         return self
 
 
+def _merge_traces(traces, method=0, fill_value=None, interpolation_samples=0):
+    """
+    Merges a list of traces with the same id sorted by start time.
+
+    Runs of traces that are separated by gaps or fit exactly are assembled
+    into a single preallocated array, so every sample is copied only once
+    instead of once per merged trace. Overlapping and contained traces are
+    added with :meth:`~obspy.core.trace.Trace.__add__`. The result is the
+    same as adding up all traces pairwise.
+    """
+    cur_trace = traces[0]
+    i = 1
+    while i < len(traces):
+        j, offsets = _get_merge_offsets(cur_trace, traces, i, fill_value)
+        if j > i + 1:
+            cur_trace = _assemble_traces(cur_trace, traces[i:j], offsets,
+                                         fill_value)
+            i = j
+        # single traces, overlaps and contained traces are added pairwise,
+        # sanity checks are already done in Stream._merge_checks()
+        if i < len(traces):
+            cur_trace = cur_trace.__add__(
+                traces[i], method, fill_value=fill_value, sanity_checks=False,
+                interpolation_samples=interpolation_samples)
+            i += 1
+    return cur_trace
+
+
+def _get_merge_offsets(cur_trace, traces, start, fill_value):
+    """
+    Computes the sample offsets of traces following ``cur_trace`` in one pass.
+
+    The offsets are determined exactly like in
+    :meth:`~obspy.core.trace.Trace.__add__`, i.e. relative to the end time
+    of the accumulated trace. The pass stops at the first trace that
+    overlaps or that would need a masked array to be merged in pairwise.
+
+    :returns: Index of the first trace not part of the run and the list of
+        sample offsets of the traces in the run.
+    """
+    if isinstance(cur_trace.data, np.ma.masked_array) and \
+            fill_value in ("latest", "interpolate"):
+        return start, []
+    stats = cur_trace.stats
+    sr = stats.sampling_rate
+    starttime = stats.starttime
+    npts = stats.npts
+    offsets = []
+    for j in range(start, len(traces)):
+        trace = traces[j]
+        if isinstance(trace.data, np.ma.masked_array):
+            break
+        # same as Stats.endtime of the accumulated trace
+        endtime = starttime + float(npts - 1) * stats.delta
+        delta = (trace.stats.starttime - endtime) * sr
+        delta = int(compatibility.round_away(delta)) - 1
+        if delta < 0:
+            break
+        offsets.append(npts + delta)
+        npts += delta + trace.stats.npts
+    else:
+        j = len(traces)
+    return j, offsets
+
+
+def _can_append_trace(cur_trace, trace):
+    """
+    Checks if ``trace`` can be appended to ``cur_trace`` without any of the
+    errors raised by :meth:`~obspy.core.trace.Trace.__add__`.
+    """
+    return (cur_trace.id == trace.id and
+            cur_trace.stats.sampling_rate == trace.stats.sampling_rate and
+            cur_trace.stats.calib == trace.stats.calib and
+            cur_trace.data.dtype == trace.data.dtype)
+
+
+def _append_traces(cur_trace, traces):
+    """
+    Appends directly adjacent traces to ``cur_trace``.
+    """
+    if not traces:
+        return cur_trace
+    if len(traces) == 1:
+        return cur_trace + traces[0]
+    offsets = np.cumsum([len(cur_trace.data)] +
+                        [len(tr.data) for tr in traces[:-1]])
+    return _assemble_traces(cur_trace, traces, offsets, None)
+
+
+def _assemble_traces(cur_trace, traces, offsets, fill_value):
+    """
+    Copies the data of ``cur_trace`` and ``traces`` into a single trace.
+
+    Gaps are filled like :meth:`~obspy.core.trace.Trace.__add__` does and
+    masked if ``fill_value`` is ``None``.
+    """
+    dtype = cur_trace.data.dtype
+    npts = offsets[-1] + traces[-1].stats.npts
+    data = np.empty(npts, dtype=dtype)
+    traces = [cur_trace] + list(traces)
+    offsets = [0] + list(offsets)
+    mask = None
+    if any(isinstance(tr.data, np.ma.masked_array) for tr in traces):
+        mask = np.zeros(npts, dtype=bool)
+    end = 0
+    for trace, offset in zip(traces, offsets):
+        if offset > end:
+            if fill_value is None:
+                if mask is None:
+                    mask = np.zeros(npts, dtype=bool)
+                mask[end:offset] = True
+            else:
+                if fill_value == "latest":
+                    value = data[end - 1]
+                elif fill_value == "interpolate":
+                    value = (data[end - 1], trace.data[0])
+                else:
+                    value = fill_value
+                data[end:offset] = create_empty_data_chunk(
+                    offset - end, dtype, value)
+        end = offset + len(trace.data)
+        if isinstance(trace.data, np.ma.masked_array):
+            mask[offset:end] = np.ma.getmaskarray(trace.data)
+            data[offset:end] = trace.data.data
+        else:
+            data[offset:end] = trace.data
+    if mask is not None and mask.any():
+        data = np.ma.masked_array(data, mask=mask)
+    out = cur_trace.__class__(header=copy.deepcopy(cur_trace.stats))
+    out.data = data
+    return out
+
+
 def _is_pickle(filename):  # @UnusedVariable
     """
     Check whether a file is a pickled ObsPy Stream file.
@@ -201,6 +201,32 @@ class TestStats:
         pickle.loads(pickle.dumps(stats, protocol=1))
         pickle.loads(pickle.dumps(stats, protocol=2))
 
+    def test_slots(self):
+        """
+        Default headers are stored in slots, all other headers in the
+        instance dictionary.
+        """
+        stats = Stats({'network': 'BW', 'npts': 10, 'mseed': {'a': 1}})
+        assert 'network' not in stats.__dict__
+        assert list(stats.__dict__) == ['mseed']
+        assert list(stats)[:10] == list(Stats.defaults)
+        assert len(stats) == 11
+        assert stats.endtime == UTCDateTime(9)
+        # deleted default headers fall back to the default value
+        del stats.network
+        assert stats.network == ''
+        assert 'network' not in list(stats)
+        assert len(stats) == 10
+        # copies are independent
+        stats2 = copy.deepcopy(stats)
+        assert stats2 == stats
+        stats2.npts = 5
+        stats2.mseed.a = 2
+        assert stats.endtime == UTCDateTime(9)
+        assert stats.mseed.a == 1
+        assert pickle.loads(pickle.dumps(stats2)) == stats2
+        assert repr(Stats()).startswith("Stats({'sampling_rate': 1.0,")
+
     def test_set_calib(self):
         """
         Test to prevent setting a calibration factor of 0
@@ -282,7 +308,7 @@ class TestStats:
         # Get a new stats object with just the basic items in it
         stats_items = set(Stats())
         new_stats = Stats()
-        new_stats.__dict__.update({x: st[0].stats[x] for x in stats_items})
+        new_stats.update({x: st[0].stats[x] for x in stats_items})
         with CatchAndAssertWarnings():
             new_stats.network = 1
             new_stats.station = 1.1
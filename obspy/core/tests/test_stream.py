@@ -12,8 +12,10 @@ import pytest
 
 from obspy import Stream, Trace, UTCDateTime, read, read_inventory
 from obspy.core.inventory import Channel, Inventory, Network, Station
-from obspy.core.stream import _is_pickle, _read_pickle, _write_pickle
+from obspy.core.stream import (_is_pickle, _read_pickle, _write_pickle,
+                               iread)
 from obspy.core.util.attribdict import AttribDict
+from obspy.core.util.misc import TemporaryWorkingDirectory
 from obspy.core.util.base import NamedTemporaryFile, _get_entry_points
 from obspy.core.util.obspy_types import ObsPyException
 from obspy.core.util.testing import streams_almost_equal
@@ -1971,6 +1973,55 @@ class TestStream:
         st = read(data_path)
         assert isinstance(st, Stream)
 
+    def test_iread(self):
+        """
+        Test iteratively reading files per file, chunk and time window.
+        """
+        st = Stream()
+        for channel in ("EHZ", "EHN"):
+            for _i in range(3):
+                st += Trace(data=np.arange(6000, dtype=np.int32),
+                            header={"channel": channel,
+                                    "sampling_rate": 100.0,
+                                    "starttime": UTCDateTime(60 * _i)})
+        with TemporaryWorkingDirectory():
+            for tr in st:
+                tr.write("%s.%04i.mseed" % (tr.stats.channel,
+                                            tr.stats.starttime.timestamp),
+                         format="MSEED", reclen=512)
+            expected = read("*.mseed").merge().sort()
+
+            def assert_same_data(streams, expected):
+                got = Stream([tr for _st in streams for tr in _st])
+                got.merge().sort()
+                assert [tr.id for tr in got] == [tr.id for tr in expected]
+                for tr, tr_expected in zip(got, expected):
+                    assert tr.stats.starttime == tr_expected.stats.starttime
+                    np.testing.assert_array_equal(tr.data, tr_expected.data)
+            # One stream per file.
+            streams = list(iread("*.mseed"))
+            assert [len(_st) for _st in streams] == [1] * 6
+            assert all(isinstance(_st, Stream) for _st in streams)
+            # Chunks of records.
+            streams = list(iread("*.mseed", chunksize=4))
+            assert len(streams) > 6
+            assert_same_data(streams, expected)
+            # Time windows with trimming.
+            streams = list(iread("*.mseed", window=50.0,
+                                 starttime=UTCDateTime(10)))
+            for _st in streams:
+                start = min(tr.stats.starttime for tr in _st)
+                end = max(tr.stats.endtime for tr in _st)
+                assert (start - UTCDateTime(10)) % 50 == 0
+                assert end - start < 50
+            assert_same_data(streams,
+                             expected.trim(starttime=UTCDateTime(10)))
+            # Nothing matching.
+            with pytest.raises(Exception):
+                next(iread("NOTEXISTING.*"))
+        # Default example.
+        assert list(iread()) == [read()]
+
     def test_copy(self):
         """
         Testing the copy method of the Stream object.
@@ -1999,6 +2050,51 @@ class TestStream:
         st.merge(fill_value='interpolate')
         assert len(st) == 1
 
+    def test_merge_many_segments(self):
+        """
+        Merging many small segments in one pass gives the same result as
+        adding up the traces pairwise.
+        """
+        rng = np.random.RandomState(815)
+        st = Stream()
+        start = UTCDateTime(2020, 1, 1)
+        for _i in range(300):
+            data = rng.randint(-1000, 1000, rng.randint(1, 50)).astype(
+                np.int32)
+            # mostly gaps and exact fits, some overlaps and odd offsets
+            start += rng.choice([0, 0, 1, 3, 17, -2, -60, 0.49, 0.51])
+            st.append(Trace(data=data, header={'starttime': start}))
+            start = st[-1].stats.endtime + 1
+        st.append(Trace(data=np.arange(10, dtype=np.int32),
+                        header={'station': 'X', 'starttime': start}))
+        for method, kwargs in [
+                (0, {}), (0, {'fill_value': 0}),
+                (0, {'fill_value': 'latest'}),
+                (0, {'fill_value': 'interpolate'}),
+                (1, {'interpolation_samples': 2}),
+                (1, {'fill_value': 'latest', 'interpolation_samples': -1})]:
+            expected = st.copy()._cleanup()
+            expected.sort(keys=['network', 'station', 'location', 'channel',
+                                'starttime', 'endtime'])
+            traces = [expected[0]]
+            for tr in expected[1:]:
+                if tr.id == traces[-1].id:
+                    traces[-1] = traces[-1].__add__(tr, method, **kwargs)
+                else:
+                    traces.append(tr)
+            got = st.copy().merge(method=method, **kwargs)
+            assert len(got) == 2
+            for tr_got, tr_expected in zip(got, traces):
+                assert tr_got.stats == tr_expected.stats
+                assert type(tr_got.data) is type(tr_expected.data)
+                assert tr_got.data.dtype == tr_expected.data.dtype
+                np.testing.assert_array_equal(
+                    np.ma.getmaskarray(tr_got.data),
+                    np.ma.getmaskarray(tr_expected.data))
+                np.testing.assert_array_equal(
+                    np.ma.filled(tr_got.data, 0),
+                    np.ma.filled(tr_expected.data, 0))
+
     def test_rotate(self):
         """
         Testing the rotate method.
@@ -10,6 +10,7 @@ from packaging.version import parse as parse_version
 import numpy as np
 
 from obspy import UTCDateTime as UTC
+from obspy.core.utcdatetime import UTCDateTimeArray
 from obspy.core.util.deprecation_helpers import ObsPyDeprecationWarning
 import pytest
 
@@ -1521,3 +1522,102 @@ class TestUTCDateTime:
         # skip ISO8601 mode
         assert UTC('2019-01-01T02-02:33', iso8601=False) == \
                UTC(2019, 1, 1, 2, 2, 33)
+
+    def test_from_ns(self):
+        """
+        UTCDateTime.from_ns() equals UTCDateTime(ns=...).
+        """
+        for ns in (0, -1, 1230768000123456789, np.int64(5)):
+            for precision in (None, 3, 9):
+                kwargs = {'ns': ns}
+                if precision is not None:
+                    kwargs['precision'] = precision
+                expected = UTC(**kwargs)
+                got = UTC.from_ns(ns, precision)
+                assert got.__dict__ == expected.__dict__
+        with pytest.raises(TypeError):
+            UTC.from_ns(1.5)
+        t = UTC.from_ns(123456789, precision=9)
+        assert copy.deepcopy(t) == t
+        assert copy.deepcopy(t).precision == 9
+
+
+class TestUTCDateTimeArray:
+    """
+    Test suite for obspy.core.utcdatetime.UTCDateTimeArray.
+    """
+    def get_times(self):
+        return [UTC(-3.5), UTC(0), UTC(0.0000005), UTC(0.0000015),
+                UTC("2009-08-24T00:20:03.123456789"), UTC(1e9 + 0.4999999),
+                UTC(1700, 2, 3)]
+
+    def test_consistent_with_utcdatetime(self):
+        """
+        All operations give the same results as for single UTCDateTime
+        objects.
+        """
+        times = self.get_times()
+        for precision in range(10):
+            utcs = [UTC(ns=t.ns, precision=precision) for t in times]
+            array = UTCDateTimeArray(utcs, precision=precision)
+            assert len(array) == len(utcs)
+            assert list(array) == utcs
+            assert array[3] == utcs[3]
+            assert list(array[1:3]) == utcs[1:3]
+            other = utcs[3]
+            for op in (eq, ne, lt, le, gt, ge):
+                expected = [op(t, other) for t in utcs]
+                assert op(array, other).tolist() == expected
+                assert op(other, array).tolist() == \
+                    [op(other, t) for t in utcs]
+                assert op(array, array[::-1]).tolist() == \
+                    [op(a, b) for a, b in zip(utcs, utcs[::-1])]
+            # differences in seconds may differ in the last digit
+            np.testing.assert_allclose(array - other,
+                                       [t - other for t in utcs], rtol=1e-15)
+            np.testing.assert_allclose(other - array,
+                                       [other - t for t in utcs], rtol=1e-15)
+            assert (array + 1.25).ns.tolist() == \
+                [(t + 1.25).ns for t in utcs]
+            assert (array - 0.5).ns.tolist() == \
+                [(t - 0.5).ns for t in utcs]
+            assert array.isoformat().tolist() == [str(t) for t in utcs]
+            for fmt in ("%Y-%m-%d %H:%M:%S.%f", "%j"):
+                assert array.strftime(fmt).tolist() == \
+                    [t.strftime(fmt) for t in utcs]
+
+    def test_compare_with_invalid_operands(self):
+        """
+        Comparisons with operands that are no times give the same results
+        as for single UTCDateTime objects.
+        """
+        utcs = self.get_times()
+        array = UTCDateTimeArray(utcs)
+        for other in ("garbage", None, object(), [1, "garbage"]):
+            for op in (eq, ne, lt, le, gt, ge):
+                result = op(array, other)
+                assert result.dtype == np.bool_
+                assert result.tolist() == [op(t, other) for t in utcs]
+        assert (array != "garbage").all()
+        assert not (array == "garbage").any()
+
+    def test_init(self):
+        """
+        Arrays can be created from various inputs.
+        """
+        times = self.get_times()
+        expected = [t.ns for t in times]
+        array = UTCDateTimeArray(times)
+        assert array.ns.tolist() == expected
+        assert UTCDateTimeArray([str(t) for t in times[:-1]]).ns.tolist() \
+            == [UTC(str(t)).ns for t in times[:-1]]
+        assert UTCDateTimeArray(array.datetime64).ns.tolist() == expected
+        assert UTCDateTimeArray.from_ns(expected).ns.tolist() == expected
+        assert UTCDateTimeArray(np.array([1.5, 2])).ns.tolist() == \
+            [UTC(1.5).ns, UTC(2).ns]
+        assert np.asarray(array).dtype == np.dtype('datetime64[ns]')
+        assert array.min() == times[-1]
+        assert array.max() == times[4]
+        assert array.argsort().tolist() == [6, 0, 1, 2, 3, 5, 4]
+        np.testing.assert_array_equal(array.timestamp,
+                                      [t.timestamp for t in times])
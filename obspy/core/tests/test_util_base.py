@@ -1,15 +1,22 @@
 # -*- coding: utf-8 -*-
+import io
 import os
 import copy
+import subprocess
+import sys
 from unittest import mock
 
 import numpy as np
 import pytest
 from requests import HTTPError
 
+import obspy
+from obspy import read
 from obspy.core.util.base import (NamedTemporaryFile, get_dependency_version,
                                   download_to_file, sanitize_filename,
-                                  create_empty_data_chunk, ComparingObject)
+                                  create_empty_data_chunk, ComparingObject,
+                                  clear_format_detection_cache,
+                                  get_format_detection_stats)
 
 
 class TestUtilBase:
@@ -26,10 +33,8 @@ class TestUtilBase:
                     ("1.2.x", [1, 2, 0]), ("1.3.1rc2", [1, 3, 1]))
 
         for version_string, expected in versions:
-            with mock.patch('pkg_resources.get_distribution') as p:
-                class _D(object):
-                    version = version_string
-                p.return_value = _D()
+            with mock.patch('importlib.metadata.version') as p:
+                p.return_value = version_string
                 got = get_dependency_version('matplotlib')
             assert expected == got
 
@@ -115,3 +120,76 @@ class TestUtilBase:
         assert co == deep_copy
         deep_copy.at = 0
         assert co != deep_copy
+
+    def test_format_detection_cache_and_sniffing(self):
+        """
+        Formats are detected from the first bytes of a file and cached for
+        unchanged files.
+        """
+        st = read()
+        clear_format_detection_cache()
+        with NamedTemporaryFile() as tf:
+            for format in ("MSEED", "SLIST", "PICKLE", "SAC"):
+                st[:1].write(tf.name, format=format)
+                clear_format_detection_cache()
+                assert read(tf.name)[0].stats._format == format
+                stats = get_format_detection_stats()
+                assert stats["detections"] == 1
+                assert stats["cache_hits"] == 0
+                # SAC has no magic bytes and is found by probing.
+                assert stats["sniff_hits"] == int(format != "SAC")
+                if format != "SAC":
+                    assert stats["probes"] == 1
+                # Reading again is answered from the cache.
+                probes = stats["probes"]
+                assert read(tf.name)[0].stats._format == format
+                stats = get_format_detection_stats()
+                assert stats["cache_hits"] == 1
+                assert stats["probes"] == probes
+                assert stats["probes_avoided"] > 0
+            # The cache is invalidated once the file changes.
+            st[:1].write(tf.name, format="MSEED")
+            assert read(tf.name)[0].stats._format == "MSEED"
+            assert get_format_detection_stats()["cache_hits"] == 1
+        # File-like objects are sniffed but not cached.
+        clear_format_detection_cache()
+        bio = io.BytesIO()
+        st.write(bio, format="MSEED")
+        bio.seek(0)
+        assert len(read(bio)) == 3
+        stats = get_format_detection_stats()
+        assert stats["sniff_hits"] == 1
+        assert stats["cache_hits"] == 0
+
+    def test_import_is_lazy(self):
+        """
+        Importing obspy must neither look up plugin entry points nor import
+        heavy optional modules. See misc/scripts/benchmark_import.py for the
+        import time.
+        """
+        code = (
+            "import sys\n"
+            "import obspy\n"
+            "from obspy.core.util.base import ENTRY_POINTS\n"
+            "print(len(ENTRY_POINTS._entry_points))\n"
+            "print(' '.join(sys.modules))\n")
+        root = os.path.dirname(os.path.dirname(os.path.abspath(
+            obspy.__file__)))
+        output = subprocess.check_output(
+            [sys.executable, "-c", code], cwd=root).decode().splitlines()
+        looked_up, modules = int(output[0]), output[1].split()
+        assert looked_up == 0
+        for module in ("pkg_resources", "matplotlib", "scipy",
+                       "obspy.imaging", "obspy.signal", "obspy.taup"):
+            assert module not in modules
+        assert not [m for m in modules if m.startswith("obspy.io.")]
+
+    def test_format_plugin_table_in_docstrings(self):
+        """
+        The read()/write() docstrings list all installed formats.
+        """
+        assert ":func:`obspy.io.mseed.core._read_mseed`" in obspy.read.__doc__
+        assert ":func:`obspy.io.quakeml.core._write_quakeml`" in \
+            obspy.Catalog.write.__doc__
+        assert ":func:`obspy.io.stationxml.core._read_stationxml`" in \
+            obspy.read_inventory.__doc__
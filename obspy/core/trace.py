@@ -9,6 +9,7 @@ Module for handling ObsPy :class:`~obspy.core.trace.Trace` and
     GNU Lesser General Public License, Version 3
     (https://www.gnu.org/copyleft/lesser.html)
 """
+import collections.abc
 import inspect
 import math
 import warnings
@@ -156,6 +157,10 @@ class Stats(AttribDict):
         'location': '',
         'channel': '',
     }
+    # the default headers are stored in slots, all other (e.g. format
+    # specific) headers in the instance dictionary which is only created
+    # once it is needed
+    __slots__ = tuple(defaults)
     # keys which need to refresh derived values
     _refresh_keys = {'delta', 'sampling_rate', 'starttime', 'npts'}
     # dict of required types for certain attrs
@@ -169,41 +174,73 @@ class Stats(AttribDict):
     def __init__(self, header={}):
         """
         """
-        super(Stats, self).__init__(header)
+        for key, value in self.defaults.items():
+            object.__setattr__(self, key, value)
+        self.update(header)
 
-    def __setitem__(self, key, value):
+    def update(self, adict={}):
         """
+        Update header information, derived values are calculated only once.
         """
-        if key in self._refresh_keys:
-            # ensure correct data type
-            if key == 'delta':
-                key = 'sampling_rate'
-                try:
-                    value = 1.0 / float(value)
-                except ZeroDivisionError:
-                    value = 0.0
-            elif key == 'sampling_rate':
-                value = float(value)
-            elif key == 'starttime':
-                value = UTCDateTime(value)
-            elif key == 'npts':
-                if not isinstance(value, int):
-                    value = int(value)
-            # set current key
-            super(Stats, self).__setitem__(key, value)
-            # set derived value: delta
+        refresh = False
+        for key, value in adict.items():
+            if key in self.readonly:
+                continue
+            if key in self._refresh_keys:
+                self._set_refresh_key(key, value)
+                refresh = True
+            else:
+                self.__setitem__(key, value)
+        if refresh:
+            self._refresh()
+
+    def _set_refresh_key(self, key, value):
+        """
+        Sets a key derived values depend on without refreshing them.
+        """
+        # ensure correct data type
+        if key == 'delta':
+            key = 'sampling_rate'
             try:
-                delta = 1.0 / float(self.sampling_rate)
+                value = 1.0 / float(value)
             except ZeroDivisionError:
-                delta = 0
-            self.__dict__['delta'] = delta
-            # set derived value: endtime
-            if self.npts == 0:
-                timediff = 0
-            else:
-                timediff = float(self.npts - 1) * delta
-            self.__dict__['endtime'] = self.starttime + timediff
+                value = 0.0
+        elif key == 'sampling_rate':
+            value = float(value)
+        elif key == 'starttime':
+            value = UTCDateTime(value)
+        elif key == 'npts':
+            if not isinstance(value, int):
+                value = int(value)
+        object.__setattr__(self, key, value)
+
+    def _refresh(self):
+        """
+        Calculates the derived values ``delta`` and ``endtime``.
+        """
+        # set derived value: delta
+        try:
+            delta = 1.0 / float(self.sampling_rate)
+        except ZeroDivisionError:
+            delta = 0
+        object.__setattr__(self, 'delta', delta)
+        # set derived value: endtime
+        if self.npts == 0:
+            timediff = 0
+        else:
+            timediff = float(self.npts - 1) * delta
+        object.__setattr__(self, 'endtime', self.starttime + timediff)
+
+    def __setitem__(self, key, value):
+        """
+        """
+        if key in self._refresh_keys:
+            self._set_refresh_key(key, value)
+            self._refresh()
             return
+        if key in self.readonly:
+            msg = 'Attribute "%s" in %s object is read only!'
+            raise AttributeError(msg % (key, self.__class__.__name__))
         if key == 'component':
             key = 'channel'
             value = str(value)
@@ -215,11 +252,17 @@ class Stats(AttribDict):
         if key == 'calib' and value == 0:
             msg = 'Calibration factor set to 0.0!'
             warnings.warn(msg, UserWarning)
+        # Type checking/warnings
+        if key in self._types and not isinstance(value, self._types[key]):
+            value = self._cast_type(key, value)
         # all other keys
-        if isinstance(value, dict):
-            super(Stats, self).__setitem__(key, AttribDict(value))
+        if isinstance(value, collections.abc.Mapping) and \
+                not isinstance(value, AttribDict):
+            value = AttribDict(value)
+        if key in self.__slots__:
+            object.__setattr__(self, key, value)
         else:
-            super(Stats, self).__setitem__(key, value)
+            self.__dict__[key] = value
 
     __setattr__ = __setitem__
 
@@ -227,9 +270,65 @@ class Stats(AttribDict):
         """
         """
         if key == 'component':
-            return super(Stats, self).__getitem__('channel', default)[-1:]
+            return self.__getitem__('channel', default)[-1:]
+        try:
+            if key in self.__slots__:
+                return object.__getattribute__(self, key)
+            return self.__dict__[key]
+        except (AttributeError, KeyError):
+            # check if we got any default value given at class level
+            if key in self.defaults:
+                return self.defaults[key]
+            # if both are missing check for a given default value
+            if default is None:
+                raise KeyError(key)
+            return default
+
+    def __delitem__(self, key):
+        if key in self.__slots__:
+            try:
+                object.__delattr__(self, key)
+            except AttributeError:
+                raise KeyError(key)
         else:
-            return super(Stats, self).__getitem__(key, default)
+            del self.__dict__[key]
+
+    __delattr__ = __delitem__
+
+    def __iter__(self):
+        yield from self._set_slots()
+        yield from self.__dict__
+
+    def _set_slots(self):
+        """
+        Returns the default headers which have not been deleted.
+        """
+        keys = []
+        for key in self.__slots__:
+            try:
+                object.__getattribute__(self, key)
+            except AttributeError:
+                continue
+            keys.append(key)
+        return keys
+
+    def __len__(self):
+        return len(self._set_slots()) + len(self.__dict__)
+
+    def __repr__(self):
+        return "%s(%s)" % (self.__class__.__name__, dict(self))
+
+    def __deepcopy__(self, memo):
+        new = self.__class__.__new__(self.__class__)
+        memo[id(self)] = new
+        for key in self._set_slots():
+            value = object.__getattribute__(self, key)
+            if isinstance(value, UTCDateTime):
+                value = deepcopy(value, memo)
+            object.__setattr__(new, key, value)
+        if self.__dict__:
+            new.__dict__.update(deepcopy(self.__dict__, memo))
+        return new
 
     def __str__(self):
         """
@@ -244,14 +343,20 @@ class Stats(AttribDict):
         p.text(str(self))
 
     def __getstate__(self):
-        state = self.__dict__.copy()
+        state = {key: object.__getattribute__(self, key)
+                 for key in self._set_slots()}
+        state.update(self.__dict__)
         # Remove the unneeded entries
         state.pop('delta', None)
         state.pop('endtime', None)
         return state
 
     def __setstate__(self, state):
-        self.__dict__.update(state)
+        for key, value in state.items():
+            if key in self.defaults:
+                object.__setattr__(self, key, value)
+            else:
+                self.__dict__[key] = value
         # trigger refreshing
         self.__setitem__('sampling_rate', state['sampling_rate'])
 
@@ -277,6 +277,11 @@ class UTCDateTime(object):
         """
         Creates a new UTCDateTime object.
         """
+        # fast path for integer nanoseconds
+        if not args and kwargs.keys() <= {'ns', 'precision'} and \
+                type(kwargs.get('ns')) is int:
+            self._init_from_ns(kwargs['ns'], kwargs.get('precision'))
+            return
         # set default precision
         self.precision = kwargs.pop('precision', self.DEFAULT_PRECISION)
         # set directly to nanoseconds if given
@@ -458,6 +463,47 @@ class UTCDateTime(object):
         else:
             self._from_datetime(dt)
 
+    @classmethod
+    def from_ns(cls, ns, precision=None):
+        """
+        Creates a new UTCDateTime object from POSIX integer nanoseconds.
+
+        Same as ``UTCDateTime(ns=ns)`` but skips parsing the arguments, which
+        is considerably faster when creating a lot of objects.
+
+        :type ns: int
+        :param ns: POSIX timestamp as integer nanoseconds.
+        :type precision: int, optional
+        :param precision: Precision used by the rich comparison operators.
+            Defaults to :attr:`UTCDateTime.DEFAULT_PRECISION`.
+
+        .. rubric:: Example
+
+        >>> UTCDateTime.from_ns(1230768000123456789)
+        UTCDateTime(2009, 1, 1, 0, 0, 0, 123457)
+        """
+        obj = cls.__new__(cls)
+        obj._init_from_ns(ns, precision)
+        return obj
+
+    def _init_from_ns(self, ns, precision=None):
+        """
+        Sets nanoseconds and precision of a new object without the overhead of
+        going through the property setters.
+        """
+        if precision is None:
+            precision = self.DEFAULT_PRECISION
+        elif precision > 9:
+            msg = 'UTCDateTime precision above 9 is not supported, using 9'
+            warnings.warn(msg)
+            precision = 9
+        object.__setattr__(self, '_UTCDateTime__precision', int(precision))
+        if type(ns) is int:
+            object.__setattr__(self, '_UTCDateTime__ns', ns)
+            object.__setattr__(self, '_initialized', True)
+        else:
+            self._set_ns(ns)
+
     def _handle_overflow(self, year, month, day, hour=0, minute=0, second=0,
                          microsecond=0):
         """
@@ -1001,7 +1047,7 @@ class UTCDateTime(object):
         # which means we can't keep full precision when converting input
         # seconds to nanoseconds
         value = float(value)
-        return UTCDateTime(ns=self._ns + int(round(value * 1e9)))
+        return UTCDateTime.from_ns(self.__ns + int(round(value * 1e9)))
 
     def __sub__(self, value):
         """
@@ -1026,12 +1072,14 @@ class UTCDateTime(object):
         86400.0
         """
         if isinstance(value, UTCDateTime):
-            return round((self._ns - value._ns) / 1e9, self.__precision)
+            return round((self.__ns - value.__ns) / 1e9, self.__precision)
+        elif isinstance(value, UTCDateTimeArray):
+            return NotImplemented
         elif isinstance(value, datetime.timedelta):
             # see datetime.timedelta.total_seconds
             value = (value.microseconds + (value.seconds + value.days *
                      86400) * 10**6) / 1e6
-        return UTCDateTime(ns=self._ns - int(round((value * 1e9))))
+        return UTCDateTime.from_ns(self.__ns - int(round((value * 1e9))))
 
     def __str__(self):
         """
@@ -1073,15 +1121,20 @@ class UTCDateTime(object):
 
     def _operate(self, other, op_func):
         if isinstance(other, UTCDateTime):
-            ndigits = min(self.precision, other.precision) - 9
-            if self.precision != other.precision:
+            precision = self.__precision
+            if precision != other.__precision:
                 msg = ('Comparing UTCDateTime objects of different precision'
                        ' is not defined will raise an Exception in a future'
                        ' version of obspy')
                 warnings.warn(msg, ObsPyDeprecationWarning)
-            a = round(self._ns, ndigits)
-            b = round(other._ns, ndigits)
-            return op_func(a, b)
+                precision = min(precision, other.__precision)
+            if precision == 9:
+                return op_func(self.__ns, other.__ns)
+            ndigits = precision - 9
+            return op_func(round(self.__ns, ndigits),
+                           round(other.__ns, ndigits))
+        elif isinstance(other, UTCDateTimeArray):
+            return NotImplemented
         else:
             try:
                 return self._operate(UTCDateTime(other), op_func)
@@ -1134,7 +1187,10 @@ class UTCDateTime(object):
         >>> t1 == t2
         False
         """
-        return not self.__eq__(other)
+        result = self.__eq__(other)
+        if result is NotImplemented:
+            return result
+        return not result
 
     def __lt__(self, other):
         """
@@ -1256,6 +1312,15 @@ class UTCDateTime(object):
         # explicitly flag it as unhashable
         return None
 
+    def __copy__(self):
+        new = self.__class__.__new__(self.__class__)
+        new.__dict__.update(self.__dict__)
+        return new
+
+    def __deepcopy__(self, memo):
+        # all attributes are immutable
+        return self.__copy__()
+
     def __setattr__(self, key, value):
         # raise a warning if overwriting previous ns (see #2072)
         if self._initialized and not self._has_warned:
@@ -1279,15 +1344,7 @@ class UTCDateTime(object):
         See methods :meth:`~datetime.datetime.strftime()` and
         :meth:`~datetime.datetime.strptime()` for more information.
         """
-        # This is an attempt to get consistent behavior across platforms.
-        # See https://bugs.python.org/issue32195
-        # and https://bugs.python.org/issue13305
-        # This is an issue of glibc implementation differing across platforms,
-        # out of control of Python, but we still try to be consistent across
-        # all platforms
-        if sys.platform.startswith("linux"):
-            format = format.replace("%Y", "%04Y")
-        return self.datetime.strftime(format)
+        return self.datetime.strftime(_get_strftime_format(format))
 
     @staticmethod
     def strptime(date_string, format):
@@ -1682,6 +1739,305 @@ class UTCDateTime(object):
         return date2num(self.datetime)
 
 
+class UTCDateTimeArray(object):
+    """
+    An array of UTC based date times backed by a NumPy ``datetime64[ns]``
+    array.
+
+    Comparisons, offsets, differences and formatting are done for all
+    elements at once instead of going through one
+    :class:`~obspy.core.utcdatetime.UTCDateTime` object at a time. Single
+    elements are returned as :class:`~obspy.core.utcdatetime.UTCDateTime`
+    objects.
+
+    :type times: list or :class:`numpy.ndarray`
+    :param times: :class:`~obspy.core.utcdatetime.UTCDateTime` objects,
+        anything a :class:`~obspy.core.utcdatetime.UTCDateTime` can be created
+        from, an array of POSIX timestamps in seconds or a NumPy
+        ``datetime64`` array.
+    :type precision: int, optional
+    :param precision: Precision used by the rich comparison operators, see
+        :class:`~obspy.core.utcdatetime.UTCDateTime`. Defaults to
+        :attr:`UTCDateTime.DEFAULT_PRECISION`.
+
+    .. rubric:: Example
+
+    >>> times = UTCDateTimeArray(["2009-08-24T00:20:03", "2009-08-24T00:20:13",
+    ...                           "2009-08-24T00:20:23"])
+    >>> times[1]
+    UTCDateTime(2009, 8, 24, 0, 20, 13)
+    >>> times > UTCDateTime("2009-08-24T00:20:05")
+    array([False,  True,  True], dtype=bool)
+    >>> times + 0.5  # doctest: +NORMALIZE_WHITESPACE
+    UTCDateTimeArray(['2009-08-24T00:20:03.500000Z',
+                      '2009-08-24T00:20:13.500000Z',
+                      '2009-08-24T00:20:23.500000Z'])
+    >>> times - times[0]
+    array([  0.,  10.,  20.])
+    >>> times.strftime("%j %H:%M")  # doctest: +NORMALIZE_WHITESPACE
+    array(['236 00:20', '236 00:20', '236 00:20'], dtype='<U9')
+    """
+    __hash__ = None
+
+    def __init__(self, times=(), precision=None):
+        if precision is None:
+            precision = UTCDateTime.DEFAULT_PRECISION
+        elif precision > 9:
+            msg = 'UTCDateTime precision above 9 is not supported, using 9'
+            warnings.warn(msg)
+            precision = 9
+        self.precision = int(precision)
+        self._ns = _get_ns_array(times)
+
+    @classmethod
+    def from_ns(cls, ns, precision=None):
+        """
+        Creates a new array from POSIX integer nanoseconds.
+
+        :type ns: :class:`numpy.ndarray`
+        :param ns: POSIX timestamps as integer nanoseconds.
+        :type precision: int, optional
+        :param precision: Precision used by the rich comparison operators.
+        """
+        obj = cls(precision=precision)
+        obj._ns = np.array(ns, dtype=np.int64, ndmin=1)
+        return obj
+
+    @property
+    def ns(self):
+        """
+        POSIX timestamps as integer nanoseconds.
+
+        :rtype: :class:`numpy.ndarray`
+        """
+        return self._ns
+
+    @property
+    def timestamp(self):
+        """
+        POSIX timestamps in seconds.
+
+        :rtype: :class:`numpy.ndarray`
+        """
+        return self._ns / 1e9
+
+    @property
+    def datetime64(self):
+        """
+        NumPy ``datetime64[ns]`` view of the times.
+
+        :rtype: :class:`numpy.ndarray`
+        """
+        return self._ns.view('datetime64[ns]')
+
+    def __array__(self, dtype=None, copy=None):
+        if dtype is None:
+            return self.datetime64
+        return self.datetime64.astype(dtype)
+
+    def __len__(self):
+        return len(self._ns)
+
+    def __iter__(self):
+        for ns in self._ns.tolist():
+            yield UTCDateTime.from_ns(ns, self.precision)
+
+    def __getitem__(self, index):
+        ns = self._ns[index]
+        if isinstance(ns, np.ndarray):
+            return self.from_ns(ns, self.precision)
+        return UTCDateTime.from_ns(int(ns), self.precision)
+
+    def __repr__(self):
+        return "%s(%s)" % (self.__class__.__name__,
+                           list(self.isoformat()))
+
+    def __str__(self):
+        return str(self.isoformat())
+
+    def _get_other_ns(self, other):
+        """
+        Returns nanoseconds and precision of the other operand of a
+        comparison or subtraction.
+        """
+        if isinstance(other, UTCDateTime):
+            return other._ns, other.precision
+        if not isinstance(other, UTCDateTimeArray):
+            other = UTCDateTimeArray(other, precision=self.precision)
+        return other._ns, other.precision
+
+    def _operate(self, other, op_func):
+        try:
+            other_ns, other_precision = self._get_other_ns(other)
+        except (TypeError, ValueError):
+            # Same as for single UTCDateTime objects, only "!=" is true.
+            return np.full(len(self), op_func is operator.ne)
+        if self.precision != other_precision:
+            msg = ('Comparing UTCDateTime objects of different precision'
+                   ' is not defined will raise an Exception in a future'
+                   ' version of obspy')
+            warnings.warn(msg, ObsPyDeprecationWarning)
+        precision = min(self.precision, other_precision)
+        return op_func(_round_ns(self._ns, precision),
+                       _round_ns(other_ns, precision))
+
+    def __eq__(self, other):
+        return self._operate(other, operator.eq)
+
+    def __ne__(self, other):
+        return self._operate(other, operator.ne)
+
+    def __lt__(self, other):
+        return self._operate(other, operator.lt)
+
+    def __le__(self, other):
+        return self._operate(other, operator.le)
+
+    def __gt__(self, other):
+        return self._operate(other, operator.gt)
+
+    def __ge__(self, other):
+        return self._operate(other, operator.ge)
+
+    def __add__(self, value):
+        """
+        Adds seconds to all times.
+
+        :type value: float or :class:`numpy.ndarray`
+        :param value: Seconds to add, either a single value or one value per
+            element.
+        """
+        if isinstance(value, (UTCDateTime, UTCDateTimeArray)):
+            return NotImplemented
+        value = np.round(np.asarray(value, dtype=np.float64) * 1e9)
+        return self.from_ns(self._ns + value.astype(np.int64), self.precision)
+
+    __radd__ = __add__
+
+    def __sub__(self, value):
+        """
+        Subtracts seconds or times from all times.
+
+        Subtracting :class:`~obspy.core.utcdatetime.UTCDateTime` objects or
+        arrays results in relative time spans in seconds, rounded to the
+        precision of the array (up to floating point accuracy).
+        """
+        if isinstance(value, (UTCDateTime, UTCDateTimeArray)):
+            other_ns, _ = self._get_other_ns(value)
+            return np.round((self._ns - other_ns) / 1e9, self.precision)
+        return self + -np.asarray(value, dtype=np.float64)
+
+    def __rsub__(self, value):
+        if isinstance(value, UTCDateTime):
+            return np.round((value._ns - self._ns) / 1e9, value.precision)
+        return NotImplemented
+
+    def min(self):
+        """
+        Returns the earliest time.
+        """
+        return UTCDateTime.from_ns(int(self._ns.min()), self.precision)
+
+    def max(self):
+        """
+        Returns the latest time.
+        """
+        return UTCDateTime.from_ns(int(self._ns.max()), self.precision)
+
+    def argsort(self):
+        """
+        Returns the indices that would sort the times.
+        """
+        return np.argsort(self._ns, kind='stable')
+
+    def isoformat(self):
+        """
+        Returns ISO8601 strings like ``str()`` of the single elements.
+
+        :rtype: :class:`numpy.ndarray`
+        """
+        ns = _round_ns(self._ns, self.precision)
+        # unit with at least as many fractional digits as the precision
+        digits, unit = [(digits, unit) for digits, unit in (
+            (0, 's'), (3, 'ms'), (6, 'us'), (9, 'ns'))
+            if digits >= self.precision][0]
+        strings = np.datetime_as_string(
+            ns.view('datetime64[ns]').astype('datetime64[%s]' % unit))
+        if digits != self.precision:
+            cut = digits - self.precision + (1 if self.precision == 0 else 0)
+            strings = np.array([string[:-cut] for string in strings.tolist()])
+        return np.char.add(strings, 'Z')
+
+    def strftime(self, format):
+        """
+        Returns strings representing the times, controlled by an explicit
+        format string.
+
+        Same as :meth:`UTCDateTime.strftime()
+        <obspy.core.utcdatetime.UTCDateTime.strftime>` for every element,
+        but the conversion to Python datetime objects is done for all times
+        at once.
+
+        :type format: str
+        :param format: Format string.
+        :rtype: :class:`numpy.ndarray`
+        """
+        format = _get_strftime_format(format)
+        us = _round_ns(self._ns, self.precision) // 1000
+        datetimes = us.view('datetime64[us]').astype(object).tolist()
+        strings = []
+        for ns, dt in zip(self._ns.tolist(), datetimes):
+            if not isinstance(dt, datetime.datetime):
+                # out of range of Python datetime objects
+                dt = UTCDateTime.from_ns(ns, self.precision).datetime
+            strings.append(dt.strftime(format))
+        return np.array(strings, dtype=str)
+
+
+def _get_ns_array(times):
+    """
+    Converts date times to an array of POSIX integer nanoseconds.
+    """
+    if isinstance(times, UTCDateTimeArray):
+        return times._ns.copy()
+    if isinstance(times, np.ndarray) and times.dtype.kind == 'M':
+        return times.astype('datetime64[ns]').view(np.int64).copy()
+    if isinstance(times, np.ndarray) and times.dtype.kind in 'iuf':
+        # POSIX timestamps in seconds like UTCDateTime(float)
+        return np.round(times.astype(np.float64) * 1e9).astype(np.int64)
+    return np.array([UTCDateTime(time)._ns for time in times],
+                    dtype=np.int64)
+
+
+def _round_ns(ns, precision):
+    """
+    Rounds integer nanoseconds to the given precision like
+    ``round(ns, precision - 9)``, i.e. half to even.
+    """
+    if precision >= 9:
+        return ns
+    factor = 10 ** (9 - precision)
+    quotient, remainder = np.divmod(ns, factor)
+    round_up = (2 * remainder > factor) | \
+        ((2 * remainder == factor) & (quotient % 2 == 1))
+    return (quotient + round_up) * factor
+
+
+def _get_strftime_format(format):
+    """
+    Returns a format string giving the same results on all platforms.
+    """
+    # This is an attempt to get consistent behavior across platforms.
+    # See https://bugs.python.org/issue32195
+    # and https://bugs.python.org/issue13305
+    # This is an issue of glibc implementation differing across platforms,
+    # out of control of Python, but we still try to be consistent across
+    # all platforms
+    if sys.platform.startswith("linux"):
+        format = format.replace("%Y", "%04Y")
+    return format
+
+
 def _datetime_to_ns(dt):
     """
     Use Python datetime object to return equivalent nanoseconds.
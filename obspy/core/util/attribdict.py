@@ -178,7 +178,7 @@ class AttribDict(collections.abc.MutableMapping):
         other_keys = [k for k in keys if k not in priorized_keys]
         # priorized keys first + all other keys
         keys = priorized_keys + sorted(other_keys)
-        head = [pattern % (k, self.__dict__[k]) for k in keys]
+        head = [pattern % (k, self[k]) for k in keys]
         return "\n".join(head)
 
     def _cast_type(self, key, value):
@@ -8,8 +8,10 @@ Base utilities and constants for ObsPy.
     GNU Lesser General Public License, Version 3
     (https://www.gnu.org/copyleft/lesser.html)
 """
+import functools
 import glob
 import importlib
+import importlib.metadata
 import inspect
 import io
 import os
@@ -21,12 +23,11 @@ import sys
 import tempfile
 import unicodedata
 import warnings
-from collections import OrderedDict
+from collections import Counter, OrderedDict
+from collections.abc import Mapping
 from pathlib import PurePath
 
 import numpy as np
-import pkg_resources
-from pkg_resources import get_entry_info, iter_entry_points
 
 from obspy.core.util.misc import to_int_or_zero, buffered_load_entry_point
 
@@ -61,6 +62,11 @@ INVENTORY_PREFERRED_ORDER = ['STATIONXML', 'SEED', 'RESP']
 # waveform plugins accepting a byteorder keyword
 WAVEFORM_ACCEPT_BYTEORDER = ['MSEED', 'Q', 'SAC', 'SEGY', 'SU']
 
+# Number of bytes read to guess the format of a file from its first bytes
+FORMAT_SNIFF_SIZE = 256
+# Maximum number of files in the per-process format detection cache
+FORMAT_CACHE_SIZE = 100000
+
 _sys_is_le = sys.byteorder == 'little'
 NATIVE_BYTEORDER = _sys_is_le and '<' or '>'
 
@@ -239,6 +245,7 @@ def _get_entry_points(group, subgroup=None):
     >>> _get_entry_points('obspy.plugin.waveform')  # doctest: +ELLIPSIS
     {...'SLIST': EntryPoint.parse('SLIST = obspy.io.ascii.core')...}
     """
+    from pkg_resources import iter_entry_points
     features = {}
     for ep in iter_entry_points(group):
         if subgroup:
@@ -269,27 +276,55 @@ def _get_ordered_entry_points(group, subgroup=None, order_list=[]):
     return entry_points
 
 
-ENTRY_POINTS = {
-    'trigger': _get_entry_points('obspy.plugin.trigger'),
-    'filter': _get_entry_points('obspy.plugin.filter'),
-    'rotate': _get_entry_points('obspy.plugin.rotate'),
-    'detrend': _get_entry_points('obspy.plugin.detrend'),
-    'interpolate': _get_entry_points('obspy.plugin.interpolate'),
-    'integrate': _get_entry_points('obspy.plugin.integrate'),
-    'differentiate': _get_entry_points('obspy.plugin.differentiate'),
-    'waveform': _get_ordered_entry_points(
+class _LazyEntryPoints(Mapping):
+    """
+    Read-only mapping of plug-in groups to their entry points.
+
+    Looking up entry points requires scanning all installed distributions,
+    so the entry points of a group are only looked up on first access.
+    """
+    def __init__(self, factories):
+        self._factories = factories
+        self._entry_points = {}
+
+    def __getitem__(self, key):
+        try:
+            return self._entry_points[key]
+        except KeyError:
+            entry_points = self._factories[key]()
+            self._entry_points[key] = entry_points
+            return entry_points
+
+    def __iter__(self):
+        return iter(self._factories)
+
+    def __len__(self):
+        return len(self._factories)
+
+
+ENTRY_POINTS = _LazyEntryPoints({
+    'trigger': lambda: _get_entry_points('obspy.plugin.trigger'),
+    'filter': lambda: _get_entry_points('obspy.plugin.filter'),
+    'rotate': lambda: _get_entry_points('obspy.plugin.rotate'),
+    'detrend': lambda: _get_entry_points('obspy.plugin.detrend'),
+    'interpolate': lambda: _get_entry_points('obspy.plugin.interpolate'),
+    'integrate': lambda: _get_entry_points('obspy.plugin.integrate'),
+    'differentiate': lambda: _get_entry_points(
+        'obspy.plugin.differentiate'),
+    'waveform': lambda: _get_ordered_entry_points(
         'obspy.plugin.waveform', 'readFormat', WAVEFORM_PREFERRED_ORDER),
-    'waveform_write': _get_ordered_entry_points(
+    'waveform_write': lambda: _get_ordered_entry_points(
         'obspy.plugin.waveform', 'writeFormat', WAVEFORM_PREFERRED_ORDER),
-    'event': _get_ordered_entry_points('obspy.plugin.event', 'readFormat',
-                                       EVENT_PREFERRED_ORDER),
-    'event_write': _get_entry_points('obspy.plugin.event', 'writeFormat'),
-    'taper': _get_entry_points('obspy.plugin.taper'),
-    'inventory': _get_ordered_entry_points(
+    'event': lambda: _get_ordered_entry_points(
+        'obspy.plugin.event', 'readFormat', EVENT_PREFERRED_ORDER),
+    'event_write': lambda: _get_entry_points(
+        'obspy.plugin.event', 'writeFormat'),
+    'taper': lambda: _get_entry_points('obspy.plugin.taper'),
+    'inventory': lambda: _get_ordered_entry_points(
         'obspy.plugin.inventory', 'readFormat', INVENTORY_PREFERRED_ORDER),
-    'inventory_write': _get_entry_points(
+    'inventory_write': lambda: _get_entry_points(
         'obspy.plugin.inventory', 'writeFormat'),
-}
+})
 
 
 def _get_function_from_entry_point(group, type):
@@ -353,8 +388,8 @@ def get_dependency_version(package_name, raw_string=False):
         0.
     """
     try:
-        version_string = pkg_resources.get_distribution(package_name).version
-    except pkg_resources.DistributionNotFound:
+        version_string = importlib.metadata.version(package_name)
+    except importlib.metadata.PackageNotFoundError:
         return []
     if raw_string:
         return version_string
@@ -369,64 +404,269 @@ MATPLOTLIB_VERSION = get_dependency_version('matplotlib')
 CARTOPY_VERSION = get_dependency_version('cartopy')
 
 
-def _read_from_plugin(plugin_type, filename, format=None, **kwargs):
+def _looks_like_mseed(header):
     """
-    Reads a single file from a plug-in's readFormat function.
+    Checks the fixed header of the first record for plausible values.
+    """
+    if len(header) < 48:
+        return False
+    sequence_number = header[:6]
+    if not sequence_number.strip(b' \x00').isdigit():
+        return False
+    return header[6:7] in b'DRQMVAST' and header[7:8] in b' \x00'
+
+
+# Formats which can be recognized by the first bytes of a file, in the order
+# of checking. A match is always confirmed by the isFormat function of the
+# plug-in.
+_FORMAT_SIGNATURES = {
+    'waveform': [
+        ('MSEED', _looks_like_mseed),
+        ('WAV', lambda header: header[:4] == b'RIFF' and
+            header[8:12] == b'WAVE'),
+        ('GSE2', lambda header: header.lstrip().startswith(b'WID2')),
+        ('SH_ASC', lambda header: header.startswith(b'DELTA:')),
+        ('SLIST', lambda header: header.startswith(b'TIMESERIES') and
+            b'SLIST' in header.split(b'\n')[0]),
+        ('TSPAIR', lambda header: header.startswith(b'TIMESERIES') and
+            b'TSPAIR' in header.split(b'\n')[0]),
+        ('PICKLE', lambda header: b'obspy.core.stream' in header[:100]),
+        ('SEG2', lambda header: header[:2] in (b'\x55\x3a', b'\x3a\x55')),
+    ],
+}
+
+# Per-process cache of detected formats keyed on the type of plug-in, the
+# absolute path, size and modification time of a file.
+_FORMAT_CACHE = OrderedDict()
+_FORMAT_DETECTION_STATS = Counter()
+
+
+def get_format_detection_stats():
+    """
+    Returns counters of the automatic file format detection.
+
+    :rtype: dict
+    :returns: Dictionary with the number of format detections (``detections``)
+        and how many of them were answered from the cache (``cache_hits``) or
+        by the first bytes of the file (``sniff_hits``), the number of calls
+        to ``isFormat`` functions of plug-ins (``probes``) and the number of
+        calls avoided compared to probing all formats in order
+        (``probes_avoided``).
+    """
+    stats = dict.fromkeys(('detections', 'cache_hits', 'sniff_hits', 'probes',
+                           'probes_avoided'), 0)
+    stats.update(_FORMAT_DETECTION_STATS)
+    return stats
+
+
+def clear_format_detection_cache(reset_stats=True):
+    """
+    Clears the per-process cache of detected file formats.
+
+    :type reset_stats: bool
+    :param reset_stats: Also reset the counters returned by
+        :func:`get_format_detection_stats`.
+    """
+    _FORMAT_CACHE.clear()
+    if reset_stats:
+        _FORMAT_DETECTION_STATS.clear()
+
+
+def _get_format_cache_key(plugin_type, filename):
+    """
+    Returns the key of a file in the format detection cache or ``None`` if it
+    can not be cached.
+    """
+    if not isinstance(filename, str):
+        return None
+    try:
+        stat = os.stat(filename)
+    except OSError:
+        return None
+    return (plugin_type, os.path.abspath(filename), stat.st_size,
+            stat.st_mtime_ns)
+
+
+def _sniff_format(plugin_type, filename):
+    """
+    Guesses the format of a file from its first bytes.
+
+    :returns: Name of the guessed format or ``None``.
+    """
+    signatures = _FORMAT_SIGNATURES.get(plugin_type)
+    if not signatures:
+        return None
+    try:
+        if isinstance(filename, str):
+            with open(filename, 'rb') as fh:
+                header = fh.read(FORMAT_SNIFF_SIZE)
+        elif hasattr(filename, 'read') and hasattr(filename, 'seek'):
+            position = filename.tell()
+            try:
+                header = filename.read(FORMAT_SNIFF_SIZE)
+            finally:
+                filename.seek(position, 0)
+        else:
+            return None
+    except Exception:
+        return None
+    if not isinstance(header, bytes):
+        return None
+    for name, signature in signatures:
+        if signature(header):
+            return name
+    return None
+
+
+def _is_format(plugin_type, format_ep, filename):
+    """
+    Calls the isFormat function of a plug-in without moving the file pointer
+    of file-like objects.
+    """
+    # search isFormat for given entry point
+    is_format = buffered_load_entry_point(
+        format_ep.dist.key,
+        'obspy.plugin.%s.%s' % (plugin_type, format_ep.name),
+        'isFormat')
+    # If it is a file-like object, store the position and restore it
+    # later to avoid that the isFormat() functions move the file
+    # pointer.
+    if hasattr(filename, "tell") and hasattr(filename, "seek"):
+        position = filename.tell()
+    else:
+        position = None
+    _FORMAT_DETECTION_STATS['probes'] += 1
+    # check format
+    is_format = is_format(filename)
+    if position is not None:
+        filename.seek(position, 0)
+    return is_format
+
+
+def _detect_format(plugin_type, filename):
+    """
+    Detects the format of a file.
+
+    Previously detected formats of unchanged files are taken from a
+    per-process cache. Otherwise the format is guessed from the first bytes
+    of the file which is then confirmed by the isFormat function of that
+    format. Only if that fails, the isFormat functions of all plug-ins are
+    tried in the preferred order.
+
+    :returns: Entry point of the detected format.
     """
-    if isinstance(filename, str):
-        if not Path(filename).exists():
-            msg = "[Errno 2] No such file or directory: '{}'".format(
-                filename)
-            raise FileNotFoundError(msg)
     eps = ENTRY_POINTS[plugin_type]
-    # get format entry point
+    names = list(eps)
+    _FORMAT_DETECTION_STATS['detections'] += 1
+    key = _get_format_cache_key(plugin_type, filename)
+    if key is not None and _FORMAT_CACHE.get(key) in eps:
+        _FORMAT_CACHE.move_to_end(key)
+        name = _FORMAT_CACHE[key]
+        _FORMAT_DETECTION_STATS['cache_hits'] += 1
+        _FORMAT_DETECTION_STATS['probes_avoided'] += names.index(name) + 1
+        return eps[name]
+
     format_ep = None
-    if not format:
+    name = _sniff_format(plugin_type, filename)
+    if name in eps and _is_format(plugin_type, eps[name], filename):
+        format_ep = eps[name]
+        _FORMAT_DETECTION_STATS['sniff_hits'] += 1
+        _FORMAT_DETECTION_STATS['probes_avoided'] += names.index(name)
+    else:
         # auto detect format - go through all known formats in given sort order
-        for format_ep in eps.values():
-            # search isFormat for given entry point
-            is_format = buffered_load_entry_point(
-                format_ep.dist.key,
-                'obspy.plugin.%s.%s' % (plugin_type, format_ep.name),
-                'isFormat')
-            # If it is a file-like object, store the position and restore it
-            # later to avoid that the isFormat() functions move the file
-            # pointer.
-            if hasattr(filename, "tell") and hasattr(filename, "seek"):
-                position = filename.tell()
-            else:
-                position = None
-            # check format
-            is_format = is_format(filename)
-            if position is not None:
-                filename.seek(position, 0)
-            if is_format:
+        for candidate in eps.values():
+            if candidate.name != name and \
+                    _is_format(plugin_type, candidate, filename):
+                format_ep = candidate
                 break
         else:
             raise TypeError('Unknown format for file %s' % filename)
-    else:
-        # format given via argument
-        format = format.upper()
-        try:
-            format_ep = eps[format]
-        except (KeyError, IndexError):
-            msg = "Format \"%s\" is not supported. Supported types: %s"
-            raise TypeError(msg % (format, ', '.join(eps)))
-    # file format should be known by now
+
+    if key is not None:
+        _FORMAT_CACHE[key] = format_ep.name
+        while len(_FORMAT_CACHE) > FORMAT_CACHE_SIZE:
+            _FORMAT_CACHE.popitem(last=False)
+    return format_ep
+
+
+def _get_format_entry_point(plugin_type, filename, format=None):
+    """
+    Returns the entry point of the plug-in for the format of a file.
+
+    If no format is given, it is detected with :func:`_detect_format`.
+    """
+    eps = ENTRY_POINTS[plugin_type]
+    if not format:
+        return _detect_format(plugin_type, filename)
+    # format given via argument
+    format = format.upper()
+    try:
+        return eps[format]
+    except (KeyError, IndexError):
+        msg = "Format \"%s\" is not supported. Supported types: %s"
+        raise TypeError(msg % (format, ', '.join(eps)))
+
+
+def _load_read_format(plugin_type, format_ep, method='readFormat'):
+    """
+    Loads the reading function of a plug-in.
+    """
     try:
         # search readFormat for given entry point
-        read_format = buffered_load_entry_point(
+        return buffered_load_entry_point(
             format_ep.dist.key,
             'obspy.plugin.%s.%s' % (plugin_type, format_ep.name),
-            'readFormat')
+            method)
     except ImportError:
+        eps = ENTRY_POINTS[plugin_type]
         msg = "Format \"%s\" is not supported. Supported types: %s"
         raise TypeError(msg % (format_ep.name, ', '.join(eps)))
+
+
+def _read_from_plugin(plugin_type, filename, format=None, **kwargs):
+    """
+    Reads a single file from a plug-in's readFormat function.
+    """
+    if isinstance(filename, str):
+        if not Path(filename).exists():
+            msg = "[Errno 2] No such file or directory: '{}'".format(
+                filename)
+            raise FileNotFoundError(msg)
+    # file format should be known by now
+    format_ep = _get_format_entry_point(plugin_type, filename, format=format)
+    read_format = _load_read_format(plugin_type, format_ep)
     # read
     list_obj = read_format(filename, **kwargs)
     return list_obj, format_ep.name
 
 
+def _iread_from_plugin(plugin_type, filename, format=None, chunksize=None,
+                       **kwargs):
+    """
+    Iteratively reads a single file from a plug-in's ireadFormat function.
+
+    Plug-ins without an ireadFormat function are read at once with their
+    readFormat function.
+
+    :returns: Tuple of an iterator over the read objects and the name of the
+        format.
+    """
+    if isinstance(filename, str):
+        if not Path(filename).exists():
+            msg = "[Errno 2] No such file or directory: '{}'".format(
+                filename)
+            raise FileNotFoundError(msg)
+    format_ep = _get_format_entry_point(plugin_type, filename, format=format)
+    try:
+        iread_format = _load_read_format(plugin_type, format_ep,
+                                         method='ireadFormat')
+    except TypeError:
+        read_format = _load_read_format(plugin_type, format_ep)
+        return iter([read_format(filename, **kwargs)]), format_ep.name
+    return iread_format(filename, chunksize=chunksize, **kwargs), \
+        format_ep.name
+
+
 def get_script_dir_name():
     """
     Get the directory of the current script file. This is more robust than
@@ -480,14 +720,16 @@ def make_format_plugin_table(group="waveform", method="read", numspaces=4,
         raise ValueError("no valid type: %s" % method)
 
     method = "%sFormat" % method
-    eps = _get_ordered_entry_points("obspy.plugin.%s" % group, method,
-                                    WAVEFORM_PREFERRED_ORDER)
+    entry_points = _get_plugin_entry_point_values()
     mod_list = []
-    for name, ep in eps.items():
-        module_short = ":mod:`%s`" % ".".join(ep.module_name.split(".")[:3])
-        ep_list = [ep.dist.key, "obspy.plugin.%s.%s" % (group, name), method]
-        entry_info = str(get_entry_info(*ep_list))
-        func_str = ':func:`%s`' % entry_info.split(' = ')[1].replace(':', '.')
+    for name, module in entry_points.get("obspy.plugin.%s" % group,
+                                         {}).items():
+        func = entry_points.get("obspy.plugin.%s.%s" % (group, name),
+                                {}).get(method)
+        if func is None:
+            continue
+        module_short = ":mod:`%s`" % ".".join(module.split(".")[:3])
+        func_str = ':func:`%s`' % func.replace(':', '.')
         mod_list.append((name, module_short, func_str))
 
     mod_list = sorted(mod_list)
@@ -512,13 +754,35 @@ def make_format_plugin_table(group="waveform", method="read", numspaces=4,
     return ret
 
 
+@functools.lru_cache(maxsize=None)
+def _get_plugin_entry_point_values():
+    """
+    Returns the values of the entry points of all ObsPy plug-in groups of
+    all installed distributions, without importing pkg_resources or loading
+    the plug-ins.
+
+    :rtype: dict
+    :returns: Dictionary mapping entry point groups to dictionaries mapping
+        entry point names to their values, e.g.
+        ``{"obspy.plugin.waveform.MSEED":
+        {"readFormat": "obspy.io.mseed.core:_read_mseed", ...}, ...}``.
+    """
+    groups = {}
+    for dist in importlib.metadata.distributions():
+        for ep in dist.entry_points:
+            # like pkg_resources, the first of several installations wins
+            if ep.group.startswith('obspy.plugin.'):
+                groups.setdefault(ep.group, {}).setdefault(ep.name, ep.value)
+    return groups
+
+
 def _add_format_plugin_table(func, group, method, numspaces=4):
     """
     A function to populate the docstring of func with its plugin table.
     """
     if func.__doc__ is not None and '%s' in func.__doc__:
-        func.__doc__ = func.__doc__ % make_format_plugin_table(
-            group, method, numspaces=numspaces)
+        table = make_format_plugin_table(group, method, numspaces=numspaces)
+        func.__doc__ = func.__doc__ % table
 
 
 class ComparingObject(object):
@@ -655,6 +919,41 @@ def _generic_reader(pathname_or_url=None, callback_func=None,
         return generic
 
 
+def _generic_ireader(pathname_or_url=None, callback_func=None,
+                     **kwargs):
+    """
+    Generator counterpart of :func:`_generic_reader` chaining the objects
+    yielded by ``callback_func`` for all matching files.
+    """
+    # convert pathlib.Path objects to str for compatibility.
+    if isinstance(pathname_or_url, PurePath):
+        pathname_or_url = str(pathname_or_url)
+    if not isinstance(pathname_or_url, str):
+        # not a string - we assume a file-like object
+        yield from callback_func(pathname_or_url, **kwargs)
+    elif "://" in pathname_or_url[:10]:
+        # URL
+        # extract extension if any
+        suffix = Path(Path(pathname_or_url).name).suffix
+        if suffix == '':
+            suffix = ".tmp"
+        with NamedTemporaryFile(suffix=sanitize_filename(suffix)) as fh:
+            download_to_file(url=pathname_or_url, filename_or_buffer=fh)
+            yield from callback_func(fh.name, **kwargs)
+    else:
+        pathname = pathname_or_url
+        # File name(s)
+        pathnames = sorted(glob.glob(pathname))
+        if not pathnames:
+            # try to give more specific information why nothing is found
+            if glob.has_magic(pathname):
+                raise Exception("No file matching file pattern: %s" % pathname)
+            elif not Path(pathname).is_file():
+                raise IOError(2, "No such file or directory", pathname)
+        for filename in pathnames:
+            yield from callback_func(filename, **kwargs)
+
+
 def get_bytes_stream(file_or_stream):
     """
     Return a file-like object streaming bytes data (``bytes`` objects)
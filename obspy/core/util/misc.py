@@ -22,7 +22,6 @@ from subprocess import STDOUT, CalledProcessError, check_output
 
 
 import numpy as np
-from pkg_resources import load_entry_point
 
 WIN32 = sys.platform.startswith('win32')
 
@@ -587,6 +586,15 @@ def limit_numpy_fft_cache(max_size_in_mb_per_cache=100):
             cache.clear()
 
 
+def load_entry_point(dist, group, name):
+    """
+    Wrapper around :func:`pkg_resources.load_entry_point` only importing
+    the slow to import :mod:`pkg_resources` on first use.
+    """
+    import pkg_resources
+    return pkg_resources.load_entry_point(dist, group, name)
+
+
 def buffered_load_entry_point(dist, group, name):
     """
     Return `name` entry point of `group` for `dist` or raise ImportError
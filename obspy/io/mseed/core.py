@@ -6,22 +6,27 @@ import ctypes as C  # NOQA
 import io
 import os
 import warnings
+from multiprocessing.pool import ThreadPool
 from pathlib import Path
-from struct import pack
+from struct import pack, unpack_from
 
 import numpy as np
 
 from obspy import Stream, Trace, UTCDateTime
 from obspy.core.compatibility import from_buffer
 from obspy.core.util import NATIVE_BYTEORDER
-from . import (util, InternalMSEEDError, ObsPyMSEEDFilesizeTooSmallError,
+from . import (index, util, InternalMSEEDError,
+               ObsPyMSEEDFilesizeTooSmallError,
                ObsPyMSEEDFilesizeTooLargeError, ObsPyMSEEDError)
 from .headers import (DATATYPES, ENCODINGS, HPTERROR, HPTMODULUS, SAMPLETYPE,
-                      SEED_CONTROL_HEADERS, UNSUPPORTED_ENCODINGS,
-                      VALID_CONTROL_HEADERS, VALID_RECORD_LENGTHS, Selections,
+                      UNSUPPORTED_ENCODINGS, VALID_RECORD_LENGTHS, Selections,
                       SelectTime, Blkt100S, Blkt1001S, clibmseed)
 
 
+# Maximum size of a buffer that can be passed to libmseed.
+MAX_BUFFER_SIZE = 2 ** 31
+
+
 def _is_mseed(file):
     """
     Checks whether a file is Mini-SEED/full SEED or not.
@@ -142,7 +147,8 @@ def __is_mseed(fp, file_size):  # NOQA
 
 def _read_mseed(mseed_object, starttime=None, endtime=None, headonly=False,
                 sourcename=None, reclen=None, details=False,
-                header_byteorder=None, verbose=None, **kwargs):
+                header_byteorder=None, verbose=None, use_mmap=False,
+                use_index=None, index_dir=None, threads=None, **kwargs):
     """
     Reads a Mini-SEED file and returns a Stream object.
 
@@ -188,6 +194,35 @@ def _read_mseed(mseed_object, starttime=None, endtime=None, headonly=False,
         little-endian, ``1`` or ``'>'`` for MBF or big-endian. ``'='`` is the
         native byte order. Used to enforce the header byte order. Useful in
         some rare cases where the automatic byte order detection fails.
+    :type use_mmap: bool, optional
+    :param use_mmap: If ``True``, files are memory mapped instead of being
+        read into memory. If any of ``starttime``, ``endtime`` or
+        ``sourcename`` is given, only the headers of all records are scanned
+        and only the records overlapping the selection are passed on to
+        libmseed, so the pages containing the data of all other records are
+        never read from disk. This makes it possible to efficiently extract
+        short time windows from large files and also lifts the 2 GiB file
+        size limit as long as the selected records are smaller than that.
+        Only works for file names and file objects backed by an actual
+        file, otherwise it is silently ignored. Defaults to ``False``.
+    :type use_index: bool, optional
+    :param use_index: Controls the usage of a persistent record index (see
+        :mod:`obspy.io.mseed.index`) if any of ``starttime``, ``endtime`` or
+        ``sourcename`` is given. With an index only the records overlapping
+        the selection are read from disk. ``None`` uses an existing and up
+        to date index, ``True`` additionally creates or updates the index if
+        necessary and ``False`` never uses an index. Only applies to file
+        names. Defaults to ``None``.
+    :type index_dir: str, optional
+    :param index_dir: Directory the record indices are stored in. If not
+        given, indices are stored as hidden files next to the MiniSEED files.
+    :type threads: int, optional
+    :param threads: If given and larger than one, the records are split into
+        up to ``threads`` groups at record boundaries which are then decoded
+        concurrently by libmseed (which releases the GIL). The resulting
+        segments are stitched together so the result is identical to the
+        default serial decoding. Only worthwhile for large files. Files with
+        varying record lengths are always decoded serially.
 
     .. rubric:: Example
 
@@ -272,13 +307,22 @@ def _read_mseed(mseed_object, starttime=None, endtime=None, headonly=False,
         msg = "The smallest possible mini-SEED record is made up of 128 " \
               "bytes. The passed buffer or file contains only %i." % length
         raise ObsPyMSEEDFilesizeTooSmallError(msg)
-    elif length > 2 ** 31:
-        msg = ("ObsPy can currently not directly read mini-SEED files that "
-               "are larger than 2^31 bytes (2048 MiB). To still read it, "
-               "please read the file in chunks as documented here: "
-               "https://github.com/obspy/obspy/pull/1419"
-               "#issuecomment-221582369")
-        raise ObsPyMSEEDFilesizeTooLargeError(msg)
+
+    has_selection = starttime is not None or endtime is not None or \
+        sourcename is not None
+
+    # Use a persistent record index if available.
+    record_index = None
+    if has_selection and use_index is not False and \
+            isinstance(mseed_object, str):
+        record_index = index.get_record_index(
+            mseed_object, index_dir=index_dir, create=bool(use_index))
+
+    # With a selection and a memory mapped file or a record index the size is
+    # checked once the actually required records are known.
+    if length > MAX_BUFFER_SIZE and not (
+            has_selection and (use_mmap or record_index is not None)):
+        _raise_filesize_too_large_error()
 
     info = util.get_record_information(mseed_object, endian=bo)
 
@@ -300,39 +344,37 @@ def _read_mseed(mseed_object, starttime=None, endtime=None, headonly=False,
         raise ValueError(msg)
 
     record_length = info["record_length"]
+    record_byteorder = info["byteorder"]
 
     # Only keep information relevant for the whole file.
     info = {'filesize': info['filesize']}
 
-    # If it's a file name just read it.
-    if isinstance(mseed_object, str):
-        # Read to NumPy array which is used as a buffer.
-        bfr_np = np.fromfile(mseed_object, dtype=np.int8)
-    elif hasattr(mseed_object, 'read'):
-        bfr_np = from_buffer(mseed_object.read(), dtype=np.int8)
-
-    # Search for data records and pass only the data part to the underlying C
-    # routine.
+    bfr_np = None
     offset = 0
-    # 0 to 9 are defined in a row in the ASCII charset.
-    min_ascii = ord('0')
-
-    # Small function to check whether an array of ASCII values contains only
-    # digits.
-    def isdigit(x):
-        return True if (x - min_ascii).max() <= 9 else False
-
-    while True:
-        # This should never happen
-        if (isdigit(bfr_np[offset:offset + 6]) is False) or \
-                (bfr_np[offset + 6] not in VALID_CONTROL_HEADERS):
-            msg = 'Not a valid (Mini-)SEED file'
-            raise Exception(msg)
-        elif bfr_np[offset + 6] in SEED_CONTROL_HEADERS:
-            offset += record_length
-            continue
-        break
-    bfr_np = bfr_np[offset:]
+    if record_index is not None:
+        # The record index knows the offsets of the data records.
+        indices = util._select_record_indices(record_index, starttime,
+                                              endtime, sourcename)
+        if len(indices):
+            bfr_np = index._read_records(mseed_object, record_index,
+                                         indices)
+        else:
+            bfr_np = np.empty(0, dtype=np.int8)
+    else:
+        if use_mmap:
+            bfr_np = util._mmap_buffer(mseed_object)
+        if bfr_np is None:
+            # If it's a file name just read it.
+            if isinstance(mseed_object, str):
+                # Read to NumPy array which is used as a buffer.
+                bfr_np = np.fromfile(mseed_object, dtype=np.int8)
+            elif hasattr(mseed_object, 'read'):
+                bfr_np = from_buffer(mseed_object.read(), dtype=np.int8)
+
+        # Search for data records and pass only the data part to the
+        # underlying C routine.
+        offset = util._get_data_offset(bfr_np, record_length)
+        bfr_np = bfr_np[offset:]
     buflen = len(bfr_np)
 
     # If no selection is given pass None to the C function.
@@ -371,35 +413,51 @@ def _read_mseed(mseed_object, starttime=None, endtime=None, headonly=False,
                 encode('ascii', 'ignore')
         else:
             selections.srcname = b'*'
-    all_data = []
 
-    # Use a callback function to allocate the memory and keep track of the
-    # data.
-    def allocate_data(samplecount, sampletype):
-        # Enhanced sanity checking for libmseed 2.10 can result in the
-        # sampletype not being set. Just return an empty array in this case.
-        if sampletype == b"\x00":
-            data = np.empty(0)
-        else:
-            data = np.empty(samplecount, dtype=DATATYPES[sampletype])
-        all_data.append(data)
-        return data.ctypes.data
-    # XXX: Do this properly!
-    # Define Python callback function for use in C function. Return a long so
-    # it hopefully works on 32 and 64 bit systems.
-    alloc_data = C.CFUNCTYPE(C.c_longlong, C.c_int, C.c_char)(allocate_data)
+    # Only pass the records overlapping the selection to libmseed. For memory
+    # mapped files this avoids reading the data of all other records.
+    if use_mmap and selections is not None and record_index is None:
+        bfr_np = util._select_records(bfr_np, record_length,
+                                      record_byteorder, starttime, endtime,
+                                      sourcename)
+        buflen = len(bfr_np)
+    if not buflen:
+        return Stream()
+    if buflen > MAX_BUFFER_SIZE:
+        _raise_filesize_too_large_error()
 
     try:
         verbose = int(verbose)
     except Exception:
         verbose = 0
 
+    chunks = [bfr_np]
+    if threads is not None and threads > 1:
+        chunks = _split_buffer(bfr_np, record_length, record_byteorder,
+                               threads)
+    args = (selections, unpack_data, reclen, verbose, details,
+            header_byteorder, headonly, info)
+
     clibmseed.verbose = bool(verbose)
     try:
-        lil = clibmseed.readMSEEDBuffer(
-            bfr_np, buflen, selections, C.c_int8(unpack_data),
-            reclen, C.c_int8(verbose), C.c_int8(details), header_byteorder,
-            alloc_data)
+        if len(chunks) > 1:
+            # The messages of all threads are collected as if they were of a
+            # single wrapped call.
+            with clibmseed._collect_messages("readMSEEDBuffer") as collector:
+
+                def _read_chunk(chunk):
+                    with clibmseed._forward_messages(collector):
+                        return _read_buffer(clibmseed.lib.readMSEEDBuffer,
+                                            chunk, *args)
+                pool = ThreadPool(min(threads, len(chunks)))
+                try:
+                    results = pool.map(_read_chunk, chunks)
+                finally:
+                    pool.close()
+                    pool.join()
+            segments = _stitch_segments(results)
+        else:
+            segments = _read_buffer(clibmseed.readMSEEDBuffer, bfr_np, *args)
     except InternalMSEEDError as e:
         msg = e.args[0]
         if offset and offset in str(e):
@@ -413,20 +471,262 @@ def _read_mseed(mseed_object, starttime=None, endtime=None, headonly=False,
                 raise InternalMSEEDError(msg)
         else:
             raise
+        segments = []
     finally:
         # Make sure to reset the verbosity.
         clibmseed.verbose = True
 
     del selections
 
-    traces = []
+    return Stream(traces=[trace for _, trace in segments])
+
+
+def _iread_mseed(mseed_object, chunksize=None, starttime=None, endtime=None,
+                 sourcename=None, use_index=None, index_dir=None, **kwargs):
+    """
+    Iteratively reads a Mini-SEED file and yields a Stream object per chunk
+    of records.
+
+    .. warning::
+        This function should NOT be called directly, it registers via the
+        ObsPy :func:`~obspy.core.stream.iread` function, call this instead.
+
+    :type mseed_object: str or file-like object
+    :param mseed_object: Filename or open file-like object that contains the
+        binary Mini-SEED data.
+    :type chunksize: int, optional
+    :param chunksize: Number of records per yielded Stream. If not given, the
+        whole file is read at once.
+    :type use_index: bool, optional
+    :param use_index: Use an existing record index (see
+        :mod:`obspy.io.mseed.index`) to locate the records. If ``True``, a
+        missing index is built and stored as well.
+    :type index_dir: str, optional
+    :param index_dir: Directory the record indices are stored in.
+
+    All other parameters are passed on to
+    :func:`~obspy.io.mseed.core._read_mseed`.
+
+    Only the records of the current chunk are kept in memory. Chunks without
+    records overlapping a ``starttime``/``endtime``/``sourcename`` selection
+    are not read at all. Files that can not be chunked, i.e. file-like
+    objects and files with varying record lengths, are read at once.
+    """
+    kwargs.update(starttime=starttime, endtime=endtime, sourcename=sourcename)
+    if isinstance(mseed_object, Path):
+        mseed_object = str(mseed_object)
+    table = None
+    if chunksize is not None and isinstance(mseed_object, str):
+        if use_index is not False:
+            table = index.get_record_index(mseed_object, index_dir=index_dir,
+                                           create=bool(use_index))
+        if table is None:
+            table = index.build_record_index(mseed_object)
+    if table is None:
+        yield _read_mseed(mseed_object, **kwargs)
+        return
+
+    indices = util._select_record_indices(table, starttime, endtime,
+                                          sourcename)
+    for i in range(0, len(indices), chunksize):
+        bfr_np = index._read_records(mseed_object, table,
+                                     indices[i:i + chunksize])
+        st = _read_mseed(io.BytesIO(bfr_np), **kwargs)
+        if len(st):
+            yield st
+
+
+def _read_mseed_stream(file_object, buffer_size=2 ** 20):
+    """
+    Reads MiniSEED data from a file-like object that does not have to be
+    seekable, e.g. an HTTP response, while it is being read.
+
+    Gives the same result as :func:`_read_mseed` with default arguments on
+    the whole data but only keeps about ``buffer_size`` bytes of undecoded
+    records in memory at any time.
+    """
+    results = []
+    length = 0
+    for _, bfr_np in _iter_record_buffers(file_object, buffer_size):
+        length += len(bfr_np)
+        results.append(_read_record_buffer(bfr_np))
+    st = Stream(traces=[trace for _, trace in _stitch_segments(results)])
+    for trace in st:
+        trace.stats.mseed.filesize = length
+    return st
+
+
+def _iread_mseed_stream(file_object, buffer_size=2 ** 20):
+    """
+    Reads MiniSEED data from a file-like object that does not have to be
+    seekable, e.g. an HTTP response, and yields every trace as soon as it is
+    complete.
+
+    A trace is complete once the records of another channel (or the end of
+    the data) follow its records. Data of a channel that is continued later
+    in the file-like object is yielded as a separate trace. Only about
+    ``buffer_size`` bytes of undecoded records are kept in memory.
+    """
+    pending = []
+    current = None
+    for key, bfr_np in _iter_record_buffers(file_object, buffer_size):
+        if pending and (key is None or key != current):
+            for _, trace in _stitch_segments(pending):
+                yield trace
+            pending = []
+        current = key
+        pending.append(_read_record_buffer(bfr_np))
+    for _, trace in _stitch_segments(pending):
+        yield trace
+
+
+def _read_record_buffer(bfr_np):
+    """
+    Decodes a buffer of complete records read by
+    :func:`_iter_record_buffers`.
+    """
+    clibmseed.verbose = False
+    try:
+        segments = _read_buffer(clibmseed.readMSEEDBuffer, bfr_np, None, 1,
+                                -1, 0, False, -1, False, {})
+    finally:
+        clibmseed.verbose = True
+    for _, trace in segments:
+        trace.stats._format = "MSEED"
+    return segments
+
+
+def _iter_record_buffers(file_object, buffer_size):
+    """
+    Reads a file-like object in blocks of ``buffer_size`` bytes and yields
+    ``(key, buffer)`` tuples of consecutive complete records of the same
+    channel and data quality with at most ``buffer_size`` bytes (unless a
+    single record is larger).
+
+    ``key`` is the data quality and channel code of the records. Data that
+    cannot be split into records, e.g. because the records have no blockette
+    1000, is yielded at once with a key of ``None``.
+    """
+    data = b""
+    records = []
+    size = 0
+    key = None
+    eof = False
+    while True:
+        position = 0
+        while len(data) - position >= 128:
+            record_length = _get_record_length(data, position)
+            if record_length is None:
+                if records:
+                    yield key, _join_records(records)
+                yield None, _join_records(
+                    [data[position:], file_object.read()])
+                return
+            if len(data) - position < record_length:
+                break
+            record_key = data[position + 6:position + 7] + \
+                data[position + 8:position + 20]
+            if records and (record_key != key or
+                            size + record_length > buffer_size):
+                yield key, _join_records(records)
+                records = []
+                size = 0
+            key = record_key
+            records.append(data[position:position + record_length])
+            size += record_length
+            position += record_length
+        data = data[position:]
+        if eof:
+            break
+        block = file_object.read(buffer_size)
+        if not block:
+            eof = True
+        data += block
+    if records:
+        yield key, _join_records(records)
+    # Let libmseed deal with trailing data that is no complete record.
+    if data:
+        yield None, _join_records([data])
+
+
+def _join_records(records):
+    """
+    Joins byte strings to a writable ``int8`` array without further copies.
+    """
+    return np.frombuffer(bytearray().join(records), dtype=np.int8)
+
+
+def _get_record_length(data, position):
+    """
+    Returns the record length given in blockette 1000 of the data record
+    starting at ``position`` or ``None`` if it cannot be determined.
+    """
+    if data[position + 6:position + 7] not in (b"D", b"R", b"Q", b"M"):
+        return None
+    for byteorder in (">", "<"):
+        year = unpack_from(byteorder + "H", data, position + 20)[0]
+        if 1900 <= year <= 2500:
+            break
+    else:
+        return None
+    blockette_count = data[position + 39]
+    offset = unpack_from(byteorder + "H", data, position + 46)[0]
+    for _ in range(blockette_count):
+        if offset < 48 or position + offset + 8 > len(data):
+            return None
+        blockette_type, next_offset = unpack_from(
+            byteorder + "HH", data, position + offset)
+        if blockette_type == 1000:
+            exponent = data[position + offset + 6]
+            if not 7 <= exponent <= 20:
+                return None
+            return 2 ** exponent
+        offset = next_offset
+    return None
+
+
+def _read_buffer(read_function, bfr_np, selections, unpack_data, reclen,
+                 verbose, details, header_byteorder, headonly, info):
+    """
+    Reads a buffer with libmseed and converts all contained segments to
+    traces.
+
+    :returns: List of ``(segment, trace)`` tuples in the order they are
+        returned by libmseed. ``segment`` is a dictionary with the low level
+        information about the segment required to stitch segments of
+        different buffers.
+    """
+    all_data = []
+
+    # Use a callback function to allocate the memory and keep track of the
+    # data.
+    def allocate_data(samplecount, sampletype):
+        # Enhanced sanity checking for libmseed 2.10 can result in the
+        # sampletype not being set. Just return an empty array in this case.
+        if sampletype == b"\x00":
+            data = np.empty(0)
+        else:
+            data = np.empty(samplecount, dtype=DATATYPES[sampletype])
+        all_data.append(data)
+        return data.ctypes.data
+    # XXX: Do this properly!
+    # Define Python callback function for use in C function. Return a long so
+    # it hopefully works on 32 and 64 bit systems.
+    alloc_data = C.CFUNCTYPE(C.c_longlong, C.c_int, C.c_char)(allocate_data)
+
+    lil = read_function(
+        bfr_np, len(bfr_np), selections, C.c_int8(unpack_data),
+        reclen, C.c_int8(verbose), C.c_int8(details), header_byteorder,
+        alloc_data)
+
+    segments = []
     try:
         current_id = lil.contents
     # Return stream if not traces are found.
     except ValueError:
-        clibmseed.lil_free(lil)
+        clibmseed.lib.lil_free(lil)
         del lil
-        return Stream()
+        return segments
 
     while True:
         # Init header with the essential information.
@@ -479,7 +779,19 @@ def _read_mseed(mseed_object, starttime=None, endtime=None, headonly=False,
             # Append global information.
             for key, value in info.items():
                 setattr(trace.stats.mseed, key, value)
-            traces.append(trace)
+            segment = {
+                'id': (current_id.network, current_id.station,
+                       current_id.location, current_id.channel,
+                       current_id.dataquality),
+                'starttime': current_segment.starttime,
+                'endtime': current_segment.endtime,
+                'hpdelta': current_segment.hpdelta,
+                'samprate': current_segment.samprate,
+                'sampletype': current_segment.sampletype,
+                'samplecnt': current_segment.samplecnt,
+                'timing_quality': current_segment.timing_quality,
+                'calibration_type': current_segment.calibration_type}
+            segments.append((segment, trace))
             # A Null pointer access results in a ValueError
             try:
                 current_segment = current_segment.next.contents
@@ -490,9 +802,101 @@ def _read_mseed(mseed_object, starttime=None, endtime=None, headonly=False,
         except ValueError:
             break
 
-    clibmseed.lil_free(lil)  # NOQA
+    clibmseed.lib.lil_free(lil)  # NOQA
     del lil  # NOQA
-    return Stream(traces=traces)
+    return segments
+
+
+def _split_buffer(bfr_np, record_length, byteorder, count):
+    """
+    Splits a buffer at record boundaries into up to ``count`` views with
+    roughly the same number of records each.
+
+    Returns a list with just the original buffer if the records cannot be
+    located.
+    """
+    table = util._get_record_table(bfr_np, record_length, byteorder)
+    if table is None or len(table) < 2:
+        return [bfr_np]
+    count = min(count, len(table))
+    boundaries = table["offset"][
+        np.linspace(0, len(table), count, endpoint=False).astype(np.int64)]
+    boundaries[0] = 0
+    boundaries = np.append(boundaries, len(bfr_np))
+    return [bfr_np[_s:_e] for _s, _e in zip(boundaries[:-1], boundaries[1:])]
+
+
+def _stitch_segments(results):
+    """
+    Combines the segments of consecutive buffers read with
+    :func:`_read_buffer` to the same result as reading the buffers as one.
+
+    This mirrors the logic libmseed uses in ``readMSEEDBuffer``: The first
+    segment of each id in a buffer is appended to the last segment of the
+    same id of the previous buffers if it seamlessly continues it.
+    """
+    # Segments and traces per id in order of appearance.
+    ids = {}
+    for segments in results:
+        seen = set()
+        for segment, trace in segments:
+            key = segment['id']
+            previous = ids.setdefault(key, [])
+            if key in seen or not previous:
+                previous.append([segment, [trace]])
+                seen.add(key)
+                continue
+            seen.add(key)
+            last, traces = previous[-1]
+            tolerance = int(0.5 * last['hpdelta'])
+            gap = segment['starttime'] - last['endtime'] - last['hpdelta']
+            if (segment['samplecnt'] > 0 and last['samplecnt'] > 0 and
+                    segment['sampletype'] == last['sampletype'] and
+                    _is_rate_tolerable(last['samprate'],
+                                       segment['samprate']) and
+                    -tolerance <= gap <= tolerance and
+                    segment['timing_quality'] == last['timing_quality'] and
+                    segment['calibration_type'] ==
+                    last['calibration_type']):
+                last['endtime'] = segment['endtime']
+                last['samplecnt'] += segment['samplecnt']
+                traces.append(trace)
+            else:
+                previous.append([segment, [trace]])
+
+    stitched = []
+    for segments in ids.values():
+        for segment, traces in segments:
+            trace = traces[0]
+            if len(traces) > 1:
+                headonly = all(not len(tr.data) for tr in traces)
+                npts = sum(tr.stats.npts for tr in traces)
+                if not headonly:
+                    trace.data = np.concatenate([tr.data for tr in traces])
+                trace.stats.npts = npts
+                trace.stats.mseed.number_of_records = sum(
+                    tr.stats.mseed.number_of_records for tr in traces)
+            stitched.append((segment, trace))
+    return stitched
+
+
+def _is_rate_tolerable(rate_1, rate_2):
+    """
+    Python version of libmseed's ``MS_ISRATETOLERABLE`` macro.
+    """
+    if not rate_2:
+        return False
+    return abs(1.0 - (rate_1 / rate_2)) < 0.0001
+
+
+def _raise_filesize_too_large_error():
+    msg = ("ObsPy can currently not directly read mini-SEED files that "
+           "are larger than 2^31 bytes (2048 MiB). To still read it, "
+           "please read the file in chunks as documented here: "
+           "https://github.com/obspy/obspy/pull/1419"
+           "#issuecomment-221582369 or use the use_mmap=True option "
+           "together with a starttime, endtime or sourcename selection.")
+    raise ObsPyMSEEDFilesizeTooLargeError(msg)
 
 
 def _write_mseed(stream, filename, encoding=None, reclen=None, byteorder=None,
@@ -568,39 +972,9 @@ def _write_mseed(stream, filename, encoding=None, reclen=None, byteorder=None,
     if verbose is True:
         verbose = 1
 
-    # Some sanity checks for the keyword arguments.
-    if reclen is not None and reclen not in VALID_RECORD_LENGTHS:
-        msg = 'Invalid record length. The record length must be a value\n' + \
-            'of 2 to the power of X where 8 <= X <= 20.'
-        raise ValueError(msg)
-    if byteorder is not None and byteorder not in [0, 1, -1]:
-        if byteorder == '=':
-            byteorder = NATIVE_BYTEORDER
-        # If not elif because NATIVE_BYTEORDER is '<' or '>'.
-        if byteorder == '<':
-            byteorder = 0
-        elif byteorder == '>':
-            byteorder = 1
-        else:
-            msg = "Invalid byte order. It must be either '<', '>', '=', " + \
-                  "0, 1 or -1"
-            raise ValueError(msg)
-
-    if encoding is not None:
-        encoding = util._convert_and_check_encoding_for_writing(encoding)
-
-    if sequence_number is not None:
-        # Check sequence number type
-        try:
-            sequence_number = int(sequence_number)
-            # Check sequence number value
-            if sequence_number < 1 or sequence_number > 999999:
-                raise ValueError("Sequence number out of range. It must be " +
-                                 " between 1 and 999999.")
-        except (TypeError, ValueError):
-            msg = "Invalid sequence number. It must be an integer ranging " +\
-                  "from 1 to 999999."
-            raise ValueError(msg)
+    encoding, byteorder, sequence_number = _check_write_arguments(
+        encoding=encoding, reclen=reclen, byteorder=byteorder,
+        sequence_number=sequence_number)
 
     trace_attributes = []
     use_blkt_1001 = False
@@ -610,208 +984,14 @@ def _write_mseed(stream, filename, encoding=None, reclen=None, byteorder=None,
     trace_data = []
     # Loop over every trace and figure out the correct settings.
     for _i, trace in enumerate(stream):
-        # Create temporary dict for storing information while writing.
-        trace_attr = {}
+        trace_attr, data, _use_blkt_1001 = _get_trace_attributes(
+            trace, _i, encoding=encoding, reclen=reclen, byteorder=byteorder,
+            sequence_number=sequence_number)
+        # Once set, all following traces use the same sequence number.
+        sequence_number = trace_attr['sequence_number']
+        use_blkt_1001 = use_blkt_1001 or _use_blkt_1001
         trace_attributes.append(trace_attr)
-
-        # Figure out whether or not to use Blockette 1001. This check is done
-        # once to ensure that Blockette 1001 is either written for every record
-        # in the file or for none. It checks the starttime, the sampling rate
-        # and the timing quality. If starttime or sampling rate has a precision
-        # of more than 100 microseconds, or if timing quality is set, \
-        # Blockette 1001 will be written for every record.
-        starttime = util._convert_datetime_to_mstime(trace.stats.starttime)
-        if starttime % 100 != 0 or (
-                trace.stats.sampling_rate and
-                (1.0 / trace.stats.sampling_rate * HPTMODULUS) % 100 != 0):
-            use_blkt_1001 = True
-
-        if hasattr(trace.stats, 'mseed') and \
-           hasattr(trace.stats['mseed'], 'blkt1001') and \
-           hasattr(trace.stats['mseed']['blkt1001'], 'timing_quality'):
-
-            timing_quality = trace.stats['mseed']['blkt1001']['timing_quality']
-            # Check timing quality type
-            try:
-                timing_quality = int(timing_quality)
-                if timing_quality < 0 or timing_quality > 100:
-                    raise ValueError("Timing quality out of range. It must be "
-                                     "between 0 and 100.")
-            except ValueError:
-                msg = "Invalid timing quality in Stream[%i].stats." % _i + \
-                    "mseed.timing_quality. It must be an integer ranging" + \
-                    " from 0 to 100"
-                raise ValueError(msg)
-
-            trace_attr['timing_quality'] = timing_quality
-            use_blkt_1001 = True
-        else:
-            trace_attr['timing_quality'] = timing_quality = 0
-
-        if sequence_number is not None:
-            trace_attr['sequence_number'] = sequence_number
-        elif hasattr(trace.stats, 'mseed') and \
-                hasattr(trace.stats['mseed'], 'sequence_number'):
-
-            sequence_number = trace.stats['mseed']['sequence_number']
-            # Check sequence number type
-            try:
-                sequence_number = int(sequence_number)
-                # Check sequence number value
-                if sequence_number < 1 or sequence_number > 999999:
-                    raise ValueError("Sequence number out of range in " +
-                                     "Stream[%i].stats. It must be between " +
-                                     "1 and 999999.")
-            except (TypeError, ValueError):
-                msg = "Invalid sequence number in Stream[%i].stats." % _i +\
-                      "mseed.sequence_number. It must be an integer ranging" +\
-                      " from 1 to 999999."
-                raise ValueError(msg)
-            trace_attr['sequence_number'] = sequence_number
-        else:
-            trace_attr['sequence_number'] = sequence_number = 1
-
-        # Set data quality to indeterminate (= D) if it is not already set.
-        try:
-            trace_attr['dataquality'] = \
-                trace.stats['mseed']['dataquality'].upper()
-        except Exception:
-            trace_attr['dataquality'] = 'D'
-        # Sanity check for the dataquality to get a nice Python exception
-        # instead of a C error.
-        if trace_attr['dataquality'] not in ['D', 'R', 'Q', 'M']:
-            msg = 'Invalid dataquality in Stream[%i].stats' % _i + \
-                  '.mseed.dataquality\n' + \
-                  'The dataquality for Mini-SEED must be either D, R, Q ' + \
-                  'or M. See the SEED manual for further information.'
-            raise ValueError(msg)
-
-        # Check that data is of the right type.
-        if not isinstance(trace.data, np.ndarray):
-            msg = "Unsupported data type %s" % type(trace.data) + \
-                  " for Stream[%i].data." % _i
-            raise ValueError(msg)
-
-        # Check if ndarray is contiguous (see #192, #193)
-        if not trace.data.flags.c_contiguous:
-            msg = "Detected non contiguous data array in Stream[%i]" % _i + \
-                  ".data. Trying to fix array."
-            warnings.warn(msg)
-            trace.data = np.ascontiguousarray(trace.data)
-
-        # Handle the record length.
-        if reclen is not None:
-            trace_attr['reclen'] = reclen
-        elif hasattr(trace.stats, 'mseed') and \
-                hasattr(trace.stats.mseed, 'record_length'):
-            if trace.stats.mseed.record_length in VALID_RECORD_LENGTHS:
-                trace_attr['reclen'] = trace.stats.mseed.record_length
-            else:
-                msg = 'Invalid record length in Stream[%i].stats.' % _i + \
-                      'mseed.reclen.\nThe record length must be a value ' + \
-                      'of 2 to the power of X where 8 <= X <= 20.'
-                raise ValueError(msg)
-        else:
-            trace_attr['reclen'] = 4096
-
-        # Handle the byte order.
-        if byteorder is not None:
-            trace_attr['byteorder'] = byteorder
-        elif hasattr(trace.stats, 'mseed') and \
-                hasattr(trace.stats.mseed, 'byteorder'):
-            if trace.stats.mseed.byteorder in [0, 1, -1]:
-                trace_attr['byteorder'] = trace.stats.mseed.byteorder
-            elif trace.stats.mseed.byteorder == '=':
-                if NATIVE_BYTEORDER == '<':
-                    trace_attr['byteorder'] = 0
-                else:
-                    trace_attr['byteorder'] = 1
-            elif trace.stats.mseed.byteorder == '<':
-                trace_attr['byteorder'] = 0
-            elif trace.stats.mseed.byteorder == '>':
-                trace_attr['byteorder'] = 1
-            else:
-                msg = "Invalid byteorder in Stream[%i].stats." % _i + \
-                    "mseed.byteorder. It must be either '<', '>', '='," + \
-                    " 0, 1 or -1"
-                raise ValueError(msg)
-        else:
-            trace_attr['byteorder'] = 1
-        if trace_attr['byteorder'] == -1:
-            if NATIVE_BYTEORDER == '<':
-                trace_attr['byteorder'] = 0
-            else:
-                trace_attr['byteorder'] = 1
-
-        # Handle the encoding.
-        trace_attr['encoding'] = None
-        # If encoding arrives here it is already guaranteed to be a valid
-        # integer encoding.
-        if encoding is not None:
-            # Check if the dtype for all traces is compatible with the enforced
-            # encoding.
-            ident, _, dtype, _ = ENCODINGS[encoding]
-            if trace.data.dtype.type != dtype:
-                msg = """
-                    Wrong dtype for Stream[%i].data for encoding %s.
-                    Please change the dtype of your data or use an appropriate
-                    encoding. See the obspy.io.mseed documentation for more
-                    information.
-                    """ % (_i, ident)
-                raise Exception(msg)
-            trace_attr['encoding'] = encoding
-        elif hasattr(trace.stats, 'mseed') and hasattr(trace.stats.mseed,
-                                                       'encoding'):
-            trace_attr["encoding"] = \
-                util._convert_and_check_encoding_for_writing(
-                    trace.stats.mseed.encoding)
-            # Check if the encoding matches the data's dtype.
-            if trace.data.dtype.type != ENCODINGS[trace_attr['encoding']][2]:
-                msg = 'The encoding specified in ' + \
-                      'trace.stats.mseed.encoding does not match the ' + \
-                      'dtype of the data.\nA suitable encoding will ' + \
-                      'be chosen.'
-                warnings.warn(msg, UserWarning)
-                trace_attr['encoding'] = None
-        # automatically detect encoding if no encoding is given.
-        if trace_attr['encoding'] is None:
-            if trace.data.dtype.type == np.int32:
-                trace_attr['encoding'] = 11
-            elif trace.data.dtype.type == np.float32:
-                trace_attr['encoding'] = 4
-            elif trace.data.dtype.type == np.float64:
-                trace_attr['encoding'] = 5
-            elif trace.data.dtype.type == np.int16:
-                trace_attr['encoding'] = 1
-            elif trace.data.dtype.type == np.dtype('|S1').type:
-                trace_attr['encoding'] = 0
-            # int64 data not supported; if possible downcast to int32, else
-            # create error message. After bumping up to numpy 1.9.0 this check
-            # can be replaced by numpy.can_cast()
-            # -- actually not sure, it even looks like can_cast() does not
-            # check individual values in arrays, so it might be better to keep
-            # the current check using iinfo().
-            elif trace.data.dtype.type == np.int64:
-                # check if data can be safely downcast to int32
-                ii32 = np.iinfo(np.int32)
-                if abs(trace.max()) <= ii32.max:
-                    trace_data.append(trace.data.astype(np.int32, copy=True))
-                    trace_attr['encoding'] = 11
-                else:
-                    msg = ("int64 data only supported when writing MSEED if "
-                           "it can be downcast to int32 type data.")
-                    raise ObsPyMSEEDError(msg)
-            else:
-                msg = "Unsupported data type %s in Stream[%i].data" % \
-                    (trace.data.dtype, _i)
-                raise Exception(msg)
-
-        # Convert data if necessary, otherwise store references in list.
-        if trace_attr['encoding'] == 1:
-            # INT16 needs INT32 data type
-            trace_data.append(trace.data.astype(np.int32, copy=True))
-        else:
-            trace_data.append(trace.data)
+        trace_data.append(data)
 
     # Do some final sanity checks and raise a warning if a file will be written
     # with more than one different encoding, record length or byte order.
@@ -853,84 +1033,7 @@ def _write_mseed(stream, filename, encoding=None, reclen=None, byteorder=None,
         rec_handler = C.CFUNCTYPE(C.c_void_p, C.POINTER(C.c_char), C.c_int,
                                   C.c_void_p)(record_handler)
 
-        # Fill up msr record structure, this is already contained in
-        # mstg, however if blk1001 is set we need it anyway
-        msr = clibmseed.msr_init(None)
-        msr.contents.network = trace.stats.network.encode('ascii', 'strict')
-        msr.contents.station = trace.stats.station.encode('ascii', 'strict')
-        msr.contents.location = trace.stats.location.encode('ascii', 'strict')
-        msr.contents.channel = trace.stats.channel.encode('ascii', 'strict')
-        msr.contents.dataquality = trace_attr['dataquality'].\
-            encode('ascii', 'strict')
-
-        # Set starting sequence number
-        msr.contents.sequence_number = trace_attr['sequence_number']
-
-        # Only use Blockette 1001 if necessary.
-        if use_blkt_1001:
-            # Timing quality has been set in trace_attr
-
-            size = C.sizeof(Blkt1001S)
-            # Only timing quality matters here, other blockette attributes will
-            # be filled by libmseed.msr_normalize_header
-            blkt_value = pack("BBBB", trace_attr['timing_quality'],
-                              0, 0, 0)
-            blkt_ptr = C.create_string_buffer(blkt_value, len(blkt_value))
-
-            # Usually returns a pointer to the added blockette in the
-            # blockette link chain and a NULL pointer if it fails.
-            # NULL pointers have a false boolean value according to the
-            # ctypes manual.
-            ret_val = clibmseed.msr_addblockette(msr, blkt_ptr,
-                                                 size, 1001, 0)
-
-            if bool(ret_val) is False:
-                clibmseed.msr_free(C.pointer(msr))
-                del msr
-                raise Exception('Error in msr_addblockette')
-
-        # Only use Blockette 100 if necessary.
-        # Determine if a blockette 100 will be needed to represent the input
-        # sample rate or if the sample rate in the fixed section of the data
-        # header will suffice (see ms_genfactmult in libmseed/genutils.c)
-        use_blkt_100 = False
-
-        _factor = C.c_int16()
-        _multiplier = C.c_int16()
-        _retval = clibmseed.ms_genfactmult(
-            trace.stats.sampling_rate, C.pointer(_factor),
-            C.pointer(_multiplier))
-        # Use blockette 100 if ms_genfactmult() failed.
-        if _retval != 0:
-            use_blkt_100 = True
-        # Otherwise figure out if ms_genfactmult() found exact factors.
-        # Otherwise write blockette 100.
-        else:
-            ms_sr = clibmseed.ms_nomsamprate(_factor.value, _multiplier.value)
-
-            # It is also necessary if the libmseed calculated sampling rate
-            # would result in a loss of accuracy - the floating point
-            # comparision is on purpose here as it will always try to
-            # preserve all accuracy.
-            # Cast to float32 to not add blockette 100 for values
-            # that cannot be represented with 32bits.
-            if np.float32(ms_sr) != np.float32(trace.stats.sampling_rate):
-                use_blkt_100 = True
-
-        if use_blkt_100:
-            size = C.sizeof(Blkt100S)
-            blkt100 = C.c_char(b' ')
-            C.memset(C.pointer(blkt100), 0, size)
-            ret_val = clibmseed.msr_addblockette(
-                msr, C.pointer(blkt100), size, 100, 0)  # NOQA
-            # Usually returns a pointer to the added blockette in the
-            # blockette link chain and a NULL pointer if it fails.
-            # NULL pointers have a false boolean value according to the
-            # ctypes manual.
-            if bool(ret_val) is False:
-                clibmseed.msr_free(C.pointer(msr))  # NOQA
-                del msr  # NOQA
-                raise Exception('Error in msr_addblockette')
+        msr = _create_msr_template(trace, trace_attr, use_blkt_1001)
 
         # Pack mstg into a MSEED file using the callback record_handler as
         # write method.
@@ -955,6 +1058,559 @@ def _write_mseed(stream, filename, encoding=None, reclen=None, byteorder=None,
         f.close()
 
 
+def _check_write_arguments(encoding=None, reclen=None, byteorder=None,
+                           sequence_number=None):
+    """
+    Sanity checks for the keyword arguments of the MiniSEED writers.
+
+    :returns: Tuple of the normalized encoding, byte order and sequence
+        number.
+    """
+    if reclen is not None and reclen not in VALID_RECORD_LENGTHS:
+        msg = 'Invalid record length. The record length must be a value\n' + \
+            'of 2 to the power of X where 8 <= X <= 20.'
+        raise ValueError(msg)
+    if byteorder is not None and byteorder not in [0, 1, -1]:
+        if byteorder == '=':
+            byteorder = NATIVE_BYTEORDER
+        # If not elif because NATIVE_BYTEORDER is '<' or '>'.
+        if byteorder == '<':
+            byteorder = 0
+        elif byteorder == '>':
+            byteorder = 1
+        else:
+            msg = "Invalid byte order. It must be either '<', '>', '=', " + \
+                  "0, 1 or -1"
+            raise ValueError(msg)
+
+    if encoding is not None:
+        encoding = util._convert_and_check_encoding_for_writing(encoding)
+
+    if sequence_number is not None:
+        # Check sequence number type
+        try:
+            sequence_number = int(sequence_number)
+            # Check sequence number value
+            if sequence_number < 1 or sequence_number > 999999:
+                raise ValueError("Sequence number out of range. It must be " +
+                                 " between 1 and 999999.")
+        except (TypeError, ValueError):
+            msg = "Invalid sequence number. It must be an integer ranging " +\
+                  "from 1 to 999999."
+            raise ValueError(msg)
+
+    return encoding, byteorder, sequence_number
+
+
+def _get_trace_attributes(trace, _i, encoding=None, reclen=None,
+                          byteorder=None, sequence_number=None):
+    """
+    Checks a trace for writing it to MiniSEED and figures out the settings to
+    write it with.
+
+    :returns: Tuple of a dictionary with the settings, the data to actually
+        write and whether or not the trace requires Blockette 1001.
+    """
+    # Create temporary dict for storing information while writing.
+    trace_attr = {}
+    use_blkt_1001 = False
+    data = None
+
+    # Figure out whether or not to use Blockette 1001. This check is done
+    # once to ensure that Blockette 1001 is either written for every record
+    # in the file or for none. It checks the starttime, the sampling rate
+    # and the timing quality. If starttime or sampling rate has a precision
+    # of more than 100 microseconds, or if timing quality is set, \
+    # Blockette 1001 will be written for every record.
+    starttime = util._convert_datetime_to_mstime(trace.stats.starttime)
+    if starttime % 100 != 0 or (
+            trace.stats.sampling_rate and
+            (1.0 / trace.stats.sampling_rate * HPTMODULUS) % 100 != 0):
+        use_blkt_1001 = True
+
+    if hasattr(trace.stats, 'mseed') and \
+       hasattr(trace.stats['mseed'], 'blkt1001') and \
+       hasattr(trace.stats['mseed']['blkt1001'], 'timing_quality'):
+
+        timing_quality = trace.stats['mseed']['blkt1001']['timing_quality']
+        # Check timing quality type
+        try:
+            timing_quality = int(timing_quality)
+            if timing_quality < 0 or timing_quality > 100:
+                raise ValueError("Timing quality out of range. It must be "
+                                 "between 0 and 100.")
+        except ValueError:
+            msg = "Invalid timing quality in Stream[%i].stats." % _i + \
+                "mseed.timing_quality. It must be an integer ranging" + \
+                " from 0 to 100"
+            raise ValueError(msg)
+
+        trace_attr['timing_quality'] = timing_quality
+        use_blkt_1001 = True
+    else:
+        trace_attr['timing_quality'] = timing_quality = 0
+
+    if sequence_number is not None:
+        trace_attr['sequence_number'] = sequence_number
+    elif hasattr(trace.stats, 'mseed') and \
+            hasattr(trace.stats['mseed'], 'sequence_number'):
+
+        sequence_number = trace.stats['mseed']['sequence_number']
+        # Check sequence number type
+        try:
+            sequence_number = int(sequence_number)
+            # Check sequence number value
+            if sequence_number < 1 or sequence_number > 999999:
+                raise ValueError("Sequence number out of range in " +
+                                 "Stream[%i].stats. It must be between " +
+                                 "1 and 999999.")
+        except (TypeError, ValueError):
+            msg = "Invalid sequence number in Stream[%i].stats." % _i +\
+                  "mseed.sequence_number. It must be an integer ranging" +\
+                  " from 1 to 999999."
+            raise ValueError(msg)
+        trace_attr['sequence_number'] = sequence_number
+    else:
+        trace_attr['sequence_number'] = sequence_number = 1
+
+    # Set data quality to indeterminate (= D) if it is not already set.
+    try:
+        trace_attr['dataquality'] = \
+            trace.stats['mseed']['dataquality'].upper()
+    except Exception:
+        trace_attr['dataquality'] = 'D'
+    # Sanity check for the dataquality to get a nice Python exception
+    # instead of a C error.
+    if trace_attr['dataquality'] not in ['D', 'R', 'Q', 'M']:
+        msg = 'Invalid dataquality in Stream[%i].stats' % _i + \
+              '.mseed.dataquality\n' + \
+              'The dataquality for Mini-SEED must be either D, R, Q ' + \
+              'or M. See the SEED manual for further information.'
+        raise ValueError(msg)
+
+    # Check that data is of the right type.
+    if not isinstance(trace.data, np.ndarray):
+        msg = "Unsupported data type %s" % type(trace.data) + \
+              " for Stream[%i].data." % _i
+        raise ValueError(msg)
+
+    # Check if ndarray is contiguous (see #192, #193)
+    if not trace.data.flags.c_contiguous:
+        msg = "Detected non contiguous data array in Stream[%i]" % _i + \
+              ".data. Trying to fix array."
+        warnings.warn(msg)
+        trace.data = np.ascontiguousarray(trace.data)
+
+    # Handle the record length.
+    if reclen is not None:
+        trace_attr['reclen'] = reclen
+    elif hasattr(trace.stats, 'mseed') and \
+            hasattr(trace.stats.mseed, 'record_length'):
+        if trace.stats.mseed.record_length in VALID_RECORD_LENGTHS:
+            trace_attr['reclen'] = trace.stats.mseed.record_length
+        else:
+            msg = 'Invalid record length in Stream[%i].stats.' % _i + \
+                  'mseed.reclen.\nThe record length must be a value ' + \
+                  'of 2 to the power of X where 8 <= X <= 20.'
+            raise ValueError(msg)
+    else:
+        trace_attr['reclen'] = 4096
+
+    # Handle the byte order.
+    if byteorder is not None:
+        trace_attr['byteorder'] = byteorder
+    elif hasattr(trace.stats, 'mseed') and \
+            hasattr(trace.stats.mseed, 'byteorder'):
+        if trace.stats.mseed.byteorder in [0, 1, -1]:
+            trace_attr['byteorder'] = trace.stats.mseed.byteorder
+        elif trace.stats.mseed.byteorder == '=':
+            if NATIVE_BYTEORDER == '<':
+                trace_attr['byteorder'] = 0
+            else:
+                trace_attr['byteorder'] = 1
+        elif trace.stats.mseed.byteorder == '<':
+            trace_attr['byteorder'] = 0
+        elif trace.stats.mseed.byteorder == '>':
+            trace_attr['byteorder'] = 1
+        else:
+            msg = "Invalid byteorder in Stream[%i].stats." % _i + \
+                "mseed.byteorder. It must be either '<', '>', '='," + \
+                " 0, 1 or -1"
+            raise ValueError(msg)
+    else:
+        trace_attr['byteorder'] = 1
+    if trace_attr['byteorder'] == -1:
+        if NATIVE_BYTEORDER == '<':
+            trace_attr['byteorder'] = 0
+        else:
+            trace_attr['byteorder'] = 1
+
+    # Handle the encoding.
+    trace_attr['encoding'] = None
+    # If encoding arrives here it is already guaranteed to be a valid
+    # integer encoding.
+    if encoding is not None:
+        # Check if the dtype for all traces is compatible with the enforced
+        # encoding.
+        ident, _, dtype, _ = ENCODINGS[encoding]
+        if trace.data.dtype.type != dtype:
+            msg = """
+                Wrong dtype for Stream[%i].data for encoding %s.
+                Please change the dtype of your data or use an appropriate
+                encoding. See the obspy.io.mseed documentation for more
+                information.
+                """ % (_i, ident)
+            raise Exception(msg)
+        trace_attr['encoding'] = encoding
+    elif hasattr(trace.stats, 'mseed') and hasattr(trace.stats.mseed,
+                                                   'encoding'):
+        trace_attr["encoding"] = \
+            util._convert_and_check_encoding_for_writing(
+                trace.stats.mseed.encoding)
+        # Check if the encoding matches the data's dtype.
+        if trace.data.dtype.type != ENCODINGS[trace_attr['encoding']][2]:
+            msg = 'The encoding specified in ' + \
+                  'trace.stats.mseed.encoding does not match the ' + \
+                  'dtype of the data.\nA suitable encoding will ' + \
+                  'be chosen.'
+            warnings.warn(msg, UserWarning)
+            trace_attr['encoding'] = None
+    # automatically detect encoding if no encoding is given.
+    if trace_attr['encoding'] is None:
+        if trace.data.dtype.type == np.int32:
+            trace_attr['encoding'] = 11
+        elif trace.data.dtype.type == np.float32:
+            trace_attr['encoding'] = 4
+        elif trace.data.dtype.type == np.float64:
+            trace_attr['encoding'] = 5
+        elif trace.data.dtype.type == np.int16:
+            trace_attr['encoding'] = 1
+        elif trace.data.dtype.type == np.dtype('|S1').type:
+            trace_attr['encoding'] = 0
+        # int64 data not supported; if possible downcast to int32, else
+        # create error message. After bumping up to numpy 1.9.0 this check
+        # can be replaced by numpy.can_cast()
+        # -- actually not sure, it even looks like can_cast() does not
+        # check individual values in arrays, so it might be better to keep
+        # the current check using iinfo().
+        elif trace.data.dtype.type == np.int64:
+            # check if data can be safely downcast to int32
+            ii32 = np.iinfo(np.int32)
+            if abs(trace.max()) <= ii32.max:
+                data = trace.data.astype(np.int32, copy=True)
+                trace_attr['encoding'] = 11
+            else:
+                msg = ("int64 data only supported when writing MSEED if "
+                       "it can be downcast to int32 type data.")
+                raise ObsPyMSEEDError(msg)
+        else:
+            msg = "Unsupported data type %s in Stream[%i].data" % \
+                (trace.data.dtype, _i)
+            raise Exception(msg)
+
+    # Convert data if necessary, otherwise return a reference.
+    if trace_attr['encoding'] == 1:
+        # INT16 needs INT32 data type
+        data = trace.data.astype(np.int32, copy=True)
+    elif data is None:
+        data = trace.data
+
+    return trace_attr, data, use_blkt_1001
+
+
+def _create_msr_template(trace, trace_attr, use_blkt_1001):
+    """
+    Creates the MSRecord used as the template for packing the records of a
+    trace.
+
+    The caller is responsible for freeing it with ``msr_free``.
+    """
+    # Fill up msr record structure, this is already contained in
+    # mstg, however if blk1001 is set we need it anyway
+    msr = clibmseed.msr_init(None)
+    msr.contents.network = trace.stats.network.encode('ascii', 'strict')
+    msr.contents.station = trace.stats.station.encode('ascii', 'strict')
+    msr.contents.location = trace.stats.location.encode('ascii', 'strict')
+    msr.contents.channel = trace.stats.channel.encode('ascii', 'strict')
+    msr.contents.dataquality = trace_attr['dataquality'].\
+        encode('ascii', 'strict')
+
+    # Set starting sequence number
+    msr.contents.sequence_number = trace_attr['sequence_number']
+
+    # Only use Blockette 1001 if necessary.
+    if use_blkt_1001:
+        # Timing quality has been set in trace_attr
+
+        size = C.sizeof(Blkt1001S)
+        # Only timing quality matters here, other blockette attributes will
+        # be filled by libmseed.msr_normalize_header
+        blkt_value = pack("BBBB", trace_attr['timing_quality'],
+                          0, 0, 0)
+        blkt_ptr = C.create_string_buffer(blkt_value, len(blkt_value))
+
+        # Usually returns a pointer to the added blockette in the
+        # blockette link chain and a NULL pointer if it fails.
+        # NULL pointers have a false boolean value according to the
+        # ctypes manual.
+        ret_val = clibmseed.msr_addblockette(msr, blkt_ptr,
+                                             size, 1001, 0)
+
+        if bool(ret_val) is False:
+            clibmseed.msr_free(C.pointer(msr))
+            del msr
+            raise Exception('Error in msr_addblockette')
+
+    # Only use Blockette 100 if necessary.
+    # Determine if a blockette 100 will be needed to represent the input
+    # sample rate or if the sample rate in the fixed section of the data
+    # header will suffice (see ms_genfactmult in libmseed/genutils.c)
+    use_blkt_100 = False
+
+    _factor = C.c_int16()
+    _multiplier = C.c_int16()
+    _retval = clibmseed.ms_genfactmult(
+        trace.stats.sampling_rate, C.pointer(_factor),
+        C.pointer(_multiplier))
+    # Use blockette 100 if ms_genfactmult() failed.
+    if _retval != 0:
+        use_blkt_100 = True
+    # Otherwise figure out if ms_genfactmult() found exact factors.
+    # Otherwise write blockette 100.
+    else:
+        ms_sr = clibmseed.ms_nomsamprate(_factor.value, _multiplier.value)
+
+        # It is also necessary if the libmseed calculated sampling rate
+        # would result in a loss of accuracy - the floating point
+        # comparision is on purpose here as it will always try to
+        # preserve all accuracy.
+        # Cast to float32 to not add blockette 100 for values
+        # that cannot be represented with 32bits.
+        if np.float32(ms_sr) != np.float32(trace.stats.sampling_rate):
+            use_blkt_100 = True
+
+    if use_blkt_100:
+        size = C.sizeof(Blkt100S)
+        blkt100 = C.c_char(b' ')
+        C.memset(C.pointer(blkt100), 0, size)
+        ret_val = clibmseed.msr_addblockette(
+            msr, C.pointer(blkt100), size, 100, 0)  # NOQA
+        # Usually returns a pointer to the added blockette in the
+        # blockette link chain and a NULL pointer if it fails.
+        # NULL pointers have a false boolean value according to the
+        # ctypes manual.
+        if bool(ret_val) is False:
+            clibmseed.msr_free(C.pointer(msr))  # NOQA
+            del msr  # NOQA
+            raise Exception('Error in msr_addblockette')
+
+    return msr
+
+
+class MSEEDWriter(object):
+    """
+    Incrementally writes traces to a MiniSEED file.
+
+    Contrary to :meth:`~obspy.core.stream.Stream.write`, the data does not
+    have to be available all at once. Chunks of data can be appended as they
+    arrive and every record is written as soon as enough data to completely
+    fill it is available. Per SEED identifier only the samples not yet packed
+    into a record are kept in memory, so long running recorders or converters
+    can write continuously with constant memory usage.
+
+    Appended traces directly following the last trace of the same SEED
+    identifier continue the current record, otherwise the pending data of
+    that identifier is flushed into a (possibly partially filled) record
+    first. Steim compression state and record sequence numbers are carried
+    over between chunks.
+
+    :type filename: str or file-like object
+    :param filename: Name of the output file or a file-like object.
+    :type encoding: int or str, optional
+    :param encoding: See :func:`~obspy.io.mseed.core._write_mseed`.
+    :type reclen: int, optional
+    :param reclen: See :func:`~obspy.io.mseed.core._write_mseed`.
+    :type byteorder: int or str, optional
+    :param byteorder: See :func:`~obspy.io.mseed.core._write_mseed`.
+    :type sequence_number: int, optional
+    :param sequence_number: Sequence number of the first record of each
+        SEED identifier. Defaults to 1.
+    :type verbose: int, optional
+    :param verbose: Controls verbosity, a value of ``0`` will result in no
+        diagnostic output.
+
+    .. rubric:: Example
+
+    >>> from obspy import read
+    >>> from obspy.io.mseed.core import MSEEDWriter
+    >>> tr = read()[0]
+    >>> with MSEEDWriter('filename.mseed', reclen=512) as writer:  \
+# doctest: +SKIP
+    ...     for chunk in tr.slide(window_length=5.0, step=5.0):
+    ...         writer.append(chunk)
+    """
+    def __init__(self, filename, encoding=None, reclen=None, byteorder=None,
+                 sequence_number=None, verbose=0):
+        self.encoding, self.byteorder, self.sequence_number = \
+            _check_write_arguments(
+                encoding=encoding, reclen=reclen, byteorder=byteorder,
+                sequence_number=sequence_number)
+        self.reclen = reclen
+        self.verbose = int(verbose)
+
+        # Open filehandler or use an existing file like object.
+        if not hasattr(filename, 'write'):
+            self._file = open(filename, 'wb')
+            self._close_file = True
+        else:
+            self._file = filename
+            self._close_file = False
+
+        def record_handler(record, reclen, _stream):
+            self._file.write(record[0:reclen])
+        # Keep a reference to the callback as long as records are written.
+        self._record_handler = C.CFUNCTYPE(
+            C.c_void_p, C.POINTER(C.c_char), C.c_int,
+            C.c_void_p)(record_handler)
+        # Pending state and next record sequence number per SEED
+        # identifier.
+        self._channels = {}
+        self._sequence_numbers = {}
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def write(self, stream):
+        """
+        Appends all traces of a stream.
+
+        :type stream: :class:`~obspy.core.stream.Stream`
+        """
+        for trace in stream:
+            self.append(trace)
+
+    def append(self, trace):
+        """
+        Appends a trace and writes all records that can be completely
+        filled.
+
+        :type trace: :class:`~obspy.core.trace.Trace`
+        """
+        if self._file is None:
+            raise ValueError('I/O operation on closed MSEEDWriter.')
+        trace_attr, data, use_blkt_1001 = _get_trace_attributes(
+            trace, 0, encoding=self.encoding, reclen=self.reclen,
+            byteorder=self.byteorder, sequence_number=self.sequence_number)
+        if not len(data):
+            msg = 'Skipping empty trace "%s".' % (trace)
+            warnings.warn(msg)
+            return
+        stats = trace.stats
+        key = (stats.network, stats.station, stats.location, stats.channel,
+               trace_attr['dataquality'])
+        settings = {k: v for k, v in trace_attr.items()
+                    if k != 'sequence_number'}
+        settings['sampling_rate'] = stats.sampling_rate
+        settings['dtype'] = data.dtype.type
+        settings['use_blkt_1001'] = use_blkt_1001
+
+        channel = self._channels.get(key)
+        if channel is not None and (
+                channel['settings'] != settings or
+                abs(stats.starttime.ns - channel['next_ns']) >
+                0.5e9 / stats.sampling_rate):
+            # Not contiguous, write the pending data of the old segment.
+            self._close_channel(key)
+            channel = None
+
+        if channel is None:
+            # Continue the record sequence numbers of previous segments.
+            if key in self._sequence_numbers:
+                trace_attr['sequence_number'] = self._sequence_numbers[key]
+            channel = {
+                'settings': settings,
+                'msr': _create_msr_template(trace, trace_attr,
+                                            use_blkt_1001),
+                'mst': MST(trace, data, trace_attr['dataquality'])}
+            self._channels[key] = channel
+        else:
+            mst = channel['mst'].mst.contents
+            residual = np.empty(mst.numsamples, dtype=data.dtype.type)
+            C.memmove(residual.ctypes.data, mst.datasamples, residual.nbytes)
+            header = {'network': stats.network, 'station': stats.station,
+                      'location': stats.location, 'channel': stats.channel,
+                      'sampling_rate': stats.sampling_rate}
+            if len(residual):
+                header['starttime'] = UTCDateTime(
+                    ns=int(mst.starttime) * 1000)
+            else:
+                header['starttime'] = stats.starttime
+            data = np.concatenate([residual, data])
+            new = MST(Trace(data=data, header=header), data,
+                      trace_attr['dataquality'])
+            # Hand the compression state over to the new segment.
+            new.mst.contents.ststate = mst.ststate
+            mst.ststate = None
+            channel['mst'] = new
+        channel['next_ns'] = stats.endtime.ns + int(round(
+            1e9 / stats.sampling_rate))
+        self._pack(channel, flush=0)
+
+    def _pack(self, channel, flush):
+        """
+        Packs the pending data of a channel into records.
+        """
+        settings = channel['settings']
+        packedsamples = C.c_int()
+        errcode = clibmseed.mst_pack(
+            channel['mst'].mst, self._record_handler, None,
+            settings['reclen'], settings['encoding'], settings['byteorder'],
+            C.byref(packedsamples), flush, self.verbose, channel['msr'])
+        if errcode == -1:
+            raise Exception('Error in mst_pack')
+
+    def _close_channel(self, key):
+        """
+        Writes the pending data of a channel and frees its resources.
+        """
+        channel = self._channels.pop(key)
+        try:
+            if channel['mst'].mst.contents.numsamples > 0:
+                self._pack(channel, flush=1)
+        finally:
+            self._sequence_numbers[key] = \
+                channel['msr'].contents.sequence_number
+            clibmseed.msr_free(C.pointer(channel['msr']))
+
+    def flush(self):
+        """
+        Writes all pending data, also into partially filled records.
+
+        Appending data afterwards starts new records.
+        """
+        for key in list(self._channels):
+            self._close_channel(key)
+        if hasattr(self._file, 'flush'):
+            self._file.flush()
+
+    def close(self):
+        """
+        Writes all pending data and closes the file if it was opened by the
+        writer.
+        """
+        if self._file is None:
+            return
+        try:
+            self.flush()
+        finally:
+            if self._close_file:
+                self._file.close()
+            self._file = None
+
+
 class MST(object):
     """
     Class that transforms a ObsPy Trace object to a libmseed internal MSTrace
@@ -2,7 +2,9 @@
 """
 Defines the libmseed structures and blockettes.
 """
+import contextlib
 import ctypes as C  # NOQA
+import threading
 import warnings
 
 import numpy as np
@@ -755,6 +757,17 @@ __clibmseed.ms_nomsamprate.argtypes = [
 __clibmseed.ms_nomsamprate.restype = C.c_double
 
 
+class _MessageCollector(object):
+    """
+    Warnings and errors of libmseed collected within one
+    :meth:`_LibmseedWrapper._collect_messages` context.
+    """
+    def __init__(self, verbose):
+        self.verbose = verbose
+        self.errs = []
+        self.warns = []
+
+
 class _LibmseedWrapper(object):
     """
     Wrapper object around libmseed that tries to guarantee that all warnings
@@ -763,52 +776,119 @@ class _LibmseedWrapper(object):
 
     Might be a bit overengineered but it does the trick and is completely
     transparent to the user.
+
+    libmseed's logging facilities are global. They are thus hooked up once
+    to callbacks that stay alive for the lifetime of the process and pass
+    each message on to the collector of the calling thread, which makes it
+    safe to call the library from multiple threads at once.
     """
+    _lock = threading.Lock()
+
     def __init__(self, lib):
         self.lib = lib
-        self.verbose = True
+        self._local = threading.local()
+        self._callbacks = None
+
+    @property
+    def verbose(self):
+        return getattr(self._local, "verbose", True)
+
+    @verbose.setter
+    def verbose(self, value):
+        self._local.verbose = value
 
     def __getattr__(self, item):
         func = getattr(self.lib, item)
 
         def _wrapper(*args):
-            # Collect exceptions. They cannot be raised in the callback as
-            # they could never be caught then. They are collected and raised
-            # later on.
-            _errs = []
-            _warns = []
+            with self._collect_messages(item):
+                return func(*args)
+        return _wrapper
+
+    def _get_collectors(self):
+        try:
+            return self._local.collectors
+        except AttributeError:
+            self._local.collectors = []
+            return self._local.collectors
+
+    def _setup_logging(self):
+        """
+        Hooks up libmseed's logging facilities to it's Python callbacks if
+        not done yet.
+        """
+        with self._lock:
+            if self._callbacks is not None:
+                return
 
             def log_error_or_warning(msg):
                 msg = msg.decode()
+                collectors = self._get_collectors()
                 if msg.startswith("ERROR: "):
                     msg = msg[7:].strip()
-                    _errs.append(msg)
+                    if collectors:
+                        collectors[-1].errs.append(msg)
+                    else:
+                        warnings.warn(msg, InternalMSEEDWarning)
                 if msg.startswith("INFO: "):
                     msg = msg[6:].strip()
-                    _warns.append(msg)
-
-            diag_print = \
-                C.CFUNCTYPE(None, C.c_char_p)(log_error_or_warning)
+                    if collectors:
+                        collectors[-1].warns.append(msg)
+                    else:
+                        warnings.warn(msg, InternalMSEEDWarning)
 
             def log_message(msg):
-                if self.verbose:
+                collectors = self._get_collectors()
+                if collectors[-1].verbose if collectors else self.verbose:
                     print(msg[6:].strip())
-            log_print = C.CFUNCTYPE(None, C.c_char_p)(log_message)
-
-            # Hookup libmseed's logging facilities to it's Python callbacks.
-            self.lib.setupLogging(diag_print, log_print)
 
+            # Keep references to the callbacks, libmseed might call them at
+            # any time from now on.
+            self._callbacks = (
+                C.CFUNCTYPE(None, C.c_char_p)(log_error_or_warning),
+                C.CFUNCTYPE(None, C.c_char_p)(log_message))
+            self.lib.setupLogging(*self._callbacks)
+
+    @contextlib.contextmanager
+    def _collect_messages(self, item):
+        """
+        Collects all warnings and errors of libmseed in the current thread
+        and converts them once the context is left.
+
+        Yields the collector which can be passed on to
+        :meth:`_forward_messages` to also collect the messages of calls to
+        the unwrapped library in other threads.
+        """
+        # Collect exceptions. They cannot be raised in the callback as
+        # they could never be caught then. They are collected and raised
+        # later on.
+        collector = _MessageCollector(self.verbose)
+        with self._forward_messages(collector):
             try:
-                return func(*args)
+                yield collector
             finally:
-                for _w in _warns:
+                for _w in collector.warns:
                     warnings.warn(_w, InternalMSEEDWarning)
-                if _errs:
+                if collector.errs:
                     msg = ("Encountered %i error(s) during a call to "
                            "%s():\n%s" % (
-                               len(_errs), item, "\n".join(_errs)))
+                               len(collector.errs), item,
+                               "\n".join(collector.errs)))
                     raise InternalMSEEDError(msg)
-        return _wrapper
+
+    @contextlib.contextmanager
+    def _forward_messages(self, collector):
+        """
+        Passes all warnings and errors of libmseed in the current thread on
+        to the given collector while in the context.
+        """
+        self._setup_logging()
+        collectors = self._get_collectors()
+        collectors.append(collector)
+        try:
+            yield
+        finally:
+            collectors.pop()
 
 
 clibmseed = _LibmseedWrapper(lib=__clibmseed)
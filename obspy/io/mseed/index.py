@@ -0,0 +1,195 @@
+# -*- coding: utf-8 -*-
+"""
+Persistent record level index for MiniSEED files.
+
+The index stores the byte offset, SEED identifier, start and end time,
+sampling rate and encoding of every record of a MiniSEED file. It is written
+to disk next to the file (or into a separate directory) and is automatically
+invalidated once the size or modification time of the file changes.
+
+With an index at hand, reading a short time window from a large file only
+requires reading the records overlapping the time window from disk instead
+of the whole file. :func:`~obspy.core.stream.read` automatically uses an
+existing index when reading MiniSEED files with a ``starttime``, ``endtime``
+or ``sourcename`` selection.
+
+>>> from obspy import read
+>>> from obspy.io.mseed.index import get_record_index
+>>> filename = "/path/to/BW.BGLD.__.EHE.D.2008.001.first_10_records"
+>>> table = get_record_index(filename)  # doctest: +SKIP
+>>> st = read(filename, starttime=..., endtime=...)  # doctest: +SKIP
+
+:copyright:
+    The ObsPy Development Team (devs@obspy.org)
+:license:
+    GNU Lesser General Public License, Version 3
+    (https://www.gnu.org/copyleft/lesser.html)
+"""
+import hashlib
+import os
+import tempfile
+
+import numpy as np
+
+from . import util
+
+
+# Increase whenever the layout of the index changes to invalidate all
+# existing indices.
+INDEX_VERSION = 1
+INDEX_SUFFIX = ".msidx.npz"
+
+
+def _get_index_filename(filename, index_dir=None):
+    """
+    Returns the name of the index file for a MiniSEED file.
+
+    Without ``index_dir`` the index is a hidden file next to the MiniSEED
+    file, otherwise it is stored in ``index_dir`` named after a hash of the
+    absolute path of the MiniSEED file.
+    """
+    filename = os.path.abspath(filename)
+    if index_dir is None:
+        dirname, basename = os.path.split(filename)
+        return os.path.join(dirname, "." + basename + INDEX_SUFFIX)
+    digest = hashlib.sha1(filename.encode("utf-8")).hexdigest()
+    return os.path.join(index_dir, digest + INDEX_SUFFIX)
+
+
+def _get_file_key(filename):
+    """
+    Returns the values an index is keyed on: version, size and modification
+    time of the file.
+    """
+    stat = os.stat(filename)
+    return np.array([INDEX_VERSION, stat.st_size, stat.st_mtime_ns],
+                    dtype=np.int64)
+
+
+def build_record_index(filename):
+    """
+    Parses the headers of all records of a MiniSEED file.
+
+    The file is memory mapped and only the pages containing the record
+    headers are read.
+
+    :type filename: str
+    :param filename: The MiniSEED file.
+    :returns: Structured array with dtype
+        :const:`~obspy.io.mseed.util.RECORD_TABLE_DTYPE` with the absolute
+        byte offsets of all data records in the file or ``None`` if the file
+        cannot be indexed, e.g. because it contains records of differing
+        lengths.
+    """
+    info = util.get_record_information(filename)
+    record_length = info["record_length"]
+    bfr_np = util._mmap_buffer(filename)
+    offset = util._get_data_offset(bfr_np, record_length)
+    table = util._get_record_table(bfr_np[offset:], record_length,
+                                   info["byteorder"])
+    if table is not None:
+        table["offset"] += offset
+    return table
+
+
+def write_record_index(filename, table, index_dir=None):
+    """
+    Writes the record index of a MiniSEED file.
+
+    The index is first written to a temporary file which is then moved into
+    place so concurrent readers never see partially written indices.
+
+    :type filename: str
+    :param filename: The MiniSEED file.
+    :type table: :class:`numpy.ndarray`
+    :param table: The record index as returned by
+        :func:`~obspy.io.mseed.index.build_record_index`.
+    :type index_dir: str, optional
+    :param index_dir: Directory to store the index in. If not given, the
+        index is stored next to the MiniSEED file.
+    :returns: The name of the index file.
+    """
+    index_filename = _get_index_filename(filename, index_dir=index_dir)
+    key = _get_file_key(filename)
+    fd, temp = tempfile.mkstemp(dir=os.path.dirname(index_filename),
+                                suffix=INDEX_SUFFIX)
+    try:
+        with os.fdopen(fd, "wb") as fh:
+            np.savez(fh, key=key, records=table)
+        os.replace(temp, index_filename)
+    except Exception:
+        os.remove(temp)
+        raise
+    return index_filename
+
+
+def read_record_index(filename, index_dir=None):
+    """
+    Reads the record index of a MiniSEED file.
+
+    :type filename: str
+    :param filename: The MiniSEED file.
+    :type index_dir: str, optional
+    :param index_dir: Directory the index is stored in. If not given, the
+        index is expected next to the MiniSEED file.
+    :returns: The record index or ``None`` if there is no index or if it is
+        outdated.
+    """
+    index_filename = _get_index_filename(filename, index_dir=index_dir)
+    try:
+        with np.load(index_filename, allow_pickle=False) as data:
+            if not np.array_equal(data["key"], _get_file_key(filename)):
+                return None
+            table = data["records"]
+    except (OSError, KeyError, ValueError):
+        return None
+    if table.dtype != util.RECORD_TABLE_DTYPE:
+        return None
+    return table
+
+
+def get_record_index(filename, index_dir=None, create=True):
+    """
+    Returns the record index of a MiniSEED file, optionally creating it.
+
+    :type filename: str
+    :param filename: The MiniSEED file.
+    :type index_dir: str, optional
+    :param index_dir: Directory to store the index in. If not given, the
+        index is stored next to the MiniSEED file.
+    :type create: bool, optional
+    :param create: If ``True``, a missing or outdated index is (re)built and
+        written to disk. If the index cannot be written, e.g. due to missing
+        permissions, the freshly built index is still returned.
+    :returns: The record index or ``None`` if no index is available.
+    """
+    table = read_record_index(filename, index_dir=index_dir)
+    if table is not None or not create:
+        return table
+    table = build_record_index(filename)
+    if table is None:
+        return None
+    try:
+        write_record_index(filename, table, index_dir=index_dir)
+    except OSError:
+        pass
+    return table
+
+
+def _read_records(filename, table, indices):
+    """
+    Reads the given records of a MiniSEED file into a single ``int8`` buffer.
+
+    Adjacent records are read in one go.
+    """
+    offsets = table["offset"][indices]
+    record_length = int(table["record_length"][0])
+    starts, ends = util._group_adjacent_records(offsets, record_length)
+    bfr_np = np.empty(int((ends - starts).sum()), dtype=np.int8)
+    position = 0
+    with open(filename, "rb") as fh:
+        for start, end in zip(starts, ends):
+            fh.seek(start, 0)
+            position += fh.readinto(
+                memoryview(bfr_np)[position:position + end - start])
+    return bfr_np[:position]
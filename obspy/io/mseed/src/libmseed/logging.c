@@ -232,7 +232,7 @@ ms_log_l (MSLogParam *logp, int level, ...)
 int
 ms_log_main (MSLogParam *logp, int level, va_list *varlist)
 {
-  static char message[MAX_LOG_MSG_LENGTH];
+  char message[MAX_LOG_MSG_LENGTH];
   int retvalue = 0;
   int presize;
   const char *format;
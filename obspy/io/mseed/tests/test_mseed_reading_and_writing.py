@@ -6,6 +6,7 @@ import os
 import warnings
 from datetime import datetime
 from struct import unpack
+from unittest import mock
 
 import numpy as np
 import pytest
@@ -16,7 +17,9 @@ from obspy.core.compatibility import from_buffer
 from obspy.core.util import CatchOutput, NamedTemporaryFile
 from obspy.io.mseed import (util, InternalMSEEDWarning,
                             InternalMSEEDError, ObsPyMSEEDError)
-from obspy.io.mseed.core import _is_mseed, _read_mseed, _write_mseed
+from obspy.io.mseed.core import (MSEEDWriter, _is_mseed, _read_mseed,
+                                 _write_mseed, _read_mseed_stream,
+                                 _iread_mseed_stream)
 from obspy.io.mseed.headers import ENCODINGS, clibmseed
 from obspy.io.mseed.msstruct import _MSStruct
 
@@ -437,6 +440,196 @@ class TestMSEEDReadingAndWriting():
         st6 = _read_mseed(testfile, sourcename='*.BLA')
         assert len(st6) == 0
 
+    def test_read_partial_with_mmap(self, testdata):
+        """
+        Reading with use_mmap=True must result in the same data as the
+        regular reading for all kinds of selections.
+        """
+        testfile = testdata['BW.BGLD.__.EHE.D.2008.001.first_10_records']
+        starttime = UTCDateTime('2007-12-31T23:59:59.915000Z')
+        endtime = UTCDateTime('2008-01-01T00:00:20.510000Z')
+        selections = [{}, {'starttime': starttime + 6},
+                      {'endtime': endtime - 6},
+                      {'starttime': starttime + 6, 'endtime': endtime - 6},
+                      {'starttime': starttime + 7, 'endtime': starttime + 8},
+                      {'sourcename': 'BW.BGLD..EHE'},
+                      {'sourcename': '*.EHZ'}]
+        for kwargs in selections:
+            st1 = _read_mseed(testfile, **kwargs)
+            st2 = _read_mseed(testfile, use_mmap=True, **kwargs)
+            assert st1 == st2
+            for tr1, tr2 in zip(st1, st2):
+                assert tr1.stats == tr2.stats
+        # Also works for open files and then consumes the file like the
+        # regular reading.
+        with open(testfile, 'rb') as fh:
+            st = _read_mseed(fh, use_mmap=True, starttime=starttime + 6,
+                             endtime=endtime - 6)
+            assert fh.tell() == os.path.getsize(testfile)
+        assert st == _read_mseed(testfile, starttime=starttime + 6,
+                                 endtime=endtime - 6)
+        # An empty time window does not have to decode anything.
+        st = _read_mseed(testfile, use_mmap=True, starttime=endtime + 10)
+        assert len(st) == 0
+
+    def test_read_with_mmap_only_passes_selected_records(self, testdata):
+        """
+        Makes sure only the records overlapping the selection are passed to
+        libmseed.
+        """
+        testfile = testdata['BW.BGLD.__.EHE.D.2008.001.first_10_records']
+        t = UTCDateTime(2008, 1, 1, 0, 0, 2)
+        with mock.patch.object(clibmseed, 'readMSEEDBuffer',
+                               wraps=clibmseed.readMSEEDBuffer) as p:
+            st = _read_mseed(testfile, use_mmap=True, starttime=t,
+                             endtime=t + 1)
+        # Each record is 512 bytes long, the window is covered by the second
+        # record but the selection is deliberately generous.
+        buflen = p.call_args[0][1]
+        assert buflen < 10 * 512
+        assert buflen % 512 == 0
+        assert st == _read_mseed(testfile, starttime=t, endtime=t + 1)
+
+    def test_read_with_threads(self, testdata):
+        """
+        Decoding groups of records in parallel must result in the same
+        traces as the serial decoding.
+        """
+        st = Stream()
+        for channel in ("HHZ", "HHN"):
+            for _i in range(4):
+                st += Trace(
+                    data=np.arange(2500, dtype=np.int32) * (_i + 1),
+                    header={"channel": channel, "sampling_rate": 100.0,
+                            "starttime": UTCDateTime(0) + _i * 30})
+        with NamedTemporaryFile() as tf:
+            st.write(tf.name, format="MSEED", reclen=512)
+            for kwargs in ({}, {"headonly": True}, {"details": True},
+                           {"starttime": UTCDateTime(40)}):
+                expected = _read_mseed(tf.name, **kwargs)
+                # The five second gaps separate the traces.
+                if not kwargs:
+                    assert len(expected) == 8
+                for threads in (2, 3, 8):
+                    got = _read_mseed(tf.name, threads=threads, **kwargs)
+                    assert got == expected
+                    for tr1, tr2 in zip(got, expected):
+                        assert tr1.stats == tr2.stats
+        # Files with varying record lengths are just read serially.
+        testfile = testdata['test.mseed']
+        assert _read_mseed(testfile, threads=4) == _read_mseed(testfile)
+
+    def test_read_from_stream(self, testdata):
+        """
+        Reading a non-seekable file-like object while it is read must give
+        the same traces as reading all data at once, also for records of
+        different lengths and buffers smaller than a record.
+        """
+        class Reader(object):
+            def __init__(self, data):
+                self._buffer = io.BytesIO(data)
+
+            def read(self, size=-1):
+                return self._buffer.read(size)
+
+        data = b""
+        for channel, reclen in (("HHZ", 512), ("HHN", 4096)):
+            st = Stream()
+            for _i in range(3):
+                st += Trace(
+                    data=np.arange(2500, dtype=np.int32) * (_i + 1),
+                    header={"channel": channel, "sampling_rate": 100.0,
+                            "starttime": UTCDateTime(0) + _i * 30})
+            with io.BytesIO() as buf:
+                st.write(buf, format="MSEED", reclen=reclen)
+                data += buf.getvalue()
+        # Continues the last HHZ trace.
+        tr = Trace(data=np.arange(500, dtype=np.int32),
+                   header={"channel": "HHZ", "sampling_rate": 100.0,
+                           "starttime": UTCDateTime(85)})
+        with io.BytesIO() as buf:
+            tr.write(buf, format="MSEED", reclen=512)
+            data += buf.getvalue()
+        with open(testdata['test.mseed'], "rb") as fh:
+            data += fh.read()
+        expected = read(io.BytesIO(data), format="MSEED")
+        assert len(expected) == 7
+        for buffer_size in (100, 512, 5000, 2 ** 20):
+            got = _read_mseed_stream(Reader(data), buffer_size=buffer_size)
+            assert got == expected
+            for tr1, tr2 in zip(got, expected):
+                assert tr1.stats == tr2.stats
+            traces = list(_iread_mseed_stream(Reader(data),
+                                              buffer_size=buffer_size))
+            # The last HHZ part continues the first one, but is yielded
+            # separately as HHN data is between them.
+            assert [tr.id for tr in traces] == \
+                ["...HHZ"] * 3 + ["...HHN"] * 3 + ["...HHZ", "NL.HGN.00.BHZ"]
+            merged = Stream(traces).merge(-1)
+            for tr1, tr2 in zip(merged, expected.copy().merge(-1)):
+                assert tr1.id == tr2.id
+                assert tr1.stats.starttime == tr2.stats.starttime
+                np.testing.assert_array_equal(tr1.data, tr2.data)
+        # Data that can not be split into records is passed to libmseed at
+        # once, which skips the invalid bytes.
+        with warnings.catch_warnings(record=True) as w:
+            warnings.simplefilter("always")
+            got = _read_mseed_stream(Reader(b"\x00" * 256 + data), 512)
+        assert len(w) == 2
+        assert [tr.id for tr in got] == [tr.id for tr in expected]
+
+    def test_streaming_writer(self):
+        """
+        Writing a trace in chunks with the MSEEDWriter must result in the
+        same records as writing it at once.
+        """
+        np.random.seed(815)
+        data = np.cumsum(np.random.randint(-500, 500, 20000)).astype(np.int32)
+        tr = Trace(data=data, header={"network": "XX", "station": "ABC",
+                                      "sampling_rate": 100.0,
+                                      "starttime": UTCDateTime(2020, 1, 1)})
+        for encoding, dtype in (("STEIM2", np.int32), ("STEIM1", np.int32),
+                                ("INT32", np.int32), ("FLOAT64", np.float64)):
+            tr.data = data.astype(dtype)
+            expected = io.BytesIO()
+            tr.write(expected, format="MSEED", encoding=encoding, reclen=512)
+            got = io.BytesIO()
+            with MSEEDWriter(got, encoding=encoding, reclen=512) as writer:
+                i = 0
+                while i < len(data):
+                    npts = np.random.randint(1, 2000)
+                    chunk = tr.copy()
+                    chunk.data = chunk.data[i:i + npts]
+                    chunk.stats.starttime += i / 100.0
+                    writer.append(chunk)
+                    i += npts
+            assert got.getvalue() == expected.getvalue()
+
+        # Gaps and interleaved channels start new records and continue the
+        # record sequence numbers.
+        tr.data = data
+        tr2 = tr.copy()
+        tr2.stats.channel = "HHZ"
+        with NamedTemporaryFile() as tf:
+            with MSEEDWriter(tf.name, reclen=512) as writer:
+                writer.append(tr.slice(endtime=tr.stats.starttime + 50))
+                writer.append(tr2)
+                writer.append(tr.slice(starttime=tr.stats.starttime + 100))
+            st = read(tf.name)
+            st.sort()
+            assert len(st) == 3
+            assert st[0].stats.endtime == tr.stats.starttime + 50
+            assert st[1].stats.starttime == tr.stats.starttime + 100
+            np.testing.assert_array_equal(st[2].data, data)
+            with open(tf.name, "rb") as fh:
+                raw = fh.read()
+            for channel in (b"   ", b"HHZ"):
+                sequence_numbers = [
+                    int(raw[_i:_i + 6]) for _i in range(0, len(raw), 512)
+                    if raw[_i + 15:_i + 18] == channel]
+                assert sequence_numbers == \
+                    list(range(1, len(sequence_numbers) + 1))
+
     def test_write_integers(self):
         """
         Write integer array via L{obspy.io.mseed.mseed._write_mseed}.
@@ -7,6 +7,7 @@ import shutil
 import sys
 from datetime import datetime
 from struct import pack, unpack
+from unittest import mock
 import warnings
 
 import numpy as np
@@ -14,7 +15,8 @@ import numpy as np
 from obspy import UTCDateTime
 from obspy.core import Stream, Trace
 from obspy.core.util import NamedTemporaryFile
-from obspy.io.mseed import util
+from obspy.core.util.misc import TemporaryWorkingDirectory
+from obspy.io.mseed import index, util
 from obspy.io.mseed.core import _read_mseed
 from obspy.io.mseed.headers import (FIXED_HEADER_ACTIVITY_FLAGS,
                                     FIXED_HEADER_DATA_QUAL_FLAGS,
@@ -190,6 +192,67 @@ class TestMSEEDUtil():
         assert info['number_of_records'] == 2
         assert info['excess_bytes'] == 0
 
+    def test_get_record_table(self, testdata):
+        """
+        The vectorized record table must agree with the information parsed
+        per record.
+        """
+        filename = testdata['BW.BGLD.__.EHE.D.2008.001.first_10_records']
+        buf = np.fromfile(filename, dtype=np.int8)
+        table = util._get_record_table(buf, 512, ">")
+        assert len(table) == 10
+        np.testing.assert_array_equal(table['offset'], np.arange(10) * 512)
+        for row in table:
+            info = util.get_record_information(filename,
+                                               offset=int(row['offset']))
+            assert row['network'] == b'BW'
+            assert row['station'] == b'BGLD'
+            assert row['location'] == b''
+            assert row['channel'] == b'EHE'
+            assert row['dataquality'] == b'D'
+            assert UTCDateTime(ns=int(row['starttime'])) == info['starttime']
+            assert UTCDateTime(ns=int(row['endtime'])) == info['endtime']
+            assert row['samp_rate'] == info['samp_rate']
+            assert row['npts'] == info['npts']
+            assert row['encoding'] == info['encoding']
+        # Wrong record lengths cannot be parsed.
+        assert util._get_record_table(buf, 256, ">") is None
+
+    def test_record_index(self, testdata):
+        """
+        Tests building, storing and invalidating record indices.
+        """
+        source = testdata['BW.BGLD.__.EHE.D.2008.001.first_10_records']
+        with TemporaryWorkingDirectory():
+            shutil.copy(source, "data.mseed")
+            assert index.read_record_index("data.mseed") is None
+            assert index.get_record_index("data.mseed", create=False) is None
+            table = index.get_record_index("data.mseed")
+            assert len(table) == 10
+            assert os.path.exists(".data.mseed" + index.INDEX_SUFFIX)
+            np.testing.assert_array_equal(
+                index.read_record_index("data.mseed"), table)
+            # Reading with the index only reads the selected records.
+            t = UTCDateTime(2008, 1, 1, 0, 0, 2)
+            expected = _read_mseed("data.mseed", starttime=t, endtime=t + 1,
+                                   use_index=False)
+            with mock.patch.object(index, "_read_records",
+                                   wraps=index._read_records) as p:
+                st = _read_mseed("data.mseed", starttime=t, endtime=t + 1)
+            assert p.call_count == 1
+            assert len(p.call_args[0][2]) < 10
+            assert st == expected
+            # Indices are stored in a separate directory if requested.
+            os.mkdir("index")
+            index.get_record_index("data.mseed", index_dir="index")
+            assert len(os.listdir("index")) == 1
+            # Changing the file invalidates the index.
+            with open("data.mseed", "ab") as fh:
+                fh.write(b"\x00" * 512)
+            assert index.read_record_index("data.mseed") is None
+            assert index.read_record_index("data.mseed",
+                                           index_dir="index") is None
+
     def test_get_record_information_negative_sr_rate_and_mult(self, testdata):
         """
         Tests the method for negative sampling rate factors and multipliers.
@@ -4,6 +4,8 @@ MiniSEED specific utilities.
 """
 import collections
 import ctypes as C  # NOQA
+import fnmatch
+import mmap
 import os
 from pathlib import Path
 import sys
@@ -20,7 +22,8 @@ from . import InternalMSEEDParseTimeError
 from .headers import (ENCODINGS, ENDIAN, FIXED_HEADER_ACTIVITY_FLAGS,
                       FIXED_HEADER_DATA_QUAL_FLAGS,
                       FIXED_HEADER_IO_CLOCK_FLAGS, HPTMODULUS,
-                      SAMPLESIZES, UNSUPPORTED_ENCODINGS, MSRecord,
+                      SAMPLESIZES, SEED_CONTROL_HEADERS,
+                      UNSUPPORTED_ENCODINGS, VALID_CONTROL_HEADERS, MSRecord,
                       MS_NOERROR, clibmseed)
 
 
@@ -823,6 +826,301 @@ def _get_record_information(file_object, offset=0, endian=None):
     return info
 
 
+# Dtype of a single row of the record table as returned by
+# _get_record_table().
+RECORD_TABLE_DTYPE = np.dtype([
+    ('offset', np.int64), ('network', 'S2'), ('station', 'S5'),
+    ('location', 'S2'), ('channel', 'S3'), ('dataquality', 'S1'),
+    ('starttime', np.int64), ('endtime', np.int64),
+    ('samp_rate', np.float64), ('npts', np.int64),
+    ('encoding', np.int16), ('record_length', np.int32)])
+
+
+def _gather_bytes(buffer, positions, fmt):
+    """
+    Gathers one value of the given struct-like format (e.g. ``">H"``) for
+    each position in ``positions`` from a flat ``int8`` buffer.
+    """
+    dtype = np.dtype(fmt)
+    idx = positions[:, np.newaxis] + np.arange(dtype.itemsize)
+    return buffer[idx].copy().view(dtype).ravel()
+
+
+def _get_record_table(buffer, record_length, endian):
+    """
+    Parses the fixed section of the data header and the most important
+    blockettes of all records in a buffer in one vectorized pass.
+
+    Only the header bytes of each record are accessed so this is cheap even
+    for large memory mapped files as the pages containing the actual data are
+    never touched. All records are assumed to have the same record length and
+    byte order.
+
+    :type buffer: :class:`numpy.ndarray`
+    :param buffer: Flat ``int8`` array starting at the first data record.
+    :type record_length: int
+    :param record_length: The record length in bytes.
+    :type endian: str
+    :param endian: Byte order of the headers. Either ``"<"`` or ``">"``.
+    :returns: Structured array with dtype
+        :const:`~obspy.io.mseed.util.RECORD_TABLE_DTYPE` with one row per
+        data record. Times are integer nanoseconds since the epoch and the
+        end time is the time of the last sample. Noise and blank records are
+        skipped. ``None`` is returned if the buffer cannot be interpreted
+        this way, e.g. for files with varying record lengths or byte orders.
+    """
+    count = len(buffer) // record_length
+    if count == 0:
+        return None
+    fixed_header = np.dtype({
+        'names': ['quality', 'code', 'year', 'julday', 'hour', 'minute',
+                  'second', 'fract', 'npts', 'rate_factor', 'rate_mult',
+                  'activity', 'time_correction', 'blkt_offset'],
+        'formats': ['S1', 'S12', endian + 'u2', endian + 'u2', 'u1', 'u1',
+                    'u1', endian + 'u2', endian + 'u2', endian + 'i2',
+                    endian + 'i2', 'u1', endian + 'i4', endian + 'u2'],
+        'offsets': [6, 8, 20, 22, 24, 25, 26, 28, 30, 32, 34, 36, 40, 46],
+        'itemsize': record_length})
+    headers = np.ndarray(shape=(count,), dtype=fixed_header, buffer=buffer)
+
+    # Skip noise or blank records - libmseed does the same.
+    quality = headers['quality']
+    is_data = np.isin(quality, [b'D', b'R', b'Q', b'M'])
+    if not np.all(is_data | (quality == b' ')):
+        return None
+    offsets = np.arange(count, dtype=np.int64)[is_data] * record_length
+    headers = headers[is_data]
+    count = len(headers)
+
+    year = headers['year'].astype(np.int64)
+    julday = headers['julday'].astype(np.int64)
+    if np.any((year < 1900) | (year > 2500) | (julday < 1) |
+              (julday > 366)):
+        return None
+
+    days = (year - 1970).astype('datetime64[Y]').astype(
+        'datetime64[D]').astype(np.int64) + julday - 1
+    seconds = (days * 86400 + headers['hour'].astype(np.int64) * 3600 +
+               headers['minute'].astype(np.int64) * 60 +
+               headers['second'].astype(np.int64))
+    starttime = seconds * 10 ** 9 + headers['fract'].astype(np.int64) * 100000
+    # Apply the time correction if it has not yet been applied (bit 1 of the
+    # activity flags). Units are 0.0001 seconds.
+    not_applied = (headers['activity'] & 2) == 0
+    starttime += np.where(
+        not_applied, headers['time_correction'].astype(np.int64), 0) * 100000
+
+    # Sample rate according to the SEED manual.
+    factor = headers['rate_factor'].astype(np.float64)
+    mult = headers['rate_mult'].astype(np.float64)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        samp_rate = np.select(
+            [(factor > 0) & (mult > 0), (factor > 0) & (mult < 0),
+             (factor < 0) & (mult > 0), (factor < 0) & (mult < 0)],
+            [factor * mult, -factor / mult, -mult / factor,
+             1.0 / (factor * mult)], default=0.0)
+
+    encoding = np.full(count, -1, dtype=np.int16)
+    reclens = np.full(count, record_length, dtype=np.int32)
+
+    # Traverse the blockette chains of all records in parallel.
+    buffer = buffer.view(np.uint8)
+    blkt_offset = headers['blkt_offset'].astype(np.int64)
+    for _ in range(32):
+        active = np.nonzero((blkt_offset >= 48) &
+                            (blkt_offset + 8 <= record_length))[0]
+        if not len(active):
+            break
+        position = offsets[active] + blkt_offset[active]
+        blkt_type = _gather_bytes(buffer, position, endian + 'u2')
+        next_blkt = _gather_bytes(buffer, position + 2,
+                                  endian + 'u2').astype(np.int64)
+
+        _i = blkt_type == 1000
+        if np.any(_i):
+            encoding[active[_i]] = buffer[position[_i] + 4]
+            reclens[active[_i]] = \
+                2 ** buffer[position[_i] + 6].astype(np.int64)
+        _i = blkt_type == 1001
+        if np.any(_i):
+            starttime[active[_i]] += \
+                buffer[position[_i] + 5].view(np.int8).astype(np.int64) * 1000
+        _i = (blkt_type == 500) & (blkt_offset[active] + 19 <= record_length)
+        if np.any(_i):
+            starttime[active[_i]] += \
+                buffer[position[_i] + 18].view(np.int8).astype(np.int64) * \
+                1000
+        _i = blkt_type == 100
+        if np.any(_i):
+            samp_rate[active[_i]] = _gather_bytes(
+                buffer, position[_i] + 4, endian + 'f4')
+
+        # Invalid blockette chains end the traversal for that record.
+        next_blkt[next_blkt <= blkt_offset[active]] = 0
+        blkt_offset[active] = next_blkt
+
+    # Records with a different length cannot be handled here.
+    if np.any(reclens != record_length):
+        return None
+
+    npts = headers['npts'].astype(np.int64)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        duration = np.where(
+            (samp_rate > 0) & (npts > 0),
+            np.round((npts - 1) * 1e9 / samp_rate), 0).astype(np.int64)
+
+    code = headers['code']
+    table = np.empty(count, dtype=RECORD_TABLE_DTYPE)
+    table['offset'] = offsets
+    table['station'] = np.char.strip(_fixed_width(code, 0, 5))
+    table['location'] = np.char.strip(_fixed_width(code, 5, 7))
+    table['channel'] = np.char.strip(_fixed_width(code, 7, 10))
+    table['network'] = np.char.strip(_fixed_width(code, 10, 12))
+    table['dataquality'] = headers['quality']
+    table['starttime'] = starttime
+    table['endtime'] = starttime + duration
+    table['samp_rate'] = samp_rate
+    table['npts'] = npts
+    table['encoding'] = encoding
+    table['record_length'] = reclens
+    return table
+
+
+def _fixed_width(array, start, end):
+    """
+    Returns a slice of each element of a fixed width byte string array.
+    """
+    raw = np.frombuffer(np.ascontiguousarray(array).tobytes(), dtype=np.uint8)
+    raw = raw.reshape(len(array), array.dtype.itemsize)[:, start:end]
+    return np.ascontiguousarray(raw).view('S%i' % (end - start)).ravel()
+
+
+def _select_record_indices(table, starttime=None, endtime=None,
+                           sourcename=None):
+    """
+    Returns the indices of all rows of a record table (see
+    :func:`~obspy.io.mseed.util._get_record_table`) overlapping the given
+    selection.
+
+    The selection is conservative - libmseed still applies the exact
+    selection afterwards.
+    """
+    selected = np.ones(len(table), dtype=bool)
+    # Be generous with the times. Time corrections and rounding are
+    # handled by libmseed.
+    tolerance = 10 ** 9
+    if isinstance(starttime, UTCDateTime):
+        selected &= table["endtime"] >= starttime._ns - tolerance
+    if isinstance(endtime, UTCDateTime):
+        selected &= table["starttime"] <= endtime._ns + tolerance
+    if isinstance(sourcename, str) and len(table):
+        # Same pattern and source name as used by libmseed.
+        pattern = sourcename.replace('.', '_') + '_*'
+        srcnames = table["network"]
+        for key in ("station", "location", "channel", "dataquality"):
+            srcnames = np.char.add(np.char.add(srcnames, b"_"), table[key])
+        ids, inverse = np.unique(srcnames, return_inverse=True)
+        matches = np.array([
+            fnmatch.fnmatchcase(i.decode("ascii", "ignore"), pattern)
+            for i in ids], dtype=bool)
+        selected &= matches[inverse.ravel()]
+    return np.nonzero(selected)[0]
+
+
+def _group_adjacent_records(offsets, record_length):
+    """
+    Groups sorted record offsets into runs of adjacent records.
+
+    :returns: Two arrays with the start and end byte offsets of all runs.
+    """
+    breaks = np.nonzero(np.diff(offsets) != record_length)[0]
+    starts = offsets[np.concatenate([[0], breaks + 1]).astype(np.int64)]
+    ends = offsets[np.concatenate([breaks, [-1]]).astype(np.int64)] + \
+        record_length
+    return starts, ends
+
+
+def _select_records(bfr_np, record_length, byteorder, starttime=None,
+                    endtime=None, sourcename=None):
+    """
+    Returns a buffer only containing the records of ``bfr_np`` that overlap
+    with the given selection.
+
+    The record headers are parsed with
+    :func:`~obspy.io.mseed.util._get_record_table` which only touches the
+    pages containing the headers. If all selected records are adjacent a
+    view on the original buffer is returned, otherwise they are copied into a
+    new buffer. If the buffer cannot be parsed that way, the original buffer
+    is returned.
+    """
+    table = _get_record_table(bfr_np, record_length, byteorder)
+    if table is None:
+        return bfr_np
+    indices = _select_record_indices(table, starttime, endtime, sourcename)
+    if not len(indices):
+        return bfr_np[:0]
+    starts, ends = _group_adjacent_records(table["offset"][indices],
+                                           record_length)
+    # Keep trailing bytes so libmseed deals with them as usual.
+    if indices[-1] == len(table) - 1:
+        ends[-1] = len(bfr_np)
+    if len(starts) == 1:
+        return bfr_np[starts[0]:ends[0]]
+    return np.concatenate([bfr_np[_s:_e] for _s, _e in zip(starts, ends)])
+
+
+def _mmap_buffer(file_or_file_object):
+    """
+    Memory maps a file name or file object and returns it as a NumPy ``int8``
+    array starting at the current position of the file object.
+
+    Nothing is actually read from disk at this point - pages are only loaded
+    once they are accessed. Returns ``None`` if the object cannot be memory
+    mapped.
+    """
+    if isinstance(file_or_file_object, str):
+        with open(file_or_file_object, 'rb') as fh:
+            mm = mmap.mmap(fh.fileno(), 0, access=mmap.ACCESS_COPY)
+        return np.frombuffer(mm, dtype=np.int8)
+
+    try:
+        fileno = file_or_file_object.fileno()
+        cur_pos = file_or_file_object.tell()
+        mm = mmap.mmap(fileno, 0, access=mmap.ACCESS_COPY)
+    except Exception:
+        return None
+    # Mimic the behaviour of reading the whole file.
+    file_or_file_object.seek(0, 2)
+    return np.frombuffer(mm, dtype=np.int8)[cur_pos:]
+
+
+def _get_data_offset(bfr_np, record_length):
+    """
+    Returns the offset of the first data record in a buffer, skipping any
+    full SEED control headers.
+    """
+    offset = 0
+    # 0 to 9 are defined in a row in the ASCII charset.
+    min_ascii = ord('0')
+
+    # Small function to check whether an array of ASCII values contains only
+    # digits.
+    def isdigit(x):
+        return True if (x - min_ascii).max() <= 9 else False
+
+    while True:
+        # This should never happen
+        if (isdigit(bfr_np[offset:offset + 6]) is False) or \
+                (bfr_np[offset + 6] not in VALID_CONTROL_HEADERS):
+            msg = 'Not a valid (Mini-)SEED file'
+            raise Exception(msg)
+        elif bfr_np[offset + 6] in SEED_CONTROL_HEADERS:
+            offset += record_length
+            continue
+        break
+    return offset
+
+
 def _ctypes_array_2_numpy_array(buffer_, buffer_elements, sampletype):
     """
     Takes a Ctypes array and its length and type and returns it as a
@@ -23,7 +23,7 @@ from .segy import _read_segy as _read_segyrev1
 from .segy import _read_su as _read_su_file
 from .segy import (SEGYBinaryFileHeader, SEGYError, SEGYFile, SEGYTrace,
                    SEGYTraceHeader, SUFile,
-                   autodetect_endian_and_sanity_check_su)
+                   autodetect_endian_and_sanity_check_su, iread_segy)
 from .util import unpack_header_value
 
 
@@ -208,6 +208,63 @@ def _read_segy(filename, headonly=False, byteorder=None,
     return stream
 
 
+def _iread_segy(filename, chunksize=None, headonly=False, byteorder=None,
+                textual_header_encoding=None, unpack_trace_headers=False,
+                **kwargs):  # @UnusedVariable
+    """
+    Iteratively reads a SEG Y file and yields a Stream object per chunk of
+    traces.
+
+    .. warning::
+        This function should NOT be called directly, it registers via the
+        ObsPy :func:`~obspy.core.stream.iread` function, call this instead.
+
+    :type chunksize: int, optional
+    :param chunksize: Number of traces per yielded Stream. If not given, the
+        whole file is read at once.
+
+    See :func:`~obspy.io.segy.core._read_segy` for all other parameters. Only
+    the traces of the current chunk are kept in memory.
+    """
+    if chunksize is None:
+        yield _read_segy(filename, headonly=headonly, byteorder=byteorder,
+                         textual_header_encoding=textual_header_encoding,
+                         unpack_trace_headers=unpack_trace_headers)
+        return
+    stream = None
+    for trace in iread_segy(filename, endian=byteorder,
+                            textual_header_encoding=textual_header_encoding,
+                            unpack_headers=unpack_trace_headers,
+                            headonly=headonly):
+        if stream is None:
+            stream = Stream()
+            # Move the file wide headers to Stream.stats as done by
+            # _read_segy().
+            segy = trace.stats.segy
+            binary_file_header = AttribDict()
+            for key, value in segy.binary_file_header.__dict__.items():
+                setattr(binary_file_header, key, value)
+            stream.stats = AttribDict()
+            stream.stats.textual_file_header = segy.textual_file_header
+            stream.stats.binary_file_header = binary_file_header
+            stream.stats.data_encoding = segy.data_encoding
+            stream.stats.endian = segy.endian
+            stream.stats.textual_file_header_encoding = \
+                segy.textual_file_header_encoding
+        for key in ("textual_file_header", "binary_file_header",
+                    "textual_file_header_encoding", "data_encoding",
+                    "endian"):
+            del trace.stats.segy[key]
+        # Set by read() and iread() to the actual format.
+        trace.stats.pop("_format", None)
+        stream.append(trace)
+        if len(stream) == chunksize:
+            yield stream
+            stream = None
+    if stream is not None:
+        yield stream
+
+
 def _write_segy(stream, filename, data_encoding=None, byteorder=None,
                 textual_header_encoding=None, **kwargs):  # @UnusedVariable
     """
@@ -14,8 +14,8 @@ from obspy import UTCDateTime, read, Trace, Stream
 from obspy.core.util import NamedTemporaryFile, AttribDict
 from obspy.core.util.base import CatchAndAssertWarnings
 from obspy.io.segy.core import (SEGYCoreWritingError, SEGYSampleIntervalError,
-                                _is_segy, _is_su, _read_segy, _read_su,
-                                _write_segy, _write_su)
+                                _is_segy, _is_su, _iread_segy, _read_segy,
+                                _read_su, _write_segy, _write_su)
 from obspy.io.segy.segy import _read_segy as _read_segy_internal
 from obspy.io.segy.segy import SEGYError, SEGYFile, SEGYTrace, \
     SEGYBinaryFileHeader
@@ -312,6 +312,26 @@ class TestSEGYCore():
                 assert getattr(st[0].stats.segy.trace_header, key) == \
                                  value
 
+    def test_iread_segy_in_chunks(self, testdata):
+        """
+        Reading in chunks of traces must result in the same traces and file
+        wide headers as reading the whole file.
+        """
+        st = read(testdata['00001034.sgy_first_trace'])
+        st += st.copy()
+        st += st.copy()
+        with NamedTemporaryFile() as tf:
+            st.write(tf.name, format="SEGY")
+            expected = _read_segy(tf.name)
+            streams = list(_iread_segy(tf.name, chunksize=3))
+            assert [len(_st) for _st in streams] == [3, 1]
+            assert streams[0].stats == expected.stats
+            got = Stream([tr for _st in streams for tr in _st])
+            for tr, tr_expected in zip(got, expected):
+                np.testing.assert_array_equal(tr.data, tr_expected.data)
+                assert tr.stats == tr_expected.stats
+            assert list(_iread_segy(tf.name)) == [expected]
+
     def test_writing_using_core(self, testdata):
         """
         Tests the writing of SEGY rev1 files using obspy.core. It just compares
@@ -224,6 +224,7 @@ ENTRY_POINTS = {
     'obspy.plugin.waveform.MSEED': [
         'isFormat = obspy.io.mseed.core:_is_mseed',
         'readFormat = obspy.io.mseed.core:_read_mseed',
+        'ireadFormat = obspy.io.mseed.core:_iread_mseed',
         'writeFormat = obspy.io.mseed.core:_write_mseed',
         ],
     'obspy.plugin.waveform.PDAS': [
@@ -247,6 +248,7 @@ ENTRY_POINTS = {
     'obspy.plugin.waveform.SEGY': [
         'isFormat = obspy.io.segy.core:_is_segy',
         'readFormat = obspy.io.segy.core:_read_segy',
+        'ireadFormat = obspy.io.segy.core:_iread_segy',
         'writeFormat = obspy.io.segy.core:_write_segy',
         ],
     'obspy.plugin.waveform.SU': [